@@ -1,19 +1,39 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Header, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import List, Optional
 from app.models.message import SearchQuery, SearchResult
-from app.services.search import search_messages
-from app.services.embedding import index_slack_data, index_multiple_files
+from app.core.leader import exclusive
 import tempfile
 import os
+import shutil
 import zipfile
 import json
 from pathlib import Path
 
 router = APIRouter()
 
+# 업로드 파일을 임시 파일로 옮길 때 한 번에 복사할 크기 (전체를 메모리에 올리지 않음)
+UPLOAD_COPY_BUFFER = 1024 * 1024
+
+def _failure_fields(result: dict) -> dict:
+    """임베딩에 끝내 실패해 저장하지 못한 청크 수와 (앞부분) 위치/오류"""
+    return {"failed": result["failed"], "failed_items": result["failed_items"]}
+
+def _save_upload(upload: UploadFile, suffix: str) -> str:
+    """UploadFile 을 스트리밍으로 임시 파일에 복사하고 경로 반환"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        shutil.copyfileobj(upload.file, tmp_file, UPLOAD_COPY_BUFFER)
+        return tmp_file.name
+
 @router.post("/search", response_model=SearchResult)
-async def search(query: SearchQuery):
-    """슬랙 메시지 검색 및 답변 생성"""
+def search(query: SearchQuery):
+    """슬랙 메시지 검색 및 답변 생성
+
+    임베딩/검색/LLM 호출이 블로킹이라 스레드풀에서 실행합니다 (동시 요청이 이벤트 루프를
+    막지 않고, 같은 질문은 single-flight 로 합쳐짐).
+    """
+    from app.services.search import search_messages
+    
     try:
         result = search_messages(query)
         return result
@@ -23,23 +43,23 @@ async def search(query: SearchQuery):
 @router.post("/index")
 async def index_data(file: UploadFile = File(...)):
     """슬랙 export 파일 업로드 및 인덱싱"""
+    from app.services.embedding import index_slack_data
+    
     try:
         # 임시 파일로 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
+        tmp_file_path = _save_upload(file, ".json")
         
         # 인덱싱 수행
-        chunk_count = index_slack_data(tmp_file_path)
+        result = index_slack_data(tmp_file_path)
         
         # 임시 파일 삭제
         os.unlink(tmp_file_path)
         
         return {
             "status": "success",
-            "message": f"Successfully indexed {chunk_count} chunks from {file.filename}",
-            "chunk_count": chunk_count,
+            "message": f"Successfully indexed {result['indexed']} chunks from {file.filename}",
+            "chunk_count": result["indexed"],
+            **_failure_fields(result),
             "filename": file.filename
         }
     except Exception as e:
@@ -50,8 +70,10 @@ async def index_data(file: UploadFile = File(...)):
 @router.post("/index-multiple")
 async def index_multiple_data(files: List[UploadFile] = File(...)):
     """여러 슬랙 export 파일 업로드 및 인덱싱"""
+    from app.services.embedding import index_multiple_files
+    
     results = []
-    total_chunks = 0
+    result = {"indexed": 0, "failed": 0, "failed_items": []}
     temp_files = []
     
     try:
@@ -60,15 +82,11 @@ async def index_multiple_data(files: List[UploadFile] = File(...)):
             if not file.filename.endswith('.json'):
                 continue
                 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp_file:
-                content = await file.read()
-                tmp_file.write(content)
-                temp_files.append(tmp_file.name)
+            temp_files.append(_save_upload(file, ".json"))
         
         # 여러 파일 인덱싱
         if temp_files:
-            chunk_count = index_multiple_files(temp_files)
-            total_chunks = chunk_count
+            result = index_multiple_files(temp_files)
             
             for i, file in enumerate(files):
                 if file.filename.endswith('.json'):
@@ -83,8 +101,9 @@ async def index_multiple_data(files: List[UploadFile] = File(...)):
         
         return {
             "status": "success",
-            "message": f"Successfully indexed {total_chunks} chunks from {len(results)} files",
-            "total_chunks": total_chunks,
+            "message": f"Successfully indexed {result['indexed']} chunks from {len(results)} files",
+            "total_chunks": result["indexed"],
+            **_failure_fields(result),
             "files": results
         }
     except Exception as e:
@@ -97,6 +116,8 @@ async def index_multiple_data(files: List[UploadFile] = File(...)):
 @router.post("/index-folder")
 async def index_folder_data(folder: UploadFile = File(...)):
     """ZIP 폴더 업로드 및 인덱싱 (폴더 내 모든 JSON 파일 처리)"""
+    from app.services.embedding import index_multiple_files
+    
     temp_dir = None
     temp_zip = None
     
@@ -106,10 +127,7 @@ async def index_folder_data(folder: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail="Please upload a ZIP file containing JSON files")
         
         # ZIP 파일을 임시 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp_zip:
-            content = await folder.read()
-            tmp_zip.write(content)
-            temp_zip = tmp_zip.name
+        temp_zip = _save_upload(folder, ".zip")
         
         # 임시 디렉토리 생성 및 ZIP 압축 해제
         temp_dir = tempfile.mkdtemp()
@@ -127,29 +145,99 @@ async def index_folder_data(folder: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail="No JSON files found in the uploaded ZIP")
         
         # 인덱싱
-        chunk_count = index_multiple_files(json_files)
+        result = index_multiple_files(json_files)
         
         # 임시 파일 정리
-        import shutil
         shutil.rmtree(temp_dir)
         os.unlink(temp_zip)
         
         return {
             "status": "success",
-            "message": f"Successfully indexed {chunk_count} chunks from {len(json_files)} JSON files",
-            "total_chunks": chunk_count,
+            "message": f"Successfully indexed {result['indexed']} chunks from {len(json_files)} JSON files",
+            "total_chunks": result["indexed"],
+            **_failure_fields(result),
             "file_count": len(json_files),
             "processed_files": [os.path.basename(f) for f in json_files]
         }
     except Exception as e:
         # 에러 시 임시 파일 정리
         if temp_dir and os.path.exists(temp_dir):
-            import shutil
             shutil.rmtree(temp_dir)
         if temp_zip and os.path.exists(temp_zip):
             os.unlink(temp_zip)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/uploads")
+def init_upload(filename: str, total_size: int, part_size: Optional[int] = None, sha256: Optional[str] = None):
+    """대용량 export 분할 업로드 시작 (.json 또는 .zip)
+    
+    Args:
+        filename: 원본 파일 이름
+        total_size: 전체 크기 (bytes)
+        part_size: 파트 크기 (기본: UPLOAD_PART_SIZE)
+        sha256: 전체 파일 SHA-256 (선택, complete 시 검증)
+    """
+    from app.services.uploads import UploadError, upload_manager
+    
+    try:
+        return upload_manager.init(filename, total_size, part_size, sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/uploads/{upload_id}/parts/{part_no}")
+async def upload_part(upload_id: str, part_no: int, request: Request,
+                      x_part_sha256: Optional[str] = Header(None)):
+    """파트 업로드 - 요청 본문(raw bytes)을 스트리밍으로 디스크에 기록
+    
+    `X-Part-SHA256` 헤더로 파트 체크섬을 보내면 검증합니다. 같은 파트를 다시 보내면 덮어씁니다.
+    """
+    from app.services.uploads import UploadError, UploadNotFound, upload_manager
+    
+    try:
+        return await upload_manager.write_part(upload_id, part_no, request.stream(), x_part_sha256)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="upload not found")
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_status(upload_id: str):
+    """받은/빠진 파트와 인덱싱 상태 (중단된 업로드는 next_part 부터 재전송)"""
+    from app.services.uploads import UploadNotFound, upload_manager
+    
+    try:
+        return upload_manager.get_status(upload_id)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="upload not found")
+
+@router.post("/uploads/{upload_id}/complete")
+def complete_upload(upload_id: str, clear_existing: bool = False):
+    """모든 파트 수신 후 체크섬 검증 및 백그라운드 인덱싱 시작 (진행 상황은 GET /uploads/{upload_id})
+    
+    전체 파일 해시가 블로킹이라 스레드풀에서 실행합니다 (init/abort 도 같은 이유).
+    """
+    from app.services.uploads import UploadError, UploadNotFound, upload_manager
+    
+    try:
+        return upload_manager.complete(upload_id, clear_existing=clear_existing)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="upload not found")
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload(upload_id: str):
+    """업로드 취소 및 받은 데이터 삭제"""
+    from app.services.uploads import UploadNotFound, upload_manager
+    
+    try:
+        upload_manager.abort(upload_id)
+        return {"status": "aborted", "upload_id": upload_id}
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="upload not found")
+
 @router.post("/slack/sync")
 async def sync_slack_messages(
     hours_back: int = 24,
@@ -171,11 +259,14 @@ async def sync_slack_messages(
         if connection_test["status"] == "error":
             raise HTTPException(status_code=401, detail=f"Slack 연결 실패: {connection_test['error']}")
         
-        # 메시지 동기화
-        result = slack.sync_recent_messages(
-            hours_back=hours_back,
-            channels=channels
-        )
+        # 메시지 동기화 (다른 워커의 자동/수동 동기화와 동시에 쓰지 않도록)
+        with exclusive() as acquired:
+            if not acquired:
+                raise HTTPException(status_code=409, detail="다른 동기화가 진행 중입니다. 잠시 후 다시 시도하세요.")
+            result = slack.sync_recent_messages(
+                hours_back=hours_back,
+                channels=channels
+            )
         
         return {
             "status": "success",
@@ -183,9 +274,12 @@ async def sync_slack_messages(
             "channels_synced": result["channels_synced"],
             "messages_collected": result["messages_collected"],
             "chunks_created": result["chunks_created"],
+            "changes": result["changes"],
             "errors": result["errors"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -238,6 +332,20 @@ async def get_sync_status():
             "error": str(e)
         }
 
+@router.post("/slack/scheduler/trigger")
+async def trigger_scheduler(channel_id: Optional[str] = None):
+    """스케줄러에 즉시 동기화 예약 (channel_id 가 없으면 모든 채널)
+    
+    스케줄러 리더 워커에서만 동작합니다. 대기 중인 스케줄러가 바로 깨어나 처리합니다.
+    """
+    from app.services.scheduler import scheduler
+    try:
+        return {"status": "scheduled", **scheduler.trigger(channel_id)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"스케줄러가 추적하지 않는 채널입니다: {channel_id}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @router.post("/slack/sync-now")
 async def sync_now():
     """즉시 동기화 실행 (스케줄과 별개로)"""
@@ -245,21 +353,147 @@ async def sync_now():
         from app.services.slack_realtime import SlackRealtime
         
         slack = SlackRealtime()
-        result = slack.sync_recent_messages(
-            hours_back=2,  # 최근 2시간
-            channels=None
-        )
+        with exclusive() as acquired:
+            if not acquired:
+                raise HTTPException(status_code=409, detail="다른 동기화가 진행 중입니다. 잠시 후 다시 시도하세요.")
+            result = slack.sync_recent_messages(
+                hours_back=2,  # 최근 2시간
+                channels=None
+            )
         
         return {
             "status": "success",
             "channels_synced": result["channels_synced"],
             "messages_collected": result["messages_collected"],
-            "chunks_created": result["chunks_created"]
+            "chunks_created": result["chunks_created"],
+            "changes": result["changes"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/slack/events")
+async def receive_slack_events(request: Request):
+    """Slack Events API 수신 (서명 검증 후 마이크로 배치 큐에 적재)
+    
+    Slack은 3초 안에 응답을 받아야 하므로 임베딩/저장은 백그라운드에서 처리합니다.
+    """
+    from app.core.config import settings
+    from slack_sdk.signature import SignatureVerifier
+    
+    if not settings.slack_signing_secret:
+        raise HTTPException(status_code=503, detail="SLACK_SIGNING_SECRET이 설정되지 않았습니다.")
+    
+    body = await request.body()
+    verifier = SignatureVerifier(settings.slack_signing_secret)
+    if not verifier.is_valid_request(body, dict(request.headers)):
+        raise HTTPException(status_code=401, detail="유효하지 않은 Slack 서명입니다.")
+    
+    payload = json.loads(body)
+    if payload.get("type") == "url_verification":
+        return {"challenge": payload.get("challenge")}
+    
+    if payload.get("type") != "event_callback":
+        return {"ok": True, "action": "ignored"}
+    
+    from app.services.slack_events import event_queue
+    return {"ok": True, "action": event_queue.enqueue(payload)}
+
+@router.get("/slack/events/status")
+async def get_slack_events_status():
+    """Slack 이벤트 인덱서 상태 (큐 길이, 처리 건수)"""
+    from app.services.slack_events import event_queue
+    return event_queue.get_status()
+
+@router.get("/ingest/checkpoints")
+async def list_ingest_checkpoints(prefix: str = ""):
+    """인덱싱/동기화 체크포인트 목록 (running 상태는 다음 실행에서 이어서 진행)"""
+    from app.core.state_db import get_state_db
+    checkpoints = get_state_db().list_checkpoints(prefix)
+    return {"count": len(checkpoints), "checkpoints": checkpoints}
+
+@router.get("/collections")
+async def list_collections():
+    """임베딩 모델별 버전 컬렉션 목록과 현재 서비스 중인 컬렉션"""
+    from app.core.collections import load_registry, current_embedding_spec
+    
+    registry = load_registry()
+    return {
+        "active": registry.get("active"),
+        "previous": registry.get("previous"),
+        "configured_model": current_embedding_spec()["model"],
+        "collections": registry.get("collections", {})
+    }
+
+@router.get("/partitions")
+async def list_partitions():
+    """서비스 컬렉션의 파티션 목록 (PARTITION_BY 설정 시)"""
+    from app.core.config import settings
+    from app.core.database import get_collection
+    
+    collection = get_collection()
+    if settings.partition_by == "none":
+        return {"partition_by": "none", "collection": collection.name, "partitions": []}
+    return {"partition_by": settings.partition_by, "collection": collection.name, "partitions": collection.describe()}
+
+@router.get("/stats")
+async def index_stats(collection: Optional[str] = None, top: int = 20, days: int = 30, verify: bool = False):
+    """채널/사용자/소스/일별 문서 수 (쓰기 시점에 갱신한 카운터만 읽음)
+
+    verify=true 이면 저장소의 실제 문서 수와 비교해 `consistent` 를 함께 반환합니다
+    (다르면 scripts/rebuild_stats.py 로 다시 세기).
+    """
+    from app.core.collections import get_active_collection
+    from app.core.config import settings
+    from app.core.index_stats import get_index_stats
+
+    name = collection or get_active_collection()["name"]
+    summary = get_index_stats().summary(name, top=max(1, min(top, 1000)), days=max(1, min(days, 3660)))
+    result = {"collection": name, "enabled": settings.index_stats_enabled, **summary}
+    if verify:
+        from app.core.database import get_collection
+        stored = get_collection(name).count()
+        result.update(stored_documents=stored, consistent=stored == summary["documents"])
+    return result
+
+@router.post("/reindex")
+async def start_reindex(batch_size: Optional[int] = None):
+    """설정된 임베딩 모델로 새 버전 컬렉션을 백그라운드에서 만들고, 완료 시 무중단 전환"""
+    from app.services.reindex import reindex_migration
+    return reindex_migration.start(batch_size=batch_size)
+
+@router.get("/reindex/status")
+async def get_reindex_status():
+    """재인덱싱 진행 상태"""
+    from app.services.reindex import reindex_migration
+    return reindex_migration.get_status()
+
+@router.post("/reindex/rollback")
+async def rollback_reindex():
+    """직전 서비스 컬렉션으로 되돌리기"""
+    try:
+        from app.services.reindex import reindex_migration
+        registry = reindex_migration.rollback()
+        return {"status": "success", "active": registry["active"]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 형식 메트릭 (단계별 지연시간 히스토그램, 카운터)"""
+    from app.core.metrics import registry
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @router.get("/health")
 async def health_check():
-    """헬스 체크 엔드포인트"""
-    return {"status": "healthy"}
\ No newline at end of file
+    """헬스 체크 엔드포인트 (liveness - 워밍업 여부와 무관하게 즉시 응답)"""
+    return {"status": "healthy"}
+
+@router.get("/ready")
+async def readiness_check():
+    """준비 상태 (readiness) - 워밍업이 끝나기 전에는 503"""
+    from app.services.warmup import warmup
+    
+    status = warmup.get_status()
+    return JSONResponse(status_code=200 if warmup.is_ready else 503, content=status)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""임베딩 모델별 버전 컬렉션 레지스트리
+
+컬렉션 이름에 임베딩 모델과 차원을 붙여(`slack_messages__all-minilm-l6-v2__384`)
+서로 다른 모델의 벡터가 한 컬렉션에 섞이지 않도록 합니다. 현재 서비스 중인(active)
+컬렉션은 `CHROMA_PERSIST_DIRECTORY/collections.json` 에 기록하며, 임시 파일에 쓴 뒤
+`os.replace` 로 교체하므로 모든 프로세스가 원자적으로 새 컬렉션으로 전환됩니다.
+읽기-수정-쓰기는 `collections.json.lock` 파일 잠금 안에서 해서 다른 워커의 갱신을 덮어쓰지 않습니다.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE = "collections.json"
+
+# 차원을 모델 이름만으로 알 수 있는 OpenAI 임베딩 모델
+KNOWN_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+_registry_lock = threading.Lock()
+_registry_write_lock = threading.Lock()
+_bootstrap_lock = threading.Lock()
+_registry_cache = {"path": None, "mtime": None, "data": None}
+_warned_mismatch = set()
+
+def current_embedding_spec() -> Dict:
+    """현재 설정(Settings)이 가리키는 임베딩 모델 사양 (차원은 모를 수 있음)"""
+    # 'onnx' 백엔드는 같은 sentence-transformers 모델의 다른 런타임이라 사양(컬렉션)을 공유
+    if settings.local_embedding_backend == "hash":
+        return {"provider": "hash", "model": f"hash-{settings.hash_embedding_dim}",
+                "dim": settings.hash_embedding_dim}
+    if settings.api_provider == "claude" or not settings.openai_api_key:
+        return {"provider": "sentence-transformers", "model": settings.embedding_model, "dim": None}
+    return {
+        "provider": "openai",
+        "model": settings.openai_embedding_model,
+        "dim": settings.embedding_dimensions or KNOWN_DIMENSIONS.get(settings.openai_embedding_model),
+    }
+
+def resolve_dimension(spec: Dict) -> Dict:
+    """차원이 비어 있으면 샘플 문장을 한 번 임베딩해서 채우기"""
+    if spec.get("dim"):
+        return spec
+    from app.services.llm_service import get_embeddings
+
+    dim = int(get_embeddings(["dimension probe"], spec=spec).shape[1])
+    return {**spec, "dim": dim}
+
+def versioned_collection_name(spec: Dict) -> str:
+    """`{기본이름}__{모델 slug}__{차원}` 형식의 ChromaDB 호환 컬렉션 이름"""
+    slug = re.sub(r'[^a-z0-9]+', '-', spec["model"].split('/')[-1].lower()).strip('-')
+    name = f"{settings.chroma_collection_name}__{slug}__{spec['dim']}"
+    if len(name) > 63:
+        # ChromaDB 이름 길이 제한(63자) - 모델 이름 해시로 축약
+        digest = hashlib.sha1(spec["model"].encode()).hexdigest()[:8]
+        name = f"{settings.chroma_collection_name[:30]}__{slug[:12]}-{digest}__{spec['dim']}"
+    return name
+
+def _registry_path() -> str:
+    return os.path.join(settings.chroma_persist_directory, REGISTRY_FILE)
+
+def load_registry() -> Dict:
+    """레지스트리 읽기 (파일 mtime 기준 캐시)"""
+    path = _registry_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {"active": None, "previous": None, "collections": {}}
+
+    with _registry_lock:
+        if _registry_cache["path"] != path or _registry_cache["mtime"] != mtime:
+            with open(path, 'r', encoding='utf-8') as f:
+                _registry_cache.update(path=path, mtime=mtime, data=json.load(f))
+        return json.loads(json.dumps(_registry_cache["data"]))
+
+def save_registry(registry: Dict):
+    """임시 파일 + os.replace 로 레지스트리를 원자적으로 교체"""
+    path = _registry_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+@contextmanager
+def _updating_registry():
+    """프로세스 간 잠금 안에서 최신 레지스트리를 읽어 수정하고 저장 (예외 시 저장하지 않음)"""
+    from app.core.leader import file_lock
+
+    path = _registry_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _registry_write_lock, file_lock(f"{path}.lock"):
+        registry = load_registry()
+        yield registry
+        save_registry(registry)
+
+def _register(registry: Dict, name: str, spec: Dict, status: str):
+    entry = registry["collections"].get(name, {})
+    entry.update({
+        "provider": spec["provider"],
+        "model": spec["model"],
+        "dim": spec["dim"],
+        "legacy": spec.get("legacy", False),
+        "status": status,
+        "created_at": entry.get("created_at", datetime.now().isoformat()),
+    })
+    registry["collections"][name] = entry
+
+def register_collection(name: str, spec: Dict, status: str = "building") -> Dict:
+    """컬렉션을 레지스트리에 등록 (활성화는 하지 않음)"""
+    with _updating_registry() as registry:
+        _register(registry, name, spec, status)
+    return registry
+
+def _activate(registry: Dict, name: str):
+    if name not in registry["collections"]:
+        raise ValueError(f"등록되지 않은 컬렉션입니다: {name}")
+    if registry["active"] != name:
+        registry["previous"] = registry["active"]
+    registry["active"] = name
+    registry["collections"][name]["status"] = "active"
+    registry["collections"][name]["activated_at"] = datetime.now().isoformat()
+    if registry["previous"] in registry["collections"]:
+        registry["collections"][registry["previous"]]["status"] = "retired"
+
+def activate_collection(name: str) -> Dict:
+    """서비스 컬렉션을 원자적으로 전환 (이전 컬렉션은 롤백용으로 남김)"""
+    with _updating_registry() as registry:
+        _activate(registry, name)
+    logger.info(f"서비스 컬렉션 전환: {registry['previous']} -> {name}")
+    return registry
+
+def _bootstrap_registry() -> Dict:
+    """레지스트리가 없을 때 최초 active 컬렉션 결정
+
+    버전 태그 이전에 만들어진 `chroma_collection_name` 컬렉션이 있으면 현재 설정의
+    모델로 만들어졌다고 보고 그대로 등록하고, 없으면 새 버전 컬렉션을 만듭니다.
+    """
+    spec = resolve_dimension(current_embedding_spec())
+    name = versioned_collection_name(spec)
+
+    if settings.vector_store == "chroma":
+        from app.core.database import list_collection_names
+        if settings.chroma_collection_name in list_collection_names():
+            name = settings.chroma_collection_name
+            spec = {**spec, "legacy": True}
+
+    with _updating_registry() as registry:
+        # 다른 워커가 먼저 만들었으면 그대로 사용
+        if not registry.get("active"):
+            _register(registry, name, spec, status="active")
+            _activate(registry, name)
+    return registry
+
+def get_active_collection() -> Dict:
+    """현재 서비스 중인 컬렉션 이름과 임베딩 사양 {"name", "spec"}"""
+    registry = load_registry()
+    if not registry.get("active"):
+        with _bootstrap_lock:
+            registry = load_registry()
+            if not registry.get("active"):
+                registry = _bootstrap_registry()
+
+    name = registry["active"]
+    entry = registry["collections"][name]
+    spec = {"provider": entry["provider"], "model": entry["model"], "dim": entry["dim"]}
+
+    configured = current_embedding_spec()
+    if (configured["provider"], configured["model"]) != (spec["provider"], spec["model"]) \
+            and name not in _warned_mismatch:
+        _warned_mismatch.add(name)
+        logger.warning(
+            f"설정된 임베딩 모델({configured['model']})과 서비스 컬렉션({name}, {spec['model']})이 다릅니다. "
+            f"POST /api/v1/reindex 로 재임베딩 후 전환하세요. 그 전까지는 기존 모델로 검색/저장합니다."
+        )
+    return {"name": name, "spec": spec}
@@ -8,10 +8,21 @@ class Settings(BaseSettings):
     
     # 임베딩 모델 설정 (sentence-transformers 사용)
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # 로컬 임베딩 백엔드 ('sentence-transformers', 'onnx' - 같은 모델의 onnxruntime 추론,
+    # 'hash' - 오프라인 벤치마크용 결정적 스텁)
+    local_embedding_backend: str = "sentence-transformers"
+    hash_embedding_dim: int = 384
+    local_embedding_workers: int = 1  # sentence-transformers 인코딩 프로세스 수 (0이면 CPU 코어 수)
+    local_embedding_batch_size: int = 32  # 모델 한 번 forward 에 넣을 텍스트 수
+    local_embedding_parallel_min_texts: int = 256  # 이보다 적은 입력은 워커 풀 없이 단일 프로세스로 인코딩
+    onnx_model_dir: Optional[str] = None  # scripts/export_onnx.py 출력 디렉토리 (기본: ./models/{EMBEDDING_MODEL 이름})
+    onnx_model_file: str = "model.onnx"  # int8 양자화 모델은 'model_int8.onnx'
+    onnx_num_threads: int = 0  # onnxruntime intra-op 스레드 수 (0이면 onnxruntime 기본값)
     
     # OpenAI 설정 (Optional - OpenAI를 사용하려면 설정)
     openai_api_key: Optional[str] = None
     openai_embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: Optional[int] = None  # text-embedding-3 계열 출력 차원 축소 (예: 512)
     openai_chat_model: str = "gpt-4o-mini"
     
     # API 제공자 선택 ('claude' 또는 'openai')
@@ -22,13 +33,65 @@ class Settings(BaseSettings):
     slack_sync_interval_minutes: int = 30  # 자동 동기화 간격 (분)
     slack_sync_hours_back: int = 2  # 동기화할 메시지 시간 범위 (시간)
     slack_auto_sync_enabled: bool = True  # 자동 동기화 활성화
+    slack_signing_secret: Optional[str] = None  # 설정 시 /slack/events 수신 활성화
+    slack_events_batch_size: int = 64  # 이벤트를 모아서 한 번에 임베딩할 최대 개수
+    slack_events_flush_seconds: float = 2.0  # 첫 이벤트 이후 배치를 기다리는 최대 시간 (초)
+    slack_reconcile_interval_minutes: int = 360  # 이벤트 수신 중 누락 보정용 폴링 간격 (분)
+    slack_min_sync_interval_minutes: int = 2  # 활발한 채널의 최소 동기화 간격 (분)
+    slack_max_sync_interval_minutes: int = 240  # 조용한 채널의 최대 동기화 간격 (분)
+    slack_api_budget_per_minute: int = 50  # 스케줄러가 모든 채널에 걸쳐 쓰는 분당 Slack API 호출 수
+    slack_sync_jitter: float = 0.1  # 동기화 시각에 더하는 ±비율 지터 (호출 몰림 방지)
+    slack_api_base_url: Optional[str] = None  # Slack Web API 주소 (기본: https://slack.com/api/, 로컬 가짜 서버 테스트용)
+    slack_rate_limit_retries: int = 3  # 429 응답 시 Retry-After 만큼 기다렸다 다시 호출할 최대 횟수 (0이면 바로 실패)
+    scheduler_leader_retry_seconds: int = 30  # 팔로워 워커가 리더 lease 획득을 재시도하는 간격 (초)
     
     chroma_persist_directory: str = "./chroma_db"
     chroma_collection_name: str = "slack_messages"
+    chroma_server_host: Optional[str] = None  # 설정하면 임베디드 PersistentClient 대신 Chroma 서버(HttpClient)에 연결 (chroma 저장소로 --workers N 실행 시 필요)
+    chroma_server_port: int = 8000  # Chroma 서버 포트
+    
+    # 벡터 저장소 ('chroma', 'quantized' - memmap float16/int8 저장소, 'hnswlib' - 프로세스 내 HNSW)
+    vector_store: str = "chroma"
+    quantized_dtype: str = "int8"  # 'float16' 또는 'int8'
+    quantized_rescore_factor: int = 4  # coarse pass 후보 수 = n_results * factor
+    vector_store_compact_ratio: float = 0.3  # quantized/hnswlib 저장소에서 삭제/교체로 죽은 행 비율이 이 이상이면 자동 compact (0이면 끔)
+    hnsw_m: int = 16  # HNSW 노드당 이웃 수 (클수록 recall/메모리 증가, 새 컬렉션부터 적용)
+    hnsw_construction_ef: int = 100  # 그래프 구축 시 후보 리스트 크기 (새 컬렉션부터 적용)
+    hnsw_search_ef: int = 10  # 검색 시 후보 리스트 크기 (n_results 보다 작으면 n_results 사용)
+    hnsw_sync_threshold: int = 1000  # hnswlib 저장소가 그래프 파일을 다시 저장하는 추가 행 수
+    hnsw_brute_force_threshold: int = 2000  # where 필터 결과가 이 이하면 hnswlib 저장소가 그래프 대신 정확 스캔
+    partition_by: str = "none"  # 'none', 'month' (메시지 월별) 또는 'channel' (채널 그룹별) 하위 컬렉션으로 분할
+    partition_channel_groups: int = 8  # partition_by=channel 일 때 채널 해시 그룹 수
+    partition_query_workers: int = 4  # 파티션 fan-out 검색 동시 실행 수
+    ingest_commit_batch_size: int = 256  # 인덱싱/동기화 시 한 번에 임베딩하고 커밋(체크포인트)할 개수
+    ingest_pipeline_depth: int = 2  # 임베딩이 저장보다 앞서 준비해 둘 수 있는 최대 배치 수
+    state_db_path: Optional[str] = None  # 동기화/인덱싱 체크포인트 DB (기본: CHROMA_PERSIST_DIRECTORY/sync_state.sqlite3)
+    embedding_max_attempts: int = 3  # 일시적 오류(429/5xx/연결) 시 임베딩 배치당 최대 시도 횟수
+    reindex_batch_size: int = 256  # 모델 전환 재인덱싱 시 한 번에 읽고 임베딩할 문서 수
+    dedup_enabled: bool = True  # 인덱싱 전 유사 메시지(MinHash LSH)를 대표 문서 하나로 접기
+    dedup_threshold: float = 0.9  # 이 이상의 추정 Jaccard 유사도(문자 5-gram)면 중복으로 판단
+    dedup_num_perm: int = 128  # MinHash 서명 길이
+    dedup_bands: int = 16  # LSH 밴드 수 (dedup_num_perm 의 약수, 많을수록 후보를 넓게 찾음)
+    dedup_min_chars: int = 30  # 이보다 짧은 메시지는 접지 않음
+    thread_summary_enabled: bool = True  # 인덱싱 후 질문-답변 스레드 요약 문서를 백그라운드로 생성/갱신
+    thread_summary_min_replies: int = 1  # 질문자가 아닌 사람의 답글이 이 수 이상인 스레드만 요약
+    thread_summary_answer_distance: float = 0.25  # 검색 결과에 이 거리 이하의 스레드 요약이 있으면 LLM 없이 바로 답변 (0이면 끔)
+    search_coalescing_enabled: bool = True  # 동시에 들어온 같은(정규화한) 질문은 검색/답변 생성을 한 번만 수행
+    index_stats_enabled: bool = True  # 저장/삭제 시 채널/사용자/소스/일별 카운터 갱신 (/stats)
     
     max_tokens_per_chunk: int = 1000
+    parsed_cache_enabled: bool = True  # 파일 내용 해시 기준 파싱 결과 Parquet 캐시 (pyarrow 필요)
+    parsed_cache_dir: Optional[str] = None  # 기본: CHROMA_PERSIST_DIRECTORY/parsed_cache
+    upload_dir: Optional[str] = None  # 분할 업로드 저장 위치 (기본: CHROMA_PERSIST_DIRECTORY/uploads)
+    upload_part_size: int = 8 * 1024 * 1024  # 분할 업로드 기본 파트 크기 (bytes)
+    upload_max_bytes: int = 20 * 1024 * 1024 * 1024  # 분할 업로드 최대 파일 크기, ZIP 은 압축 해제 크기에도 적용 (0이면 제한 없음)
     search_top_k: int = 10
     
+    # 모니터링 설정
+    slow_request_threshold_ms: int = 2000  # 이 시간을 넘는 요청은 단계별 구조화 로그 기록
+    warmup_enabled: bool = True  # 시작 시 모델/컬렉션/LLM 클라이언트 워밍업 후 /ready 200
+    warmup_query: str = "배포는 어떻게 하나요?"  # 워밍업용 합성 질문
+    
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     
@@ -1,8 +1,49 @@
-import chromadb
-from chromadb.config import Settings as ChromaSettings
 from app.core.config import settings
+from typing import List, Optional
+import os
+import threading
+import numpy as np
+
+EMBEDDED_CHROMA_LOCK_FILE = "embedded_chroma.lock"
+
+_embedded_leases = {}
+_embedded_leases_lock = threading.Lock()
+
+def claim_embedded_chroma():
+    """임베디드 ChromaDB 디렉토리를 이 프로세스 전용으로 잡기 (다른 프로세스가 쓰고 있으면 RuntimeError)
+
+    PersistentClient 는 HNSW 인덱스를 프로세스 메모리에 들고 있어서, 같은 디렉토리를 여러 프로세스
+    (uvicorn --workers N, 서버 실행 중의 스크립트)가 열면 서로의 쓰기를 보지 못하고 인덱스 파일을
+    덮어씁니다. 멀티 워커로 실행하려면 CHROMA_SERVER_HOST 로 Chroma 서버를 쓰거나
+    VECTOR_STORE=quantized/hnswlib (파일 잠금 + 변경 감지로 프로세스 간 공유) 를 사용하세요.
+    """
+    from app.core.leader import LeaderLease, read_holder_pid
+
+    with _embedded_leases_lock:
+        lease = _embedded_leases.get(settings.chroma_persist_directory)
+        if lease is None:
+            lease = _embedded_leases[settings.chroma_persist_directory] = LeaderLease(EMBEDDED_CHROMA_LOCK_FILE)
+    if not lease.try_acquire():
+        raise RuntimeError(
+            f"다른 프로세스(pid {read_holder_pid(EMBEDDED_CHROMA_LOCK_FILE)})가 임베디드 ChromaDB "
+            f"({settings.chroma_persist_directory})를 사용 중입니다. 워커를 1개로 실행하거나 "
+            f"CHROMA_SERVER_HOST 또는 VECTOR_STORE=quantized/hnswlib 을 설정하세요."
+        )
 
 def get_chroma_client():
+    # chromadb 는 import 비용이 커서(수백 ms) 실제로 DB를 열 때 로드
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
+    if settings.chroma_server_host:
+        # 서버가 저장소를 소유하므로 여러 워커/프로세스가 같은 컬렉션을 안전하게 공유
+        return chromadb.HttpClient(
+            host=settings.chroma_server_host,
+            port=settings.chroma_server_port,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+
+    claim_embedded_chroma()
     client = chromadb.PersistentClient(
         path=settings.chroma_persist_directory,
         settings=ChromaSettings(
@@ -11,13 +52,180 @@ def get_chroma_client():
     )
     return client
 
-def get_collection():
-    client = get_chroma_client()
-    try:
-        collection = client.get_collection(name=settings.chroma_collection_name)
-    except:
-        collection = client.create_collection(
-            name=settings.chroma_collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
-    return collection
\ No newline at end of file
+def to_embedding_list(embeddings):
+    """ndarray(또는 ndarray 리스트)를 ChromaDB가 요구하는 List[List[float]]로 변환"""
+    if embeddings is None:
+        return None
+    if isinstance(embeddings, np.ndarray):
+        return embeddings.tolist()
+    return [e.tolist() if isinstance(e, np.ndarray) else e for e in embeddings]
+
+class ChromaCollection:
+    """ChromaDB 컬렉션 래퍼 - 서비스 계층은 임베딩을 ndarray로 유지하고,
+    리스트 변환은 이 경계에서만 수행합니다."""
+
+    def __init__(self, collection, max_batch_size: Optional[int] = None):
+        self._collection = collection
+        # 한 번의 add/upsert 에 넣을 수 있는 최대 레코드 수 (SQLite 변수 개수 제한에서 유도)
+        self.max_batch_size = max_batch_size
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        return self._collection.add(ids=ids, embeddings=to_embedding_list(embeddings),
+                                    metadatas=metadatas, documents=documents)
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        return self._collection.upsert(ids=ids, embeddings=to_embedding_list(embeddings),
+                                       metadatas=metadatas, documents=documents)
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None):
+        return self._collection.update(ids=ids, embeddings=to_embedding_list(embeddings),
+                                       metadatas=metadatas, documents=documents)
+
+    def query(self, query_embeddings, **kwargs):
+        return self._collection.query(query_embeddings=to_embedding_list(query_embeddings), **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+class VectorStore:
+    """벡터 저장소 백엔드 - 컬렉션 열기/목록/삭제
+
+    `settings.vector_store` 값으로 구현을 고르며(VECTOR_STORES), 모든 구현의 컬렉션은
+    ChromaDB 컬렉션과 같은 add/upsert/update/delete/get/query/count 인터페이스를 제공합니다.
+    """
+
+    # 한 번의 add/upsert 에 넣을 수 있는 최대 레코드 수 (없으면 제한 없음)
+    max_batch_size: Optional[int] = None
+
+    def open_collection(self, name: str):
+        raise NotImplementedError
+
+    def list_collection_names(self) -> List[str]:
+        raise NotImplementedError
+
+    def delete_collection(self, name: str):
+        raise NotImplementedError
+
+class ChromaStore(VectorStore):
+    """ChromaDB PersistentClient (HNSW 파라미터는 컬렉션 생성 시점에 고정)"""
+
+    @property
+    def max_batch_size(self) -> Optional[int]:
+        return getattr(get_chroma_client(), "max_batch_size", None)
+
+    def hnsw_metadata(self) -> dict:
+        return {
+            "hnsw:space": "cosine",
+            "hnsw:M": settings.hnsw_m,
+            "hnsw:construction_ef": settings.hnsw_construction_ef,
+            "hnsw:search_ef": settings.hnsw_search_ef,
+        }
+
+    # ChromaDB 는 컬렉션 행을 먼저 쓰고 세그먼트를 나중에 만들어서, 생성 중인 컬렉션을 다른
+    # 스레드가 열면 쿼리가 실패하거나 같은 컬렉션을 두 번 만들려고 함 → 열기/생성을 직렬화
+    _open_lock = threading.Lock()
+
+    def open_collection(self, name: str):
+        client = get_chroma_client()
+        with self._open_lock:
+            try:
+                collection = client.get_collection(name=name)
+            except:
+                collection = client.create_collection(name=name, metadata=self.hnsw_metadata())
+        return ChromaCollection(collection, max_batch_size=getattr(client, "max_batch_size", None))
+
+    def list_collection_names(self) -> List[str]:
+        return [collection.name for collection in get_chroma_client().list_collections()]
+
+    def delete_collection(self, name: str):
+        get_chroma_client().delete_collection(name)
+
+class DirectoryStore(VectorStore):
+    """CHROMA_PERSIST_DIRECTORY/<subdirectory>/<컬렉션명>/ 에 컬렉션을 두는 프로세스 내 저장소"""
+
+    subdirectory = ""
+
+    def list_collection_names(self) -> List[str]:
+        directory = os.path.join(settings.chroma_persist_directory, self.subdirectory)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+class QuantizedStore(DirectoryStore):
+    """메모리맵 float16/int8 저장소 (ChromaDB HNSW 대신 압축 벡터 전체 스캔 + 재채점)"""
+
+    subdirectory = "quantized"
+
+    def open_collection(self, name: str):
+        from app.core.quantized_store import get_quantized_collection
+        return get_quantized_collection(name)
+
+    def delete_collection(self, name: str):
+        from app.core.quantized_store import drop_quantized_collection
+        drop_quantized_collection(name)
+
+class HnswStore(DirectoryStore):
+    """프로세스 내 hnswlib 저장소 (M/ef 를 설정으로 튜닝, 좁은 필터 검색은 정확 스캔)"""
+
+    subdirectory = "hnswlib"
+
+    def open_collection(self, name: str):
+        from app.core.hnsw_store import get_hnsw_collection
+        return get_hnsw_collection(name)
+
+    def delete_collection(self, name: str):
+        from app.core.hnsw_store import drop_hnsw_collection
+        drop_hnsw_collection(name)
+
+VECTOR_STORES = {"chroma": ChromaStore, "quantized": QuantizedStore, "hnswlib": HnswStore}
+
+_stores = {}
+
+def get_vector_store() -> VectorStore:
+    """현재 설정(`VECTOR_STORE`)의 저장소 백엔드"""
+    if settings.vector_store not in VECTOR_STORES:
+        raise ValueError(f"vector_store는 {list(VECTOR_STORES)} 중 하나여야 합니다: {settings.vector_store}")
+    store = _stores.get(settings.vector_store)
+    if store is None:
+        store = _stores[settings.vector_store] = VECTOR_STORES[settings.vector_store]()
+    return store
+
+_partitioned = {}
+_partitioned_lock = threading.Lock()
+
+def list_collection_names() -> List[str]:
+    """저장소에 있는 컬렉션 이름 목록"""
+    return get_vector_store().list_collection_names()
+
+def get_collection(name: Optional[str] = None):
+    """컬렉션 열기 (없으면 생성)
+
+    Args:
+        name: 컬렉션 이름. 없으면 레지스트리의 현재 서비스(active) 컬렉션
+              (app.core.collections 참고)
+
+    `PARTITION_BY` 가 설정되어 있으면 같은 API 의 파티션 라우터를 반환합니다
+    (app.core.partitions 참고). `INDEX_STATS_ENABLED` 이면 쓰기마다 집계 카운터를
+    갱신하는 래퍼로 감쌉니다 (app.core.index_stats 참고).
+    """
+    if name is None:
+        from app.core.collections import get_active_collection
+        name = get_active_collection()["name"]
+
+    if settings.partition_by != "none":
+        from app.core.partitions import PartitionedCollection
+        key = (settings.chroma_persist_directory, settings.vector_store, settings.partition_by, name)
+        with _partitioned_lock:
+            if key not in _partitioned:
+                _partitioned[key] = PartitionedCollection(name, open_collection, list_collection_names,
+                                                          get_vector_store().max_batch_size)
+            collection = _partitioned[key]
+    else:
+        collection = open_collection(name)
+
+    if settings.index_stats_enabled:
+        from app.core.index_stats import StatsCollection, get_index_stats
+        return StatsCollection(collection, name, get_index_stats())
+    return collection
+
+def open_collection(name: str):
+    """파티션 라우팅 없이 저장소의 컬렉션 하나를 열기 (없으면 생성)"""
+    return get_vector_store().open_collection(name)
@@ -0,0 +1,492 @@
+"""프로세스 내 hnswlib HNSW 벡터 저장소 - ChromaDB 컬렉션 호환 인터페이스
+
+ChromaDB 도 내부적으로 hnswlib 를 쓰지만 M/ef 를 컬렉션 생성 시점 메타데이터로만 받고,
+검색 시 where 필터를 적용한 뒤 brute force 로 떨어지는 경우가 많습니다. 이 저장소는
+
+- 정규화된 float32 원본 벡터를 append-only memmap 파일(`vectors.f32`)로,
+- id/문서/메타데이터는 SQLite 에 (quantized 저장소와 같은 스키마),
+- HNSW 그래프는 `index.bin` 으로
+
+보관합니다. 원본 벡터 파일이 기준이고 그래프는 캐시라서, 그래프는 `HNSW_SYNC_THRESHOLD` 행이
+쌓일 때마다만 저장하고 재시작/다른 프로세스의 변경 시에는 저장된 그래프 이후의 행만 다시 넣습니다.
+삭제는 그래프에서 mark_deleted 로 숨기고 `compact()` 에서 파일과 그래프를 다시 씁니다.
+쓰기 잠금/증분 갱신/자동 compact/세대별 파일 교체는 quantized 저장소와 같은 방식입니다.
+
+M / construction_ef 는 그래프를 처음 만들 때 고정되고(`info` 테이블에 기록), search_ef 는
+검색마다 `HNSW_SEARCH_EF` 를 다시 읽으므로 재시작 없이 바꿀 수 있습니다. 거리 값은 ChromaDB 의
+cosine 공간과 같은 `1 - cosine similarity` 입니다.
+
+`settings.vector_store = "hnswlib"` 이면 `get_collection()` 이 이 저장소를 반환합니다 (hnswlib 패키지 필요).
+"""
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import numpy as np
+from app.core.config import settings
+from app.core.leader import file_lock
+from app.core import quantized_store
+from app.core.quantized_store import (
+    WRITE_LOCK_FILE, _generation_path, _normalize, _remove_stale_files, _where_to_sql, _write_file,
+)
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 1024
+GROWTH_FACTOR = 1.5
+
+def _import_hnswlib():
+    try:
+        import hnswlib
+    except ImportError as e:
+        raise RuntimeError("VECTOR_STORE=hnswlib 을 사용하려면 hnswlib 패키지가 필요합니다: pip install hnswlib") from e
+    return hnswlib
+
+class HnswCollection:
+    """hnswlib 그래프 + float32 memmap + SQLite 메타데이터로 구성된 컬렉션"""
+
+    def __init__(self, name: str, directory: str, M: int = 16, construction_ef: int = 200):
+        self._hnswlib = _import_hnswlib()
+        self.name = name
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, "store.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+        info = dict(self._db.execute("SELECT key, value FROM info").fetchall())
+        # 이미 만들어진 그래프는 생성 시점의 M / construction_ef 를 유지
+        self.M = int(info.get("M", M))
+        self.construction_ef = int(info.get("construction_ef", construction_ef))
+        self.dim = int(info["dim"]) if "dim" in info else None
+        self.metadata = {"hnsw:space": "cosine", "hnsw:M": self.M, "hnsw:construction_ef": self.construction_ef}
+
+        self._write_lock_path = os.path.join(directory, WRITE_LOCK_FILE)
+        self._generation = None
+        self._index = None
+        self._indexed_rows = 0  # 그래프에 들어간 행 수 (행 번호 = 그래프 label)
+        self._saved_rows = 0  # index.bin 에 저장된 행 수
+        self._marked = np.zeros(0, dtype=bool)  # 그래프에서 mark_deleted 된 행
+        self._data_version = None
+        self._reload()
+
+    # ------------------------------------------------------------------
+    # 내부 상태 관리
+    # ------------------------------------------------------------------
+    def _set_generation(self, generation: int):
+        if generation != self._generation:
+            # 다른 프로세스가 compact 했으면 그 세대의 그래프를 새로 로드
+            self._index = None
+        self._generation = generation
+        self._vectors_path = _generation_path(self.directory, "vectors.f32", generation)
+        self._index_path = _generation_path(self.directory, "index.bin", generation)
+
+    def _reload(self):
+        """파일 크기/SQLite 기준으로 행 수, memmap, alive 마스크를 다시 읽고 그래프를 따라잡기 (O(N))"""
+        generation = self._db.execute("SELECT value FROM info WHERE key = 'generation'").fetchone()
+        self._set_generation(int(generation[0]) if generation else 0)
+        self._rows = os.path.getsize(self._vectors_path) // (self.dim * 4) \
+            if self.dim and os.path.exists(self._vectors_path) else 0
+        self._open_map()
+
+        # 중단된 append 로 인해 레코드 없이 남은 꼬리 행은 alive=False 로 취급
+        self._alive = np.zeros(self._rows, dtype=bool)
+        rows = [row for (row,) in self._db.execute("SELECT row FROM records")]
+        if rows:
+            rows = np.asarray(rows, dtype=np.int64)
+            self._alive[rows[rows < self._rows]] = True
+        self._alive_buffer = self._alive
+        self._live = int(self._alive.sum())
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        self._sync_index()
+
+    def _open_map(self):
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._rows, self.dim)) \
+            if self._rows else None
+
+    def _extend(self, count: int):
+        """자기 append 후 행 수/alive 마스크/memmap 을 늘리고 새 행만 그래프에 추가"""
+        rows = self._rows + count
+        if rows > len(self._alive_buffer):
+            buffer = np.zeros(max(rows, len(self._alive_buffer) * 2, INITIAL_CAPACITY), dtype=bool)
+            buffer[:self._rows] = self._alive
+            self._alive_buffer = buffer
+        self._alive_buffer[self._rows:rows] = True
+        self._alive = self._alive_buffer[:rows]
+        self._rows = rows
+        self._live += count
+        self._open_map()
+        # 자기 삭제는 _delete_rows 에서 이미 그래프에 표시했으므로 전체 mark 스캔은 생략
+        self._sync_index(full=False)
+
+    def _new_index(self, capacity: int):
+        index = self._hnswlib.Index(space="cosine", dim=self.dim)
+        index.init_index(max_elements=max(capacity, INITIAL_CAPACITY), ef_construction=self.construction_ef,
+                         M=self.M, random_seed=100)
+        return index
+
+    def _sync_index(self, full: bool = True):
+        """그래프를 원본 벡터 파일/alive 마스크에 맞추기 (없으면 저장된 index.bin 부터 로드)"""
+        if self._rows == 0:
+            self._index, self._indexed_rows, self._saved_rows = None, 0, 0
+            self._marked = np.zeros(0, dtype=bool)
+            return
+
+        if self._index is None or self._indexed_rows > self._rows:
+            self._index, self._indexed_rows = None, 0
+            saved = int(dict(self._db.execute("SELECT key, value FROM info").fetchall()).get("index_rows", 0))
+            if 0 < saved <= self._rows and os.path.exists(self._index_path):
+                try:
+                    index = self._hnswlib.Index(space="cosine", dim=self.dim)
+                    index.load_index(self._index_path, max_elements=max(self._rows, INITIAL_CAPACITY))
+                    self._index, self._indexed_rows = index, saved
+                except Exception as e:
+                    logger.warning(f"HNSW 그래프 로드 실패, 원본 벡터로 다시 만듭니다 ({self.name}): {e}")
+            if self._index is None:
+                self._index = self._new_index(self._rows)
+            self._saved_rows = self._indexed_rows
+            self._marked = np.zeros(self._indexed_rows, dtype=bool)
+
+        # 저장된 그래프 이후에 추가된 행 (삭제된 행은 넣지 않고 바로 표시)
+        if self._indexed_rows < self._rows:
+            start = self._indexed_rows
+            if self._rows > self._index.get_max_elements():
+                self._index.resize_index(max(self._rows, int(self._index.get_max_elements() * GROWTH_FACTOR)))
+            labels = np.arange(start, self._rows)
+            alive = labels[self._alive[start:]]
+            if len(alive):
+                self._index.add_items(np.asarray(self._vectors[alive]), alive)
+            marked = np.zeros(self._rows, dtype=bool)
+            marked[:len(self._marked)] = self._marked
+            marked[labels[~self._alive[start:]]] = True
+            self._marked = marked
+            self._indexed_rows = self._rows
+
+        if full:
+            for row in np.flatnonzero(~self._alive & ~self._marked):
+                self._mark_deleted(int(row))
+
+        if self._indexed_rows - self._saved_rows >= settings.hnsw_sync_threshold:
+            self._save_index()
+
+    def _mark_deleted(self, row: int):
+        try:
+            self._index.mark_deleted(row)
+        except RuntimeError:
+            # 저장된 그래프에 이미 삭제 표시돼 있거나 들어간 적 없는 행
+            pass
+        self._marked[row] = True
+
+    def _save_index(self):
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        self._index.save_index(tmp_path)
+        os.replace(tmp_path, self._index_path)
+        self._db.execute("INSERT OR REPLACE INTO info VALUES ('index_rows', ?)", (str(self._indexed_rows),))
+        self._db.commit()
+        self._saved_rows = self._indexed_rows
+
+    def _refresh_if_changed(self):
+        """다른 프로세스가 같은 저장소를 수정했으면 다시 읽기"""
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._reload()
+
+    @contextmanager
+    def _writing(self):
+        """스레드 잠금 + 저장소 파일 잠금을 잡고 최신 상태에서 쓰기 (실패하면 트랜잭션/메모리 상태 되돌림)"""
+        with self._lock, file_lock(self._write_lock_path):
+            self._refresh_if_changed()
+            try:
+                yield
+            except BaseException:
+                self._db.rollback()
+                self._index = None
+                self._reload()
+                raise
+
+    def _maybe_compact(self):
+        """삭제/교체로 죽은 행이 VECTOR_STORE_COMPACT_RATIO 이상이면 compact (쓰기 잠금 안에서 호출)"""
+        dead = self._rows - self._live
+        ratio = settings.vector_store_compact_ratio
+        if ratio > 0 and dead >= quantized_store.COMPACT_MIN_DEAD_ROWS and dead >= ratio * self._rows:
+            self._compact()
+
+    def _append_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """정규화된 벡터를 파일 끝에 추가하고 새 행 번호 배열을 반환"""
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._db.execute("INSERT OR REPLACE INTO info VALUES ('dim', ?)", (str(self.dim),))
+            self._db.execute("INSERT OR REPLACE INTO info VALUES ('M', ?)", (str(self.M),))
+            self._db.execute("INSERT OR REPLACE INTO info VALUES ('construction_ef', ?)", (str(self.construction_ef),))
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원이 컬렉션({self.dim})과 다릅니다: {vectors.shape[1]}")
+
+        start = self._rows
+        with open(self._vectors_path, "r+b" if os.path.exists(self._vectors_path) else "wb") as f:
+            # 중단된 이전 append 의 꼬리 데이터는 덮어쓰기
+            f.seek(start * self.dim * 4)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.truncate()
+        return np.arange(start, start + len(vectors), dtype=np.int64)
+
+    def _rows_for(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+                  limit: Optional[int] = None, offset: Optional[int] = None) -> List[tuple]:
+        sql, params = _where_to_sql(where)
+        if ids is not None:
+            if not ids:
+                return []
+            sql += f" AND id IN ({','.join('?' for _ in ids)})"
+            params = params + list(ids)
+        sql = f"SELECT row, id, document, metadata FROM records WHERE {sql} ORDER BY row"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limit if limit is not None else -1, offset or 0]
+        return self._db.execute(sql, params).fetchall()
+
+    def _delete_rows(self, rows: List[int]):
+        if not rows:
+            return
+        self._db.executemany("DELETE FROM records WHERE row = ?", [(int(r),) for r in rows])
+        for row in rows:
+            if row < self._rows:
+                self._live -= int(self._alive[row])
+                self._alive[row] = False
+                if row < self._indexed_rows and not self._marked[row]:
+                    self._mark_deleted(int(row))
+
+    def _write(self, ids, embeddings, metadatas, documents, replace: bool):
+        vectors = _normalize(embeddings)
+        if len(vectors) != len(ids):
+            raise ValueError("ids 와 embeddings 의 개수가 다릅니다.")
+        metadatas = metadatas or [None] * len(ids)
+        documents = documents or [None] * len(ids)
+
+        with self._writing():
+            existing = {record[1]: record[0] for record in self._rows_for(ids=list(ids))}
+            if replace:
+                self._delete_rows(list(existing.values()))
+            else:
+                # ChromaDB add 와 동일하게 이미 있는 id 는 건너뜀
+                keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+                ids = [ids[i] for i in keep]
+                vectors = vectors[keep]
+                metadatas = [metadatas[i] for i in keep]
+                documents = [documents[i] for i in keep]
+                if not ids:
+                    return
+
+            rows = self._append_vectors(vectors)
+            self._db.executemany(
+                "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (int(row), doc_id, document, json.dumps(metadata or {}, ensure_ascii=False))
+                    for row, doc_id, document, metadata in zip(rows, ids, documents, metadatas)
+                ],
+            )
+            self._db.commit()
+            self._extend(len(rows))
+            self._maybe_compact()
+
+    # ------------------------------------------------------------------
+    # ChromaDB 호환 API
+    # ------------------------------------------------------------------
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write(list(ids), embeddings, metadatas, documents, replace=False)
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write(list(ids), embeddings, metadatas, documents, replace=True)
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None):
+        if embeddings is not None:
+            records = {r[1]: r for r in self._rows_for(ids=list(ids))}
+            self._write(
+                list(ids), embeddings,
+                metadatas or [json.loads(records[i][3]) if i in records else {} for i in ids],
+                documents or [records[i][2] if i in records else None for i in ids],
+                replace=True,
+            )
+            return
+        with self._writing():
+            for i, doc_id in enumerate(ids):
+                if metadatas is not None:
+                    self._db.execute("UPDATE records SET metadata = ? WHERE id = ?",
+                                     (json.dumps(metadatas[i], ensure_ascii=False), doc_id))
+                if documents is not None:
+                    self._db.execute("UPDATE records SET document = ? WHERE id = ?", (documents[i], doc_id))
+            self._db.commit()
+
+    def delete(self, ids=None, where=None):
+        with self._writing():
+            self._delete_rows([record[0] for record in self._rows_for(ids=ids, where=where)])
+            self._db.commit()
+            self._maybe_compact()
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def get(self, ids=None, where=None, limit=None, offset=None,
+            include=("metadatas", "documents")) -> Dict:
+        with self._lock:
+            self._refresh_if_changed()
+            records = self._rows_for(ids=ids, where=where, limit=limit, offset=offset)
+            result = {
+                "ids": [r[1] for r in records],
+                "documents": [r[2] for r in records] if "documents" in include else None,
+                "metadatas": [json.loads(r[3]) for r in records] if "metadatas" in include else None,
+                "embeddings": None,
+            }
+            if "embeddings" in include:
+                rows = np.asarray([r[0] for r in records], dtype=np.int64)
+                result["embeddings"] = (
+                    np.asarray(self._vectors[rows]) if len(rows) else np.zeros((0, self.dim or 0), np.float32)
+                )
+            return result
+
+    def _search(self, query: np.ndarray, n_results: int, allowed: Optional[np.ndarray]):
+        """그래프 검색 (필터가 좁으면 후보 행만 정확히 채점) → (행 번호, 거리)"""
+        candidates = self._live if allowed is None else len(allowed)
+        k = min(n_results, candidates)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # 필터를 통과하는 행이 적으면 그래프 탐색이 후보를 못 채우므로 정확한 스캔이 더 빠르고 정확함
+        if allowed is not None and len(allowed) <= settings.hnsw_brute_force_threshold:
+            scores = np.asarray(self._vectors[allowed]) @ query
+            order = np.argsort(-scores)[:k]
+            return allowed[order], (1.0 - scores[order]).astype(np.float32)
+
+        self._index.set_ef(max(settings.hnsw_search_ef, k))
+        mask = None
+        if allowed is not None:
+            mask = np.zeros(self._indexed_rows, dtype=bool)
+            mask[allowed] = True
+        try:
+            labels, distances = self._index.knn_query(
+                query[None, :], k=k, filter=(lambda label: bool(mask[label])) if mask is not None else None
+            )
+        except RuntimeError:
+            # ef 가 작아 k 개를 다 찾지 못한 경우 - 후보 전체를 정확히 채점
+            rows = np.flatnonzero(self._alive) if allowed is None else allowed
+            scores = np.asarray(self._vectors[rows]) @ query
+            order = np.argsort(-scores)[:k]
+            return rows[order], (1.0 - scores[order]).astype(np.float32)
+        return labels[0].astype(np.int64), distances[0]
+
+    def query(self, query_embeddings, n_results: int = 10, where=None, where_document=None,
+              include=("metadatas", "documents", "distances")) -> Dict:
+        if where_document:
+            raise ValueError("hnswlib 저장소는 where_document 필터를 지원하지 않습니다.")
+        queries = _normalize(query_embeddings)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": None}
+
+        with self._lock:
+            self._refresh_if_changed()
+            allowed = None
+            if where:
+                allowed = np.asarray([r[0] for r in self._rows_for(where=where)], dtype=np.int64)
+                allowed = allowed[allowed < self._indexed_rows]
+
+            for query in queries:
+                top_rows, top_distances = self._search(query, n_results, allowed) \
+                    if self._index is not None else (np.empty(0, dtype=np.int64), np.empty(0))
+
+                by_row = {r[0]: r for r in self._db.execute(
+                    f"SELECT row, id, document, metadata FROM records WHERE row IN "
+                    f"({','.join(str(int(r)) for r in top_rows) or 'NULL'})"
+                )}
+                # 그래프 저장 후 다른 프로세스가 지운 행은 건너뜀
+                hits = [(by_row[int(r)], float(d)) for r, d in zip(top_rows, top_distances) if int(r) in by_row]
+                result["ids"].append([r[1] for r, _ in hits])
+                result["documents"].append([r[2] for r, _ in hits])
+                result["metadatas"].append([json.loads(r[3]) for r, _ in hits])
+                result["distances"].append([d for _, d in hits])
+
+        return result
+
+    def persist(self):
+        """아직 저장하지 않은 그래프 변경분을 index.bin 에 저장 (종료 전 호출하면 재시작이 빨라짐)"""
+        with self._lock:
+            if self._index is not None and self._indexed_rows != self._saved_rows:
+                self._save_index()
+
+    def rebuild_index(self, M: int, construction_ef: int):
+        """M / construction_ef 를 바꿔 원본 벡터로 그래프를 다시 만들기"""
+        with self._writing():
+            self.M, self.construction_ef = M, construction_ef
+            self.metadata.update({"hnsw:M": M, "hnsw:construction_ef": construction_ef})
+            self._db.execute("INSERT OR REPLACE INTO info VALUES ('M', ?)", (str(M),))
+            self._db.execute("INSERT OR REPLACE INTO info VALUES ('construction_ef', ?)", (str(construction_ef),))
+            self._db.execute("DELETE FROM info WHERE key = 'index_rows'")
+            self._db.commit()
+            self._index = None
+            self._reload()
+            self.persist()
+
+    def compact(self):
+        """삭제된 행을 제거하고 원본 벡터 파일과 그래프를 다시 만들어 공간 회수"""
+        with self._writing():
+            self._compact()
+
+    def _compact(self):
+        """살아 있는 행으로 다음 세대 벡터 파일/그래프를 만들고, 레코드와 세대 번호를 한 트랜잭션에서 교체"""
+        records = self._rows_for()
+        generation = self._generation + 1
+        vectors_path = _generation_path(self.directory, "vectors.f32", generation)
+        index_path = _generation_path(self.directory, "index.bin", generation)
+        index = None
+        if records:
+            vectors = np.asarray(self._vectors[[r[0] for r in records]])
+            _write_file(vectors_path, vectors)
+            index = self._new_index(len(records))
+            index.add_items(vectors, np.arange(len(records)))
+            index.save_index(index_path)
+
+        self._db.execute("DELETE FROM records")
+        self._db.executemany(
+            "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+            [(row, r[1], r[2], r[3]) for row, r in enumerate(records)],
+        )
+        self._db.execute("INSERT OR REPLACE INTO info VALUES ('generation', ?)", (str(generation),))
+        self._db.execute("INSERT OR REPLACE INTO info VALUES ('index_rows', ?)", (str(len(records)),))
+        self._db.commit()
+        # 다른 프로세스가 아직 매핑 중인 이전 파일도 unlink 후 매핑은 유효하고, 다음 읽기에서 새 세대로 전환됨
+        _remove_stale_files(self.directory, ("vectors.", "index."), [vectors_path, index_path])
+
+        self._set_generation(generation)
+        self._index = index
+        self._indexed_rows = self._saved_rows = len(records) if index is not None else 0
+        self._marked = np.zeros(self._indexed_rows, dtype=bool)
+        self._reload()
+
+_collections: Dict[str, HnswCollection] = {}
+_collections_lock = threading.Lock()
+
+def get_hnsw_collection(name: str) -> HnswCollection:
+    """컬렉션 인스턴스를 프로세스 내에서 재사용 (그래프 재로드 비용 절감)"""
+    directory = os.path.join(settings.chroma_persist_directory, "hnswlib", name)
+    with _collections_lock:
+        collection = _collections.get(directory)
+        if collection is None:
+            collection = HnswCollection(name, directory, settings.hnsw_m, settings.hnsw_construction_ef)
+            _collections[directory] = collection
+        return collection
+
+def drop_hnsw_collection(name: str):
+    """컬렉션 디렉토리 삭제 (열려 있던 인스턴스도 닫고 캐시에서 제거)"""
+    directory = os.path.join(settings.chroma_persist_directory, "hnswlib", name)
+    with _collections_lock:
+        collection = _collections.pop(directory, None)
+        if collection is not None:
+            collection._db.close()
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,252 @@
+"""인덱스 집계 통계 - 쓰기 시점에 갱신하는 채널/사용자/소스/일별 카운터
+
+`check_db_data.py` 처럼 컬렉션 전체를 `get()` 으로 읽어 파이썬에서 세면 인덱스가 커질수록
+느려지고 메모리를 많이 씁니다. 대신 `get_collection()` 이 반환하는 컬렉션의
+add/upsert/update/delete 를 `StatsCollection` 이 감싸서, 문서가 바뀔 때마다 해당 문서의
+기여분만 카운터에서 빼고 더합니다. `/stats` 는 카운터 테이블만 읽으므로 문서 수와 무관하게 빠릅니다.
+
+- documents: 문서(청크)별 통계 키와 메시지 수 (갱신/삭제 시 이전 기여분을 빼기 위해 보관)
+- counters:  (컬렉션, 차원, 키) 별 문서 수 / 메시지 수. 차원은 total, channel, user, source, day
+- info:      컬렉션별 마지막 쓰기 시각, 가장 최근 Slack 동기화 시각
+
+저장 위치는 CHROMA_PERSIST_DIRECTORY/index_stats.sqlite3 이며, 도입 이전에 쌓인 문서나
+프로세스 중단으로 어긋난 카운터는 `rebuild()` (scripts/rebuild_stats.py) 로 다시 셉니다.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import threading
+from app.core.config import settings
+from app.core.state_db import connect
+
+STATS_DB_FILE = "index_stats.sqlite3"
+DIMENSIONS = ("channel", "user", "source", "day")
+# SQLite IN (...) 에 한 번에 넣을 값 수
+QUERY_BATCH_SIZE = 500
+
+def _day(metadata: Dict) -> str:
+    for key in ("ts_epoch", "timestamp", "first_ts"):
+        try:
+            return datetime.fromtimestamp(float(metadata[key]), tz=timezone.utc).strftime("%Y-%m-%d")
+        except (KeyError, TypeError, ValueError):
+            continue
+    return "unknown"
+
+def stat_keys(metadata: Optional[Dict]) -> List[Tuple[str, str]]:
+    """문서 메타데이터가 기여하는 (차원, 키) 목록"""
+    metadata = metadata or {}
+    users = [metadata["user"]] if metadata.get("user") else \
+        [user for user in (metadata.get("users") or "").split(", ") if user] or ["Unknown"]
+    keys = [("total", "")]
+    keys.append(("channel", metadata.get("channel") or "Unknown"))
+    keys.extend(("user", user) for user in dict.fromkeys(users))
+    keys.append(("source", metadata.get("source") or "file_upload"))
+    keys.append(("day", _day(metadata)))
+    return keys
+
+class IndexStats:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " collection TEXT NOT NULL, id TEXT NOT NULL, keys TEXT NOT NULL, messages INTEGER NOT NULL,"
+                " PRIMARY KEY (collection, id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " collection TEXT NOT NULL, dimension TEXT NOT NULL, key TEXT NOT NULL,"
+                " documents INTEGER NOT NULL, messages INTEGER NOT NULL,"
+                " PRIMARY KEY (collection, dimension, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS info ("
+                " collection TEXT PRIMARY KEY, updated_at TEXT, last_sync_time TEXT)"
+            )
+
+    def _connect(self):
+        # 호출마다 연결을 열어 스레드/프로세스 간 공유 문제를 피함
+        return connect(self.path)
+
+    def _existing(self, conn, collection: str, ids: List[str]) -> Dict[str, Tuple[List, int]]:
+        found = {}
+        for start in range(0, len(ids), QUERY_BATCH_SIZE):
+            batch = ids[start:start + QUERY_BATCH_SIZE]
+            rows = conn.execute(
+                f"SELECT id, keys, messages FROM documents WHERE collection = ? AND id IN ({','.join('?' * len(batch))})",
+                [collection, *batch],
+            ).fetchall()
+            found.update({doc_id: (json.loads(keys), messages) for doc_id, keys, messages in rows})
+        return found
+
+    @staticmethod
+    def _apply(deltas: Dict[Tuple[str, str], List[int]], keys: Iterable, messages: int, sign: int):
+        for dimension, key in keys:
+            delta = deltas.setdefault((dimension, key), [0, 0])
+            delta[0] += sign
+            delta[1] += sign * messages
+
+    def _write_counters(self, conn, collection: str, deltas: Dict[Tuple[str, str], List[int]]):
+        conn.executemany(
+            "INSERT INTO counters (collection, dimension, key, documents, messages) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT(collection, dimension, key) DO UPDATE SET"
+            " documents = documents + excluded.documents, messages = messages + excluded.messages",
+            [(collection, dimension, key, docs, messages)
+             for (dimension, key), (docs, messages) in deltas.items() if docs or messages],
+        )
+        conn.execute("DELETE FROM counters WHERE collection = ? AND documents <= 0", (collection,))
+
+    def _touch(self, conn, collection: str, sync_times: Iterable[str] = ()):
+        latest = max((t for t in sync_times if t), default=None)
+        conn.execute(
+            "INSERT INTO info (collection, updated_at, last_sync_time) VALUES (?, ?, ?)"
+            " ON CONFLICT(collection) DO UPDATE SET updated_at = excluded.updated_at,"
+            " last_sync_time = CASE WHEN excluded.last_sync_time IS NULL THEN last_sync_time"
+            " WHEN last_sync_time IS NULL OR excluded.last_sync_time > last_sync_time THEN excluded.last_sync_time"
+            " ELSE last_sync_time END",
+            (collection, datetime.now().isoformat(), latest),
+        )
+
+    def record_upsert(self, collection: str, ids: List[str], metadatas: List[Optional[Dict]],
+                      only_new: bool = False, only_existing: bool = False):
+        """문서 저장/갱신 반영 (이전 기여분을 빼고 새 메타데이터 기여분을 더함)
+
+        only_new: add() 처럼 이미 있는 id 는 건너뜀
+        only_existing: update() 처럼 없는 id 는 건너뜀
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = self._existing(conn, collection, ids)
+            deltas, rows = {}, []
+            for doc_id, metadata in zip(ids, metadatas):
+                if (only_new and doc_id in existing) or (only_existing and doc_id not in existing):
+                    continue
+                if doc_id in existing:
+                    self._apply(deltas, existing[doc_id][0], existing[doc_id][1], -1)
+                keys = stat_keys(metadata)
+                # 스레드 요약 문서는 문서 수에만 포함 (메시지는 원본 문서로 이미 집계됨)
+                messages = 0 if (metadata or {}).get("doc_type") == "thread_summary" else \
+                    int((metadata or {}).get("message_count") or 1)
+                self._apply(deltas, keys, messages, 1)
+                rows.append((collection, doc_id, json.dumps(keys, ensure_ascii=False), messages))
+            conn.executemany("INSERT OR REPLACE INTO documents (collection, id, keys, messages) VALUES (?, ?, ?, ?)", rows)
+            self._write_counters(conn, collection, deltas)
+            self._touch(conn, collection, ((m or {}).get("sync_time") for m in metadatas))
+
+    def record_delete(self, collection: str, ids: List[str]):
+        """문서 삭제 반영"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deltas = {}
+            for keys, messages in self._existing(conn, collection, ids).values():
+                self._apply(deltas, keys, messages, -1)
+            for start in range(0, len(ids), QUERY_BATCH_SIZE):
+                batch = ids[start:start + QUERY_BATCH_SIZE]
+                conn.execute(f"DELETE FROM documents WHERE collection = ? AND id IN ({','.join('?' * len(batch))})",
+                             [collection, *batch])
+            self._write_counters(conn, collection, deltas)
+            self._touch(conn, collection)
+
+    def clear(self, collection: str):
+        """컬렉션 통계 전체 삭제"""
+        with self._connect() as conn:
+            for table in ("documents", "counters", "info"):
+                conn.execute(f"DELETE FROM {table} WHERE collection = ?", (collection,))
+
+    def rebuild(self, collection: str, source, page_size: int = 1000) -> int:
+        """저장소의 메타데이터를 페이지 단위로 읽어 통계를 처음부터 다시 세기"""
+        self.clear(collection)
+        offset = 0
+        while True:
+            page = source.get(limit=page_size, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                return offset
+            self.record_upsert(collection, list(page["ids"]), page["metadatas"])
+            offset += len(page["ids"])
+
+    def summary(self, collection: str, top: int = 20, days: int = 30) -> Dict:
+        """카운터 테이블만 읽는 집계 (차원별 문서 수 상위 `top` 개, 최근 `days` 일)"""
+        with self._connect() as conn:
+            total = conn.execute(
+                "SELECT documents, messages FROM counters WHERE collection = ? AND dimension = 'total'", (collection,)
+            ).fetchone() or (0, 0)
+            info = conn.execute(
+                "SELECT updated_at, last_sync_time FROM info WHERE collection = ?", (collection,)
+            ).fetchone() or (None, None)
+
+            result = {
+                "documents": total[0],
+                "messages": total[1],
+                "updated_at": info[0],
+                "last_sync_time": info[1],
+            }
+            for dimension in DIMENSIONS:
+                distinct = conn.execute(
+                    "SELECT COUNT(*) FROM counters WHERE collection = ? AND dimension = ?", (collection, dimension)
+                ).fetchone()[0]
+                order = "key DESC" if dimension == "day" else "documents DESC, key"
+                rows = conn.execute(
+                    f"SELECT key, documents, messages FROM counters WHERE collection = ? AND dimension = ?"
+                    f" ORDER BY {order} LIMIT ?", (collection, dimension, days if dimension == "day" else top)
+                ).fetchall()
+                plural = f"{dimension}s"
+                result[f"{plural}_total"] = distinct
+                result[plural] = [{"key": key, "documents": docs, "messages": messages} for key, docs, messages in rows]
+        return result
+
+class StatsCollection:
+    """쓰기마다 IndexStats 카운터를 갱신하는 컬렉션 래퍼 (읽기는 그대로 위임)"""
+
+    def __init__(self, collection, name: str, stats: IndexStats):
+        self._collection = collection
+        self._stats_name = name
+        self._stats = stats
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        result = self._collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+        self._stats.record_upsert(self._stats_name, list(ids), metadatas or [None] * len(ids), only_new=True)
+        return result
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        result = self._collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+        self._stats.record_upsert(self._stats_name, list(ids), metadatas or [None] * len(ids))
+        return result
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None):
+        result = self._collection.update(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+        if metadatas is not None:
+            self._stats.record_upsert(self._stats_name, list(ids), metadatas, only_existing=True)
+        return result
+
+    def delete(self, ids=None, where=None):
+        if ids is None and not where:
+            # 빈 조건 삭제는 저장소마다 동작이 달라(ChromaDB 는 거부, quantized 는 전체 삭제) 그대로 위임하고
+            # 성공했을 때만 통계를 비움
+            result = self._collection.delete(ids=ids, where=where)
+            self._stats.clear(self._stats_name)
+            return result
+        if ids is None:
+            # where 삭제는 지워질 id 를 먼저 확인
+            ids = self._collection.get(where=where, include=[])["ids"]
+            if not ids:
+                return None
+        result = self._collection.delete(ids=ids, where=where)
+        self._stats.record_delete(self._stats_name, list(ids))
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+_instances: Dict[str, IndexStats] = {}
+_instances_lock = threading.Lock()
+
+def get_index_stats() -> IndexStats:
+    """CHROMA_PERSIST_DIRECTORY/index_stats.sqlite3 통계 저장소"""
+    path = os.path.join(settings.chroma_persist_directory, STATS_DB_FILE)
+    with _instances_lock:
+        if path not in _instances:
+            _instances[path] = IndexStats(path)
+        return _instances[path]
@@ -0,0 +1,135 @@
+"""멀티 워커 배포를 위한 프로세스 간 잠금 / 리더 선출
+
+`uvicorn --workers N` 으로 실행하면 워커마다 startup 이벤트가 돌기 때문에,
+스케줄러와 수동 동기화는 `CHROMA_PERSIST_DIRECTORY` 의 잠금 파일로 조율합니다.
+잠금은 `fcntl.flock` 이라 잠금을 가진 프로세스가 죽으면 OS가 즉시 해제하고,
+별도의 만료(lease) 갱신이나 stale 잠금 정리가 필요 없습니다.
+
+- 리더 lease (`scheduler.lock`): 잡고 있는 한 워커만 자동 동기화를 스케줄링
+- 동기화 잠금 (`sync.lock`): 자동/수동 동기화가 동시에 쓰지 않도록 보호
+- 파일 잠금 (`file_lock`): 벡터 저장소 파일 쓰기처럼 기다렸다 반드시 수행해야 하는 구간을 직렬화
+"""
+from contextlib import contextmanager
+from typing import Optional
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows - 단일 프로세스 실행으로 간주하고 잠금 생략
+    fcntl = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LOCK_FILE = "scheduler.lock"
+SYNC_LOCK_FILE = "sync.lock"
+
+def _lock_path(filename: str) -> str:
+    os.makedirs(settings.chroma_persist_directory, exist_ok=True)
+    return os.path.join(settings.chroma_persist_directory, filename)
+
+def _try_lock(fd: int) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except (BlockingIOError, PermissionError):
+        return False
+
+def _write_pid(fd: int):
+    os.ftruncate(fd, 0)
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, str(os.getpid()).encode())
+
+def read_holder_pid(filename: str) -> Optional[int]:
+    """잠금 파일에 기록된 보유 프로세스 pid (없으면 None)"""
+    try:
+        with open(_lock_path(filename), 'r') as f:
+            content = f.read().strip()
+        return int(content) if content else None
+    except (OSError, ValueError):
+        return None
+
+class LeaderLease:
+    """하나의 프로세스만 보유할 수 있는 리더 잠금"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._fd = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """리더가 되면 True (이미 리더여도 True)"""
+        with self._lock:
+            if self._fd is not None:
+                return True
+            fd = os.open(_lock_path(self.filename), os.O_RDWR | os.O_CREAT, 0o644)
+            if not _try_lock(fd):
+                os.close(fd)
+                return False
+            _write_pid(fd)
+            self._fd = fd
+            logger.info(f"리더 선출됨: {self.filename} (pid {os.getpid()})")
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._fd is None:
+                return
+            try:
+                os.ftruncate(self._fd, 0)
+            finally:
+                # 파일을 닫으면 flock 도 해제됨
+                os.close(self._fd)
+                self._fd = None
+            logger.info(f"리더 잠금 해제: {self.filename}")
+
+@contextmanager
+def exclusive(filename: str = SYNC_LOCK_FILE):
+    """비차단 배타 잠금 - 다른 프로세스/스레드가 보유 중이면 False 를 yield
+
+    같은 프로세스 안에서도 호출마다 파일을 새로 열기 때문에 스레드 간에도 배타적입니다.
+    """
+    fd = os.open(_lock_path(filename), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        acquired = _try_lock(fd)
+        if acquired:
+            _write_pid(fd)
+        yield acquired
+    finally:
+        os.close(fd)
+
+def is_locked(filename: str) -> bool:
+    """다른 프로세스(또는 이 프로세스의 다른 핸들)가 잠금을 보유 중인지 - 잠금 파일 내용은 건드리지 않음"""
+    fd = os.open(_lock_path(filename), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        return not _try_lock(fd)
+    finally:
+        # 잡았다면 닫으면서 바로 해제됨
+        os.close(fd)
+
+@contextmanager
+def file_lock(path: str):
+    """차단 배타 잠금 - 같은 경로를 잠근 다른 프로세스/스레드가 끝날 때까지 기다림
+
+    벡터 저장소의 append/compact 처럼 짧고 반드시 끝나야 하는 쓰기를 프로세스 간에 직렬화합니다.
+    같은 프로세스에서 중첩해 잡으면 교착되므로 호출자가 재진입하지 않도록 해야 합니다.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+# 전역 스케줄러 리더 lease
+scheduler_lease = LeaderLease(SCHEDULER_LOCK_FILE)
@@ -0,0 +1,336 @@
+"""월별 / 채널 그룹별 파티션 컬렉션과 fan-out 검색
+
+전체 히스토리가 컬렉션 하나에 있으면 질문 하나의 검색 비용과 인덱스 재구축 시간이 워크스페이스
+전체 크기에 비례합니다. `PARTITION_BY` 를 설정하면 서비스 컬렉션 이름은 그대로 두고 실제 문서는
+`{컬렉션}__p{파티션}` 하위 컬렉션들에 나눠 저장합니다.
+
+    month   - 메시지 timestamp 의 UTC 연월 (m202401). 시간 필터가 있으면 겹치는 달만 검색
+    channel - 채널 이름 해시 % PARTITION_CHANNEL_GROUPS (g03). 채널 필터가 있으면 해당 그룹만 검색
+
+`PartitionedCollection` 은 ChromaDB 컬렉션과 같은 API 를 제공하므로 서비스 계층은 파티션을 모릅니다.
+쓰기는 메타데이터로 파티션을 골라 나눠 저장하고, query 는 where 필터에 맞는 파티션만 골라
+동시에 검색한 뒤 거리 기준으로 top-k 를 합칩니다. 파티션 컬렉션은 처음 필요할 때 열기 때문에
+필터로 잘린 오래된 파티션은 메모리에 올라오지 않습니다.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import hashlib
+import heapq
+import logging
+import threading
+import time
+import zlib
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 다른 워커가 만든 새 파티션을 알아채는 주기 (초)
+PARTITION_DISCOVERY_SECONDS = 30
+UNKNOWN_MONTH = "m000000"
+MAX_COLLECTION_NAME = 63
+
+_query_pool: Optional[ThreadPoolExecutor] = None
+_query_pool_lock = threading.Lock()
+
+def _get_query_pool() -> ThreadPoolExecutor:
+    global _query_pool
+    with _query_pool_lock:
+        if _query_pool is None:
+            _query_pool = ThreadPoolExecutor(max_workers=max(1, settings.partition_query_workers),
+                                             thread_name_prefix="partition-query")
+        return _query_pool
+
+def partition_collection_name(name: str, suffix: str) -> str:
+    """파티션 컬렉션 이름 (ChromaDB 63자 제한을 넘으면 컬렉션 이름을 해시로 축약)"""
+    full = f"{name}__p{suffix}"
+    if len(full) <= MAX_COLLECTION_NAME:
+        return full
+    digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+    return f"{name[:MAX_COLLECTION_NAME - len(suffix) - 12]}-{digest}__p{suffix}"
+
+def partition_key(metadata: Optional[Dict]) -> str:
+    """문서 메타데이터로 파티션 결정"""
+    metadata = metadata or {}
+    if settings.partition_by == "channel":
+        channel = metadata.get("channel") or "Unknown"
+        return f"g{zlib.crc32(channel.encode('utf-8')) % max(1, settings.partition_channel_groups):02d}"
+    try:
+        moment = datetime.fromtimestamp(float(metadata.get("timestamp")), tz=timezone.utc)
+    except (TypeError, ValueError):
+        return UNKNOWN_MONTH
+    return f"m{moment.year:04d}{moment.month:02d}"
+
+def _month_range(suffix: str) -> Optional[Tuple[float, float]]:
+    if suffix == UNKNOWN_MONTH:
+        return None
+    year, month = int(suffix[1:5]), int(suffix[5:7])
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start.timestamp(), end.timestamp()
+
+def _channels_in(where: Optional[Dict]) -> Optional[Set[str]]:
+    """where 필터가 허용하는 채널 이름 집합 (제한이 없으면 None)"""
+    if not where:
+        return None
+    allowed = None
+    for key, condition in where.items():
+        found = None
+        if key == "channel":
+            if not isinstance(condition, dict):
+                found = {condition}
+            elif "$eq" in condition:
+                found = {condition["$eq"]}
+            elif "$in" in condition:
+                found = set(condition["$in"])
+        elif key == "$and":
+            for sub in condition:
+                sub_channels = _channels_in(sub)
+                if sub_channels is not None:
+                    found = sub_channels if found is None else found & sub_channels
+        elif key == "$or":
+            branches = [_channels_in(sub) for sub in condition]
+            if branches and all(branch is not None for branch in branches):
+                found = set().union(*branches)
+        if found is not None:
+            allowed = found if allowed is None else allowed & found
+    return allowed
+
+def _time_range(where: Optional[Dict]) -> Tuple[Optional[float], Optional[float], bool]:
+    """where 필터의 ts_epoch 범위 (최상위 또는 $and 안의 $gt/$gte/$lt/$lte)
+
+    Returns:
+        (하한, 상한, 상한 포함 여부)
+    """
+    low, high, inclusive = None, None, True
+    if not where:
+        return low, high, inclusive
+    conditions = [where] + list(where.get("$and", []))
+    for item in conditions:
+        condition = item.get("ts_epoch")
+        if not isinstance(condition, dict):
+            continue
+        for op in ("$gt", "$gte"):
+            if op in condition:
+                low = condition[op] if low is None else max(low, condition[op])
+        for op in ("$lt", "$lte"):
+            if op in condition and (high is None or condition[op] <= high):
+                inclusive = op == "$lte" and (high is None or condition[op] < high or inclusive)
+                high = condition[op]
+    return low, high, inclusive
+
+def _empty_query_result(count: int, include) -> Dict:
+    result = {"ids": [[] for _ in range(count)]}
+    for field in ("documents", "metadatas", "distances"):
+        result[field] = [[] for _ in range(count)] if field in include else None
+    result["embeddings"] = None
+    return result
+
+class PartitionedCollection:
+    """파티션 컬렉션들을 하나의 ChromaDB 컬렉션처럼 다루는 라우터"""
+
+    def __init__(self, name: str, open_collection: Callable[[str], object], list_names: Callable[[], List[str]],
+                 max_batch_size: Optional[int] = None):
+        self.name = name
+        self._open_collection = open_collection
+        self._list_names = list_names
+        self._prefix = partition_collection_name(name, "")
+        self._handles: Dict[str, object] = {}
+        self._known: Set[str] = set()
+        self._discovered_at = 0.0
+        self._lock = threading.Lock()
+        # 파티션별로 나눠 쓰므로 한 번의 쓰기 한도는 하위 컬렉션과 같음
+        self.max_batch_size = max_batch_size
+
+    # ------------------------------------------------------------------
+    # 파티션 목록 / 라우팅
+    # ------------------------------------------------------------------
+    def partitions(self) -> List[str]:
+        """존재하는 파티션 목록 (이름순 = 월별이면 오래된 순)"""
+        with self._lock:
+            if time.monotonic() - self._discovered_at > PARTITION_DISCOVERY_SECONDS:
+                self._known.update(
+                    collection_name[len(self._prefix):] for collection_name in self._list_names()
+                    if collection_name.startswith(self._prefix)
+                )
+                self._discovered_at = time.monotonic()
+            return sorted(self._known)
+
+    def _partition(self, suffix: str):
+        """파티션 컬렉션 열기 (없으면 생성) - 처음 필요할 때만 연다"""
+        with self._lock:
+            handle = self._handles.get(suffix)
+            if handle is None:
+                handle = self._open_collection(partition_collection_name(self.name, suffix))
+                self._handles[suffix] = handle
+                self._known.add(suffix)
+            return handle
+
+    def select_partitions(self, where: Optional[Dict] = None) -> List[str]:
+        """where 필터와 겹칠 수 있는 파티션만 선택"""
+        suffixes = self.partitions()
+        if settings.partition_by == "channel":
+            channels = _channels_in(where)
+            if channels is not None:
+                groups = {partition_key({"channel": channel}) for channel in channels}
+                suffixes = [suffix for suffix in suffixes if suffix in groups]
+        else:
+            low, high, inclusive = _time_range(where)
+            if low is not None or high is not None:
+                selected = []
+                for suffix in suffixes:
+                    bounds = _month_range(suffix)
+                    if not bounds or (low is not None and bounds[1] <= low):
+                        continue
+                    if high is not None and (bounds[0] > high or (bounds[0] == high and not inclusive)):
+                        continue
+                    selected.append(suffix)
+                suffixes = selected
+        return suffixes
+
+    def _route(self, metadatas: List[Dict]) -> Dict[str, List[int]]:
+        groups: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault(partition_key(metadata), []).append(i)
+        return groups
+
+    def _locate(self, ids: List[str]) -> Dict[str, List[str]]:
+        """문서 ID 가 들어 있는 파티션 찾기 (메타데이터 없이 수정/삭제할 때)"""
+        located = {}
+        for suffix in self.partitions():
+            found = self._partition(suffix).get(ids=ids, include=[])["ids"]
+            if found:
+                located[suffix] = found
+        return located
+
+    # ------------------------------------------------------------------
+    # ChromaDB 호환 API
+    # ------------------------------------------------------------------
+    def _write(self, method: str, ids, embeddings, metadatas, documents):
+        ids = list(ids)
+        if embeddings is not None:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+        for suffix, rows in self._route(metadatas or [{}] * len(ids)).items():
+            getattr(self._partition(suffix), method)(
+                ids=[ids[i] for i in rows],
+                embeddings=None if embeddings is None else embeddings[rows],
+                metadatas=None if metadatas is None else [metadatas[i] for i in rows],
+                documents=None if documents is None else [documents[i] for i in rows],
+            )
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write("add", ids, embeddings, metadatas, documents)
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write("upsert", ids, embeddings, metadatas, documents)
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None):
+        if metadatas is not None:
+            self._write("update", ids, embeddings, metadatas, documents)
+            return
+        position = {doc_id: i for i, doc_id in enumerate(ids)}
+        for suffix, found in self._locate(list(ids)).items():
+            rows = [position[doc_id] for doc_id in found]
+            self._partition(suffix).update(
+                ids=found,
+                embeddings=None if embeddings is None else np.asarray(embeddings, dtype=np.float32)[rows],
+                documents=None if documents is None else [documents[i] for i in rows],
+            )
+
+    def delete(self, ids=None, where=None):
+        if ids is not None:
+            for suffix, found in self._locate(list(ids)).items():
+                self._partition(suffix).delete(ids=found)
+            return
+        for suffix in self.select_partitions(where):
+            self._partition(suffix).delete(where=where)
+
+    def count(self) -> int:
+        return sum(self._partition(suffix).count() for suffix in self.partitions())
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas", "documents")) -> Dict:
+        """파티션 순서대로 이어 붙인 결과 (limit/offset 은 전체 기준)"""
+        result = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        skip = offset or 0
+        for suffix in self.select_partitions(where):
+            if limit is not None and len(result["ids"]) >= limit:
+                break
+            collection = self._partition(suffix)
+            if skip:
+                # 앞 파티션은 개수만 세서 건너뛰기
+                size = collection.count() if ids is None and where is None else \
+                    len(collection.get(ids=ids, where=where, include=[])["ids"])
+                if skip >= size:
+                    skip -= size
+                    continue
+            page = collection.get(ids=ids, where=where, include=list(include), offset=skip or None,
+                                  limit=None if limit is None else limit - len(result["ids"]))
+            skip = 0
+            for field in result:
+                if page.get(field) is not None:
+                    result[field].extend(page[field])
+        for field in ("documents", "metadatas", "embeddings"):
+            if field not in include:
+                result[field] = None
+        return result
+
+    def query(self, query_embeddings, n_results: int = 10, where=None,
+              include=("metadatas", "documents", "distances"), **kwargs) -> Dict:
+        """필터에 맞는 파티션을 동시에 검색하고 거리 기준 top-k 병합"""
+        query_count = len(query_embeddings)
+        suffixes = self.select_partitions(where)
+        if not suffixes:
+            return _empty_query_result(query_count, include)
+        fields = list(dict.fromkeys([*include, "distances"]))
+
+        def search(suffix: str) -> Dict:
+            collection = self._partition(suffix)
+            size = collection.count()
+            if not size:
+                return None
+            return collection.query(query_embeddings=query_embeddings, n_results=min(n_results, size),
+                                    where=where, include=fields, **kwargs)
+
+        if len(suffixes) == 1:
+            pages = [search(suffixes[0])]
+        else:
+            pages = list(_get_query_pool().map(search, suffixes))
+        pages = [page for page in pages if page]
+
+        merged = _empty_query_result(query_count, include)
+        for q in range(query_count):
+            candidates = [
+                (page["distances"][q][i], p, i)
+                for p, page in enumerate(pages) for i in range(len(page["ids"][q]))
+            ]
+            for _, p, i in heapq.nsmallest(n_results, candidates):
+                merged["ids"][q].append(pages[p]["ids"][q][i])
+                for field in ("documents", "metadatas", "distances"):
+                    if merged[field] is not None:
+                        merged[field][q].append(pages[p][field][q][i])
+        return merged
+
+    def describe(self) -> List[Dict]:
+        """파티션별 문서 수와 이 프로세스에서 열린(최근 사용된) 여부"""
+        opened = set(self._handles)
+        return [
+            {"partition": suffix, "collection": partition_collection_name(self.name, suffix),
+             "opened": suffix in opened, "count": self._partition(suffix).count()}
+            for suffix in self.partitions()
+        ]
+
+    def compact(self, before: Optional[str] = None) -> Dict[str, object]:
+        """오래된 파티션 정리 (저장소가 compact 를 지원하는 경우, 예: quantized 저장소)
+
+        Args:
+            before: 이 파티션 이름보다 앞(월별이면 더 오래된) 파티션만 대상
+        """
+        result = {}
+        for suffix in self.partitions():
+            if before is not None and suffix >= before:
+                continue
+            collection = self._partition(suffix)
+            if hasattr(collection, "compact"):
+                result[suffix] = collection.compact()
+        return result
@@ -0,0 +1,471 @@
+"""메모리맵 양자화 벡터 저장소 - ChromaDB 컬렉션 호환 인터페이스
+
+ChromaDB의 HNSW 인덱스는 모든 벡터를 float32로 메모리에 올리므로 수백만 메시지
+규모에서는 수 GB의 RAM을 사용합니다. 이 저장소는
+
+- 검색용 압축 벡터(float16, 또는 int8 + 행별 scale)를 memmap 파일로,
+- 재채점용 원본 float32 벡터를 별도 memmap 파일로,
+- id/문서/메타데이터는 SQLite에
+
+보관합니다. 검색은 압축 벡터 전체를 블록 단위로 벡터화 스캔(coarse pass)한 뒤,
+상위 후보만 float32 원본으로 다시 채점합니다. 거리 값은 ChromaDB의 cosine
+공간과 같은 `1 - cosine similarity` 입니다.
+
+쓰기(append/삭제/compact)는 저장소 디렉토리의 `write.lock` 파일 잠금으로 프로세스 간에 직렬화하고,
+자기 쓰기 후에는 행 수/alive 마스크만 늘려 갱신합니다. 삭제/교체로 죽은 행이 `VECTOR_STORE_COMPACT_RATIO`
+이상이 되면 자동으로 compact 하며, compact 는 새 세대 파일을 다 쓴 뒤 한 트랜잭션에서 레코드와 세대 번호를
+바꾸므로 중간에 죽어도 이전 파일과 레코드가 그대로 남습니다.
+
+`settings.vector_store = "quantized"` 이면 `get_collection()` 이 이 저장소를 반환합니다.
+"""
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import numpy as np
+from app.core.config import settings
+from app.core.leader import file_lock
+
+SCAN_BLOCK_ROWS = 65536  # coarse pass 한 번에 복사/계산할 행 수
+CODE_DTYPES = {"float16": np.float16, "int8": np.int8}
+COMPACT_MIN_DEAD_ROWS = 1024  # 죽은 행이 이보다 적으면 비율과 관계없이 자동 compact 하지 않음
+WRITE_LOCK_FILE = "write.lock"
+
+_SQL_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+def _where_to_sql(where: Optional[Dict]) -> Tuple[str, List]:
+    """ChromaDB where 필터를 SQLite 조건식으로 변환 (json_extract 기반)"""
+    if not where:
+        return "1=1", []
+
+    clauses, params = [], []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_to_sql(sub) for sub in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, sub_params in parts:
+                params.extend(sub_params)
+            continue
+
+        field = "json_extract(metadata, ?)"
+        path = f'$."{key}"'
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, value in condition.items():
+            if op in ("$in", "$nin"):
+                placeholders = ",".join("?" for _ in value) or "NULL"
+                negate = "NOT " if op == "$nin" else ""
+                clauses.append(f"{field} {negate}IN ({placeholders})")
+                params.extend([path, *value])
+            elif op in _SQL_OPERATORS:
+                clauses.append(f"{field} {_SQL_OPERATORS[op]} ?")
+                params.extend([path, value])
+            else:
+                raise ValueError(f"지원하지 않는 where 연산자입니다: {op}")
+
+    return " AND ".join(clauses), params
+
+def _generation_path(directory: str, filename: str, generation: int) -> str:
+    """compact 세대별 데이터 파일 경로 (0세대는 기존 파일명 그대로)"""
+    if not generation:
+        return os.path.join(directory, filename)
+    stem, ext = os.path.splitext(filename)
+    return os.path.join(directory, f"{stem}.{generation}{ext}")
+
+def _write_file(path: str, array: np.ndarray):
+    """배열을 새 파일로 쓰고 fsync (compact 트랜잭션 커밋 전에 디스크에 있어야 함)"""
+    with open(path, "wb") as f:
+        f.write(np.ascontiguousarray(array).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+def _remove_stale_files(directory: str, prefixes: Tuple[str, ...], keep: List[str]):
+    """이전 세대(또는 중단된 compact)의 데이터 파일 삭제"""
+    keep = {os.path.basename(path) for path in keep}
+    for filename in os.listdir(directory):
+        if filename.startswith(prefixes) and filename not in keep:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class QuantizedCollection:
+    """float16/int8 memmap 벡터 + SQLite 메타데이터로 구성된 컬렉션"""
+
+    def __init__(self, name: str, directory: str, dtype: str = "int8"):
+        if dtype not in CODE_DTYPES:
+            raise ValueError(f"quantized_dtype은 {list(CODE_DTYPES)} 중 하나여야 합니다: {dtype}")
+        self.name = name
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, "store.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+        info = dict(self._db.execute("SELECT key, value FROM info").fetchall())
+        # 이미 만들어진 저장소는 생성 시점의 dtype을 유지
+        self.dtype = info.get("dtype", dtype)
+        self.dim = int(info["dim"]) if "dim" in info else None
+        self.metadata = {"hnsw:space": "cosine", "quantized_dtype": self.dtype}
+
+        self._write_lock_path = os.path.join(directory, WRITE_LOCK_FILE)
+        self._generation = None
+        self._data_version = None
+        self._reload()
+
+    # ------------------------------------------------------------------
+    # 내부 상태 관리
+    # ------------------------------------------------------------------
+    def _file_rows(self, path: str, itemsize: int) -> int:
+        if not self.dim or not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // (self.dim * itemsize)
+
+    def _paths(self, generation: int) -> Tuple[str, str, str]:
+        return (
+            _generation_path(self.directory, "vectors.f32", generation),
+            _generation_path(self.directory, f"codes.{self.dtype}", generation),
+            _generation_path(self.directory, "scales.f32", generation),
+        )
+
+    def _reload(self):
+        """파일 크기/SQLite 기준으로 행 수, memmap, alive 마스크를 다시 읽기 (O(N) - 열 때와 다른 프로세스의 변경 시)"""
+        generation = self._db.execute("SELECT value FROM info WHERE key = 'generation'").fetchone()
+        self._generation = int(generation[0]) if generation else 0
+        self._vectors_path, self._codes_path, self._scales_path = self._paths(self._generation)
+
+        code_itemsize = np.dtype(CODE_DTYPES[self.dtype]).itemsize
+        self._rows = min(
+            self._file_rows(self._vectors_path, 4),
+            self._file_rows(self._codes_path, code_itemsize),
+        )
+        self._open_maps()
+
+        # 중단된 append 로 인해 레코드 없이 남은 꼬리 행은 alive=False 로 취급
+        self._alive = np.zeros(self._rows, dtype=bool)
+        rows = [row for (row,) in self._db.execute("SELECT row FROM records")]
+        if rows:
+            rows = np.asarray(rows, dtype=np.int64)
+            self._alive[rows[rows < self._rows]] = True
+        self._alive_buffer = self._alive
+        self._live = int(self._alive.sum())
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _open_maps(self):
+        self._vectors = self._open_map(self._vectors_path, np.float32, self.dim)
+        self._codes = self._open_map(self._codes_path, CODE_DTYPES[self.dtype], self.dim)
+        self._scales = self._open_map(self._scales_path, np.float32, None) if self.dtype == "int8" else None
+
+    def _extend(self, count: int):
+        """자기 append 후 행 수/alive 마스크/memmap 만 늘리기 (레코드 전체를 다시 읽지 않음)"""
+        rows = self._rows + count
+        if rows > len(self._alive_buffer):
+            buffer = np.zeros(max(rows, len(self._alive_buffer) * 2, 1024), dtype=bool)
+            buffer[:self._rows] = self._alive
+            self._alive_buffer = buffer
+        self._alive_buffer[self._rows:rows] = True
+        self._alive = self._alive_buffer[:rows]
+        self._rows = rows
+        self._live += count
+        self._open_maps()
+
+    def _open_map(self, path: str, dtype, dim: Optional[int]):
+        if self._rows == 0:
+            return None
+        shape = (self._rows, dim) if dim else (self._rows,)
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+    def _refresh_if_changed(self):
+        """다른 프로세스가 같은 저장소를 수정했으면 다시 읽기"""
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._reload()
+
+    @contextmanager
+    def _writing(self):
+        """스레드 잠금 + 저장소 파일 잠금을 잡고 최신 상태에서 쓰기 (실패하면 트랜잭션/메모리 상태 되돌림)"""
+        with self._lock, file_lock(self._write_lock_path):
+            self._refresh_if_changed()
+            try:
+                yield
+            except BaseException:
+                self._db.rollback()
+                self._reload()
+                raise
+
+    def _maybe_compact(self):
+        """삭제/교체로 죽은 행이 VECTOR_STORE_COMPACT_RATIO 이상이면 compact (쓰기 잠금 안에서 호출)"""
+        dead = self._rows - self._live
+        ratio = settings.vector_store_compact_ratio
+        if ratio > 0 and dead >= COMPACT_MIN_DEAD_ROWS and dead >= ratio * self._rows:
+            self._compact()
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.dtype == "float16":
+            return vectors.astype(np.float16), None
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _append_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """정규화된 벡터를 파일 끝에 추가하고 새 행 번호 배열을 반환"""
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._db.execute("INSERT OR REPLACE INTO info VALUES ('dim', ?)", (str(self.dim),))
+            self._db.execute("INSERT OR REPLACE INTO info VALUES ('dtype', ?)", (self.dtype,))
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원이 컬렉션({self.dim})과 다릅니다: {vectors.shape[1]}")
+
+        codes, scales = self._quantize(vectors)
+        start = self._rows
+        for path, array in ((self._vectors_path, vectors), (self._codes_path, codes), (self._scales_path, scales)):
+            if array is None:
+                continue
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                # 중단된 이전 append 의 꼬리 데이터는 덮어쓰기
+                f.seek(start * array.itemsize * (array.shape[1] if array.ndim == 2 else 1))
+                f.write(np.ascontiguousarray(array).tobytes())
+                f.truncate()
+        return np.arange(start, start + len(vectors), dtype=np.int64)
+
+    def _rows_for(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+                  limit: Optional[int] = None, offset: Optional[int] = None) -> List[Tuple]:
+        sql, params = _where_to_sql(where)
+        if ids is not None:
+            if not ids:
+                return []
+            sql += f" AND id IN ({','.join('?' for _ in ids)})"
+            params = params + list(ids)
+        sql = f"SELECT row, id, document, metadata FROM records WHERE {sql} ORDER BY row"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limit if limit is not None else -1, offset or 0]
+        return self._db.execute(sql, params).fetchall()
+
+    def _delete_rows(self, rows: List[int]):
+        if not rows:
+            return
+        self._db.executemany("DELETE FROM records WHERE row = ?", [(int(r),) for r in rows])
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[rows < self._rows]
+        self._live -= int(self._alive[rows].sum())
+        self._alive[rows] = False
+
+    def _write(self, ids, embeddings, metadatas, documents, replace: bool):
+        vectors = _normalize(embeddings)
+        if len(vectors) != len(ids):
+            raise ValueError("ids 와 embeddings 의 개수가 다릅니다.")
+        metadatas = metadatas or [None] * len(ids)
+        documents = documents or [None] * len(ids)
+
+        with self._writing():
+            existing = {record[1]: record[0] for record in self._rows_for(ids=list(ids))}
+            if replace:
+                self._delete_rows(list(existing.values()))
+            else:
+                # ChromaDB add 와 동일하게 이미 있는 id 는 건너뜀
+                keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+                ids = [ids[i] for i in keep]
+                vectors = vectors[keep]
+                metadatas = [metadatas[i] for i in keep]
+                documents = [documents[i] for i in keep]
+                if not ids:
+                    return
+
+            rows = self._append_vectors(vectors)
+            self._db.executemany(
+                "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (int(row), doc_id, document, json.dumps(metadata or {}, ensure_ascii=False))
+                    for row, doc_id, document, metadata in zip(rows, ids, documents, metadatas)
+                ],
+            )
+            self._db.commit()
+            self._extend(len(rows))
+            self._maybe_compact()
+
+    # ------------------------------------------------------------------
+    # ChromaDB 호환 API
+    # ------------------------------------------------------------------
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write(list(ids), embeddings, metadatas, documents, replace=False)
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write(list(ids), embeddings, metadatas, documents, replace=True)
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None):
+        if embeddings is not None:
+            records = {r[1]: r for r in self._rows_for(ids=list(ids))}
+            self._write(
+                list(ids), embeddings,
+                metadatas or [json.loads(records[i][3]) if i in records else {} for i in ids],
+                documents or [records[i][2] if i in records else None for i in ids],
+                replace=True,
+            )
+            return
+        with self._writing():
+            for i, doc_id in enumerate(ids):
+                if metadatas is not None:
+                    self._db.execute("UPDATE records SET metadata = ? WHERE id = ?",
+                                     (json.dumps(metadatas[i], ensure_ascii=False), doc_id))
+                if documents is not None:
+                    self._db.execute("UPDATE records SET document = ? WHERE id = ?", (documents[i], doc_id))
+            self._db.commit()
+
+    def delete(self, ids=None, where=None):
+        with self._writing():
+            self._delete_rows([record[0] for record in self._rows_for(ids=ids, where=where)])
+            self._db.commit()
+            self._maybe_compact()
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def get(self, ids=None, where=None, limit=None, offset=None,
+            include=("metadatas", "documents")) -> Dict:
+        with self._lock:
+            self._refresh_if_changed()
+            records = self._rows_for(ids=ids, where=where, limit=limit, offset=offset)
+            result = {
+                "ids": [r[1] for r in records],
+                "documents": [r[2] for r in records] if "documents" in include else None,
+                "metadatas": [json.loads(r[3]) for r in records] if "metadatas" in include else None,
+                "embeddings": None,
+            }
+            if "embeddings" in include:
+                rows = np.asarray([r[0] for r in records], dtype=np.int64)
+                result["embeddings"] = (
+                    np.asarray(self._vectors[rows]) if len(rows) else np.zeros((0, self.dim or 0), np.float32)
+                )
+            return result
+
+    def _coarse_candidates(self, query: np.ndarray, rows: Optional[np.ndarray], candidates: int) -> np.ndarray:
+        """압축 벡터로 전체(또는 필터된 행)를 스캔해 상위 후보 행 번호 반환"""
+        total = self._rows if rows is None else len(rows)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+
+        for start in range(0, total, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, total)
+            block_rows = np.arange(start, end) if rows is None else rows[start:end]
+            codes = self._codes[start:end] if rows is None else self._codes[block_rows]
+            scores = codes.astype(np.float32) @ query
+            if self._scales is not None:
+                scores *= self._scales[start:end] if rows is None else self._scales[block_rows]
+            scores[~self._alive[block_rows]] = -np.inf
+
+            best_rows = np.concatenate([best_rows, block_rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > candidates:
+                keep = np.argpartition(-best_scores, candidates)[:candidates]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        return best_rows[np.isfinite(best_scores)]
+
+    def query(self, query_embeddings, n_results: int = 10, where=None, where_document=None,
+              include=("metadatas", "documents", "distances")) -> Dict:
+        if where_document:
+            raise ValueError("quantized 저장소는 where_document 필터를 지원하지 않습니다.")
+        queries = _normalize(query_embeddings)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": None}
+
+        with self._lock:
+            self._refresh_if_changed()
+            rows = None
+            if where:
+                rows = np.asarray([r[0] for r in self._rows_for(where=where)], dtype=np.int64)
+                rows = rows[rows < self._rows]
+
+            for query in queries:
+                if self._rows == 0 or (rows is not None and len(rows) == 0):
+                    candidate_rows = np.empty(0, dtype=np.int64)
+                else:
+                    candidates = max(n_results * settings.quantized_rescore_factor, n_results)
+                    candidate_rows = np.sort(self._coarse_candidates(query, rows, candidates))
+
+                # 상위 후보만 float32 원본으로 정밀 재채점
+                exact = np.asarray(self._vectors[candidate_rows]) @ query if len(candidate_rows) else np.empty(0)
+                order = np.argsort(-exact)[:n_results]
+                top_rows, top_scores = candidate_rows[order], exact[order]
+
+                by_row = {r[0]: r for r in self._db.execute(
+                    f"SELECT row, id, document, metadata FROM records WHERE row IN "
+                    f"({','.join(str(int(r)) for r in top_rows) or 'NULL'})"
+                )}
+                records = [by_row[int(r)] for r in top_rows]
+                result["ids"].append([r[1] for r in records])
+                result["documents"].append([r[2] for r in records])
+                result["metadatas"].append([json.loads(r[3]) for r in records])
+                result["distances"].append([float(1.0 - s) for s in top_scores])
+
+        return result
+
+    def compact(self):
+        """삭제된 행을 제거하고 파일을 다시 써서 디스크 공간 회수"""
+        with self._writing():
+            self._compact()
+
+    def _compact(self):
+        """살아 있는 행을 다음 세대 파일로 쓰고, 레코드와 세대 번호를 한 트랜잭션에서 교체"""
+        records = self._rows_for()
+        generation = self._generation + 1
+        paths = self._paths(generation)
+        if records:
+            vectors = np.asarray(self._vectors[[r[0] for r in records]])
+            codes, scales = self._quantize(vectors)
+            for path, array in zip(paths, (vectors, codes, scales)):
+                if array is not None:
+                    _write_file(path, array)
+
+        self._db.execute("DELETE FROM records")
+        self._db.executemany(
+            "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+            [(row, r[1], r[2], r[3]) for row, r in enumerate(records)],
+        )
+        self._db.execute("INSERT OR REPLACE INTO info VALUES ('generation', ?)", (str(generation),))
+        self._db.commit()
+        # 다른 프로세스가 아직 매핑 중인 이전 파일도 unlink 후 매핑은 유효하고, 다음 읽기에서 새 세대로 전환됨
+        _remove_stale_files(self.directory, ("vectors.", "codes.", "scales."), list(paths))
+        self._reload()
+
+_collections: Dict[str, QuantizedCollection] = {}
+_collections_lock = threading.Lock()
+
+def get_quantized_collection(name: str) -> QuantizedCollection:
+    """컬렉션 인스턴스를 프로세스 내에서 재사용 (memmap 재오픈 비용 절감)"""
+    directory = os.path.join(settings.chroma_persist_directory, "quantized", name)
+    with _collections_lock:
+        collection = _collections.get(directory)
+        if collection is None:
+            collection = QuantizedCollection(name, directory, settings.quantized_dtype)
+            _collections[directory] = collection
+        return collection
+
+def drop_quantized_collection(name: str):
+    """컬렉션 디렉토리 삭제 (열려 있던 인스턴스도 닫고 캐시에서 제거)"""
+    directory = os.path.join(settings.chroma_persist_directory, "quantized", name)
+    with _collections_lock:
+        collection = _collections.pop(directory, None)
+        if collection is not None:
+            collection._db.close()
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,61 @@
+"""동시에 들어온 같은 요청을 한 번만 실행하는 single-flight
+
+장애가 시작되면 여러 사람이 몇 초 사이에 거의 같은 질문으로 `/search` 를 호출합니다.
+같은 키의 호출이 이미 진행 중이면 새 호출은 직접 실행하지 않고 기다렸다가 진행 중인
+호출의 결과(또는 예외)를 그대로 받습니다. 완료된 결과는 보관하지 않으므로(캐시 아님)
+실행이 끝난 뒤 들어온 호출은 다시 실행됩니다.
+
+프로세스(uvicorn 워커) 안의 스레드끼리만 합쳐집니다.
+"""
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+import threading
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = registry.counter(
+    "slack_qa_singleflight_calls_total",
+    "single-flight 호출 수 (role=leader: 직접 실행, role=coalesced: 진행 중인 호출 결과를 공유)"
+)
+SINGLEFLIGHT_IN_FLIGHT = registry.gauge("slack_qa_singleflight_in_flight", "진행 중인 single-flight 호출 수")
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """key 로 fn 실행 → (결과, 다른 호출의 결과를 공유했는지)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLEFLIGHT_CALLS.inc(flight=self.name, role="coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        SINGLEFLIGHT_CALLS.inc(flight=self.name, role="leader")
+        SINGLEFLIGHT_IN_FLIGHT.inc(flight=self.name)
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            SINGLEFLIGHT_IN_FLIGHT.inc(-1, flight=self.name)
+            call.done.set()
+        return call.result, False
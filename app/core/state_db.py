@@ -0,0 +1,101 @@
+"""동기화/인덱싱 진행 상태를 보관하는 로컬 SQLite 저장소
+
+배치 단위로 커밋할 때마다 체크포인트(커서 + 배치 번호)를 기록해서, 프로세스가 중간에
+죽어도 다음 실행이 이미 저장된 배치를 다시 임베딩하지 않고 이어서 진행합니다.
+
+체크포인트 키 예시:
+    index:{컬렉션}:{replace|append}:{파일 해시}  - 파일 인덱싱 (cursor = 다음 청크 위치)
+    channel:{채널 ID}                           - 채널 동기화 (cursor = 마지막으로 저장한 메시지 ts)
+    sync:{채널 목록}:{hours_back}                - 여러 채널 동기화 실행 (data.done = 완료한 채널)
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+import json
+import os
+import sqlite3
+import threading
+from app.core.config import settings
+
+STATE_DB_FILE = "sync_state.sqlite3"
+
+@contextmanager
+def connect(path: str) -> Iterator[sqlite3.Connection]:
+    """SQLite 연결을 열고 블록이 끝나면 커밋(예외 시 롤백)한 뒤 닫기
+
+    `with sqlite3.connect(...)` 는 트랜잭션만 끝내고 연결은 닫지 않아서, 호출마다 연결을 여는
+    저장소(상태 DB / 유사 메시지 인덱스 / 인덱스 통계)는 이 함수로 연결합니다.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+class StateDB:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                " job TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " cursor TEXT,"
+                " batch INTEGER NOT NULL DEFAULT 0,"
+                " data TEXT,"
+                " updated_at TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        # 호출마다 연결을 열어 스레드/프로세스 간 공유 문제를 피함
+        return connect(self.path)
+
+    def get_checkpoint(self, job: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT job, status, cursor, batch, data, updated_at FROM checkpoints WHERE job = ?", (job,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def save_checkpoint(self, job: str, cursor=None, batch: int = 0, status: str = "running",
+                        data: Optional[Dict] = None):
+        """체크포인트 기록 (같은 job 은 덮어씀)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job, status, cursor, batch, data, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job, status, None if cursor is None else str(cursor), batch,
+                 json.dumps(data or {}, ensure_ascii=False), datetime.now().isoformat())
+            )
+
+    def delete_checkpoint(self, job: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE job = ?", (job,))
+
+    def list_checkpoints(self, prefix: str = "") -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job, status, cursor, batch, data, updated_at FROM checkpoints"
+                " WHERE job LIKE ? ORDER BY updated_at DESC", (prefix + "%",)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row) -> Dict:
+        job, status, cursor, batch, data, updated_at = row
+        return {"job": job, "status": status, "cursor": cursor, "batch": batch,
+                "data": json.loads(data) if data else {}, "updated_at": updated_at}
+
+_instances: Dict[str, StateDB] = {}
+_instances_lock = threading.Lock()
+
+def get_state_db() -> StateDB:
+    """설정된 경로의 상태 DB (기본: CHROMA_PERSIST_DIRECTORY/sync_state.sqlite3)"""
+    path = settings.state_db_path or os.path.join(settings.chroma_persist_directory, STATE_DB_FILE)
+    with _instances_lock:
+        if path not in _instances:
+            _instances[path] = StateDB(path)
+        return _instances[path]
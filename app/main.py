@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import router
 from app.core.config import settings
+from app.core.metrics import registry, collect_spans
+import json
 import logging
+import time
 
 # 로깅 설정
 logging.basicConfig(
@@ -11,6 +14,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+REQUEST_DURATION = registry.histogram("slack_qa_http_request_duration_seconds", "HTTP 요청 처리 시간 (초)")
+REQUEST_COUNT = registry.counter("slack_qa_http_requests_total", "HTTP 요청 수")
+# 매칭되는 라우트가 없는 요청의 path 라벨
+UNMATCHED_ROUTE = "unmatched"
+
 app = FastAPI(
     title="Slack Q&A Search API",
     description="슬랙 대화 내용 검색 및 요약 API",
@@ -27,6 +35,38 @@ app.add_middleware(
 
 app.include_router(router, prefix="/api/v1")
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """요청별 지연시간 기록 및 느린 요청의 단계별 구조화 로그"""
+    start = time.perf_counter()
+    status_code = 500
+    with collect_spans() as spans:
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            # 라우트 템플릿 기준으로 집계 (경로 파라미터로 인한 라벨 폭증 방지). 매칭되는 라우트가
+            # 없는 요청(404)은 아무 경로나 보낼 수 있으므로 하나의 라벨로 묶음
+            route = request.scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            REQUEST_DURATION.observe(elapsed, method=request.method, path=path)
+            REQUEST_COUNT.inc(method=request.method, path=path, status=status_code)
+            
+            if elapsed * 1000 >= settings.slow_request_threshold_ms:
+                logger.warning(json.dumps({
+                    "event": "slow_request",
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "stages": [
+                        {"stage": stage, "duration_ms": round(seconds * 1000, 1)}
+                        for stage, seconds in spans
+                    ]
+                }, ensure_ascii=False))
+
 @app.get("/")
 async def root():
     return {"message": "Slack Q&A Search API", "version": "1.0.0"}
@@ -36,12 +76,22 @@ async def startup_event():
     """앱 시작 시 실행되는 이벤트"""
     logger.info("🚀 Slack Q&A Search API 시작")
     
+    # 임베디드 ChromaDB 는 여러 프로세스가 공유할 수 없으므로 두 번째 워커는 여기서 시작을 거부
+    # (멀티 워커는 CHROMA_SERVER_HOST 또는 VECTOR_STORE=quantized/hnswlib 필요)
+    if settings.vector_store == "chroma" and not settings.chroma_server_host:
+        from app.core.database import claim_embedded_chroma
+        claim_embedded_chroma()
+    
+    # 무거운 모듈 로드는 백그라운드에서 (/health 는 즉시 응답, /ready 는 완료 후 200)
+    from app.services.warmup import warmup
+    warmup.start()
+    
     # Slack 자동 동기화 스케줄러 시작
     if settings.slack_auto_sync_enabled and settings.slack_bot_token:
         try:
             from app.services.scheduler import scheduler
             scheduler.start()
-            logger.info(f"✅ Slack 자동 동기화 활성화 (간격: {settings.slack_sync_interval_minutes}분)")
+            logger.info(f"✅ Slack 자동 동기화 활성화 (모드: {scheduler.mode}, 간격: {scheduler.sync_interval // 60}분)")
         except Exception as e:
             logger.error(f"❌ Slack 자동 동기화 시작 실패: {e}")
     else:
@@ -58,6 +108,20 @@ async def shutdown_event():
         scheduler.stop()
     except:
         pass
+    
+    # 대기 중인 Slack 이벤트 반영 후 인덱서 중지
+    try:
+        from app.services.slack_events import event_queue
+        event_queue.stop()
+    except:
+        pass
+    
+    # 임베딩 워커 프로세스 종료
+    try:
+        from app.services.local_embedding import shutdown_pools
+        shutdown_pools()
+    except:
+        pass
 
 if __name__ == "__main__":
     import uvicorn
@@ -8,10 +8,14 @@ class SlackMessage(BaseModel):
     ts: str
     channel: Optional[str] = None
     thread_ts: Optional[str] = None
+    edited_ts: Optional[str] = None  # Slack `edited.ts` (수정된 메시지만)
     
 class SearchQuery(BaseModel):
     question: str
     top_k: Optional[int] = 10
+    channels: Optional[List[str]] = None  # 이 채널들의 메시지만 검색
+    since: Optional[datetime] = None  # 이 시각 이후 메시지만 검색
+    until: Optional[datetime] = None  # 이 시각 이전 메시지만 검색
     
 class SearchResult(BaseModel):
     answer: str
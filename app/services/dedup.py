@@ -0,0 +1,411 @@
+"""인덱싱 전 유사(near-duplicate) 메시지 접기 - MinHash + LSH
+
+봇 알림, 복사해 붙인 스택 트레이스, 여러 채널에 올린 공지처럼 거의 같은 메시지를
+전부 임베딩/저장하면 인덱스가 커지고 검색 상위 5개 컨텍스트가 같은 내용으로 채워집니다.
+청크 텍스트의 문자 shingle 로 MinHash 서명을 만들고, LSH 밴드 버킷으로 후보를 찾은 뒤
+추정 Jaccard 가 `dedup_threshold` 이상이면 기존(대표) 문서로 접습니다.
+
+- 대표(canonical) 문서만 임베딩/저장하고, 메타데이터에 `duplicate_count`(자신 포함 출현 수)와
+  `duplicate_locations`(최대 DEDUP_MAX_LOCATIONS 개 "채널 timestamp" JSON 문자열)를 기록
+- 서명/밴드/중복 목록은 컬렉션별로 SQLite(CHROMA_PERSIST_DIRECTORY/dedup_index.sqlite3)에
+  보관하므로 파일 업로드와 Slack 동기화가 같은 인덱스를 점진적으로 갱신
+- 같은 문서 ID 로 다시 들어오면(재시도/이어서 진행/수정) 자기 자신과는 비교하지 않아 결과가 같음
+- 대표 서명은 임베딩 전에 등록하므로(같은 배치/다음 배치의 중복을 바로 접도록) 임베딩에 실패한
+  대표는 저장 전에 `release_failed_canonicals` 로 되돌리고, 거기 접힌 청크도 실패로 처리
+- `dedup_min_chars` 보다 짧은 메시지("감사합니다!" 등)는 접지 않음 (짧은 대화는 스레드 맥락이 다름)
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.state_db import connect
+
+DEDUP_DUPLICATES = registry.counter("slack_qa_dedup_duplicates_total", "유사 메시지로 접혀 임베딩/저장을 건너뛴 청크 수")
+
+DEDUP_DB_FILE = "dedup_index.sqlite3"
+DEDUP_MAX_LOCATIONS = 20
+SHINGLE_SIZE = 5
+MERSENNE_PRIME = (1 << 61) - 1
+# SQLite IN (...) 에 한 번에 넣을 값 수
+QUERY_BATCH_SIZE = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm: int):
+    # 서명이 프로세스/재시작 간에 같도록 고정 시드 (minhash 마다 만들지 않도록 num_perm 별로 캐시)
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    # 캐시된 배열을 공유하므로 실수로 바꾸지 못하게 읽기 전용
+    a.setflags(write=False)
+    b.setflags(write=False)
+    return a, b
+
+def shingles(text: str) -> List[str]:
+    """소문자/공백 정규화 후 문자 SHINGLE_SIZE-gram (형태소 분석 없이 한국어/코드 모두 동작)"""
+    normalized = _WHITESPACE.sub(" ", text.lower()).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        return [normalized]
+    return [normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)]
+
+def minhash(text: str, num_perm: int) -> np.ndarray:
+    """(num_perm,) uint32 MinHash 서명"""
+    a, b = _permutations(num_perm)
+    values = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in set(shingles(text))), dtype=np.uint64)
+    # (a*x + b) mod p 의 uint64 오버플로는 의도된 것 (datasketch 와 같은 방식, 곱이 넘쳐야 순서가 섞임)
+    with np.errstate(over="ignore"):
+        hashed = (np.outer(values, a) + b) % np.uint64(MERSENNE_PRIME)
+    return (hashed.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+def band_keys(signature: np.ndarray, bands: int) -> List[str]:
+    """LSH 밴드 버킷 키 - 파라미터가 다르면 키가 겹치지 않도록 접두어에 포함"""
+    rows = len(signature) // bands
+    return [
+        f"{bands}x{rows}:{band}:" + hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(),
+                                                   digest_size=8).hexdigest()
+        for band in range(bands)
+    ]
+
+def similarity(left: np.ndarray, right: np.ndarray) -> float:
+    """두 서명의 추정 Jaccard 유사도"""
+    if len(left) != len(right):
+        return 0.0
+    return float(np.mean(left == right))
+
+class NearDuplicateIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                " collection TEXT NOT NULL, doc_id TEXT NOT NULL, signature BLOB NOT NULL,"
+                " PRIMARY KEY (collection, doc_id))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS bands (collection TEXT NOT NULL, band_key TEXT NOT NULL, doc_id TEXT NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_key ON bands (collection, band_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_doc ON bands (collection, doc_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS members ("
+                " collection TEXT NOT NULL, member_id TEXT NOT NULL, canonical_id TEXT NOT NULL,"
+                " location TEXT, content_hash TEXT, reply INTEGER,"
+                " PRIMARY KEY (collection, member_id))"
+            )
+            # reply 열이 생기기 전 인덱스 - 기존 행은 답글 여부를 모름(NULL)으로 둠
+            if "reply" not in {row[1] for row in conn.execute("PRAGMA table_info(members)")}:
+                conn.execute("ALTER TABLE members ADD COLUMN reply INTEGER")
+            conn.execute("CREATE INDEX IF NOT EXISTS members_canonical ON members (collection, canonical_id)")
+        # 같은 컬렉션에 대한 collapse 는 순서대로 (후보 조회와 등록 사이에 끼어들지 않도록)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return connect(self.path)
+
+    @staticmethod
+    def _batches(values: List[str]) -> Iterable[List[str]]:
+        for start in range(0, len(values), QUERY_BATCH_SIZE):
+            yield values[start:start + QUERY_BATCH_SIZE]
+
+    def _remove_signatures(self, conn: sqlite3.Connection, collection: str, ids: List[str]):
+        for batch in self._batches(ids):
+            marks = ",".join("?" * len(batch))
+            conn.execute(f"DELETE FROM signatures WHERE collection = ? AND doc_id IN ({marks})", (collection, *batch))
+            conn.execute(f"DELETE FROM bands WHERE collection = ? AND doc_id IN ({marks})", (collection, *batch))
+
+    def collapse(self, collection: str, ids: List[str], texts: List[str], locations: List[str],
+                 content_hashes: Optional[List[Optional[str]]] = None,
+                 replies: Optional[List[Optional[bool]]] = None) -> Dict:
+        """새로 들어온 청크를 기존/같은 배치의 대표 문서와 비교해 접기
+
+        Args:
+            ids: 청크가 저장될 문서 ID (같은 ID 가 다시 오면 이전 기록을 대체)
+            locations: 중복 목록에 남길 위치 ("채널 timestamp")
+            content_hashes: Slack 동기화용 본문 해시 (접힌 메시지의 변경 여부 판단)
+            replies: 스레드 답글 여부 (conversations.history 에 나오지 않아 삭제 대사에서 제외)
+
+        Returns:
+            {"kept": 임베딩/저장할 청크 위치, "duplicate_of": {청크 위치: 대표 문서 ID},
+             "demoted": 대표였다가 다른 문서의 중복이 된 문서 ID (저장소에서 지워야 함)}
+        """
+        threshold = settings.dedup_threshold
+        num_perm, bands = settings.dedup_num_perm, settings.dedup_bands
+        content_hashes = content_hashes or [None] * len(ids)
+        replies = replies or [None] * len(ids)
+
+        signatures, keys = {}, {}
+        for i, text in enumerate(texts):
+            if len(text) >= settings.dedup_min_chars:
+                signatures[i] = minhash(text, num_perm)
+                keys[i] = band_keys(signatures[i], bands)
+
+        kept, duplicate_of, demoted = [], {}, []
+        with self._lock, self._connect() as conn:
+            # 배치 전체의 밴드 키로 기존 후보를 한 번에 조회
+            buckets: Dict[str, List[str]] = {}
+            for batch in self._batches(sorted({key for entries in keys.values() for key in entries})):
+                rows = conn.execute(
+                    f"SELECT band_key, doc_id FROM bands WHERE collection = ? AND band_key IN ({','.join('?' * len(batch))})",
+                    (collection, *batch)
+                ).fetchall()
+                for band_key, doc_id in rows:
+                    buckets.setdefault(band_key, []).append(doc_id)
+            candidate_ids = sorted({doc_id for doc_ids in buckets.values() for doc_id in doc_ids})
+            known: Dict[str, np.ndarray] = {}
+            for batch in self._batches(candidate_ids):
+                rows = conn.execute(
+                    f"SELECT doc_id, signature FROM signatures WHERE collection = ? AND doc_id IN ({','.join('?' * len(batch))})",
+                    (collection, *batch)
+                ).fetchall()
+                known.update((doc_id, np.frombuffer(blob, dtype=np.uint32)) for doc_id, blob in rows)
+            # 이미 대표로 등록된 ID (수정으로 다른 문서의 중복이 되면 저장소에서 지워야 함)
+            previous_canonicals = set()
+            for batch in self._batches(list(ids)):
+                rows = conn.execute(
+                    f"SELECT doc_id FROM signatures WHERE collection = ? AND doc_id IN ({','.join('?' * len(batch))})",
+                    (collection, *batch)
+                ).fetchall()
+                previous_canonicals.update(row[0] for row in rows)
+
+            for i, doc_id in enumerate(ids):
+                if i not in signatures:
+                    kept.append(i)
+                    continue
+                best_id, best_score = None, threshold
+                for candidate in dict.fromkeys(c for key in keys[i] for c in buckets.get(key, [])):
+                    if candidate == doc_id or candidate not in known:
+                        continue
+                    score = similarity(signatures[i], known[candidate])
+                    if score >= best_score:
+                        best_id, best_score = candidate, score
+                        if score == 1.0:
+                            break
+
+                if best_id is None:
+                    # 대표 문서로 등록 (같은 배치의 뒤 청크도 이 문서로 접힘)
+                    kept.append(i)
+                    known[doc_id] = signatures[i]
+                    for key in keys[i]:
+                        bucket = buckets.setdefault(key, [])
+                        if doc_id not in bucket:
+                            bucket.append(doc_id)
+                else:
+                    duplicate_of[i] = best_id
+                    if doc_id in previous_canonicals:
+                        demoted.append(doc_id)
+
+            # 결과 기록: 대표는 서명/밴드 갱신, 중복은 members 에 추가
+            self._remove_signatures(conn, collection, [ids[i] for i in kept] + demoted)
+            conn.executemany(
+                "INSERT INTO signatures (collection, doc_id, signature) VALUES (?, ?, ?)",
+                [(collection, ids[i], signatures[i].tobytes()) for i in kept if i in signatures]
+            )
+            conn.executemany(
+                "INSERT INTO bands (collection, band_key, doc_id) VALUES (?, ?, ?)",
+                [(collection, key, ids[i]) for i in kept if i in signatures for key in keys[i]]
+            )
+            for batch in self._batches([ids[i] for i in kept]):
+                conn.execute(
+                    f"DELETE FROM members WHERE collection = ? AND member_id IN ({','.join('?' * len(batch))})",
+                    (collection, *batch)
+                )
+            # 대표에서 밀려난 문서에 붙어 있던 중복은 대표가 사라지므로 정리 (다음 동기화에서 다시 판단)
+            for batch in self._batches(demoted):
+                conn.execute(
+                    f"DELETE FROM members WHERE collection = ? AND canonical_id IN ({','.join('?' * len(batch))})",
+                    (collection, *batch)
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO members (collection, member_id, canonical_id, location, content_hash, reply)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(collection, ids[i], canonical_id, locations[i], content_hashes[i],
+                  None if replies[i] is None else int(replies[i]))
+                 for i, canonical_id in duplicate_of.items()]
+            )
+
+        return {"kept": kept, "duplicate_of": duplicate_of, "demoted": demoted}
+
+    def summaries(self, collection: str, canonical_ids: List[str], locations: Optional[Dict[str, str]] = None) -> Dict[str, Dict]:
+        """대표 문서별 중복 메타데이터 {"duplicate_count", "duplicate_locations"}
+
+        Args:
+            locations: 대표 문서 자신의 위치 (목록 맨 앞에 표시)
+        """
+        locations = locations or {}
+        result = {}
+        with self._connect() as conn:
+            for batch in self._batches(list(dict.fromkeys(canonical_ids))):
+                rows = conn.execute(
+                    f"SELECT canonical_id, location FROM members WHERE collection = ?"
+                    f" AND canonical_id IN ({','.join('?' * len(batch))}) ORDER BY rowid",
+                    (collection, *batch)
+                ).fetchall()
+                grouped: Dict[str, List[str]] = {doc_id: [] for doc_id in batch}
+                for canonical_id, location in rows:
+                    grouped[canonical_id].append(location)
+                for doc_id, member_locations in grouped.items():
+                    head = [locations[doc_id]] if doc_id in locations else []
+                    result[doc_id] = {
+                        "duplicate_count": 1 + len(member_locations),
+                        "duplicate_locations": json.dumps((head + member_locations)[:DEDUP_MAX_LOCATIONS], ensure_ascii=False),
+                    }
+        return result
+
+    def get_members(self, collection: str, ids: List[str]) -> Dict[str, Dict]:
+        """접힌 문서 ID -> {"canonical_id", "content_hash"}"""
+        members = {}
+        with self._connect() as conn:
+            for batch in self._batches(ids):
+                rows = conn.execute(
+                    f"SELECT member_id, canonical_id, content_hash FROM members WHERE collection = ?"
+                    f" AND member_id IN ({','.join('?' * len(batch))})",
+                    (collection, *batch)
+                ).fetchall()
+                members.update((member_id, {"canonical_id": canonical_id, "content_hash": content_hash})
+                               for member_id, canonical_id, content_hash in rows)
+        return members
+
+    def folded_top_level(self, collection: str, prefix: str) -> List[str]:
+        """prefix 로 시작하는 접힌 문서 ID 중 스레드 답글이 아닌 것 (Slack 동기화의 삭제 대사용)
+
+        답글 여부를 모르는 예전 기록은 잘못 지우지 않도록 제외합니다.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT member_id FROM members WHERE collection = ? AND substr(member_id, 1, ?) = ? AND reply = 0",
+                (collection, len(prefix), prefix)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def forget(self, collection: str, ids: List[str]) -> List[str]:
+        """삭제된 문서를 인덱스에서 제거
+
+        대표 문서가 지워지면 거기에 접혀 있던 중복 기록도 지웁니다 (Slack 동기화의 누락 보정이
+        남은 메시지를 새 메시지로 다시 판단). 중복이 지워진 경우 갱신해야 할 대표 문서 ID 를 반환합니다.
+        """
+        affected = set()
+        with self._lock, self._connect() as conn:
+            self._remove_signatures(conn, collection, ids)
+            for batch in self._batches(ids):
+                marks = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT DISTINCT canonical_id FROM members WHERE collection = ? AND member_id IN ({marks})",
+                    (collection, *batch)
+                ).fetchall()
+                affected.update(row[0] for row in rows)
+                conn.execute(f"DELETE FROM members WHERE collection = ? AND member_id IN ({marks})", (collection, *batch))
+                conn.execute(f"DELETE FROM members WHERE collection = ? AND canonical_id IN ({marks})", (collection, *batch))
+        return sorted(affected - set(ids))
+
+    def clear(self, collection: str):
+        with self._lock, self._connect() as conn:
+            for table in ("signatures", "bands", "members"):
+                conn.execute(f"DELETE FROM {table} WHERE collection = ?", (collection,))
+
+    def copy(self, source: str, target: str):
+        """재인덱싱으로 같은 문서 ID 를 가진 새 컬렉션이 만들어질 때 인덱스 복사"""
+        with self._lock, self._connect() as conn:
+            for table in ("signatures", "bands", "members"):
+                conn.execute(f"DELETE FROM {table} WHERE collection = ?", (target,))
+            conn.execute("INSERT INTO signatures SELECT ?, doc_id, signature FROM signatures WHERE collection = ?", (target, source))
+            conn.execute("INSERT INTO bands SELECT ?, band_key, doc_id FROM bands WHERE collection = ?", (target, source))
+            conn.execute(
+                "INSERT INTO members (collection, member_id, canonical_id, location, content_hash, reply)"
+                " SELECT ?, member_id, canonical_id, location, content_hash, reply FROM members"
+                " WHERE collection = ?", (target, source)
+            )
+
+    def stats(self, collection: str) -> Dict:
+        with self._connect() as conn:
+            canonical = conn.execute("SELECT COUNT(*) FROM signatures WHERE collection = ?", (collection,)).fetchone()[0]
+            members = conn.execute("SELECT COUNT(*) FROM members WHERE collection = ?", (collection,)).fetchone()[0]
+        return {"canonical": canonical, "duplicates": members}
+
+_instances: Dict[str, NearDuplicateIndex] = {}
+_instances_lock = threading.Lock()
+
+def get_dedup_index() -> NearDuplicateIndex:
+    """CHROMA_PERSIST_DIRECTORY/dedup_index.sqlite3 의 유사 메시지 인덱스"""
+    path = os.path.join(settings.chroma_persist_directory, DEDUP_DB_FILE)
+    with _instances_lock:
+        if path not in _instances:
+            _instances[path] = NearDuplicateIndex(path)
+        return _instances[path]
+
+def chunk_location(metadata: Dict) -> str:
+    return f"{metadata.get('channel', 'Unknown')} {metadata.get('timestamp', '')}"
+
+def is_thread_reply(metadata: Dict) -> bool:
+    thread_ts = metadata.get("thread_ts")
+    return bool(thread_ts) and thread_ts != metadata.get("timestamp")
+
+def refresh_canonical_metadata(collection, canonical_ids: List[str]) -> int:
+    """이미 저장된 대표 문서의 duplicate_count / duplicate_locations 갱신"""
+    canonical_ids = list(dict.fromkeys(canonical_ids))
+    if not canonical_ids:
+        return 0
+    page = collection.get(ids=canonical_ids, include=["metadatas"])
+    if not page["ids"]:
+        return 0
+    locations = {doc_id: chunk_location(metadata) for doc_id, metadata in zip(page["ids"], page["metadatas"])}
+    summaries = get_dedup_index().summaries(collection.name, page["ids"], locations)
+    # 저장소에 따라 update 가 메타데이터를 통째로 바꾸므로 기존 값과 합쳐서 전달
+    metadatas = [{**metadata, **summaries[doc_id]} for doc_id, metadata in zip(page["ids"], page["metadatas"])]
+    collection.update(ids=page["ids"], metadatas=metadatas)
+    return len(page["ids"])
+
+def collapse_chunks(collection_name: str, ids: List[str], chunks: List[Dict],
+                    content_hashes: Optional[List[Optional[str]]] = None, source: str = "file_upload") -> Dict:
+    """청크 목록에 collapse() 적용 (NearDuplicateIndex.collapse 결과와 같은 형식)
+
+    `DEDUP_ENABLED=false` 면 모든 청크를 그대로 둡니다.
+    """
+    if not settings.dedup_enabled or not chunks:
+        return {"kept": list(range(len(chunks))), "duplicate_of": {}, "demoted": []}
+    result = get_dedup_index().collapse(
+        collection_name, ids, [chunk["text"] for chunk in chunks],
+        [chunk_location(chunk["metadata"]) for chunk in chunks], content_hashes,
+        [is_thread_reply(chunk["metadata"]) for chunk in chunks]
+    )
+    if result["duplicate_of"]:
+        DEDUP_DUPLICATES.inc(len(result["duplicate_of"]), source=source)
+    return result
+
+def release_failed_canonicals(collection_name: str, ids: List[str], collapsed: Dict,
+                               failed: Iterable[int]) -> List[int]:
+    """임베딩에 실패해 저장하지 못할 대표 청크를 인덱스에서 되돌리기
+
+    collapse() 는 저장 전에 대표 서명을 등록하므로, 그대로 두면 이후 유사 메시지가 저장소에
+    없는 문서로 접히고 다음 동기화에서도 "변경 없음"이 되어 영영 저장되지 않습니다.
+
+    Args:
+        failed: 임베딩에 실패한 청크 위치 (collapsed["kept"] 중)
+
+    Returns:
+        같은 배치에서 실패한 대표 청크로 접힌 청크 위치 (함께 실패로 처리해야 함)
+    """
+    failed_ids = sorted({ids[i] for i in failed})
+    if not settings.dedup_enabled or not failed_ids:
+        return []
+    get_dedup_index().forget(collection_name, failed_ids)
+    failed_ids = set(failed_ids)
+    return sorted(i for i, canonical_id in collapsed["duplicate_of"].items() if canonical_id in failed_ids)
+
+def annotate_canonical_chunks(collection_name: str, ids: List[str], chunks: List[Dict]):
+    """저장 직전 대표 청크 메타데이터에 중복 수/위치 기록 (중복이 있는 청크만)"""
+    if not settings.dedup_enabled or not chunks:
+        return
+    locations = {doc_id: chunk_location(chunk["metadata"]) for doc_id, chunk in zip(ids, chunks)}
+    summaries = get_dedup_index().summaries(collection_name, ids, locations)
+    for doc_id, chunk in zip(ids, chunks):
+        if summaries[doc_id]["duplicate_count"] > 1:
+            chunk["metadata"].update(summaries[doc_id])
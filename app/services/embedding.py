@@ -1,116 +1,226 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from app.core.database import get_collection
-from app.services.llm_service import get_embeddings
-from app.services.slack_data import parse_slack_export, chunk_messages
-from app.core.config import settings
-import uuid
+from app.services.slack_data import chunk_message_columns, load_message_columns
+from app.core.metrics import registry, track
+from app.core.state_db import get_state_db
+import hashlib
+import logging
 
-def index_slack_data(file_path: str, progress_callback=None, clear_existing=True):
-    """슬랙 데이터를 파싱하고 임베딩하여 ChromaDB에 저장"""
+logger = logging.getLogger(__name__)
+
+INDEXED_CHUNKS = registry.counter("slack_qa_indexed_chunks_total", "저장된 청크 수")
+
+def hash_files(file_paths: List[str]) -> Tuple[str, List[str]]:
+    """파일을 한 번씩만 읽어 (작업 키, 파일별 파싱 캐시 키) 계산
+
+    작업 키는 파일 내용 기반 해시라 임시 파일 경로가 달라도 같은 업로드를 같은 작업으로 인식합니다.
+    파싱 캐시 키(slack_data.file_digest 와 같은 값)도 함께 구해 수 GB 파일을 두 번 해시하지 않습니다.
+    """
+    combined = hashlib.sha1()
+    digests = []
+    for file_path in file_paths:
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                combined.update(block)
+                digest.update(block)
+        combined.update(b'\x00')
+        digests.append(digest.hexdigest())
+    return combined.hexdigest(), digests
+
+def store_chunks_in_batches(job: str, chunks: List[Dict], collection, progress_callback=None,
+                            content_key: Optional[str] = None) -> Dict:
+    """청크를 배치 단위로 임베딩/저장하고 배치마다 체크포인트 기록
+    
+    임베딩과 저장은 ingest_pipeline 에서 겹쳐 실행됩니다. 같은 job 이 중간에 끊겼다면
+    마지막 체크포인트 다음 청크부터 이어서 진행합니다. 문서 ID는 `{content_key 해시}:{청크 위치}`
+    라서 체크포인트 기록 직전에 죽어도 재실행 시 덮어쓰기만 됩니다.
+    
+    Args:
+        content_key: 문서 ID 를 만들 입력 내용 키 (기본: job). job 에는 replace/append 모드가
+            들어가므로 파일 내용 해시를 넘겨야 같은 파일을 다른 모드로 다시 인덱싱해도 같은
+            문서를 덮어씀 (중복 저장되지 않음)
+    
+    Returns:
+        처리량 리포트 (ingest_pipeline.run_pipeline 참고)
+    """
+    from app.services.ingest_pipeline import run_pipeline
+    
+    state = get_state_db()
+    checkpoint = state.get_checkpoint(job)
+    start = int(checkpoint["cursor"]) if checkpoint and checkpoint["status"] == "running" else 0
+    batch_offset = checkpoint["batch"] if start else 0
+    if start:
+        logger.info(f"중단된 인덱싱 이어서 진행: {job} ({start}/{len(chunks)})")
+        if progress_callback:
+            progress_callback(f"이전 작업 이어서 진행: {start}/{len(chunks)}개 청크 저장됨")
+    
+    id_prefix = hashlib.sha1((content_key or job).encode()).hexdigest()[:16]
+    
+    def on_commit(next_offset: int, batches: int):
+        state.save_checkpoint(job, cursor=next_offset, batch=batch_offset + batches, data={"total": len(chunks)})
+        if progress_callback:
+            progress_callback(f"{next_offset}/{len(chunks)}개 청크 저장됨")
+    
+    report = run_pipeline(
+        chunks,
+        collection,
+        make_ids=lambda offset, count: [f"{id_prefix}:{offset + i}" for i in range(count)],
+        start=start,
+        on_commit=on_commit,
+    )
+    state.save_checkpoint(job, cursor=len(chunks), batch=batch_offset + report["batches"], status="completed",
+                          data={"total": len(chunks), "throughput": report})
+    return report
+
+def _clear_collection(collection) -> int:
+    """컬렉션의 모든 문서 삭제
+
+    ChromaDB 는 빈 where 로 전체 삭제하는 요청을 거부하므로 ID 를 배치 단위로 읽어서 지웁니다.
+    """
+    from app.services.ingest_pipeline import effective_batch_size
+    
+    batch_size = effective_batch_size(collection)
+    removed = 0
+    while True:
+        ids = collection.get(limit=batch_size, include=[])["ids"]
+        if not ids:
+            return removed
+        collection.delete(ids=ids)
+        removed += len(ids)
+
+def _dedup_message(report: Dict) -> str:
+    return (f"유사 메시지 {report['duplicates']}개를 대표 메시지로 접었습니다 "
+            f"(임베딩 호출/인덱스 크기 {report['dedup_ratio'] * 100:.1f}% 절감)")
+
+def _index_result(chunks: List[Dict], report: Dict) -> Dict:
+    """인덱싱 함수 반환값 - 전체/저장(유사 메시지로 접힌 것 포함)/실패 청크 수와 처리량 리포트"""
+    return {**report, "total": len(chunks), "indexed": len(chunks) - report["failed"]}
+
+def _schedule_thread_summaries(collection, chunks: List[Dict], progress_callback=None):
+    """인덱싱한 청크가 속한 스레드의 요약을 백그라운드로 갱신 (app.services.thread_summary 참고)"""
+    from app.core.config import settings
+    from app.services.thread_summary import schedule_thread_summaries
+    
+    thread_ts = {chunk["metadata"]["thread_ts"] for chunk in chunks if chunk["metadata"].get("thread_ts")}
+    if settings.thread_summary_enabled and thread_ts:
+        schedule_thread_summaries(collection.name, thread_ts)
+        if progress_callback:
+            progress_callback(f"{len(thread_ts)}개 스레드의 질문-답변 요약을 백그라운드에서 생성합니다")
+
+def index_slack_data(file_path: str, progress_callback=None, clear_existing=True) -> Dict:
+    """슬랙 데이터를 파싱하고 임베딩하여 ChromaDB에 저장
+    
+    Returns:
+        {"total", "indexed", "failed", "failed_items", ...처리량 리포트} - 임베딩에 끝내 실패한
+        청크는 indexed 에서 빠지고 failed_items 에 위치와 오류가 남음
+    """
     
     # 슬랙 데이터 파싱
     if progress_callback:
         progress_callback("슬랙 데이터 파싱 중...")
-    messages = parse_slack_export(file_path)
+    with track("index.parse"):
+        # 작업 키와 파싱 캐시 키를 한 번 읽어서 함께 계산
+        content_key, (digest,) = hash_files([file_path])
+        # 같은 내용의 파일은 파싱 캐시(Parquet)에서 정제된 컬럼을 바로 읽음
+        messages = load_message_columns(file_path, digest)
     
     # 메시지 청킹
     if progress_callback:
-        progress_callback(f"{len(messages)}개 메시지를 청크로 분할 중...")
-    chunks = chunk_messages(messages, settings.max_tokens_per_chunk)
-    
-    # 텍스트 추출
-    texts = [chunk["text"] for chunk in chunks]
-    
-    # 임베딩 생성
-    if progress_callback:
-        progress_callback(f"{len(chunks)}개 청크의 임베딩 생성 중...")
-    embeddings = get_embeddings(texts)
+        progress_callback(f"{len(messages['text'])}개 메시지를 청크로 분할 중...")
+    with track("index.chunk"):
+        chunks = chunk_message_columns(messages)
     
     # ChromaDB에 저장
     if progress_callback:
-        progress_callback("ChromaDB에 저장 중...")
-    collection = get_collection()
-    
-    # 기존 데이터 삭제 (clear_existing이 True일 때만)
-    if clear_existing:
-        try:
-            collection.delete(where={})
-        except:
-            pass
-    
-    # 새 데이터 추가
-    ids = [str(uuid.uuid4()) for _ in chunks]
-    metadatas = [chunk["metadata"] for chunk in chunks]
-    
-    collection.add(
-        ids=ids,
-        embeddings=embeddings,
-        documents=texts,
-        metadatas=metadatas
-    )
+        progress_callback(f"{len(chunks)}개 청크의 임베딩 생성 및 저장 중...")
+    with track("index.open_collection"):
+        collection = get_collection()
+    
+    job = f"index:{collection.name}:{'replace' if clear_existing else 'append'}:{content_key}"
+    checkpoint = get_state_db().get_checkpoint(job)
+    resuming = checkpoint is not None and checkpoint["status"] == "running"
+    
+    # 기존 데이터 삭제 (clear_existing이 True일 때만, 이어서 진행할 때는 이미 삭제됨)
+    if clear_existing and not resuming:
+        # 삭제에 실패하면 예외를 그대로 올림 (유사 메시지 인덱스/체크포인트는 건드리지 않음)
+        with track("index.clear"):
+            _clear_collection(collection)
+        # 지운 문서의 유사 메시지 인덱스도 비움
+        from app.services.dedup import get_dedup_index
+        get_dedup_index().clear(collection.name)
+        # 삭제로 무효가 된 다른 중단 작업은 이어서 진행하지 않도록 정리
+        state = get_state_db()
+        for stale in state.list_checkpoints(f"index:{collection.name}:"):
+            if stale["status"] == "running" and stale["job"] != job:
+                state.delete_checkpoint(stale["job"])
+    
+    # 배치 단위로 임베딩/저장 (중단 시 다음 실행에서 이어서 진행)
+    report = store_chunks_in_batches(job, chunks, collection, progress_callback, content_key=content_key)
+    _schedule_thread_summaries(collection, chunks, progress_callback)
     
     if progress_callback:
-        progress_callback(f"인덱싱 완료! {len(chunks)}개 청크 저장됨")
+        progress_callback(f"인덱싱 완료! {len(chunks) - report['failed']}개 청크 저장됨 ({report['chunks_per_second']} chunks/s)")
+        if report["duplicates"]:
+            progress_callback(_dedup_message(report))
+        if report["failed"]:
+            progress_callback(f"⚠️ 임베딩 실패로 {report['failed']}개 청크를 건너뛰었습니다")
     
-    return len(chunks)
+    return _index_result(chunks, report)
 
-def index_multiple_files(file_paths: List[str], progress_callback=None):
-    """여러 슬랙 export 파일을 파싱하고 임베딩하여 ChromaDB에 저장"""
+def index_multiple_files(file_paths: List[str], progress_callback=None) -> Dict:
+    """여러 슬랙 export 파일을 파싱하고 임베딩하여 ChromaDB에 저장 (반환값은 index_slack_data 참고)"""
     
-    all_messages = []
+    all_messages = {}
+    # 작업 키와 파일별 파싱 캐시 키를 파일당 한 번 읽어서 함께 계산
+    with track("index.parse"):
+        content_key, digests = hash_files(file_paths)
     
-    # 모든 파일에서 메시지 파싱
-    for i, file_path in enumerate(file_paths):
+    # 모든 파일에서 메시지 파싱 (같은 내용의 파일은 파싱 캐시 사용)
+    for i, (file_path, digest) in enumerate(zip(file_paths, digests)):
         if progress_callback:
             progress_callback(f"파일 {i+1}/{len(file_paths)} 파싱 중: {file_path}")
         
         try:
-            messages = parse_slack_export(file_path)
-            all_messages.extend(messages)
+            with track("index.parse"):
+                messages = load_message_columns(file_path, digest)
+            for name, values in messages.items():
+                all_messages.setdefault(name, []).extend(values)
         except Exception as e:
             print(f"파일 파싱 실패 {file_path}: {str(e)}")
             continue
     
-    if not all_messages:
-        return 0
+    if not all_messages.get("text"):
+        return {"total": 0, "indexed": 0, "failed": 0, "failed_items": []}
     
     # 메시지 청킹
     if progress_callback:
-        progress_callback(f"총 {len(all_messages)}개 메시지를 청크로 분할 중...")
-    chunks = chunk_messages(all_messages, settings.max_tokens_per_chunk)
-    
-    # 텍스트 추출
-    texts = [chunk["text"] for chunk in chunks]
+        progress_callback(f"총 {len(all_messages['text'])}개 메시지를 청크로 분할 중...")
+    with track("index.chunk"):
+        chunks = chunk_message_columns(all_messages)
     
-    # 임베딩 생성
-    if progress_callback:
-        progress_callback(f"{len(chunks)}개 청크의 임베딩 생성 중...")
-    embeddings = get_embeddings(texts)
+    # 파일명 정보를 메타데이터에 추가
+    for chunk in chunks:
+        chunk["metadata"]["source_files_count"] = len(file_paths)
     
     # ChromaDB에 저장
     if progress_callback:
-        progress_callback("ChromaDB에 저장 중...")
-    collection = get_collection()
+        progress_callback(f"{len(chunks)}개 청크의 임베딩 생성 및 저장 중...")
+    with track("index.open_collection"):
+        collection = get_collection()
     
     # 기존 데이터는 유지하고 새로운 데이터 추가 (append 방식)
-    # 만약 기존 데이터를 삭제하고 싶다면 첫 번째 파일 처리 시에만 삭제
-    
-    # 새 데이터 추가
-    ids = [str(uuid.uuid4()) for _ in chunks]
-    metadatas = [chunk["metadata"] for chunk in chunks]
-    
-    # 파일명 정보를 메타데이터에 추가
-    for i, metadata in enumerate(metadatas):
-        metadata["source_files_count"] = len(file_paths)
-    
-    collection.add(
-        ids=ids,
-        embeddings=embeddings,
-        documents=texts,
-        metadatas=metadatas
-    )
+    # 배치 단위로 임베딩/저장 (중단 시 다음 실행에서 이어서 진행)
+    job = f"index:{collection.name}:append:{content_key}"
+    report = store_chunks_in_batches(job, chunks, collection, progress_callback, content_key=content_key)
+    _schedule_thread_summaries(collection, chunks, progress_callback)
     
     if progress_callback:
-        progress_callback(f"인덱싱 완료! {len(file_paths)}개 파일에서 {len(chunks)}개 청크 저장됨")
-    
-    return len(chunks)
\ No newline at end of file
+        progress_callback(f"인덱싱 완료! {len(file_paths)}개 파일에서 {len(chunks) - report['failed']}개 청크 저장됨 "
+                          f"({report['chunks_per_second']} chunks/s)")
+        if report["duplicates"]:
+            progress_callback(_dedup_message(report))
+        if report["failed"]:
+            progress_callback(f"⚠️ 임베딩 실패로 {report['failed']}개 청크를 건너뛰었습니다")
+    
+    return _index_result(chunks, report)
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""배치 단위 재시도 임베딩 실행기
+
+텍스트를 배치로 나눠 임베딩하고, 실패한 배치만 재시도합니다. 완료된 배치 결과는 유지되므로
+1000개 중 900번째 배치가 일시적으로 실패해도 앞의 899개를 다시 임베딩하지 않습니다.
+
+- 일시적 오류(429, 5xx, 연결/타임아웃): 같은 배치를 지수 백오프로 재시도, 끝내 실패하면 배치 전체를 실패로 기록
+- 입력 오류(400/413/422, 컨텍스트 길이 초과, 로컬 모델의 ValueError): 배치를 반으로 나눠 다시 시도해서
+  문제 있는 텍스트만 실패로 기록
+- 그 외 오류(401/403 인증, 404 모델 없음, 설정/환경 문제): 어떤 배치도 성공할 수 없으므로 나누거나 다음 배치를
+  호출하지 않고 바로 예외를 올림 (인덱싱은 마지막 체크포인트에서 멈추고 원인을 고친 뒤 이어서 진행)
+"""
+from typing import Callable, Dict, List
+import logging
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_RETRIES = registry.counter("slack_qa_embedding_retries_total", "일시적 오류로 재시도한 임베딩 배치 수")
+EMBEDDING_FAILED_ITEMS = registry.counter("slack_qa_embedding_failed_items_total", "끝내 임베딩하지 못한 텍스트 수")
+
+RETRY_MIN_WAIT_SECONDS = 4
+RETRY_MAX_WAIT_SECONDS = 10
+
+# 상태 코드가 없는 SDK 예외 중 재시도할 클래스 이름 (openai / anthropic / httpx)
+TRANSIENT_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "TimeoutException"}
+# 요청 내용(특정 텍스트) 때문에 거절된 경우의 상태 코드 - 나눠서 보내면 나머지는 성공할 수 있음
+INPUT_ERROR_STATUSES = {400, 413, 422}
+# 상태 코드 없이 메시지로만 알 수 있는 입력 길이 초과
+CONTEXT_LENGTH_MARKERS = ("context length", "context_length", "maximum context", "too many tokens", "token limit")
+
+class EmbeddingError(RuntimeError):
+    """일부 텍스트를 끝내 임베딩하지 못함 (failed: [{"index", "error"}])"""
+
+    def __init__(self, failed: List[Dict]):
+        self.failed = failed
+        super().__init__(f"{len(failed)}개 텍스트 임베딩 실패: {failed[0]['error']}")
+
+def is_transient(error: Exception) -> bool:
+    """재시도하면 성공할 수 있는 오류인지"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+def is_input_error(error: Exception) -> bool:
+    """특정 텍스트 때문에 실패한 오류인지 (배치를 나누면 나머지는 성공할 수 있음)"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in INPUT_ERROR_STATUSES
+    if isinstance(error, (ValueError, TypeError)):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in CONTEXT_LENGTH_MARKERS)
+
+def run_batches(texts: List[str], embed_batch: Callable[[List[str]], np.ndarray], batch_size: int,
+                provider: str = "") -> Dict:
+    """texts 를 batch_size 단위로 embed_batch 에 넘겨 임베딩
+
+    Returns:
+        {"embeddings": 성공한 텍스트의 (n, dim) float32 행렬 (원래 순서),
+         "indices": embeddings 각 행의 원래 위치,
+         "failed": [{"index", "error"}]}
+
+    Raises:
+        일시적 오류도 입력 오류도 아닌 예외 (인증/설정 문제) - 첫 실패에서 그대로 올림
+    """
+    parts, failed = [], []
+
+    def attempt(indices: List[int]) -> np.ndarray:
+        batch = [texts[i] for i in indices]
+        for attempt_no in range(1, settings.embedding_max_attempts + 1):
+            try:
+                return embed_batch(batch)
+            except Exception as e:
+                if not is_transient(e) or attempt_no == settings.embedding_max_attempts:
+                    raise
+                wait = min(RETRY_MAX_WAIT_SECONDS, RETRY_MIN_WAIT_SECONDS * 2 ** (attempt_no - 1))
+                EMBEDDING_RETRIES.inc(provider=provider)
+                logger.warning(f"임베딩 배치 재시도 {attempt_no}/{settings.embedding_max_attempts} "
+                               f"({len(batch)}개, {wait}초 후): {e}")
+                time.sleep(wait)
+
+    def process(indices: List[int]):
+        try:
+            parts.append((indices, attempt(indices)))
+        except Exception as e:
+            if not is_transient(e) and not is_input_error(e):
+                # 인증/설정 오류는 다른 텍스트도 똑같이 실패하므로 더 호출하지 않음
+                raise
+            if len(indices) > 1 and not is_transient(e):
+                # 입력 문제이므로 반으로 나눠 문제 있는 텍스트만 골라냄
+                middle = len(indices) // 2
+                process(indices[:middle])
+                process(indices[middle:])
+                return
+            EMBEDDING_FAILED_ITEMS.inc(len(indices), provider=provider)
+            logger.error(f"임베딩 실패 ({len(indices)}개 텍스트): {e}")
+            failed.extend({"index": i, "error": str(e)} for i in indices)
+
+    for start in range(0, len(texts), max(1, batch_size)):
+        process(list(range(start, min(start + batch_size, len(texts)))))
+
+    if not parts:
+        return {"embeddings": np.zeros((0, 0), dtype=np.float32), "indices": [], "failed": failed}
+
+    indices = [i for part_indices, _ in parts for i in part_indices]
+    embeddings = np.vstack([matrix for _, matrix in parts]).astype(np.float32, copy=False)
+    order = np.argsort(indices, kind="stable")
+    return {
+        "embeddings": embeddings[order],
+        "indices": [indices[i] for i in order],
+        "failed": sorted(failed, key=lambda item: item["index"]),
+    }
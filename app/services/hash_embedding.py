@@ -0,0 +1,39 @@
+"""결정적 해시 임베딩 - 오프라인 벤치마크/테스트용 스텁
+
+모델 다운로드나 API 키 없이 항상 같은 입력에 같은 벡터를 돌려줍니다.
+문자 n-gram과 단어를 feature hashing으로 고정 차원에 투영하므로
+한국어/영어 모두 어휘가 겹치는 문장끼리 가깝게 배치됩니다.
+"""
+from typing import List
+import re
+import zlib
+import numpy as np
+
+NGRAM_SIZE = 3
+
+def _features(text: str) -> List[str]:
+    """텍스트를 단어 + 문자 n-gram 특징 목록으로 변환"""
+    normalized = re.sub(r'\s+', ' ', text.lower()).strip()
+    words = normalized.split(' ') if normalized else []
+
+    features = [f"w:{word}" for word in words]
+    for word in words:
+        padded = f" {word} "
+        for i in range(max(len(padded) - NGRAM_SIZE + 1, 1)):
+            features.append(f"c:{padded[i:i + NGRAM_SIZE]}")
+    return features
+
+def hash_embeddings(texts: List[str], dim: int = 384) -> np.ndarray:
+    """텍스트 리스트를 L2 정규화된 해시 임베딩 행렬(float32)로 변환"""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+
+    for row, text in enumerate(texts):
+        for feature in _features(text):
+            # 파이썬 hash()는 프로세스마다 달라지므로 crc32 사용
+            hashed = zlib.crc32(feature.encode('utf-8'))
+            sign = 1.0 if (hashed >> 31) & 1 else -1.0
+            vectors[row, hashed % dim] += sign
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
@@ -0,0 +1,198 @@
+"""임베딩과 저장을 겹쳐 실행하는 배치 인덱싱 파이프라인
+
+생산자 스레드가 배치 N+1을 임베딩하는 동안 호출 스레드(소비자)는 배치 N을 저장합니다.
+둘 사이는 크기가 제한된 큐(`ingest_pipeline_depth`)라서, 저장이 느리면 임베딩이 기다리고
+메모리에는 최대 depth+2 개 배치만 올라갑니다. 배치 크기는 `ingest_commit_batch_size` 와
+저장소의 `max_batch_size`(ChromaDB 한 번 add 한도) 중 작은 값입니다.
+
+생산자는 임베딩 전에 배치를 유사 메시지 인덱스(app.services.dedup)로 접어서 대표 청크만
+임베딩하고, 소비자는 대표 청크에 중복 수/위치를 기록하고 이전 배치/이전 작업의 대표 문서
+메타데이터를 갱신합니다. 작업이 예외로 멈추면 저장하지 못한 배치의 대표 서명은 되돌립니다.
+"""
+from typing import Callable, Dict, List, Optional
+import contextvars
+import logging
+import queue
+import threading
+import time
+from app.core.config import settings
+from app.core.metrics import registry, track
+from app.services.llm_service import embed_texts
+
+logger = logging.getLogger(__name__)
+
+INGEST_THROUGHPUT = registry.gauge("slack_qa_ingest_chunks_per_second", "마지막 인덱싱 작업의 처리량 (chunks/s)")
+
+_DONE = object()
+
+# 리포트/체크포인트에 남길 실패 항목 최대 개수
+MAX_REPORTED_FAILURES = 100
+
+def effective_batch_size(collection, requested: Optional[int] = None) -> int:
+    """요청 배치 크기를 저장소 한도에 맞게 조정"""
+    batch_size = requested or settings.ingest_commit_batch_size
+    limit = getattr(collection, "max_batch_size", None)
+    if limit:
+        batch_size = min(batch_size, limit)
+    return max(1, batch_size)
+
+def run_pipeline(
+    chunks: List[Dict],
+    collection,
+    make_ids: Callable[[int, int], List[str]],
+    start: int = 0,
+    batch_size: Optional[int] = None,
+    on_commit: Optional[Callable[[int, int], None]] = None,
+    source: str = "file_upload",
+) -> Dict:
+    """chunks[start:] 를 배치 단위로 임베딩(생산자)/upsert(소비자)
+
+    Args:
+        make_ids: (offset, 배치 길이) -> 문서 ID 목록
+        on_commit: 배치 저장 직후 (다음 offset, 배치 번호)로 호출 - 체크포인트 기록용
+
+    Returns:
+        처리량 리포트 {"chunks", "batches", "batch_size", "seconds", "chunks_per_second",
+                      "embed_seconds", "store_seconds", "overlap_ratio",
+                      "failed", "failed_items": [{"offset", "error"}],
+                      "duplicates", "dedup_ratio"}
+        임베딩에 끝내 실패한 청크는 저장하지 않고 failed_items 로 보고합니다.
+        duplicates 는 유사 메시지로 접혀 임베딩/저장을 건너뛴 청크 수, dedup_ratio 는 입력 대비
+        그 비율(임베딩 호출과 인덱스 크기가 줄어든 비율)입니다.
+    """
+    from app.services.dedup import (
+        annotate_canonical_chunks, collapse_chunks, refresh_canonical_metadata, release_failed_canonicals
+    )
+    from app.services.embedding import INDEXED_CHUNKS
+
+    batch_size = effective_batch_size(collection, batch_size)
+    pending = queue.Queue(maxsize=max(1, settings.ingest_pipeline_depth))
+    stop = threading.Event()
+    # 대표 서명을 등록했지만 아직 저장하지 못한 배치 (offset -> (ids, collapsed))
+    uncommitted, uncommitted_lock = {}, threading.Lock()
+    timings = {"embed": 0.0, "store": 0.0}
+
+    def put(item):
+        # 소비자가 실패해 멈춘 경우 영원히 막히지 않도록 주기적으로 확인
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        try:
+            for offset in range(start, len(chunks), batch_size):
+                if stop.is_set():
+                    return
+                batch = chunks[offset:offset + batch_size]
+                ids = make_ids(offset, len(batch))
+                with track("index.dedup"):
+                    collapsed = collapse_chunks(collection.name, ids, batch, source=source)
+                with uncommitted_lock:
+                    uncommitted[offset] = (ids, collapsed)
+                kept = collapsed["kept"]
+                began = time.perf_counter()
+                with track("index.embed"):
+                    result = embed_texts([batch[i]["text"] for i in kept])
+                timings["embed"] += time.perf_counter() - began
+                # 결과 위치를 배치 기준으로 되돌림
+                result["indices"] = [kept[i] for i in result["indices"]]
+                result["failed"] = [{**entry, "index": kept[entry["index"]]} for entry in result["failed"]]
+                if result["failed"]:
+                    # 실패한 대표에 접힌 청크도 저장되지 않으므로 함께 실패로 보고
+                    orphaned = release_failed_canonicals(collection.name, ids, collapsed,
+                                                         [entry["index"] for entry in result["failed"]])
+                    result["failed"].extend({"index": i, "error": "대표 청크 임베딩 실패"} for i in orphaned)
+                    collapsed["duplicate_of"] = {i: doc_id for i, doc_id in collapsed["duplicate_of"].items()
+                                                 if i not in set(orphaned)}
+                put((offset, batch, ids, result, collapsed))
+        except Exception as e:
+            put(e)
+            return
+        put(_DONE)
+
+    # 느린 요청 로그에 생산자 스레드의 span 도 모이도록 현재 context 를 복사해서 실행
+    context = contextvars.copy_context()
+    producer = threading.Thread(target=context.run, args=(produce,), daemon=True)
+    began = time.perf_counter()
+    producer.start()
+
+    stored, batches, failed, duplicates = 0, 0, [], 0
+    completed = False
+    try:
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            offset, batch, ids, result, collapsed = item
+            # 끝내 임베딩하지 못한 청크는 빼고 저장 (전체 작업은 계속 진행)
+            failed.extend({"offset": offset + entry["index"], "error": entry["error"]} for entry in result["failed"])
+            kept = [batch[i] for i in result["indices"]]
+            kept_ids = [ids[i] for i in result["indices"]]
+            store_began = time.perf_counter()
+            if kept:
+                annotate_canonical_chunks(collection.name, kept_ids, kept)
+                with track("index.store"):
+                    collection.upsert(
+                        ids=kept_ids,
+                        embeddings=result["embeddings"],
+                        documents=[chunk["text"] for chunk in kept],
+                        metadatas=[chunk["metadata"] for chunk in kept]
+                    )
+                INDEXED_CHUNKS.inc(len(kept), source=source)
+            # 이 배치의 중복이 접힌, 이미 저장된 대표 문서의 중복 수/위치 갱신
+            stored_canonicals = [doc_id for doc_id in collapsed["duplicate_of"].values() if doc_id not in set(kept_ids)]
+            if stored_canonicals or collapsed["demoted"]:
+                with track("index.store"):
+                    refresh_canonical_metadata(collection, stored_canonicals)
+                    if collapsed["demoted"]:
+                        collection.delete(ids=collapsed["demoted"])
+            timings["store"] += time.perf_counter() - store_began
+            duplicates += len(collapsed["duplicate_of"])
+            stored += len(kept)
+            batches += 1
+            with uncommitted_lock:
+                uncommitted.pop(offset, None)
+            if on_commit:
+                on_commit(offset + len(batch), batches)
+        completed = True
+    finally:
+        stop.set()
+        producer.join()
+        if not completed:
+            # 임베딩/저장이 실패해 멈추면 저장하지 못한 배치에서 등록한 대표 서명을 되돌림
+            # (그대로 두면 다음 실행에서 같은 청크가 저장소에 없는 대표로 접혀 영영 저장되지 않음)
+            for ids, collapsed in uncommitted.values():
+                release_failed_canonicals(collection.name, ids, collapsed, collapsed["kept"])
+
+    seconds = time.perf_counter() - began
+    busy = timings["embed"] + timings["store"]
+    shorter = min(timings["embed"], timings["store"])
+    report = {
+        "chunks": stored,
+        "batches": batches,
+        "batch_size": batch_size,
+        "seconds": round(seconds, 3),
+        "chunks_per_second": round(stored / seconds, 1) if seconds > 0 else 0.0,
+        "embed_seconds": round(timings["embed"], 3),
+        "store_seconds": round(timings["store"], 3),
+        # 임베딩/저장이 겹친 시간 비율 (1이면 짧은 쪽이 완전히 가려짐)
+        "overlap_ratio": round(max(0.0, busy - seconds) / shorter, 2) if shorter > 0 else 0.0,
+        "failed": len(failed),
+        "failed_items": failed[:MAX_REPORTED_FAILURES],
+        "duplicates": duplicates,
+        "dedup_ratio": round(duplicates / (len(chunks) - start), 3) if len(chunks) > start else 0.0,
+    }
+    if failed:
+        logger.warning(f"임베딩 실패로 저장하지 못한 청크 {len(failed)}개 (첫 위치 {failed[0]['offset']}): "
+                       f"{failed[0]['error']}")
+    if stored:
+        INGEST_THROUGHPUT.set(report["chunks_per_second"])
+        logger.info(f"인덱싱 처리량: {stored}개 청크 / {report['seconds']}초 "
+                    f"({report['chunks_per_second']} chunks/s, 배치 {batch_size}, 겹침 {report['overlap_ratio']}, "
+                    f"유사 메시지 {duplicates}개 접음)")
+    return report
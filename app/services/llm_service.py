@@ -1,83 +1,121 @@
 """LLM 서비스 통합 모듈 - OpenAI와 Claude를 모두 지원"""
-from typing import List
+from typing import Dict, List, Optional
 from app.core.config import settings
-from tenacity import retry, stop_after_attempt, wait_exponential
-import time
+from app.core.metrics import track
+import numpy as np
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10)
-)
-def get_embeddings(texts: List[str]) -> List[List[float]]:
-    """텍스트 리스트를 임베딩 벡터로 변환
-    
-    Claude를 사용하는 경우 sentence-transformers를 사용하고,
-    OpenAI를 사용하는 경우 OpenAI Embeddings API를 사용합니다.
-    """
-    if settings.api_provider == "claude" or not settings.openai_api_key:
-        # Claude 사용 또는 OpenAI 키가 없는 경우 - sentence-transformers 사용
-        from sentence_transformers import SentenceTransformer
-        
-        model = SentenceTransformer(settings.embedding_model)
-        embeddings = []
-        batch_size = 10
+# OpenAI Embeddings API 한 요청에 넣을 텍스트 수 (재시도 단위)
+OPENAI_EMBEDDING_BATCH_SIZE = 10
+
+def _embed_once(texts: List[str], spec: Dict) -> np.ndarray:
+    """텍스트 묶음을 한 번 임베딩 (재시도/배치 분할은 embedding_executor 에서)"""
+    if spec["provider"] == "hash":
+        # 오프라인 벤치마크/테스트용 결정적 스텁 (모델/네트워크 불필요)
+        from app.services.hash_embedding import hash_embeddings
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = model.encode(batch, convert_to_numpy=True)
-            embeddings.extend(batch_embeddings.tolist())
-            time.sleep(0.1)
+        with track("embedding.hash"):
+            return hash_embeddings(texts, spec["dim"])
+    elif spec["provider"] == "sentence-transformers":
+        # Claude 사용 또는 OpenAI 키가 없는 경우 - sentence-transformers 모델 사용
+        if settings.local_embedding_backend == "onnx":
+            # 같은 모델을 ONNX로 내보낸 버전 (PyTorch 없이 onnxruntime 으로 추론, 벡터 공간 동일)
+            from app.services.onnx_embedding import encode
+        else:
+            # 입력이 크면 LOCAL_EMBEDDING_WORKERS 개 프로세스로 나눠 인코딩
+            from app.services.local_embedding import encode
         
-        return embeddings
+        return encode(texts, spec["model"])
     else:
         # OpenAI 사용
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=settings.openai_api_key)
-        embeddings = []
-        batch_size = 10
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        client = get_llm_client("openai")
+        with track("embedding.openai_request"):
             response = client.embeddings.create(
-                model=settings.openai_embedding_model,
-                input=batch
+                model=spec["model"],
+                input=texts,
+                # text-embedding-3 계열은 출력 차원 지정 가능
+                extra_body={"dimensions": spec["dim"]} if spec.get("dim") and spec["model"].startswith("text-embedding-3") else None
             )
-            for item in response.data:
-                embeddings.append(item.embedding)
-            time.sleep(1)
-        
-        return embeddings
+        return np.asarray([item.embedding for item in response.data], dtype=np.float32)
 
-def generate_answer(question: str, context: str) -> str:
-    """검색된 컨텍스트를 기반으로 답변 생성
+def embed_texts(texts: List[str], spec: Optional[Dict] = None) -> Dict:
+    """배치 단위 재시도로 임베딩하고 끝내 실패한 텍스트는 따로 보고
     
-    LLM 없이 가장 관련성 높은 대화 내용을 직접 반환합니다.
+    Args:
+        spec: 사용할 임베딩 모델 사양 (get_embeddings 참고)
+    
+    Returns:
+        {"embeddings", "indices", "failed"} - embedding_executor.run_batches 참고
     """
-    # LLM API가 설정되어 있으면 사용
+    from app.services.embedding_executor import run_batches
+    
+    if spec is None:
+        from app.core.collections import get_active_collection
+        spec = get_active_collection()["spec"]
+    
+    # 로컬 모델은 내부에서 배치/병렬 처리하므로 한 번에 넘기고, 실패 시에만 나눠서 재시도
+    batch_size = OPENAI_EMBEDDING_BATCH_SIZE if spec["provider"] == "openai" else max(1, len(texts))
+    return run_batches(texts, lambda batch: _embed_once(batch, spec), batch_size, provider=spec["provider"])
+
+def get_embeddings(texts: List[str], spec: Optional[Dict] = None) -> np.ndarray:
+    """텍스트 리스트를 임베딩 벡터로 변환
+    
+    Claude를 사용하는 경우 sentence-transformers를 사용하고,
+    OpenAI를 사용하는 경우 OpenAI Embeddings API를 사용합니다.
+    일시적 오류는 실패한 배치만 재시도합니다 (embed_texts 참고).
+    
+    Args:
+        texts: 임베딩할 텍스트 목록
+        spec: 사용할 임베딩 모델 사양 {"provider", "model", "dim"}.
+              없으면 현재 서비스 중인 컬렉션의 모델을 사용합니다 (모델 전환 중에도
+              저장/검색 벡터가 같은 공간에 있도록).
+    
+    Returns:
+        (len(texts), dim) 크기의 float32 ndarray. 파이썬 리스트 변환은
+        ChromaDB 경계(app.core.database)에서만 수행합니다.
+    
+    Raises:
+        EmbeddingError: 일부 텍스트를 끝내 임베딩하지 못한 경우
+    """
+    from app.services.embedding_executor import EmbeddingError
+    
+    result = embed_texts(texts, spec)
+    if result["failed"]:
+        raise EmbeddingError(result["failed"])
+    return result["embeddings"]
+
+_llm_clients: Dict[str, object] = {}
+
+def get_llm_client(provider: str):
+    """답변 생성용 LLM 클라이언트 ('claude' 또는 'openai', 프로세스당 1회 생성해 연결 재사용)"""
+    if provider not in _llm_clients:
+        with track("llm.client_setup"):
+            if provider == "claude":
+                from anthropic import Anthropic
+                _llm_clients[provider] = Anthropic(api_key=settings.claude_api_key)
+            else:
+                from openai import OpenAI
+                _llm_clients[provider] = OpenAI(api_key=settings.openai_api_key)
+    return _llm_clients[provider]
+
+ANSWER_SYSTEM_PROMPT = "당신은 팀의 과거 슬랙 대화 내용을 바탕으로 기술적 질문에 답변하는 도우미입니다. 간결하고 정확하게 답변해주세요."
+
+def complete(prompt: str, system: str = ANSWER_SYSTEM_PROMPT, max_tokens: int = 500,
+             temperature: float = 0.7) -> Optional[str]:
+    """설정된 LLM(Claude 또는 OpenAI)으로 응답 생성 - LLM 이 없거나 API 에러면 None"""
     if settings.api_provider == "claude" and settings.claude_api_key:
         # Claude 사용
-        from anthropic import Anthropic
-        
         try:
-            client = Anthropic(api_key=settings.claude_api_key)
-            prompt = f"""다음 슬랙 대화 내용을 참고하여 질문에 답변해주세요.
-            
-컨텍스트:
-{context}
-
-질문: {question}
-
-답변:"""
-            response = client.messages.create(
-                model=settings.claude_model,
-                max_tokens=500,
-                temperature=0.7,
-                system="당신은 팀의 과거 슬랙 대화 내용을 바탕으로 기술적 질문에 답변하는 도우미입니다. 간결하고 정확하게 답변해주세요.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            client = get_llm_client("claude")
+            with track("llm.claude_request"):
+                response = client.messages.create(
+                    model=settings.claude_model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
             return response.content[0].text
         except Exception as e:
             # API 에러 시 기본 방식으로 폴백
@@ -85,11 +123,53 @@ def generate_answer(question: str, context: str) -> str:
     
     elif settings.openai_api_key:
         # OpenAI 사용
-        from openai import OpenAI
-        
         try:
-            client = OpenAI(api_key=settings.openai_api_key)
-            prompt = f"""다음 슬랙 대화 내용을 참고하여 질문에 답변해주세요.
+            client = get_llm_client("openai")
+            with track("llm.openai_request"):
+                response = client.chat.completions.create(
+                    model=settings.openai_chat_model,
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+            return response.choices[0].message.content
+        except Exception as e:
+            # API 에러 시 기본 방식으로 폴백
+            pass
+    
+    return None
+
+def summarize_thread(question: str, thread: str) -> Optional[str]:
+    """질문 스레드에서 최종 답변(해결 방법)만 요약
+    
+    Returns:
+        요약한 답변. LLM 이 없거나 실패하면 None, 스레드에서 답을 찾지 못했으면 빈 문자열
+    """
+    prompt = f"""다음은 슬랙 질문 스레드입니다. 질문에 대해 스레드에서 나온 최종 답변(해결 방법)을
+2~3문장으로 요약해주세요. 스레드에 답이 없으면 "없음" 이라고만 답하세요.
+
+질문: {question}
+
+스레드:
+{thread}
+
+답변 요약:"""
+    summary = complete(prompt, max_tokens=300, temperature=0)
+    if summary is None:
+        return None
+    summary = summary.strip()
+    return "" if summary.strip(" .") == "없음" else summary
+
+def generate_answer(question: str, context: str) -> str:
+    """검색된 컨텍스트를 기반으로 답변 생성
+    
+    LLM 없이 가장 관련성 높은 대화 내용을 직접 반환합니다.
+    """
+    # LLM API가 설정되어 있으면 사용
+    prompt = f"""다음 슬랙 대화 내용을 참고하여 질문에 답변해주세요.
             
 컨텍스트:
 {context}
@@ -97,19 +177,9 @@ def generate_answer(question: str, context: str) -> str:
 질문: {question}
 
 답변:"""
-            response = client.chat.completions.create(
-                model=settings.openai_chat_model,
-                messages=[
-                    {"role": "system", "content": "당신은 팀의 과거 슬랙 대화 내용을 바탕으로 기술적 질문에 답변하는 도우미입니다. 간결하고 정확하게 답변해주세요."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            # API 에러 시 기본 방식으로 폴백
-            pass
+    answer = complete(prompt)
+    if answer is not None:
+        return answer
     
     # LLM 없이 직접 관련 대화 내용 반환
     # 컨텍스트에서 가장 관련성 있는 부분 추출
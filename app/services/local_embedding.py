@@ -0,0 +1,119 @@
+"""sentence-transformers 로컬 임베딩 (단일 프로세스 / 멀티 프로세스)
+
+모델은 프로세스마다 한 번만 로드해서 재사용합니다. 텍스트가 `local_embedding_parallel_min_texts`
+이상이고 워커가 2개 이상이면 spawn 방식 프로세스 풀로 나눠서 인코딩합니다. 각 워커는
+torch 스레드를 `코어 수 / 워커 수` 로 제한해서 코어를 과하게 나눠 쓰지 않습니다.
+
+두 경로 모두 텍스트를 길이순으로 정렬해서 배치를 만들기 때문에 배치 안 패딩이 줄고,
+결과는 원래 순서로 되돌려 반환합니다.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Tuple
+import logging
+import multiprocessing
+import os
+import threading
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import track
+
+logger = logging.getLogger(__name__)
+
+_models: Dict[str, object] = {}
+_pools: Dict[Tuple[str, int], ProcessPoolExecutor] = {}
+_lock = threading.Lock()
+
+# 워커 프로세스 안에서 로드한 모델
+_worker_model = None
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+def _encode_in_worker(texts: List[str], batch_size: int) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True).astype(np.float32, copy=False)
+
+def get_worker_count() -> int:
+    """설정된 워커 수 (0이면 CPU 코어 수)"""
+    return settings.local_embedding_workers or os.cpu_count() or 1
+
+def get_model(model_name: str):
+    """현재 프로세스에서 사용할 SentenceTransformer (최초 1회 로드)"""
+    with _lock:
+        if model_name not in _models:
+            with track("embedding.model_load"):
+                from sentence_transformers import SentenceTransformer
+
+                _models[model_name] = SentenceTransformer(model_name, device="cpu")
+        return _models[model_name]
+
+def _get_pool(model_name: str, workers: int) -> ProcessPoolExecutor:
+    with _lock:
+        key = (model_name, workers)
+        if key not in _pools:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            logger.info(f"임베딩 워커 풀 시작: {workers}개 프로세스 x torch 스레드 {threads}개 ({model_name})")
+            # fork 는 torch 스레드 풀과 충돌할 수 있어 spawn 사용
+            _pools[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, threads),
+            )
+        return _pools[key]
+
+def shutdown_pools():
+    """워커 풀 종료 (앱 종료 시 호출)"""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def encode(texts: List[str], model_name: str, workers: int = None, batch_size: int = None) -> np.ndarray:
+    """텍스트 목록을 (len(texts), dim) float32 행렬로 인코딩
+
+    Args:
+        workers: 프로세스 수 (기본: 설정값). 입력이 작으면 설정과 무관하게 단일 프로세스로 처리
+        batch_size: 모델 한 번 forward 에 넣을 텍스트 수 (기본: 설정값)
+    """
+    workers = workers or get_worker_count()
+    batch_size = batch_size or settings.local_embedding_batch_size
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    # 길이순 정렬: 비슷한 길이끼리 배치/청크를 묶어 패딩 낭비를 줄임
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    sorted_texts = [texts[i] for i in order]
+
+    if workers < 2 or len(texts) < settings.local_embedding_parallel_min_texts:
+        model = get_model(model_name)
+        parts = []
+        for i in range(0, len(sorted_texts), batch_size):
+            with track("embedding.encode_batch"):
+                parts.append(model.encode(sorted_texts[i:i + batch_size], batch_size=batch_size,
+                                          convert_to_numpy=True).astype(np.float32, copy=False))
+        encoded = np.vstack(parts)
+    else:
+        # 워커마다 여러 청크가 돌아가도록 나눠서 긴 청크 하나가 전체를 붙잡지 않게 함
+        chunk_size = max(batch_size, -(-len(sorted_texts) // (workers * 4)))
+        chunks = [sorted_texts[i:i + chunk_size] for i in range(0, len(sorted_texts), chunk_size)]
+        pool = _get_pool(model_name, workers)
+        try:
+            with track("embedding.encode_parallel"):
+                encoded = np.vstack(list(pool.map(_encode_in_worker, chunks, [batch_size] * len(chunks))))
+        except BrokenProcessPool:
+            # 워커가 죽으면(OOM 등) 풀을 버리고 이번 요청은 단일 프로세스로 처리
+            logger.warning("임베딩 워커 풀이 비정상 종료되어 단일 프로세스로 인코딩합니다")
+            with _lock:
+                _pools.pop((model_name, workers), None)
+            return encode(texts, model_name, workers=1, batch_size=batch_size)
+
+    result = np.empty_like(encoded)
+    result[order] = encoded
+    return result
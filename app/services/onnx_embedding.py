@@ -0,0 +1,110 @@
+"""onnxruntime 기반 로컬 임베딩 (PyTorch 없이 CPU 추론)
+
+`scripts/export_onnx.py` 로 sentence-transformers 모델을 ONNX(및 int8 동적 양자화)로 내보낸
+디렉토리를 사용합니다. 디렉토리 구성:
+    model.onnx / model_int8.onnx  - 트랜스포머 본체 (출력: last_hidden_state)
+    tokenizer.json                - HuggingFace fast tokenizer
+    onnx_config.json              - {"model", "pooling", "normalize", "max_seq_length"}
+
+풀링/정규화는 원본 sentence-transformers 파이프라인과 같게 numpy 로 수행하므로
+PyTorch 경로와 같은 벡터 공간을 유지합니다 (export 시 수치 검증).
+"""
+from typing import Dict, List
+import json
+import os
+import threading
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import track
+
+CONFIG_FILE = "onnx_config.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+_runtimes: Dict[str, "OnnxEmbedder"] = {}
+_lock = threading.Lock()
+
+def default_model_dir(model_name: str) -> str:
+    """export 스크립트 기본 출력 위치 (./models/{모델 이름})"""
+    return os.path.join("./models", model_name.split('/')[-1])
+
+class OnnxEmbedder:
+    def __init__(self, model_dir: str, model_file: str, num_threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config.get("max_seq_length", 256))
+        self.tokenizer.no_padding()
+
+    def _run_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        length = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.zeros((len(texts), length), dtype=np.int64)
+        attention_mask = np.zeros((len(texts), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, feed)[0]
+
+        if self.config.get("pooling", "mean") == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config.get("normalize", True):
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32, copy=False)
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        # 길이순 배치로 패딩 최소화 후 원래 순서로 복원
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        parts = []
+        for i in range(0, len(order), batch_size):
+            with track("embedding.onnx_batch"):
+                parts.append(self._run_batch([texts[j] for j in order[i:i + batch_size]]))
+        encoded = np.vstack(parts)
+        result = np.empty_like(encoded)
+        result[order] = encoded
+        return result
+
+def get_embedder(model_name: str) -> OnnxEmbedder:
+    """설정된 ONNX 모델 세션 (프로세스당 1회 로드)"""
+    model_dir = settings.onnx_model_dir or default_model_dir(model_name)
+    path = os.path.join(model_dir, settings.onnx_model_file)
+    with _lock:
+        if path not in _runtimes:
+            if not os.path.exists(path):
+                raise ValueError(
+                    f"ONNX 모델 파일이 없습니다: {path}. "
+                    f"python scripts/export_onnx.py --model {model_name} 로 먼저 내보내세요."
+                )
+            with track("embedding.model_load"):
+                embedder = OnnxEmbedder(model_dir, settings.onnx_model_file, settings.onnx_num_threads)
+            if embedder.config.get("model") != model_name:
+                raise ValueError(
+                    f"ONNX 모델({embedder.config.get('model')})이 컬렉션 임베딩 모델({model_name})과 다릅니다."
+                )
+            _runtimes[path] = embedder
+        return _runtimes[path]
+
+def encode(texts: List[str], model_name: str, batch_size: int = None) -> np.ndarray:
+    """텍스트 목록을 (len(texts), dim) float32 행렬로 인코딩"""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return get_embedder(model_name).encode(texts, batch_size or settings.local_embedding_batch_size)
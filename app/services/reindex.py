@@ -0,0 +1,229 @@
+"""임베딩 모델 전환을 위한 무중단 재인덱싱
+
+현재 서비스 중인 컬렉션은 그대로 검색/저장을 계속하는 동안, 설정된 새 임베딩
+모델로 별도의 버전 컬렉션을 백그라운드에서 채웁니다. 복사가 끝나면 추가/수정/삭제된
+문서를 따라잡는 패스를 몇 번 더 돌린 뒤 레지스트리를 원자적으로 전환하고,
+전환 직전에 들어온 쓰기를 놓치지 않도록 전환 후에도 한 번 더 따라잡습니다.
+
+패스마다 문서/메타데이터 지문(sha1)을 비교해 문서가 바뀌면 다시 임베딩하고, 메타데이터만
+바뀌면(Slack 수정 시각, duplicate_count 등) 메타데이터만 갱신합니다. 전환 후 패스는 마지막
+패스에서 본 원본 상태와 비교하므로, 전환 직전 원본에서 삭제/수정된 문서는 반영하면서
+전환 후 새 컬렉션에 직접 들어온 쓰기는 건드리지 않습니다.
+
+멀티 워커에서는 `reindex.lock` lease 를 잡은 워커 하나만 실행하고, 진행 상태는
+`CHROMA_PERSIST_DIRECTORY/reindex_state.json` 에 기록해 어느 워커에서든 조회할 수 있습니다.
+"""
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+from app.core.collections import (
+    activate_collection, current_embedding_spec, get_active_collection, load_registry,
+    register_collection, resolve_dimension, versioned_collection_name
+)
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.leader import LeaderLease, is_locked
+from app.core.metrics import track
+from app.services.llm_service import get_embeddings
+
+logger = logging.getLogger(__name__)
+
+MAX_CATCHUP_PASSES = 3
+REINDEX_LOCK_FILE = "reindex.lock"
+REINDEX_STATE_FILE = "reindex_state.json"
+FINISHED_STATUSES = ("idle", "up_to_date", "completed", "failed", "interrupted")
+
+def _fingerprint(document: Optional[str], metadata: Optional[Dict]) -> Tuple[bytes, bytes]:
+    """(문서 해시, 메타데이터 해시) - 문서가 같으면 재임베딩 없이 메타데이터만 갱신"""
+    return (
+        hashlib.sha1((document or "").encode("utf-8")).digest(),
+        hashlib.sha1(json.dumps(metadata or {}, sort_keys=True, ensure_ascii=False).encode("utf-8")).digest(),
+    )
+
+class ReindexMigration:
+    def __init__(self):
+        self.is_running = False
+        self.migration_thread = None
+        self.state = {"status": "idle"}
+        self._lease = LeaderLease(REINDEX_LOCK_FILE)
+
+    def start(self, batch_size: Optional[int] = None) -> Dict:
+        """백그라운드 재인덱싱 시작 (이 워커나 다른 워커에서 이미 실행 중이면 현재 상태 반환)"""
+        if self.is_running or not self._lease.try_acquire():
+            return self.get_status()
+
+        self.is_running = True
+        self.state = {"status": "starting", "pid": os.getpid(), "started_at": datetime.now().isoformat()}
+        self._publish()
+        self.migration_thread = threading.Thread(
+            target=self._run, args=(batch_size or settings.reindex_batch_size,), daemon=True
+        )
+        self.migration_thread.start()
+        return self.get_status()
+
+    def _state_path(self) -> str:
+        return os.path.join(settings.chroma_persist_directory, REINDEX_STATE_FILE)
+
+    def _publish(self):
+        """진행 상태를 공유 파일에 기록 (다른 워커의 /reindex/status 용)"""
+        path = self._state_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"재인덱싱 상태 기록 실패: {e}")
+
+    def get_status(self) -> Dict:
+        if self.is_running:
+            return {"is_running": True, **self.state}
+        try:
+            with open(self._state_path(), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {"is_running": False, **self.state}
+
+        running = is_locked(REINDEX_LOCK_FILE)
+        if not running and state.get("status") not in FINISHED_STATUSES:
+            # 실행하던 워커가 중간에 종료됨
+            state["status"] = "interrupted"
+        return {"is_running": running, **state}
+
+    def _fingerprints(self, collection, batch_size: int) -> Dict[str, Tuple[bytes, bytes]]:
+        state, offset = {}, 0
+        while True:
+            page = collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                return state
+            for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                state[doc_id] = _fingerprint(document, metadata)
+            offset += len(page["ids"])
+
+    def _sync_pass(self, source, target, spec: Dict, batch_size: int,
+                   known: Optional[Dict[str, Tuple[bytes, bytes]]] = None
+                   ) -> Tuple[int, int, int, Dict[str, Tuple[bytes, bytes]]]:
+        """target 이 source 와 같아지도록 바뀐 문서만 반영
+
+        source 에 새로 생겼거나 문서가 바뀐 항목은 새 모델로 임베딩해 저장하고, 메타데이터만 바뀐
+        항목은 메타데이터만 갱신하며, known 에 있지만 source 에서 사라진 항목은 target 에서 삭제합니다.
+
+        Args:
+            known: target 이 반영하고 있는 상태 (id -> 지문). None 이면 target 을 읽어서 만듦.
+                전환 후에는 새 쓰기가 target 에만 들어가므로 target 대신 직전 패스의 source 상태를 넘겨
+                그 이후 source 에서 바뀐 것만 반영함
+
+        Returns:
+            (재임베딩한 수, 메타데이터만 갱신한 수, 삭제한 수, 이번 패스에서 읽은 source 상태)
+        """
+        known = self._fingerprints(target, batch_size) if known is None else known
+        seen = {}
+        copied, updated, offset = 0, 0, 0
+
+        while True:
+            page = source.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            offset += len(page["ids"])
+
+            changed, metadata_only = [], []
+            for i, doc_id in enumerate(page["ids"]):
+                fingerprint = _fingerprint(page["documents"][i], page["metadatas"][i])
+                seen[doc_id] = fingerprint
+                previous = known.get(doc_id)
+                if previous is None or previous[0] != fingerprint[0]:
+                    changed.append(i)
+                elif previous[1] != fingerprint[1]:
+                    metadata_only.append(i)
+
+            if changed:
+                texts = [page["documents"][i] for i in changed]
+                with track("reindex.embed"):
+                    embeddings = get_embeddings(texts, spec=spec)
+                with track("reindex.store"):
+                    target.upsert(
+                        ids=[page["ids"][i] for i in changed],
+                        embeddings=embeddings,
+                        documents=texts,
+                        metadatas=[page["metadatas"][i] for i in changed]
+                    )
+                copied += len(changed)
+            if metadata_only:
+                with track("reindex.store"):
+                    target.update(
+                        ids=[page["ids"][i] for i in metadata_only],
+                        metadatas=[page["metadatas"][i] for i in metadata_only]
+                    )
+                updated += len(metadata_only)
+            self.state["processed"] = offset
+            self._publish()
+
+        stale = [doc_id for doc_id in known if doc_id not in seen]
+        for i in range(0, len(stale), batch_size):
+            target.delete(ids=stale[i:i + batch_size])
+        return copied, updated, len(stale), seen
+
+    def _run(self, batch_size: int):
+        try:
+            source_info = get_active_collection()
+            target_spec = resolve_dimension(current_embedding_spec())
+            target_name = versioned_collection_name(target_spec)
+            self.state.update(source=source_info["name"], target=target_name, target_model=target_spec["model"])
+
+            if target_name == source_info["name"]:
+                self.state.update(status="up_to_date", finished_at=datetime.now().isoformat())
+                return
+
+            register_collection(target_name, target_spec, status="building")
+            source = get_collection(source_info["name"])
+            target = get_collection(target_name)
+            self.state.update(status="copying", total=source.count(), copied=0)
+            logger.info(f"재인덱싱 시작: {source_info['name']} -> {target_name} ({self.state['total']}개)")
+
+            # 이전 실행이 남긴 target 내용은 첫 패스에서 읽어 비교
+            copied, _, _, state = self._sync_pass(source, target, target_spec, batch_size)
+            self.state["copied"] += copied
+
+            # 복사 중 추가/수정/삭제된 문서 따라잡기 (직전 패스가 반영한 source 상태와 비교)
+            self.state.update(status="catching_up", updated=0)
+            for _ in range(MAX_CATCHUP_PASSES):
+                copied, updated, removed, state = self._sync_pass(source, target, target_spec, batch_size, state)
+                self.state["copied"] += copied
+                self.state["updated"] += updated
+                if copied == 0 and updated == 0 and removed == 0:
+                    break
+
+            # 문서 ID 가 같으므로 유사 메시지 인덱스도 그대로 복사 (전환 후 동기화가 계속 접을 수 있도록)
+            from app.services.dedup import get_dedup_index
+            get_dedup_index().copy(source_info["name"], target_name)
+            activate_collection(target_name)
+            # 마지막 패스 이후 ~ 전환 직전 이전 컬렉션에 기록된 추가/수정/삭제만 반영
+            # (target 을 다시 읽지 않으므로 전환 후 target 에 직접 들어온 쓰기는 그대로 유지)
+            copied, updated, _, _ = self._sync_pass(source, target, target_spec, batch_size, state)
+            self.state["copied"] += copied
+            self.state["updated"] += updated
+
+            self.state.update(status="completed", finished_at=datetime.now().isoformat())
+            logger.info(f"✅ 재인덱싱 완료 및 전환: {target_name} ({self.state['copied']}개 재임베딩)")
+        except Exception as e:
+            self.state.update(status="failed", error=str(e), finished_at=datetime.now().isoformat())
+            logger.error(f"재인덱싱 실패: {e}")
+        finally:
+            self.is_running = False
+            self._publish()
+            self._lease.release()
+
+    def rollback(self) -> Dict:
+        """직전 서비스 컬렉션으로 되돌리기"""
+        previous = load_registry().get("previous")
+        if not previous:
+            raise ValueError("되돌릴 이전 컬렉션이 없습니다.")
+        return activate_collection(previous)
+
+# 전역 마이그레이션 인스턴스
+reindex_migration = ReindexMigration()
@@ -1,15 +1,42 @@
-"""자동 Slack 동기화 스케줄러"""
-import asyncio
+"""자동 Slack 동기화 스케줄러
+
+채널마다 최근 메시지 유입 속도(EWMA)를 추적해서 활발한 채널은 자주, 조용한 채널은 드물게
+동기화합니다. 다음 동기화 시각 순으로 힙에서 꺼내 처리하고, 모든 채널이 분당 Slack API
+호출 예산(`slack_api_budget_per_minute`)을 함께 나눠 씁니다. 대기는 `threading.Event`
+로 하기 때문에 중지/즉시 동기화 요청에 바로 반응합니다.
+"""
+import heapq
 import logging
+import math
+import os
+import random
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from app.services.slack_realtime import SlackRealtime
 from app.core.config import settings
+from app.core.leader import SCHEDULER_LOCK_FILE, exclusive, read_holder_pid, scheduler_lease
+from app.core.metrics import registry, track
+from app.core.state_db import get_state_db
 import threading
 import time
 
 logger = logging.getLogger(__name__)
 
+SYNC_RUNS = registry.counter("slack_qa_scheduler_syncs_total", "자동 동기화 실행 횟수 (result별)")
+LAST_SYNC_TIMESTAMP = registry.gauge("slack_qa_scheduler_last_sync_timestamp_seconds", "마지막 자동 동기화 완료 시각 (unix)")
+IS_LEADER = registry.gauge("slack_qa_scheduler_is_leader", "이 워커가 스케줄러 리더인지 여부 (1/0)")
+TRACKED_CHANNELS = registry.gauge("slack_qa_scheduler_channels", "스케줄러가 추적 중인 채널 수")
+API_CALLS = registry.counter("slack_qa_scheduler_api_calls_total", "스케줄러가 사용한 Slack Web API 호출 수")
+
+# 한 번 동기화할 때 새 메시지가 이 정도 쌓여 있도록 간격을 맞춤
+TARGET_MESSAGES_PER_SYNC = 5
+# 유입 속도 EWMA 가중치 (클수록 최근 동기화 결과를 크게 반영)
+RATE_EWMA_ALPHA = 0.3
+# 채널 목록 갱신 간격 (초)
+CHANNEL_REFRESH_SECONDS = 3600
+# 다른 동기화가 진행 중일 때 채널을 미루는 시간 (초)
+BUSY_RETRY_SECONDS = 30
+
 class SlackSyncScheduler:
     def __init__(self):
         self.is_running = False
@@ -17,89 +44,333 @@ class SlackSyncScheduler:
         self.last_sync_time = None
         self.sync_interval = settings.slack_sync_interval_minutes * 60  # 분을 초로 변환
         self.sync_hours_back = settings.slack_sync_hours_back
-        
+        self.min_interval = settings.slack_min_sync_interval_minutes * 60
+        self.max_interval = max(self.sync_interval, settings.slack_max_sync_interval_minutes * 60)
+        self.mode = "polling"
+        if settings.slack_signing_secret:
+            # Events API 로 실시간 반영 중이면 폴링은 누락 보정(reconciliation) 용도로만 저빈도 실행
+            self.mode = "events+reconcile"
+            self.sync_interval = settings.slack_reconcile_interval_minutes * 60
+            self.min_interval = self.sync_interval
+            self.max_interval = max(self.sync_interval, self.max_interval)
+        self.role = "stopped"  # leader / follower / stopped
+
+        self.channels: Dict[str, Dict] = {}  # 채널 ID -> 스케줄 상태
+        self._heap: List = []  # (다음 동기화 시각, 채널 ID)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()  # 중지/즉시 동기화 요청 시 대기 중단
+        self._slack: Optional[SlackRealtime] = None
+        self._channels_refreshed_at = 0.0
+        self._budget_tokens = float(settings.slack_api_budget_per_minute)
+        self._budget_updated_at = time.monotonic()
+
     def start(self):
         """백그라운드 스케줄러 시작"""
         if self.is_running:
             logger.info("스케줄러가 이미 실행 중입니다.")
             return
-            
+
         self.is_running = True
+        self._wake.clear()
         self.sync_thread = threading.Thread(target=self._run_scheduler, daemon=True)
         self.sync_thread.start()
-        logger.info(f"Slack 자동 동기화 시작 (간격: {settings.slack_sync_interval_minutes}분)")
-        
+        logger.info(f"Slack 자동 동기화 시작 (모드: {self.mode}, 채널별 간격: "
+                    f"{self.min_interval // 60}~{self.max_interval // 60}분)")
+
     def stop(self):
         """스케줄러 중지"""
         self.is_running = False
+        self._wake.set()
         if self.sync_thread:
             self.sync_thread.join(timeout=5)
+        self.role = "stopped"
         logger.info("Slack 자동 동기화 중지됨")
-        
+
+    def _sleep(self, seconds: float):
+        """stop()/trigger() 가 호출되면 바로 깨어나는 대기"""
+        if seconds > 0:
+            self._wake.wait(seconds)
+        self._wake.clear()
+
+    def _wait_for_leadership(self) -> bool:
+        """리더 lease 를 얻을 때까지 대기 (리더가 죽으면 팔로워 중 하나가 이어받음)"""
+        while self.is_running:
+            if scheduler_lease.try_acquire():
+                self.role = "leader"
+                IS_LEADER.set(1)
+                return True
+            if self.role != "follower":
+                logger.info(f"다른 워커(pid {read_holder_pid(SCHEDULER_LOCK_FILE)})가 스케줄러 리더입니다. 검색만 처리합니다.")
+            self.role = "follower"
+            IS_LEADER.set(0)
+            self._sleep(settings.scheduler_leader_retry_seconds)
+        return False
+
     def _run_scheduler(self):
         """백그라운드에서 실행되는 스케줄러 루프"""
-        # 시작 시 즉시 한 번 동기화
-        self._sync_messages()
-        
-        while self.is_running:
-            try:
-                # 설정된 간격만큼 대기
-                time.sleep(self.sync_interval)
-                
-                if self.is_running:
-                    self._sync_messages()
-                    
-            except Exception as e:
-                logger.error(f"스케줄러 오류: {e}")
-                time.sleep(60)  # 오류 발생 시 1분 대기
-                
-    def _sync_messages(self):
-        """Slack 메시지 동기화 실행"""
+        # 워커가 여러 개여도 리더 하나만 동기화
+        if not self._wait_for_leadership():
+            return
+
         try:
-            logger.info("🔄 Slack 메시지 자동 동기화 시작...")
-            
-            # Slack API 클라이언트 생성
-            slack = SlackRealtime()
-            
-            # 연결 테스트
-            connection = slack.test_connection()
-            if connection["status"] == "error":
-                logger.error(f"Slack 연결 실패: {connection['error']}")
-                return
-                
-            # 메시지 동기화
-            result = slack.sync_recent_messages(
-                hours_back=self.sync_hours_back,
-                channels=None  # 모든 공개 채널
+            while self.is_running:
+                try:
+                    if not self._ensure_client():
+                        self._sleep(60)  # 연결 실패 시 1분 대기
+                        continue
+
+                    if time.time() - self._channels_refreshed_at >= CHANNEL_REFRESH_SECONDS:
+                        self._refresh_channels()
+
+                    channel_id, wait = self._next_due()
+                    if channel_id is None:
+                        self._sleep(wait)
+                        continue
+
+                    # 전역 API 호출 예산이 모자라면 충전될 때까지 대기
+                    budget_wait = self._budget_wait()
+                    if budget_wait > 0:
+                        self._sleep(budget_wait)
+                        continue
+
+                    self.sync_channel(channel_id)
+
+                except Exception as e:
+                    logger.error(f"스케줄러 오류: {e}")
+                    self._sleep(60)  # 오류 발생 시 1분 대기
+        finally:
+            scheduler_lease.release()
+            IS_LEADER.set(0)
+
+    def _ensure_client(self) -> bool:
+        """Slack API 클라이언트 생성 및 연결 테스트 (채널/사용자 캐시 유지를 위해 재사용)"""
+        if self._slack is not None:
+            return True
+
+        slack = SlackRealtime()
+        connection = slack.test_connection()
+        self._charge(slack, 1)
+        if connection["status"] == "error":
+            logger.error(f"Slack 연결 실패: {connection['error']}")
+            SYNC_RUNS.inc(result="connection_error")
+            return False
+        self._slack = slack
+        return True
+
+    def _refresh_channels(self):
+        """채널 목록 갱신 - 새 채널은 바로 동기화 대상에 추가, 사라진 채널은 제외"""
+        before = self._slack.api_calls
+        with track("sync.list_channels"):
+            channel_list = self._slack.get_channels()
+        self._charge(self._slack, self._slack.api_calls - before)
+        if not channel_list:
+            # 조회 실패 시 기존 목록 유지하고 나중에 다시 시도
+            self._channels_refreshed_at = time.time() - CHANNEL_REFRESH_SECONDS + 300
+            return
+
+        now = time.time()
+        with self._lock:
+            current = {ch["id"]: ch for ch in channel_list}
+            for channel_id in list(self.channels):
+                if channel_id not in current:
+                    del self.channels[channel_id]
+            for channel_id, channel in current.items():
+                state = self.channels.get(channel_id)
+                if state is None:
+                    # 재시작 전 상태(마지막 성공 시각, 유입 속도)를 이어받아 조회 기간을 놓치지 않도록
+                    saved = (get_state_db().get_checkpoint(f"channel:{channel_id}") or {}).get("data", {})
+                    # 첫 동기화 시각을 흩어 시작 직후 호출이 몰리지 않도록
+                    self.channels[channel_id] = {
+                        "id": channel_id,
+                        "name": channel["name"],
+                        "rate_per_hour": saved.get("rate_per_hour", 0.0),
+                        "interval": self.sync_interval,
+                        "next_due": now + random.uniform(0, min(60, self.sync_interval)),
+                        "last_sync": None,
+                        "last_success": saved.get("last_success"),
+                        "last_added": 0,
+                        "consecutive_errors": 0,
+                        "syncs": 0,
+                    }
+                    heapq.heappush(self._heap, (self.channels[channel_id]["next_due"], channel_id))
+                else:
+                    state["name"] = channel["name"]
+            TRACKED_CHANNELS.set(len(self.channels))
+        self._channels_refreshed_at = now
+        logger.info(f"스케줄러 채널 목록 갱신: {len(self.channels)}개 채널")
+
+    def _next_due(self):
+        """동기화할 차례인 채널 ID (없으면 None 과 다음 차례까지 남은 초)"""
+        with self._lock:
+            while self._heap:
+                due, channel_id = self._heap[0]
+                state = self.channels.get(channel_id)
+                if state is None or state["next_due"] != due:
+                    # 삭제되었거나 다시 예약된 채널의 오래된 항목
+                    heapq.heappop(self._heap)
+                    continue
+                wait = due - time.time()
+                if wait > 0:
+                    return None, min(wait, CHANNEL_REFRESH_SECONDS)
+                heapq.heappop(self._heap)
+                return channel_id, 0
+        return None, 60
+
+    def _budget_wait(self) -> float:
+        """API 호출 예산 토큰 버킷 - 1회 이상 호출할 수 있으면 0, 아니면 기다릴 초"""
+        per_minute = settings.slack_api_budget_per_minute
+        now = time.monotonic()
+        with self._lock:
+            self._budget_tokens = min(
+                float(per_minute), self._budget_tokens + (now - self._budget_updated_at) * per_minute / 60
             )
-            
-            self.last_sync_time = datetime.now()
-            
-            logger.info(f"✅ 자동 동기화 완료: "
-                       f"{result['channels_synced']}개 채널, "
-                       f"{result['messages_collected']}개 메시지, "
-                       f"{result['chunks_created']}개 청크 생성")
-            
-            if result['errors']:
-                logger.warning(f"동기화 중 오류: {result['errors']}")
-                
+            self._budget_updated_at = now
+            if self._budget_tokens >= 1:
+                return 0.0
+            return (1 - self._budget_tokens) * 60 / per_minute
+
+    def _charge(self, slack: SlackRealtime, calls: int):
+        """실제로 사용한 API 호출 수만큼 예산 차감 (음수가 되면 그만큼 다음 호출이 늦어짐)"""
+        if calls <= 0:
+            return
+        with self._lock:
+            self._budget_tokens -= calls
+        API_CALLS.inc(calls)
+
+    def _reschedule(self, state: Dict, now: float):
+        """유입 속도에 맞춰 다음 동기화 시각 결정 (지터 포함)"""
+        if state["consecutive_errors"]:
+            # 오류가 이어지면 지수적으로 간격을 늘림
+            interval = self.sync_interval * 2 ** min(state["consecutive_errors"], 4)
+        elif state["rate_per_hour"] > 0:
+            interval = TARGET_MESSAGES_PER_SYNC / state["rate_per_hour"] * 3600
+        else:
+            interval = self.max_interval
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        jitter = settings.slack_sync_jitter
+        state["interval"] = interval
+        state["next_due"] = now + interval * random.uniform(1 - jitter, 1 + jitter)
+        heapq.heappush(self._heap, (state["next_due"], state["id"]))
+
+    def sync_channel(self, channel_id: str) -> Optional[Dict]:
+        """채널 하나를 동기화하고 유입 속도/다음 동기화 시각 갱신"""
+        with self._lock:
+            state = self.channels.get(channel_id)
+        if state is None:
+            return None
+
+        now = time.time()
+        # 마지막 성공 이후 메시지를 놓치지 않도록 조회 기간을 늘림
+        hours_back = self.sync_hours_back
+        if state["last_success"]:
+            hours_back = max(hours_back, math.ceil((now - state["last_success"]) / 3600) + 1)
+
+        result = None
+        before = self._slack.api_calls
+        try:
+            # 수동 동기화가 진행 중이면 잠시 뒤로 미룸
+            with exclusive() as acquired:
+                if not acquired:
+                    SYNC_RUNS.inc(result="skipped_busy")
+                    with self._lock:
+                        state["next_due"] = now + BUSY_RETRY_SECONDS
+                        heapq.heappush(self._heap, (state["next_due"], channel_id))
+                    return None
+                with track("scheduler.sync"):
+                    result = self._slack.sync_channel(state, hours_back)
+            SYNC_RUNS.inc(result="success")
         except Exception as e:
-            logger.error(f"자동 동기화 실패: {e}")
-            
+            SYNC_RUNS.inc(result="error")
+            logger.error(f"채널 #{state['name']} 자동 동기화 실패: {e}")
+        finally:
+            self._charge(self._slack, self._slack.api_calls - before)
+
+        finished = time.time()
+        with self._lock:
+            state["syncs"] += 1
+            state["last_sync"] = finished
+            if result is None:
+                state["consecutive_errors"] += 1
+            else:
+                # 새로 들어온 메시지 수 / 지난 동기화 이후 경과 시간 (첫 동기화는 조회 기간 전체 기준)
+                elapsed_hours = ((finished - state["last_success"]) / 3600 if state["last_success"]
+                                 else hours_back)
+                observed = result["added"] / max(elapsed_hours, 1 / 60)
+                state["rate_per_hour"] = (observed if state["last_success"] is None else
+                                          RATE_EWMA_ALPHA * observed + (1 - RATE_EWMA_ALPHA) * state["rate_per_hour"])
+                state["last_success"] = finished
+                state["last_added"] = result["added"]
+                self._save_rate(state)
+                state["consecutive_errors"] = 0
+            self._reschedule(state, finished)
+
+        if result is not None:
+            self.last_sync_time = datetime.fromtimestamp(finished)
+            LAST_SYNC_TIMESTAMP.set(finished)
+        return result
+
+    def _save_rate(self, state: Dict):
+        """유입 속도를 채널 체크포인트에 함께 저장 (재시작 후 간격 유지)"""
+        db = get_state_db()
+        job = f"channel:{state['id']}"
+        checkpoint = db.get_checkpoint(job)
+        if checkpoint:
+            db.save_checkpoint(job, cursor=checkpoint["cursor"], batch=checkpoint["batch"],
+                               status=checkpoint["status"],
+                               data={**checkpoint["data"], "rate_per_hour": state["rate_per_hour"]})
+
+    def trigger(self, channel_id: Optional[str] = None) -> Dict:
+        """채널(없으면 전체)을 즉시 동기화하도록 예약하고 스케줄러를 깨움"""
+        if self.role != "leader":
+            raise RuntimeError(f"이 워커는 스케줄러 리더가 아닙니다 (리더 pid: {read_holder_pid(SCHEDULER_LOCK_FILE)})")
+
+        now = time.time()
+        with self._lock:
+            if channel_id is not None and channel_id not in self.channels:
+                raise KeyError(channel_id)
+            targets = [channel_id] if channel_id else list(self.channels)
+            for target in targets:
+                state = self.channels[target]
+                state["next_due"] = now
+                heapq.heappush(self._heap, (now, target))
+        self._wake.set()
+        return {"scheduled": len(targets)}
+
     def get_status(self):
-        """스케줄러 상태 반환"""
+        """스케줄러 상태 반환 (채널별 유입 속도와 다음 동기화 시각 포함)"""
+        iso = lambda ts: datetime.fromtimestamp(ts).isoformat() if ts else None
+        with self._lock:
+            channels = sorted(self.channels.values(), key=lambda s: s["next_due"])
+            channel_status = [{
+                "id": state["id"],
+                "name": state["name"],
+                "rate_per_hour": round(state["rate_per_hour"], 2),
+                "interval_minutes": round(state["interval"] / 60, 1),
+                "last_sync_time": iso(state["last_sync"]),
+                "next_sync_time": iso(state["next_due"]),
+                "last_added": state["last_added"],
+                "consecutive_errors": state["consecutive_errors"],
+            } for state in channels]
+            budget = round(max(self._budget_tokens, 0.0), 1)
+
         return {
             "is_running": self.is_running,
+            "role": self.role,
+            "pid": os.getpid(),
+            "leader_pid": read_holder_pid(SCHEDULER_LOCK_FILE) if self.role != "stopped" else None,
             "last_sync_time": self.last_sync_time.isoformat() if self.last_sync_time else None,
-            "sync_interval_minutes": settings.slack_sync_interval_minutes,
+            "mode": self.mode,
+            "sync_interval_minutes": self.sync_interval // 60,
+            "min_interval_minutes": self.min_interval // 60,
+            "max_interval_minutes": self.max_interval // 60,
             "sync_hours_back": self.sync_hours_back,
-            "next_sync_time": (
-                datetime.fromtimestamp(
-                    self.last_sync_time.timestamp() + self.sync_interval
-                ).isoformat()
-                if self.last_sync_time else None
-            )
+            "next_sync_time": channel_status[0]["next_sync_time"] if channel_status else None,
+            "api_budget": {
+                "per_minute": settings.slack_api_budget_per_minute,
+                "available": budget,
+            },
+            "channels": channel_status
         }
 
 # 전역 스케줄러 인스턴스
-scheduler = SlackSyncScheduler()
\ No newline at end of file
+scheduler = SlackSyncScheduler()
@@ -1,20 +1,118 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import re
+import unicodedata
 from app.core.database import get_collection
+from app.core.collections import get_active_collection
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
 from app.services.llm_service import get_embeddings, generate_answer
 from app.models.message import SearchQuery, SearchResult
+from app.core.metrics import registry, track
+from app.services.thread_summary import THREAD_SUMMARY_DOC_TYPE
 
-def search_messages(query: SearchQuery) -> SearchResult:
-    """질문에 대한 답변 검색 및 생성"""
+# 동시에 들어온 같은 질문은 임베딩/검색/답변 생성을 한 번만 수행
+_search_flight = SingleFlight("search")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?？!.。~]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+DIRECT_ANSWERS = registry.counter(
+    "slack_qa_search_direct_answers_total", "LLM 호출 없이 스레드 요약으로 바로 답변한 검색 수"
+)
+
+def build_filters(query: SearchQuery) -> Optional[Dict]:
+    """SearchQuery 의 채널/기간 조건을 ChromaDB where 필터로 변환
+    
+    파티션 저장소(PARTITION_BY)는 이 필터로 검색할 파티션을 고릅니다. 기간 필터는
+    `ts_epoch` 메타데이터가 있는 문서(이 기능 이후 인덱싱된 문서)에만 적용됩니다.
+    """
+    conditions = []
+    if query.channels:
+        conditions.append({"channel": {"$in": list(query.channels)}})
+    if query.since:
+        conditions.append({"ts_epoch": {"$gte": query.since.timestamp()}})
+    if query.until:
+        conditions.append({"ts_epoch": {"$lt": query.until.timestamp()}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def retrieve_messages(question: str, top_k: int = 10, where: Optional[Dict] = None) -> Dict:
+    """질문과 유사한 메시지를 ChromaDB에서 검색 (답변 생성 없이)"""
+    
+    # 모델 전환 중에도 질문 벡터와 컬렉션이 같은 임베딩 공간이도록 한 번만 조회
+    active = get_active_collection()
     
     # 질문 임베딩
-    query_embedding = get_embeddings([query.question])[0]
+    with track("search.embed_query"):
+        query_embedding = get_embeddings([question], spec=active["spec"])[0]
     
     # ChromaDB에서 유사한 메시지 검색
-    collection = get_collection()
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=query.top_k or 10
+    with track("search.open_collection"):
+        collection = get_collection(active["name"])
+    with track("search.chroma_query"):
+        return collection.query(
+            query_embeddings=[query_embedding],
+            n_results=top_k,
+            where=where
+        )
+
+def format_sources(results: Dict) -> List[dict]:
+    """검색 결과를 응답의 sources 형식으로 (본문은 200자까지)"""
+    sources = []
+    for i, doc in enumerate(results['documents'][0]):
+        sources.append({
+            "text": doc[:200] + "..." if len(doc) > 200 else doc,
+            "metadata": results['metadatas'][0][i] if results['metadatas'][0] else {},
+            "distance": results['distances'][0][i] if results['distances'] else 0
+        })
+    return sources
+
+def direct_answer(results: Dict) -> Optional[str]:
+    """`THREAD_SUMMARY_ANSWER_DISTANCE` 이내의 가장 가까운 스레드 요약 답변 (app.services.thread_summary 참고)
+
+    같은 질문이면 스레드의 루트 메시지가 요약보다 가깝게 나오므로 1위만 보지 않습니다.
+    """
+    threshold = settings.thread_summary_answer_distance
+    if threshold <= 0 or not results['metadatas'] or not results['distances']:
+        return None
+    for metadata, distance in zip(results['metadatas'][0], results['distances'][0]):
+        if distance > threshold:
+            break
+        if (metadata or {}).get('doc_type') == THREAD_SUMMARY_DOC_TYPE:
+            return (f"{metadata['answer']}\n\n"
+                    f"💬 #{metadata.get('channel', 'Unknown')} 스레드에서 해결된 질문입니다: {metadata.get('question', '')}")
+    return None
+
+def normalize_question(question: str) -> str:
+    """같은 질문으로 볼 형태 (유니코드 정규화, 대소문자/공백/끝 문장부호 무시)"""
+    question = unicodedata.normalize("NFKC", question).casefold()
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", question).strip())
+
+def search_key(query: SearchQuery) -> Tuple:
+    """single-flight 키 - 정규화한 질문 + 결과에 영향을 주는 검색 조건 + 서비스 컬렉션"""
+    return (
+        get_active_collection()["name"],
+        normalize_question(query.question),
+        query.top_k or 10,
+        tuple(sorted(query.channels)) if query.channels else None,
+        query.since.timestamp() if query.since else None,
+        query.until.timestamp() if query.until else None,
     )
+
+def search_messages(query: SearchQuery) -> SearchResult:
+    """질문에 대한 답변 검색 및 생성
+
+    `SEARCH_COALESCING_ENABLED` 이면 같은 키의 검색이 진행 중일 때 새로 실행하지 않고
+    그 결과를 함께 받습니다 (app.core.singleflight 참고).
+    """
+    if not settings.search_coalescing_enabled:
+        return _search_messages(query)
+    result, shared = _search_flight.do(search_key(query), lambda: _search_messages(query))
+    # 표기만 다른 질문이 합쳐졌을 수 있으므로 응답의 query 는 각 요청의 원문으로
+    return result.model_copy(update={"query": query.question}) if shared else result
+
+def _search_messages(query: SearchQuery) -> SearchResult:
+    results = retrieve_messages(query.question, query.top_k or 10, where=build_filters(query))
     
     # 검색 결과가 없는 경우
     if not results['documents'][0]:
@@ -24,22 +122,31 @@ def search_messages(query: SearchQuery) -> SearchResult:
             query=query.question
         )
     
-    # 컨텍스트 생성
-    context_parts = []
-    sources = []
-    
-    for i, doc in enumerate(results['documents'][0]):
-        context_parts.append(f"[대화 {i+1}]\n{doc}")
-        sources.append({
-            "text": doc[:200] + "..." if len(doc) > 200 else doc,
-            "metadata": results['metadatas'][0][i] if results['metadatas'][0] else {},
-            "distance": results['distances'][0][i] if results['distances'] else 0
-        })
+    # 충분히 가까운 스레드 요약이 있으면 LLM 없이 바로 답변
+    direct = direct_answer(results)
+    if direct is not None:
+        DIRECT_ANSWERS.inc()
+        return SearchResult(answer=direct, sources=format_sources(results)[:5], query=query.question)
     
-    context = "\n\n".join(context_parts[:5])  # 상위 5개만 사용
+    # 컨텍스트 생성
+    with track("search.build_context"):
+        context_parts = []
+        
+        for i, doc in enumerate(results['documents'][0]):
+            metadata = results['metadatas'][0][i] if results['metadatas'][0] else {}
+            # 유사 메시지로 접힌 문서는 반복 횟수를 함께 전달
+            repeated = f" (유사 메시지 {metadata['duplicate_count']}회)" if (metadata or {}).get('duplicate_count', 1) > 1 else ""
+            if (metadata or {}).get('doc_type') == THREAD_SUMMARY_DOC_TYPE:
+                # 스레드 요약 문서의 본문은 질문뿐이므로 요약한 답변을 함께 전달
+                doc = f"질문: {doc}\n답변: {metadata['answer']}"
+            context_parts.append(f"[대화 {i+1}]{repeated}\n{doc}")
+        sources = format_sources(results)
+        
+        context = "\n\n".join(context_parts[:5])  # 상위 5개만 사용
     
     # 답변 생성
-    answer = generate_answer(query.question, context)
+    with track("search.generate_answer"):
+        answer = generate_answer(query.question, context)
     
     return SearchResult(
         answer=answer,
@@ -1,8 +1,21 @@
 import json
-from typing import List, Dict
+from collections import namedtuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from app.models.message import SlackMessage
+from app.core.config import settings
+import hashlib
+import logging
+import os
 import re
 
+logger = logging.getLogger(__name__)
+
+# clean_text / 파싱 규칙이 바뀌면 올려서 기존 파싱 캐시를 무효화
+PARSE_CACHE_VERSION = 1
+MESSAGE_COLUMNS = ["user", "text", "ts", "channel", "thread_ts"]
+# 컬럼 캐시에서 읽은 메시지 한 건 (chunk_messages 입력용, SlackMessage 와 같은 속성)
+MessageRecord = namedtuple("MessageRecord", MESSAGE_COLUMNS)
+
 def parse_slack_export(file_path: str) -> List[SlackMessage]:
     """슬랙 export JSON 파일 파싱"""
     messages = []
@@ -10,32 +23,103 @@ def parse_slack_export(file_path: str) -> List[SlackMessage]:
     with open(file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    # 슬랙 export 형식에 따라 파싱
+    # 단일 채널 메시지 리스트 또는 여러 채널이 포함된 export
+    for msg, channel_name in _iter_export_messages(data):
+        if 'text' in msg and msg['text']:
+            messages.append(SlackMessage(
+                user=msg.get('user'),
+                text=clean_text(msg['text']),
+                ts=msg.get('ts', ''),
+                channel=channel_name,
+                thread_ts=msg.get('thread_ts')
+            ))
+    
+    return messages
+
+def _iter_export_messages(data) -> Iterator[Tuple[Dict, Optional[str]]]:
+    """export JSON(채널 리스트 또는 채널별 dict)에서 (원본 메시지, 채널 이름) 순회"""
     if isinstance(data, list):
-        # 단일 채널 메시지 리스트
         for msg in data:
-            if 'text' in msg and msg['text']:
-                messages.append(SlackMessage(
-                    user=msg.get('user'),
-                    text=clean_text(msg['text']),
-                    ts=msg.get('ts', ''),
-                    thread_ts=msg.get('thread_ts')
-                ))
+            yield msg, None
     elif isinstance(data, dict):
-        # 여러 채널이 포함된 export
         for channel_name, channel_messages in data.items():
             if isinstance(channel_messages, list):
                 for msg in channel_messages:
-                    if 'text' in msg and msg['text']:
-                        messages.append(SlackMessage(
-                            user=msg.get('user'),
-                            text=clean_text(msg['text']),
-                            ts=msg.get('ts', ''),
-                            channel=channel_name,
-                            thread_ts=msg.get('thread_ts')
-                        ))
-    
-    return messages
+                    yield msg, channel_name
+
+def _parse_columns(file_path: str) -> Dict[str, list]:
+    columns = {name: [] for name in MESSAGE_COLUMNS}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for msg, channel_name in _iter_export_messages(data):
+        if 'text' in msg and msg['text']:
+            columns["user"].append(msg.get('user'))
+            columns["text"].append(clean_text(msg['text']))
+            columns["ts"].append(msg.get('ts', ''))
+            columns["channel"].append(channel_name)
+            columns["thread_ts"].append(msg.get('thread_ts'))
+    return columns
+
+def file_digest(file_path: str) -> str:
+    """파일 내용의 SHA-1 (파싱 캐시 키)"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_path(file_path: str, digest: Optional[str] = None) -> str:
+    cache_dir = settings.parsed_cache_dir or os.path.join(settings.chroma_persist_directory, "parsed_cache")
+    return os.path.join(cache_dir, f"v{PARSE_CACHE_VERSION}-{digest or file_digest(file_path)}.parquet")
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _read_cache(path: str) -> Dict[str, list]:
+    import pandas as pd
+
+    frame = pd.read_parquet(path, columns=MESSAGE_COLUMNS)
+    # 결측값(None)이 NaN 으로 바뀌지 않도록 object 로 변환
+    return {name: frame[name].astype(object).where(frame[name].notna(), None).tolist() for name in MESSAGE_COLUMNS}
+
+def _write_cache(path: str, columns: Dict[str, list]):
+    import pandas as pd
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pd.DataFrame(columns, columns=MESSAGE_COLUMNS).to_parquet(tmp_path, index=False, compression="zstd")
+    os.replace(tmp_path, path)
+
+def load_message_columns(file_path: str, digest: Optional[str] = None) -> Dict[str, list]:
+    """export 파일을 정제된 메시지 컬럼 {"user", "text", "ts", "channel", "thread_ts"} 으로 로드
+
+    파일 내용 해시를 키로 한 Parquet 캐시가 있으면 json.load / clean_text 없이 바로 읽고,
+    없으면 파싱 후 캐시에 저장합니다. pyarrow 가 없거나 `PARSED_CACHE_ENABLED=false` 면
+    매번 파싱합니다.
+
+    Args:
+        digest: 이미 계산한 file_digest(file_path) - 넘기면 파일을 다시 읽어 해시하지 않음
+    """
+    if not settings.parsed_cache_enabled or not _parquet_available():
+        return _parse_columns(file_path)
+
+    path = _cache_path(file_path, digest)
+    if os.path.exists(path):
+        try:
+            return _read_cache(path)
+        except Exception as e:
+            logger.warning(f"파싱 캐시 읽기 실패, 다시 파싱합니다 ({path}): {e}")
+
+    columns = _parse_columns(file_path)
+    try:
+        _write_cache(path, columns)
+    except Exception as e:
+        logger.warning(f"파싱 캐시 저장 실패 ({path}): {e}")
+    return columns
 
 def clean_text(text: str) -> str:
     """슬랙 메시지 텍스트 정제"""
@@ -49,8 +133,18 @@ def clean_text(text: str) -> str:
     
     return text.strip()
 
+def _ts_epoch(ts) -> Optional[float]:
+    """Slack ts 문자열을 숫자로 (검색 기간 필터/월별 파티션용 `ts_epoch` 메타데이터)"""
+    try:
+        return float(ts)
+    except (TypeError, ValueError):
+        return None
+
 def chunk_messages(messages: List[SlackMessage], max_tokens: int = 1000) -> List[Dict]:
-    """메시지를 개별 청크로 변환 - 1메시지 = 1청크"""
+    """메시지를 개별 청크로 변환 - 1메시지 = 1청크
+
+    user/text/ts/channel/thread_ts 속성만 읽으므로 MessageRecord 도 받습니다.
+    """
     chunks = []
     
     for msg in messages:
@@ -64,6 +158,10 @@ def chunk_messages(messages: List[SlackMessage], max_tokens: int = 1000) -> List
             "channel": msg.channel if msg.channel else "Unknown"
         }
         
+        ts_epoch = _ts_epoch(msg.ts)
+        if ts_epoch is not None:
+            metadata["ts_epoch"] = ts_epoch
+        
         # thread_ts는 있을 때만 추가
         if msg.thread_ts:
             metadata["thread_ts"] = msg.thread_ts
@@ -73,4 +171,12 @@ def chunk_messages(messages: List[SlackMessage], max_tokens: int = 1000) -> List
             "metadata": metadata
         })
     
-    return chunks
\ No newline at end of file
+    return chunks
+
+def chunk_message_columns(columns: Dict[str, list]) -> List[Dict]:
+    """load_message_columns() 결과를 청크로 변환
+
+    SlackMessage(pydantic) 검증 없이 가벼운 레코드만 만들어 chunk_messages 에 넘기므로 파일
+    인덱싱과 실시간 동기화가 같은 청크 경계/메타데이터(=같은 문서 ID)를 만듭니다.
+    """
+    return chunk_messages([MessageRecord(*row) for row in zip(*(columns[name] for name in MESSAGE_COLUMNS))])
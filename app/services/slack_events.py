@@ -0,0 +1,220 @@
+"""Slack Events API 수신 메시지의 마이크로 배치 인덱싱
+
+`/slack/events` 로 들어온 message / message_changed / message_deleted 이벤트를
+프로세스 내부 큐에 넣고, 백그라운드 스레드가 `slack_events_batch_size` 개가 모이거나
+`slack_events_flush_seconds` 가 지나면 한 번에 임베딩/upsert 합니다.
+문서 ID는 폴링 동기화와 같은 `slack:{채널ID}:{ts}` 라서 재전송·중복 이벤트와
+대사(reconciliation) 폴링이 같은 문서를 덮어쓰기만 합니다.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+import queue
+import threading
+import time
+from app.core.config import settings
+from app.core.metrics import registry, track
+
+logger = logging.getLogger(__name__)
+
+EVENTS_RECEIVED = registry.counter("slack_qa_events_received_total", "수신한 Slack 이벤트 수 (action별)")
+EVENTS_QUEUE_DEPTH = registry.gauge("slack_qa_events_queue_depth", "인덱싱 대기 중인 Slack 이벤트 수")
+EVENT_INDEX_LAG = registry.histogram(
+    "slack_qa_event_index_lag_seconds", "메시지 작성(이벤트 시각)부터 검색 가능해질 때까지 걸린 시간 (초)"
+)
+
+# Slack 재전송으로 같은 event_id 가 다시 올 수 있어 최근 ID를 기억
+SEEN_EVENT_IDS_LIMIT = 10000
+
+class SlackEventQueue:
+    def __init__(self):
+        self.is_running = False
+        self.worker_thread = None
+        self.queue = queue.Queue()
+        self.seen_event_ids = OrderedDict()
+        self._seen_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._slack = None
+        self.last_flush_time = None
+        self.processed = {"upsert": 0, "unchanged": 0, "delete": 0, "ignored": 0, "duplicate": 0, "failed": 0}
+
+    def start(self):
+        """백그라운드 배치 워커 시작"""
+        with self._start_lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.worker_thread = threading.Thread(target=self._run_worker, daemon=True)
+            self.worker_thread.start()
+            logger.info(f"Slack 이벤트 인덱서 시작 (배치 {settings.slack_events_batch_size}개 / "
+                        f"{settings.slack_events_flush_seconds}초)")
+
+    def stop(self):
+        """남은 이벤트를 처리하고 워커 중지"""
+        self.is_running = False
+        if self.worker_thread:
+            self.worker_thread.join(timeout=10)
+
+    def enqueue(self, payload: Dict) -> str:
+        """event_callback 페이로드를 큐에 넣고 처리 방식(action)을 반환"""
+        event_id = payload.get("event_id")
+        if event_id and self._is_duplicate(event_id):
+            self.processed["duplicate"] += 1
+            EVENTS_RECEIVED.inc(action="duplicate")
+            return "duplicate"
+
+        action = self._parse_event(payload.get("event", {}))
+        EVENTS_RECEIVED.inc(action=action["type"] if action else "ignored")
+        if not action:
+            self.processed["ignored"] += 1
+            return "ignored"
+
+        self.start()
+        self.queue.put(action)
+        EVENTS_QUEUE_DEPTH.set(self.queue.qsize())
+        return action["type"]
+
+    def _is_duplicate(self, event_id: str) -> bool:
+        with self._seen_lock:
+            if event_id in self.seen_event_ids:
+                return True
+            self.seen_event_ids[event_id] = True
+            if len(self.seen_event_ids) > SEEN_EVENT_IDS_LIMIT:
+                self.seen_event_ids.popitem(last=False)
+            return False
+
+    def _parse_event(self, event: Dict) -> Optional[Dict]:
+        """Slack message 이벤트를 upsert/delete 작업으로 변환 (대상이 아니면 None)"""
+        from app.services.slack_realtime import IGNORED_SUBTYPES
+
+        if event.get("type") != "message" or not event.get("channel"):
+            return None
+
+        subtype = event.get("subtype")
+        channel_id = event["channel"]
+
+        if subtype == "message_deleted":
+            return {"type": "delete", "channel": channel_id, "ts": event.get("deleted_ts"),
+                    "event_ts": event.get("event_ts")}
+
+        if subtype == "message_changed":
+            message = event.get("message", {})
+            # 스레드 답글 수 변경 등 본문이 같은 수정 이벤트는 process_batch 에서 재임베딩 생략
+            return {"type": "upsert", "channel": channel_id, "message": message,
+                    "event_ts": event.get("event_ts")}
+
+        if subtype in IGNORED_SUBTYPES or not event.get("text"):
+            return None
+
+        return {"type": "upsert", "channel": channel_id, "message": event, "event_ts": event.get("event_ts")}
+
+    def _get_slack(self):
+        """사용자/채널 이름 조회용 클라이언트 (봇 토큰이 없으면 ID 그대로 사용)"""
+        if self._slack is None:
+            try:
+                from app.services.slack_realtime import SlackRealtime
+                self._slack = SlackRealtime()
+            except ValueError:
+                self._slack = False
+        return self._slack or None
+
+    def _run_worker(self):
+        """큐에서 이벤트를 모아 배치 단위로 처리"""
+        while self.is_running or not self.queue.empty():
+            try:
+                first = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + settings.slack_events_flush_seconds
+            while len(batch) < settings.slack_events_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self.process_batch(batch)
+            except Exception as e:
+                self.processed["failed"] += len(batch)
+                logger.error(f"Slack 이벤트 배치 처리 실패 ({len(batch)}개): {e}")
+            finally:
+                EVENTS_QUEUE_DEPTH.set(self.queue.qsize())
+
+    def process_batch(self, actions: List[Dict]) -> Dict:
+        """이벤트 배치를 임베딩/upsert 및 삭제 (같은 메시지는 마지막 이벤트만 반영)
+        
+        본문이 바뀌지 않은 수정 이벤트(스레드 답글 수 변경 등)는 재임베딩하지 않습니다.
+        """
+        from app.core.database import get_collection
+        from app.models.message import SlackMessage
+        from app.services.slack_realtime import apply_message_changes, delete_messages, slack_message_id
+
+        latest = {}
+        for action in actions:
+            ts = action["ts"] if action["type"] == "delete" else action["message"].get("ts")
+            if ts:
+                latest[slack_message_id(action["channel"], ts)] = action
+
+        slack = self._get_slack()
+        channel_ids, messages, delete_ids, event_times = [], [], [], []
+        for doc_id, action in latest.items():
+            if action["type"] == "delete":
+                delete_ids.append(doc_id)
+                continue
+            raw = action["message"]
+            if slack:
+                message = slack.to_slack_message(raw, action["channel"])
+                if message:
+                    message.channel = slack.get_channel_name(action["channel"])
+            else:
+                message = SlackMessage(user=raw.get("user"), text=raw.get("text", ""), ts=raw.get("ts", ""),
+                                       channel=action["channel"], thread_ts=raw.get("thread_ts"),
+                                       edited_ts=(raw.get("edited") or {}).get("ts"))
+            if not message or not message.text:
+                # 수정 후 내용이 비었으면 삭제로 처리
+                delete_ids.append(doc_id)
+                continue
+            channel_ids.append(action["channel"])
+            messages.append(message)
+            event_times.append(action.get("event_ts"))
+
+        collection = get_collection()
+        with track("events.apply"):
+            changes = apply_message_changes(
+                collection, channel_ids, messages,
+                {"sync_time": datetime.now().isoformat(), "source": "slack_events"}
+            )
+        now = time.time()
+        for event_ts in event_times:
+            if event_ts:
+                EVENT_INDEX_LAG.observe(max(0.0, now - float(event_ts)))
+
+        if delete_ids:
+            with track("events.delete"):
+                delete_messages(collection, delete_ids)
+
+        self.processed["upsert"] += changes["added"] + changes["edited"] - changes["failed"]
+        self.processed["failed"] += changes["failed"]
+        self.processed["unchanged"] += changes["unchanged"]
+        self.processed["delete"] += len(delete_ids)
+        self.last_flush_time = datetime.now()
+        logger.info(f"Slack 이벤트 배치 반영: 신규 {changes['added']}개, 수정 {changes['edited']}개, "
+                    f"삭제 {len(delete_ids)}개")
+        return {**changes, "deleted": len(delete_ids)}
+
+    def get_status(self) -> Dict:
+        return {
+            "is_running": self.is_running,
+            "queue_depth": self.queue.qsize(),
+            "last_flush_time": self.last_flush_time.isoformat() if self.last_flush_time else None,
+            "processed": dict(self.processed),
+        }
+
+# 전역 이벤트 큐 인스턴스
+event_queue = SlackEventQueue()
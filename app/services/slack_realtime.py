@@ -1,22 +1,168 @@
 """Slack API를 통한 실시간 메시지 동기화"""
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry import RateLimitErrorRetryHandler, default_retry_handlers
 import ssl
 import certifi
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import hashlib
 import os
 from app.models.message import SlackMessage
-from app.services.embedding import index_slack_data
+from app.services.embedding import index_slack_data, INDEXED_CHUNKS
 from app.services.slack_data import chunk_messages
 from app.core.database import get_collection
-from app.services.llm_service import get_embeddings
+from app.services.llm_service import embed_texts
 from app.core.config import settings
-import uuid
+from app.core.metrics import registry, track
+from app.core.state_db import get_state_db
 import logging
 
 logger = logging.getLogger(__name__)
 
+SYNC_CHANGES = registry.counter("slack_qa_sync_changes_total", "동기화로 반영된 메시지 변경 수 (change별)")
+
+# 한 번에 조회/삭제할 문서 수
+CHANGE_BATCH_SIZE = 500
+
+# 동기화 대상에서 제외하는 메시지 subtype (봇/시스템 메시지)
+IGNORED_SUBTYPES = ["bot_message", "channel_join", "channel_leave"]
+
+def slack_message_id(channel_id: str, ts: str) -> str:
+    """채널 ID + ts 기반의 결정적 문서 ID - 폴링과 이벤트가 같은 메시지를 덮어쓰도록"""
+    return f"slack:{channel_id}:{ts}"
+
+def content_hash(message: SlackMessage) -> str:
+    """임베딩 텍스트에 영향을 주는 필드의 해시 - 같으면 재임베딩하지 않음"""
+    key = "\x1f".join([message.user or "", message.text, message.thread_ts or ""])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def apply_message_changes(
+    collection,
+    channel_ids: List[str],
+    messages: List[SlackMessage],
+    extra_metadata: Dict
+) -> Dict:
+    """새/수정된 메시지만 임베딩해서 upsert
+    
+    저장된 `content_hash` 와 비교해 본문이 바뀐 메시지만 다시 임베딩하고, 본문은 같고
+    `edited_ts` 만 바뀐 경우(예: 수정 후 원복)는 메타데이터만 갱신합니다.
+    
+    임베딩에 끝내 실패한 메시지는 저장하지 않고 `failed` 로 세므로 다음 동기화에서
+    신규 메시지로 다시 시도됩니다.
+    
+    이미 저장된 메시지와 거의 같은 메시지(봇 알림, 교차 게시 등)는 임베딩하지 않고 대표 문서의
+    중복 수/위치만 갱신합니다 (`duplicates`, app.services.dedup 참고).
+    
+    Returns:
+        {"added", "edited", "unchanged", "embedded", "failed", "duplicates"} 건수
+    """
+    from app.services.dedup import (
+        annotate_canonical_chunks, collapse_chunks, get_dedup_index, refresh_canonical_metadata, release_failed_canonicals
+    )
+    
+    result = {"added": 0, "edited": 0, "unchanged": 0, "embedded": 0, "failed": 0, "duplicates": 0}
+    if not messages:
+        return result
+    
+    ids = [slack_message_id(channel_id, msg.ts) for channel_id, msg in zip(channel_ids, messages)]    
+    existing = {}
+    for start in range(0, len(ids), CHANGE_BATCH_SIZE):
+        page = collection.get(ids=ids[start:start + CHANGE_BATCH_SIZE], include=["metadatas"])
+        existing.update(zip(page["ids"], page["metadatas"]))
+    # 대표 문서로 접혀 저장소에 없는 메시지는 중복 목록의 content_hash 로 비교
+    folded = get_dedup_index().get_members(collection.name, [doc_id for doc_id in ids if doc_id not in existing]) \
+        if settings.dedup_enabled else {}
+    
+    chunks = chunk_messages(messages, settings.max_tokens_per_chunk)
+    changed_ids, changed_chunks, touched_ids, touched_metadatas = [], [], [], []
+    for doc_id, channel_id, message, chunk in zip(ids, channel_ids, messages, chunks):
+        metadata = chunk["metadata"]
+        metadata.update(extra_metadata)
+        metadata["channel_id"] = channel_id
+        metadata["content_hash"] = content_hash(message)
+        if message.edited_ts:
+            metadata["edited_ts"] = message.edited_ts
+        
+        previous = existing.get(doc_id) or folded.get(doc_id)
+        if previous is None:
+            result["added"] += 1
+        elif previous.get("content_hash") != metadata["content_hash"]:
+            result["edited"] += 1
+        else:
+            result["unchanged"] += 1
+            if previous.get("edited_ts") != metadata.get("edited_ts"):
+                touched_ids.append(doc_id)
+                touched_metadatas.append(metadata)
+            continue
+        changed_ids.append(doc_id)
+        changed_chunks.append(chunk)
+    
+    if changed_chunks:
+        source = extra_metadata.get("source", "slack_api")
+        with track("sync.dedup"):
+            collapsed = collapse_chunks(collection.name, changed_ids, changed_chunks,
+                                        [chunk["metadata"]["content_hash"] for chunk in changed_chunks], source=source)
+        candidates = collapsed["kept"]
+        try:
+            with track("sync.embed"):
+                embedded = embed_texts([changed_chunks[i]["text"] for i in candidates])
+        except Exception:
+            # 인증/설정 오류로 동기화가 멈추면 이번에 등록한 대표 서명도 되돌려 다음 동기화에서 다시 시도
+            release_failed_canonicals(collection.name, changed_ids, collapsed, candidates)
+            raise
+        if embedded["failed"]:
+            # 실패한 대표 메시지와 거기 접힌 메시지는 인덱스에서 되돌려 다음 동기화에서 다시 시도
+            orphaned = release_failed_canonicals(collection.name, changed_ids, collapsed,
+                                                 [candidates[entry["index"]] for entry in embedded["failed"]])
+            collapsed["duplicate_of"] = {i: doc_id for i, doc_id in collapsed["duplicate_of"].items()
+                                         if i not in set(orphaned)}
+            result["failed"] = len(embedded["failed"]) + len(orphaned)
+            logger.warning(f"임베딩 실패로 메시지 {result['failed']}개를 건너뜀: {embedded['failed'][0]['error']}")
+        kept_ids = [changed_ids[candidates[i]] for i in embedded["indices"]]
+        kept = [changed_chunks[candidates[i]] for i in embedded["indices"]]
+        if kept:
+            annotate_canonical_chunks(collection.name, kept_ids, kept)
+            try:
+                with track("sync.store"):
+                    collection.upsert(
+                        ids=kept_ids,
+                        embeddings=embedded["embeddings"],
+                        documents=[chunk["text"] for chunk in kept],
+                        metadatas=[chunk["metadata"] for chunk in kept]
+                    )
+            except Exception:
+                # 저장하지 못한 대표 서명도 되돌려 다음 동기화에서 다시 시도
+                release_failed_canonicals(collection.name, changed_ids, collapsed, candidates)
+                raise
+            INDEXED_CHUNKS.inc(len(kept), source=source)
+        result["embedded"] = len(kept)
+        result["duplicates"] = len(collapsed["duplicate_of"])
+        # 접힌 메시지의 대표 문서 갱신, 수정으로 다른 문서의 중복이 된 기존 문서는 삭제
+        stored_canonicals = [doc_id for doc_id in collapsed["duplicate_of"].values() if doc_id not in set(kept_ids)]
+        if stored_canonicals or collapsed["demoted"]:
+            with track("sync.store"):
+                refresh_canonical_metadata(collection, stored_canonicals)
+                if collapsed["demoted"]:
+                    collection.delete(ids=collapsed["demoted"])
+    if touched_ids:
+        collection.update(ids=touched_ids, metadatas=touched_metadatas)
+    
+    for change in ("added", "edited", "unchanged"):
+        SYNC_CHANGES.inc(result[change], change=change)
+    return result
+
+def delete_messages(collection, ids: List[str]) -> int:
+    """문서를 배치 단위로 삭제 (대표 문서로 접힌 메시지면 대표 문서의 중복 수를 갱신)"""
+    from app.services.dedup import get_dedup_index, refresh_canonical_metadata
+    
+    for start in range(0, len(ids), CHANGE_BATCH_SIZE):
+        collection.delete(ids=ids[start:start + CHANGE_BATCH_SIZE])
+    if ids and settings.dedup_enabled:
+        refresh_canonical_metadata(collection, get_dedup_index().forget(collection.name, ids))
+    SYNC_CHANGES.inc(len(ids), change="deleted")
+    return len(ids)
+
 class SlackRealtime:
     def __init__(self, token: str = None):
         """Slack API 클라이언트 초기화"""
@@ -26,8 +172,16 @@ class SlackRealtime:
         
         # SSL 컨텍스트 생성
         ssl_context = ssl.create_default_context(cafile=certifi.where())
-        self.client = WebClient(token=self.token, ssl=ssl_context)
+        # 429(rate limited)는 Retry-After 만큼 기다렸다 재시도 (기본 핸들러는 연결 오류만 재시도)
+        retry_handlers = default_retry_handlers()
+        if settings.slack_rate_limit_retries > 0:
+            retry_handlers.append(RateLimitErrorRetryHandler(max_retry_count=settings.slack_rate_limit_retries))
+        client_options = {"base_url": settings.slack_api_base_url.rstrip("/") + "/"} if settings.slack_api_base_url else {}
+        self.client = WebClient(token=self.token, ssl=ssl_context, retry_handlers=retry_handlers, **client_options)
         self.user_cache = {}  # 사용자 정보 캐시
+        self.channel_cache = {}  # 채널 이름 캐시
+        self.joined_channels = set()  # 이미 참여한 채널 (conversations.join 반복 호출 방지)
+        self.api_calls = 0  # 이 클라이언트가 호출한 Slack Web API 횟수 (스케줄러 호출 예산 계산용)
         
     def test_connection(self) -> Dict:
         """Slack API 연결 테스트"""
@@ -56,6 +210,7 @@ class SlackRealtime:
                 types="public_channel",
                 limit=100
             ):
+                self.api_calls += 1
                 channels.extend(page["channels"])
                 
             return [{
@@ -75,6 +230,7 @@ class SlackRealtime:
             return self.user_cache[user_id]
             
         try:
+            self.api_calls += 1
             response = self.client.users_info(user=user_id)
             real_name = response["user"].get("real_name", user_id)
             self.user_cache[user_id] = real_name
@@ -83,6 +239,106 @@ class SlackRealtime:
             self.user_cache[user_id] = user_id
             return user_id
     
+    def get_channel_name(self, channel_id: str) -> str:
+        """채널 이름 가져오기 (캐시 사용)"""
+        if channel_id in self.channel_cache:
+            return self.channel_cache[channel_id]
+            
+        try:
+            self.api_calls += 1
+            response = self.client.conversations_info(channel=channel_id)
+            name = response["channel"].get("name", channel_id)
+        except SlackApiError:
+            name = channel_id
+        self.channel_cache[channel_id] = name
+        return name
+    
+    def to_slack_message(self, msg: Dict, channel_id: str) -> Optional[SlackMessage]:
+        """Slack API 메시지(dict)를 SlackMessage로 변환 (제외 대상이면 None)"""
+        # 봇 메시지나 시스템 메시지 제외
+        if msg.get("subtype") in IGNORED_SUBTYPES:
+            return None
+        
+        if not msg.get("text"):
+            return None
+            
+        user_id = msg.get("user", "unknown")
+        user_name = self.get_user_info(user_id) if user_id != "unknown" else "Unknown"
+        
+        return SlackMessage(
+            user=user_name,
+            text=msg.get("text", ""),
+            ts=msg.get("ts", ""),
+            channel=channel_id,
+            thread_ts=msg.get("thread_ts"),
+            edited_ts=(msg.get("edited") or {}).get("ts")
+        )
+    
+    def fetch_channel_messages(
+        self,
+        channel_id: str,
+        oldest_ts: str,
+        limit: Optional[int] = 1000
+    ) -> Tuple[List[SlackMessage], bool]:
+        """oldest_ts 이후 채널 메시지를 페이지 단위로 가져오기
+        
+        Args:
+            limit: 가져올 최대 메시지 수 (None 이면 기간 전체) - conversations.history 는 최신
+                메시지부터 돌려주므로 limit 에 걸리면 기간의 오래된 쪽이 빠짐
+        
+        Returns:
+            (메시지 목록, 기간 내 메시지를 빠짐없이 가져왔는지 여부)
+            - 삭제 감지는 빠짐없이 가져온 채널에서만 수행합니다.
+
+        Raises:
+            SlackApiError: 메시지 조회 실패 (재시도 후의 429 포함) - 빈 결과로 돌려주면 동기화가
+                성공한 것으로 기록되어 다음 조회 기간이 실패한 구간을 건너뛰게 됨
+        """
+        messages = []
+        complete = False
+        
+        try:
+            # 먼저 봇이 채널에 참여했는지 확인
+            if channel_id not in self.joined_channels:
+                try:
+                    self.api_calls += 1
+                    self.client.conversations_join(channel=channel_id)
+                    self.joined_channels.add(channel_id)
+                except SlackApiError as e:
+                    if "already_in_channel" in str(e):
+                        self.joined_channels.add(channel_id)
+                    else:
+                        logger.warning(f"채널 참여 실패 {channel_id}: {e}")
+            
+            # 메시지 가져오기 (cursor 페이지네이션)
+            cursor = None
+            fetched = 0
+            while limit is None or fetched < limit:
+                self.api_calls += 1
+                response = self.client.conversations_history(
+                    channel=channel_id,
+                    oldest=oldest_ts,
+                    limit=200 if limit is None else min(200, limit - fetched),
+                    cursor=cursor
+                )
+                page = response.get("messages", [])
+                fetched += len(page)
+                for msg in page:
+                    message = self.to_slack_message(msg, channel_id)
+                    if message:
+                        messages.append(message)
+                
+                cursor = (response.get("response_metadata") or {}).get("next_cursor")
+                if not response.get("has_more") or not cursor:
+                    complete = True
+                    break
+                
+        except SlackApiError as e:
+            logger.error(f"메시지 가져오기 실패 (채널: {channel_id}): {e}")
+            raise
+            
+        return messages, complete
+    
     def get_channel_messages(
         self, 
         channel_id: str, 
@@ -90,50 +346,150 @@ class SlackRealtime:
         limit: int = 1000
     ) -> List[SlackMessage]:
         """특정 채널의 메시지 가져오기"""
-        messages = []
-        
         # 시작 시간 설정
         oldest = datetime.now() - timedelta(hours=hours_back)
-        oldest_ts = str(oldest.timestamp())
-        
         try:
-            # 먼저 봇이 채널에 참여했는지 확인
-            try:
-                self.client.conversations_join(channel=channel_id)
-            except SlackApiError as e:
-                if "already_in_channel" not in str(e):
-                    logger.warning(f"채널 참여 실패 {channel_id}: {e}")
-                    
-            # 메시지 가져오기
-            response = self.client.conversations_history(
-                channel=channel_id,
-                oldest=oldest_ts,
-                limit=limit
-            )
-            
-            for msg in response.get("messages", []):
-                # 봇 메시지나 시스템 메시지 제외
-                if msg.get("subtype") in ["bot_message", "channel_join", "channel_leave"]:
+            messages, _ = self.fetch_channel_messages(channel_id, str(oldest.timestamp()), limit)
+        except SlackApiError:
+            return []
+        return messages
+    
+    def find_deleted_messages(
+        self,
+        collection,
+        channel_id: str,
+        channel_name: str,
+        window_start: float,
+        window_end: float,
+        fetched_ids: set
+    ) -> List[str]:
+        """인덱스에는 있지만 Slack에서 사라진 메시지의 문서 ID (채널별 ts 대사)
+        
+        [window_start, window_end) 사이의 Slack 동기화 문서 중 이번에 가져온 ID에 없는 것을
+        삭제된 것으로 봅니다. conversations.history 는 스레드 답글을 돌려주지 않으므로 답글은
+        제외하고(답글 삭제는 이벤트로 반영), 이전 버전의 uuid 문서는 채널 이름으로 찾습니다.
+        
+        조회 기간은 `ts_epoch` 범위로 저장소에서 거르고 CHANGE_BATCH_SIZE 단위로 페이지를 읽으므로
+        채널 전체 이력이 아니라 이번 기간의 문서만 읽습니다 (`ts_epoch` 가 없는 오래된 문서는 대상 아님).
+        
+        유사 메시지로 접혀 저장소에 없는 메시지도 유사 메시지 인덱스에서 같은 기준으로 찾습니다
+        (delete_messages 가 인덱스에서 지우고 대표 문서의 중복 수/위치를 갱신).
+        """
+        from app.services.dedup import get_dedup_index, is_thread_reply
+        
+        stale = []
+        if settings.dedup_enabled:
+            prefix = slack_message_id(channel_id, "")
+            for doc_id in get_dedup_index().folded_top_level(collection.name, prefix):
+                try:
+                    ts = float(doc_id[len(prefix):])
+                except ValueError:
                     continue
-                
-                if not msg.get("text"):
+                if window_start <= ts < window_end and doc_id not in fetched_ids:
+                    stale.append(doc_id)
+        
+        where = {"$and": [
+            {"source": {"$in": ["slack_api", "slack_events"]}},
+            {"$or": [{"channel_id": channel_id}, {"channel": channel_name}]},
+            {"ts_epoch": {"$gte": window_start}},
+            {"ts_epoch": {"$lt": window_end}},
+        ]}
+        
+        offset = 0
+        while True:
+            page = collection.get(where=where, limit=CHANGE_BATCH_SIZE, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                return stale
+            offset += len(page["ids"])
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                if doc_id in fetched_ids:
                     continue
-                    
-                user_id = msg.get("user", "unknown")
-                user_name = self.get_user_info(user_id) if user_id != "unknown" else "Unknown"
-                
-                messages.append(SlackMessage(
-                    user=user_name,
-                    text=msg.get("text", ""),
-                    ts=msg.get("ts", ""),
-                    channel=channel_id,
-                    thread_ts=msg.get("thread_ts")
-                ))
-                
-        except SlackApiError as e:
-            logger.error(f"메시지 가져오기 실패 (채널: {channel_id}): {e}")
-            
-        return messages
+                if is_thread_reply(metadata):
+                    continue
+                stale.append(doc_id)
+    
+    def sync_channel(
+        self,
+        channel: Dict,
+        hours_back: int,
+        collection=None,
+        sync_time: Optional[str] = None
+    ) -> Dict:
+        """채널 하나의 최근 메시지를 가져와 변경분(신규/수정/삭제)만 반영
+        
+        Args:
+            channel: {"id", "name"}
+            hours_back: 가져올 기간 (시간) - 이 기간 안의 수정/삭제까지 감지
+        
+        Returns:
+            {"messages", "embedded", "added", "edited", "unchanged", "failed", "duplicates", "deleted"}
+            (failed: 임베딩에 실패해 저장하지 못한 메시지 - 다음 동기화에서 다시 시도,
+             duplicates: 유사 메시지로 접혀 임베딩하지 않은 메시지)
+        
+        Raises:
+            SlackApiError: 메시지 조회 실패 - 체크포인트(last_success)를 갱신하지 않으므로 다음
+                동기화가 실패한 구간부터 다시 가져옴
+        """
+        channel_id = channel["id"]
+        channel_name = channel.get("name", channel_id)
+        collection = collection or get_collection()
+        sync_time = sync_time or datetime.now().isoformat()
+        window_start = (datetime.now() - timedelta(hours=hours_back)).timestamp()
+        window_end = datetime.now().timestamp()
+        
+        # 기간 전체를 끝까지 가져옴 - 개수 제한에 걸려 오래된 쪽이 빠진 채로 last_success 를
+        # 갱신하면 다음 동기화의 조회 기간이 빠진 구간을 건너뜀
+        with track("sync.fetch_channel"):
+            messages, complete = self.fetch_channel_messages(
+                channel_id=channel_id,
+                oldest_ts=str(window_start),
+                limit=None
+            )
+        
+        # 채널 이름을 메시지에 추가
+        for msg in messages:
+            msg.channel = channel_name
+        
+        # 오래된 메시지부터 배치 단위로 저장하고 배치마다 체크포인트 기록
+        # (중단 후 재실행 시 저장된 메시지는 content_hash 가 같아 다시 임베딩하지 않음)
+        state = get_state_db()
+        job = f"channel:{channel_id}"
+        previous = (state.get_checkpoint(job) or {}).get("data", {})
+        messages.sort(key=lambda msg: float(msg.ts))
+        changes = {"added": 0, "edited": 0, "unchanged": 0, "embedded": 0, "failed": 0, "duplicates": 0}
+        batch_size = settings.ingest_commit_batch_size
+        for batch_no, offset in enumerate(range(0, len(messages), batch_size), start=1):
+            batch = messages[offset:offset + batch_size]
+            batch_changes = apply_message_changes(
+                collection,
+                [channel_id] * len(batch),
+                batch,
+                {"sync_time": sync_time, "source": "slack_api"}
+            )
+            for key in changes:
+                changes[key] += batch_changes[key]
+            state.save_checkpoint(job, cursor=batch[-1].ts, batch=batch_no,
+                                  data={**previous, "window_start": window_start})
+        
+        deleted = 0
+        if complete:
+            with track("sync.delete_stale"):
+                fetched_ids = {slack_message_id(channel_id, msg.ts) for msg in messages}
+                stale_ids = self.find_deleted_messages(
+                    collection, channel_id, channel_name, window_start, window_end, fetched_ids
+                )
+                deleted = delete_messages(collection, stale_ids)
+        
+        # 완료 시각은 다음 동기화의 조회 기간 계산에 사용 (재시작 후에도 유지)
+        state.save_checkpoint(job, cursor=messages[-1].ts if messages else previous.get("newest_ts"),
+                              batch=-(-len(messages) // batch_size), status="completed",
+                              data={**previous, "last_success": window_end,
+                                    "newest_ts": messages[-1].ts if messages else previous.get("newest_ts")})
+        
+        if messages or deleted:
+            logger.info(f"채널 #{channel_name}: {len(messages)}개 메시지 수집 "
+                        f"(신규 {changes['added']}, 수정 {changes['edited']}, 삭제 {deleted})")
+        return {"messages": len(messages), **changes, "deleted": deleted}
     
     def sync_recent_messages(
         self, 
@@ -143,16 +499,18 @@ class SlackRealtime:
     ) -> Dict:
         """최근 메시지를 DB에 동기화
         
+        새 메시지와 수정된 메시지만 임베딩하고, Slack에서 삭제된 메시지는 인덱스에서도 제거합니다.
+        
         Args:
             hours_back: 몇 시간 전까지의 메시지를 가져올지 (기본: 24시간)
             channels: 특정 채널만 동기화 (None이면 모든 공개 채널)
             progress_callback: 진행상황 콜백
         """
-        all_messages = []
         sync_result = {
             "channels_synced": 0,
             "messages_collected": 0,
             "chunks_created": 0,
+            "changes": {"added": 0, "edited": 0, "unchanged": 0, "failed": 0, "duplicates": 0, "deleted": 0},
             "errors": []
         }
         
@@ -160,100 +518,60 @@ class SlackRealtime:
         if channels:
             channel_list = [{"id": ch, "name": ch} for ch in channels]
         else:
-            channel_list = self.get_channels()
+            with track("sync.list_channels"):
+                channel_list = self.get_channels()
             
         if progress_callback:
             progress_callback(f"총 {len(channel_list)}개 채널 동기화 시작...")
         
-        # 각 채널의 메시지 가져오기
+        collection = get_collection()
+        sync_time = datetime.now().isoformat()
+        
+        # 같은 동기화가 중간에 끊겼다면 이미 끝낸 채널은 건너뜀
+        state = get_state_db()
+        job = f"sync:{','.join(sorted(channels)) if channels else 'all'}:{hours_back}"
+        checkpoint = state.get_checkpoint(job)
+        done = []
+        if checkpoint and checkpoint["status"] == "running" and \
+                datetime.now() - datetime.fromisoformat(checkpoint["updated_at"]) < timedelta(hours=hours_back):
+            done = checkpoint["data"].get("done", [])
+            logger.info(f"중단된 동기화 이어서 진행: {len(done)}개 채널 완료됨")
+        
+        # 채널별로 가져와서 변경분만 반영
         for idx, channel in enumerate(channel_list):
-            channel_id = channel["id"]
-            channel_name = channel.get("name", channel_id)
+            channel_name = channel.get("name", channel["id"])
+            if channel["id"] in done:
+                sync_result["channels_synced"] += 1
+                continue
             
             if progress_callback:
                 progress_callback(f"[{idx+1}/{len(channel_list)}] #{channel_name} 채널 동기화 중...")
             
             try:
-                messages = self.get_channel_messages(
-                    channel_id=channel_id,
-                    hours_back=hours_back
-                )
+                result = self.sync_channel(channel, hours_back, collection, sync_time)
+                done.append(channel["id"])
+                state.save_checkpoint(job, cursor=channel["id"], batch=len(done), data={"done": done})
                 
-                # 채널 이름을 메시지에 추가
-                for msg in messages:
-                    msg.channel = channel_name
-                    
-                all_messages.extend(messages)
                 sync_result["channels_synced"] += 1
-                
-                if messages:
-                    logger.info(f"채널 #{channel_name}: {len(messages)}개 메시지 수집")
+                sync_result["messages_collected"] += result["messages"]
+                sync_result["chunks_created"] += result["embedded"]
+                for change in sync_result["changes"]:
+                    sync_result["changes"][change] += result[change]
                     
             except Exception as e:
                 error_msg = f"채널 #{channel_name} 동기화 실패: {str(e)}"
                 sync_result["errors"].append(error_msg)
                 logger.error(error_msg)
         
-        sync_result["messages_collected"] = len(all_messages)
+        # 실패한 채널이 있으면 다음 실행에서 완료한 채널을 건너뛰도록 running 으로 유지
+        state.save_checkpoint(job, batch=len(done), status="running" if sync_result["errors"] else "completed",
+                              data={"done": done})
         
-        # 메시지가 있으면 DB에 저장
-        if all_messages:
-            if progress_callback:
-                progress_callback(f"총 {len(all_messages)}개 메시지 인덱싱 중...")
-            
-            # 메시지 청킹
-            chunks = chunk_messages(all_messages, settings.max_tokens_per_chunk)
-            texts = [chunk["text"] for chunk in chunks]
-            
-            # 임베딩 생성
-            if progress_callback:
-                progress_callback(f"{len(chunks)}개 청크 임베딩 생성 중...")
-            embeddings = get_embeddings(texts)
-            
-            # ChromaDB에 저장 (중복 제거)
-            collection = get_collection()
-            
-            # 기존 Slack API 데이터 삭제 (동일 시간대 중복 방지)
-            try:
-                existing_data = collection.get(
-                    where={"source": "slack_api"}
-                )
-                if existing_data and existing_data['ids']:
-                    # 동일한 hours_back 범위의 기존 데이터만 삭제
-                    ids_to_delete = []
-                    for idx, metadata in enumerate(existing_data['metadatas']):
-                        if metadata.get('hours_back') == hours_back:
-                            ids_to_delete.append(existing_data['ids'][idx])
-                    
-                    if ids_to_delete:
-                        collection.delete(ids=ids_to_delete)
-                        logger.info(f"기존 데이터 {len(ids_to_delete)}개 삭제 (hours_back={hours_back})")
-            except Exception as e:
-                logger.warning(f"기존 데이터 삭제 중 오류: {e}")
-            
-            # 새 데이터 추가
-            ids = [str(uuid.uuid4()) for _ in chunks]
-            metadatas = [chunk["metadata"] for chunk in chunks]
-            
-            # 실시간 동기화 정보 추가
-            for metadata in metadatas:
-                metadata["sync_time"] = datetime.now().isoformat()
-                metadata["source"] = "slack_api"
-                metadata["hours_back"] = hours_back
-            
-            collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas
-            )
-            
-            sync_result["chunks_created"] = len(chunks)
-            
-            if progress_callback:
-                progress_callback(f"✅ 동기화 완료! {len(chunks)}개 청크 생성됨")
-        else:
-            if progress_callback:
+        if progress_callback:
+            if sync_result["chunks_created"] or sync_result["changes"]["deleted"]:
+                progress_callback(f"✅ 동기화 완료! {sync_result['chunks_created']}개 청크 임베딩, "
+                                  f"{sync_result['changes']['deleted']}개 삭제")
+            else:
                 progress_callback("동기화할 새 메시지가 없습니다.")
         
         return sync_result
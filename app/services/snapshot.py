@@ -0,0 +1,206 @@
+"""인덱스 스냅샷 내보내기/가져오기 (임베딩 포함, 스트리밍)
+
+`check_db_data.py --export` 는 컬렉션 전체를 한 번에 읽어 임베딩 없는 JSON 배열로 쓰므로,
+복원하려면 모든 문서를 다시 임베딩해야 합니다. 스냅샷은 컬렉션을 페이지 단위로 읽어
+아래 세 파일로 흘려 쓰고, 가져오기는 같은 순서로 읽으면서 배치 단위로 upsert 합니다.
+어느 쪽이든 메모리에는 한 페이지만 올라가고, 가져오기는 임베딩 API/모델을 호출하지 않습니다.
+
+디렉토리 구성:
+    records.ndjson  - 한 줄에 {"id", "document", "metadata"} 하나
+    vectors.f32     - records.ndjson 과 같은 순서의 float32(little-endian) 행렬 (count x dim)
+    manifest.json   - {"format", "version", "collection", "spec", "count", "dim", "dtype",
+                       "files": {이름: {"bytes", "sha256"}}, "created_at"}
+
+manifest.json 은 마지막에 쓰므로, manifest 가 있는 디렉토리만 완성된 스냅샷입니다.
+내보내는 동안 들어온 쓰기는 일부만 반영될 수 있으니 동기화를 멈춘 상태에서 만드는 것이 안전합니다.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+from app.core.collections import (
+    activate_collection, get_active_collection, load_registry, register_collection
+)
+from app.core.database import get_collection
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "slack-qa-snapshot"
+SNAPSHOT_VERSION = 1
+RECORDS_FILE = "records.ndjson"
+VECTORS_FILE = "vectors.f32"
+MANIFEST_FILE = "manifest.json"
+HASH_BLOCK_SIZE = 1 << 20
+
+class SnapshotError(ValueError):
+    """스냅샷 파일이 손상되었거나 대상 컬렉션과 맞지 않음"""
+
+def export_snapshot(path: str, collection_name: Optional[str] = None, page_size: int = 1000,
+                    progress_callback: Optional[Callable[[str], None]] = None) -> Dict:
+    """컬렉션을 스냅샷 디렉토리로 내보내기 (기본: 현재 서비스 컬렉션)"""
+    name = collection_name or get_active_collection()["name"]
+    entry = load_registry()["collections"].get(name)
+    spec = {"provider": entry["provider"], "model": entry["model"], "dim": entry["dim"]} if entry else None
+
+    os.makedirs(path, exist_ok=True)
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        # 덮어쓰는 도중 실패해도 예전 manifest 로 새 파일을 읽지 않도록 먼저 제거
+        os.remove(manifest_path)
+
+    collection = get_collection(name)
+    total = collection.count()
+    records_hash, vectors_hash = hashlib.sha256(), hashlib.sha256()
+    count, dim, offset = 0, None, 0
+
+    with open(os.path.join(path, RECORDS_FILE), 'wb') as records, \
+            open(os.path.join(path, VECTORS_FILE), 'wb') as vectors:
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=["documents", "metadatas", "embeddings"])
+            if not page["ids"]:
+                break
+            embeddings = np.asarray(page["embeddings"], dtype='<f4')
+            if dim is None:
+                dim = embeddings.shape[1]
+            elif embeddings.shape[1] != dim:
+                raise SnapshotError(f"컬렉션 안의 임베딩 차원이 섞여 있습니다: {dim} / {embeddings.shape[1]}")
+
+            lines = b"".join(
+                json.dumps({"id": doc_id, "document": document, "metadata": metadata},
+                           ensure_ascii=False).encode('utf-8') + b"\n"
+                for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+            )
+            block = np.ascontiguousarray(embeddings).tobytes()
+            records.write(lines)
+            vectors.write(block)
+            records_hash.update(lines)
+            vectors_hash.update(block)
+
+            count += len(page["ids"])
+            offset += len(page["ids"])
+            if progress_callback:
+                progress_callback(f"{count}/{total}")
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "collection": name,
+        "spec": spec,
+        "count": count,
+        "dim": dim,
+        "dtype": "float32",
+        "files": {
+            RECORDS_FILE: {"bytes": os.path.getsize(os.path.join(path, RECORDS_FILE)),
+                           "sha256": records_hash.hexdigest()},
+            VECTORS_FILE: {"bytes": os.path.getsize(os.path.join(path, VECTORS_FILE)),
+                           "sha256": vectors_hash.hexdigest()},
+        },
+        "created_at": datetime.now().isoformat(),
+    }
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    logger.info(f"스냅샷 내보내기 완료: {name} -> {path} ({count}개, dim={dim})")
+    return manifest
+
+def read_manifest(path: str) -> Dict:
+    """manifest.json 읽기 및 형식/파일 크기 확인"""
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f"{manifest_path} 가 없습니다 (내보내기가 끝나지 않은 스냅샷일 수 있습니다)")
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"지원하지 않는 스냅샷 형식입니다: {manifest.get('format')} v{manifest.get('version')}")
+
+    for name, info in manifest["files"].items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) != info["bytes"]:
+            raise SnapshotError(f"{name} 의 크기가 manifest 와 다릅니다")
+    if manifest["count"] and manifest["files"][VECTORS_FILE]["bytes"] != manifest["count"] * manifest["dim"] * 4:
+        raise SnapshotError("vectors.f32 크기가 count x dim 과 맞지 않습니다")
+    return manifest
+
+def verify_snapshot(path: str) -> Dict:
+    """파일 전체 SHA-256 을 manifest 와 비교 (블록 단위로 읽음)"""
+    manifest = read_manifest(path)
+    for name, info in manifest["files"].items():
+        digest = hashlib.sha256()
+        with open(os.path.join(path, name), 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        if digest.hexdigest() != info["sha256"]:
+            raise SnapshotError(f"{name} 체크섬이 manifest 와 다릅니다")
+    return manifest
+
+def iter_snapshot(path: str, batch_size: int) -> Iterator[Tuple[List[str], np.ndarray, List[Optional[str]], List[Dict]]]:
+    """(ids, embeddings, documents, metadatas) 배치를 순서대로 읽기 (벡터는 memmap)"""
+    manifest = read_manifest(path)
+    if not manifest["count"]:
+        return
+    vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype='<f4', mode='r',
+                        shape=(manifest["count"], manifest["dim"]))
+
+    ids, documents, metadatas, start = [], [], [], 0
+    with open(os.path.join(path, RECORDS_FILE), 'r', encoding='utf-8') as records:
+        for line in records:
+            record = json.loads(line)
+            ids.append(record["id"])
+            documents.append(record["document"])
+            metadatas.append(record["metadata"])
+            if len(ids) == batch_size:
+                yield ids, np.asarray(vectors[start:start + len(ids)], dtype=np.float32), documents, metadatas
+                start += len(ids)
+                ids, documents, metadatas = [], [], []
+    if ids:
+        yield ids, np.asarray(vectors[start:start + len(ids)], dtype=np.float32), documents, metadatas
+        start += len(ids)
+    if start != manifest["count"]:
+        raise SnapshotError(f"records.ndjson 의 레코드 수({start})가 manifest({manifest['count']})와 다릅니다")
+
+def import_snapshot(path: str, collection_name: Optional[str] = None, batch_size: int = 1000,
+                    activate: bool = False, verify: bool = True,
+                    progress_callback: Optional[Callable[[str], None]] = None) -> Dict:
+    """스냅샷을 컬렉션으로 복원 (저장된 벡터를 그대로 upsert - 임베딩 호출 없음)
+
+    Args:
+        collection_name: 복원할 컬렉션 (기본: 스냅샷을 만든 컬렉션 이름)
+        activate: 복원 후 서비스 컬렉션으로 전환
+        verify: 가져오기 전에 파일 체크섬 확인
+    """
+    manifest = verify_snapshot(path) if verify else read_manifest(path)
+    name = collection_name or manifest["collection"]
+    spec = manifest.get("spec")
+
+    entry = load_registry()["collections"].get(name)
+    if entry and manifest["dim"] and entry.get("dim") and entry["dim"] != manifest["dim"]:
+        raise SnapshotError(f"컬렉션 {name} 의 차원({entry['dim']})이 스냅샷({manifest['dim']})과 다릅니다")
+    if spec and entry and (entry["provider"], entry["model"]) != (spec["provider"], spec["model"]):
+        raise SnapshotError(f"컬렉션 {name} 의 임베딩 모델({entry['model']})이 스냅샷({spec['model']})과 다릅니다")
+    if not entry:
+        if not spec:
+            raise SnapshotError("스냅샷에 임베딩 사양이 없어 새 컬렉션으로 등록할 수 없습니다. 등록된 컬렉션을 지정하세요.")
+        register_collection(name, spec, status="restoring")
+
+    collection = get_collection(name)
+    max_batch_size = getattr(collection, "max_batch_size", None)
+    if max_batch_size:
+        batch_size = min(batch_size, max_batch_size)
+
+    restored = 0
+    for ids, embeddings, documents, metadatas in iter_snapshot(path, batch_size):
+        collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+        restored += len(ids)
+        if progress_callback:
+            progress_callback(f"{restored}/{manifest['count']}")
+
+    if not entry:
+        register_collection(name, spec, status="restored")
+    if activate:
+        activate_collection(name)
+    logger.info(f"스냅샷 가져오기 완료: {path} -> {name} ({restored}개)")
+    return {"collection": name, "restored": restored, "dim": manifest["dim"], "activated": activate}
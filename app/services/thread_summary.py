@@ -0,0 +1,242 @@
+"""질문-답변 스레드 요약 (인덱싱 후 백그라운드/오프라인 단계)
+
+`/search` 는 매번 원본 메시지로 `generate_answer` 를 호출하지만, 자주 묻는 질문은 대개
+이미 스레드 안에서 해결되어 있습니다. 같은 `thread_ts` 로 묶인 메시지 중 루트가 질문이고
+다른 사람의 답글이 있는 스레드를 찾아 스레드당 한 번만 요약하고, 요약을 일반 문서와
+같은 컬렉션에 `doc_type=thread_summary` 문서로 저장합니다.
+
+- 문서 ID 는 `thread-summary:{채널}:{thread_ts}`. 비슷하게 물어본 질문과 가깝도록 본문(임베딩
+  대상)은 질문만 두고, 메타데이터에 `question`, `answer`, `thread_hash`(스레드 메시지 해시)를 기록
+- 스레드 메시지가 바뀌지 않았으면(thread_hash 동일) 다시 요약하지 않음
+- LLM 이 설정되어 있으면 답변을 요약하고(llm_service.summarize_thread), 없으면 질문자가
+  아닌 사람의 가장 긴 답글을 답변으로 사용
+- 검색 결과에 거리가 `THREAD_SUMMARY_ANSWER_DISTANCE` 이하인 요약이 있으면 `/search` 는
+  LLM 호출 없이 가장 가까운 요약의 답변을 바로 반환 (app.services.search 참고)
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+import re
+import threading
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.metrics import registry, track
+
+logger = logging.getLogger(__name__)
+
+THREAD_SUMMARY_DOC_TYPE = "thread_summary"
+THREAD_SUMMARY_ID_PREFIX = "thread-summary:"
+# where {"thread_ts": {"$in": [...]}} 에 한 번에 넣을 값 수
+THREAD_QUERY_BATCH_SIZE = 500
+
+THREAD_SUMMARIES = registry.counter(
+    "slack_qa_thread_summaries_total",
+    "스레드 요약 처리 결과 (result=created/updated/unchanged/removed)"
+)
+
+# 끝이 물음표이거나 한국어 의문형 어미로 끝나는 문장
+_QUESTION = re.compile(
+    r"[?？]|(나요|까요|가요|는지|을까|ㄹ까|습니까|있나|없나|되나|하나|인가|일까|죠|뭔가요|할지|될지)\s*[.!~ㅠㅜ]*\s*$"
+)
+
+def is_question(text: str) -> bool:
+    return bool(_QUESTION.search(text or ""))
+
+def summary_id(channel: str, thread_ts: str) -> str:
+    return f"{THREAD_SUMMARY_ID_PREFIX}{channel}:{thread_ts}"
+
+def _message_text(document: str, user: Optional[str]) -> str:
+    """청크 본문의 "user: " 접두어 제거"""
+    prefix = f"{user}: "
+    return document[len(prefix):] if user and document.startswith(prefix) else document
+
+def _ts_key(message: Dict) -> float:
+    try:
+        return float(message["ts"])
+    except (TypeError, ValueError):
+        return 0.0
+
+def load_threads(collection, thread_ts: Optional[Iterable[str]] = None,
+                 page_size: int = 1000) -> Dict[Tuple[str, str], List[Dict]]:
+    """(채널, thread_ts) 별 메시지 목록 (ts 순) - 요약 문서는 제외
+
+    Args:
+        thread_ts: 이 스레드들만 읽음 (없으면 컬렉션 전체를 페이지 단위로 읽음)
+    """
+    def pages():
+        if thread_ts is None:
+            offset = 0
+            while True:
+                page = collection.get(limit=page_size, offset=offset, include=["documents", "metadatas"])
+                if not page["ids"]:
+                    return
+                yield page
+                offset += len(page["ids"])
+        else:
+            values = sorted(set(thread_ts))
+            for start in range(0, len(values), THREAD_QUERY_BATCH_SIZE):
+                batch = values[start:start + THREAD_QUERY_BATCH_SIZE]
+                yield collection.get(where={"thread_ts": {"$in": batch}}, include=["documents", "metadatas"])
+
+    threads: Dict[Tuple[str, str], List[Dict]] = {}
+    for page in pages():
+        for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            metadata = metadata or {}
+            if not metadata.get("thread_ts") or metadata.get("doc_type") == THREAD_SUMMARY_DOC_TYPE:
+                continue
+            user = metadata.get("user")
+            threads.setdefault((metadata.get("channel") or "Unknown", metadata["thread_ts"]), []).append({
+                "id": doc_id,
+                "user": user,
+                "ts": metadata.get("timestamp"),
+                "text": _message_text(document or "", user),
+            })
+    for messages in threads.values():
+        messages.sort(key=_ts_key)
+    return threads
+
+def qa_pair(thread_ts: str, messages: List[Dict]) -> Optional[Tuple[Dict, List[Dict]]]:
+    """질문-답변 스레드면 (루트 질문, 질문자가 아닌 사람의 답글) 반환"""
+    root = next((message for message in messages if message["ts"] == thread_ts), None)
+    if root is None or not is_question(root["text"]):
+        return None
+    answers = [message for message in messages
+               if message is not root and message["user"] != root["user"] and message["text"].strip()]
+    if len(answers) < settings.thread_summary_min_replies:
+        return None
+    return root, answers
+
+def thread_hash(messages: List[Dict]) -> str:
+    digest = hashlib.sha1()
+    for message in messages:
+        digest.update(f"{message['id']}\x1f{message['user']}\x1f{message['text']}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+def summarize(root: Dict, answers: List[Dict], messages: List[Dict]) -> str:
+    """스레드의 답변 요약 (LLM 이 없으면 질문자가 아닌 사람의 가장 긴 답글, 답이 없으면 빈 문자열)"""
+    from app.services.llm_service import summarize_thread
+
+    transcript = "\n".join(f"{message['user'] or 'Unknown'}: {message['text']}" for message in messages)
+    with track("thread_summary.summarize"):
+        summary = summarize_thread(root["text"], transcript)
+    if summary is not None:
+        return summary
+    return max(answers, key=lambda message: len(message["text"]))["text"]
+
+def build_thread_summaries(collection=None, thread_ts: Optional[Iterable[str]] = None, force: bool = False,
+                           progress_callback: Optional[Callable[[str], None]] = None) -> Dict:
+    """질문-답변 스레드를 찾아 요약 문서를 저장/갱신
+
+    Args:
+        collection: 대상 컬렉션 (기본: 현재 서비스 컬렉션)
+        thread_ts: 이 스레드들만 다시 확인 (없으면 컬렉션 전체)
+        force: 스레드가 바뀌지 않았어도 다시 요약
+
+    Returns:
+        {"threads", "qa_threads", "created", "updated", "unchanged", "removed"}
+    """
+    from app.core.collections import load_registry
+    from app.services.llm_service import get_embeddings
+
+    collection = collection or get_collection()
+    # 서비스 컬렉션이 아닌 컬렉션(재인덱싱 대상 등)도 그 컬렉션의 임베딩 모델로 저장
+    entry = load_registry()["collections"].get(collection.name)
+    spec = {"provider": entry["provider"], "model": entry["model"], "dim": entry["dim"]} if entry else None
+    with track("thread_summary.load_threads"):
+        threads = load_threads(collection, thread_ts)
+    report = {"threads": len(threads), "qa_threads": 0, "created": 0, "updated": 0, "unchanged": 0, "removed": 0}
+
+    ids = [summary_id(channel, ts) for channel, ts in threads]
+    existing = {}
+    for start in range(0, len(ids), THREAD_QUERY_BATCH_SIZE):
+        page = collection.get(ids=ids[start:start + THREAD_QUERY_BATCH_SIZE], include=["metadatas"])
+        existing.update(zip(page["ids"], page["metadatas"]))
+
+    pending, stale = [], []
+    if thread_ts is None:
+        # 전체 확인이면 메시지가 모두 삭제된 스레드의 요약도 정리
+        orphans = collection.get(where={"doc_type": THREAD_SUMMARY_DOC_TYPE}, include=[])
+        stale.extend(doc_id for doc_id in orphans["ids"] if doc_id not in existing)
+    for (channel, ts), messages in threads.items():
+        doc_id = summary_id(channel, ts)
+        pair = qa_pair(ts, messages)
+        if pair is None:
+            if doc_id in existing:
+                stale.append(doc_id)
+            continue
+        report["qa_threads"] += 1
+        digest = thread_hash(messages)
+        if not force and (existing.get(doc_id) or {}).get("thread_hash") == digest:
+            report["unchanged"] += 1
+            continue
+        pending.append((doc_id, channel, ts, digest, messages, *pair))
+
+    batch_size = min(settings.ingest_commit_batch_size, getattr(collection, "max_batch_size", None) or 1 << 30)
+    for start in range(0, len(pending), batch_size):
+        ids, documents, metadatas = [], [], []
+        for doc_id, channel, ts, digest, messages, root, answers in pending[start:start + batch_size]:
+            answer = summarize(root, answers, messages)
+            if not answer:
+                # LLM 이 스레드에서 답을 찾지 못함 - 이전 요약도 제거
+                if doc_id in existing:
+                    stale.append(doc_id)
+                continue
+            metadata = {
+                "doc_type": THREAD_SUMMARY_DOC_TYPE,
+                "source": THREAD_SUMMARY_DOC_TYPE,
+                "channel": channel,
+                "thread_ts": ts,
+                "timestamp": ts,
+                "user": root["user"] or "Unknown",
+                "question": root["text"],
+                "answer": answer,
+                "reply_count": len(messages) - 1,
+                "thread_hash": digest,
+            }
+            try:
+                metadata["ts_epoch"] = float(ts)
+            except (TypeError, ValueError):
+                pass
+            ids.append(doc_id)
+            documents.append(root["text"])
+            metadatas.append(metadata)
+        if ids:
+            with track("thread_summary.store"):
+                collection.upsert(ids=ids, embeddings=get_embeddings(documents, spec=spec), documents=documents,
+                                  metadatas=metadatas)
+            for doc_id in ids:
+                result = "updated" if doc_id in existing else "created"
+                report[result] += 1
+                THREAD_SUMMARIES.inc(result=result)
+        if progress_callback:
+            progress_callback(f"스레드 요약 {min(start + batch_size, len(pending))}/{len(pending)}")
+
+    if stale:
+        collection.delete(ids=stale)
+        report["removed"] = len(stale)
+        THREAD_SUMMARIES.inc(len(stale), result="removed")
+    if report["unchanged"]:
+        THREAD_SUMMARIES.inc(report["unchanged"], result="unchanged")
+    logger.info(f"스레드 요약 ({collection.name}): {report}")
+    return report
+
+_build_lock = threading.Lock()
+
+def schedule_thread_summaries(collection_name: str, thread_ts: Iterable[str]):
+    """인덱싱한 스레드의 요약을 백그라운드 스레드에서 갱신 (`THREAD_SUMMARY_ENABLED`)
+
+    요약은 LLM 호출이 스레드마다 필요할 수 있어 인덱싱 응답을 기다리게 하지 않습니다.
+    실행은 프로세스 안에서 하나씩 (같은 스레드를 동시에 요약하지 않도록).
+    """
+    thread_ts = sorted(set(thread_ts))
+    if not settings.thread_summary_enabled or not thread_ts:
+        return
+
+    def run():
+        with _build_lock:
+            try:
+                build_thread_summaries(get_collection(collection_name), thread_ts)
+            except Exception as e:
+                logger.warning(f"스레드 요약 실패 ({collection_name}): {e}")
+
+    threading.Thread(target=run, daemon=True).start()
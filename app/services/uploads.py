@@ -0,0 +1,302 @@
+"""대용량 Slack export 분할(청크) 업로드
+
+수 GB 짜리 ZIP/JSON 을 한 번에 메모리로 읽지 않도록 클라이언트가 파일을 고정 크기 파트로
+나눠 보내고, 각 파트는 요청 본문을 스트리밍으로 받아 디스크의 해당 위치(part_no * part_size)에
+바로 씁니다. 파트마다 SHA-256 을 검증하고, 받은 파트는 `parts/{번호}` 표시 파일로 기록하므로
+업로드가 끊겨도 상태 조회 후 빠진 파트부터 다시 보내면 됩니다. 표시 파일 방식이라 여러
+uvicorn 워커가 같은 업로드의 파트를 나눠 받아도 매니페스트 경합이 없습니다.
+
+디렉토리 구성 (UPLOAD_DIR/{upload_id}/):
+    manifest.json  - {"upload_id", "filename", "total_size", "part_size", "total_parts", "sha256", "created_at"}
+    data           - 파트가 기록되는 본 파일 (total_size 로 미리 잡아 둠)
+    parts/{n}      - 받은 파트의 크기/체크섬 (다시 받는 중에는 지워짐)
+    state.json     - complete 이후 검증/인덱싱 상태 (먼저 만든 complete 호출만 인덱싱 시작)
+"""
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIN_PART_SIZE = 64 * 1024
+MAX_PART_SIZE = 128 * 1024 * 1024
+HASH_BLOCK_SIZE = 1 << 20
+ALLOWED_SUFFIXES = (".json", ".zip")
+
+class UploadError(ValueError):
+    """잘못된 업로드 요청 (HTTP 400)"""
+
+class UploadNotFound(KeyError):
+    """존재하지 않는 upload_id (HTTP 404)"""
+
+class UploadManager:
+    def _root(self) -> str:
+        return settings.upload_dir or os.path.join(settings.chroma_persist_directory, "uploads")
+
+    def _dir(self, upload_id: str) -> str:
+        # upload_id 는 경로에 그대로 쓰이므로 hex 만 허용
+        if not upload_id or any(c not in "0123456789abcdef" for c in upload_id):
+            raise UploadNotFound(upload_id)
+        path = os.path.join(self._root(), upload_id)
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            raise UploadNotFound(upload_id)
+        return path
+
+    def _read_json(self, path: str, default=None):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def _write_json(self, path: str, data: Dict):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def init(self, filename: str, total_size: int, part_size: Optional[int] = None,
+             sha256: Optional[str] = None) -> Dict:
+        """업로드 시작 - 파트 크기와 개수를 정하고 본 파일 공간을 미리 잡음"""
+        filename = os.path.basename(filename or "")
+        if not filename.endswith(ALLOWED_SUFFIXES):
+            raise UploadError("filename must end with .json or .zip")
+        if total_size <= 0:
+            raise UploadError("total_size must be positive")
+        if settings.upload_max_bytes and total_size > settings.upload_max_bytes:
+            raise UploadError(f"total_size exceeds UPLOAD_MAX_BYTES ({settings.upload_max_bytes})")
+        part_size = part_size or settings.upload_part_size
+        if not MIN_PART_SIZE <= part_size <= MAX_PART_SIZE:
+            raise UploadError(f"part_size must be between {MIN_PART_SIZE} and {MAX_PART_SIZE}")
+
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self._root(), upload_id)
+        os.makedirs(os.path.join(path, "parts"))
+        with open(os.path.join(path, "data"), 'wb') as f:
+            f.truncate(total_size)
+
+        manifest = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "total_size": total_size,
+            "part_size": part_size,
+            "total_parts": -(-total_size // part_size),
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": datetime.now().isoformat(),
+        }
+        self._write_json(os.path.join(path, "manifest.json"), manifest)
+        logger.info(f"분할 업로드 시작: {upload_id} ({filename}, {total_size} bytes, {manifest['total_parts']}개 파트)")
+        return manifest
+
+    def _received(self, path: str) -> Dict[int, Dict]:
+        received = {}
+        for name in os.listdir(os.path.join(path, "parts")):
+            if name.isdigit():
+                entry = self._read_json(os.path.join(path, "parts", name))
+                if entry:
+                    received[int(name)] = entry
+        return received
+
+    async def write_part(self, upload_id: str, part_no: int, chunks: AsyncIterator[bytes],
+                         sha256: Optional[str] = None) -> Dict:
+        """요청 본문을 스트리밍으로 받아 파트 위치에 기록하고 크기/체크섬 검증
+
+        같은 파트를 다시 보내면 덮어씁니다 (재시도/재개 시 안전). 디스크 쓰기/해시는
+        HASH_BLOCK_SIZE 단위로 모아 스레드풀에서 실행해 이벤트 루프를 막지 않습니다.
+        """
+        from fastapi.concurrency import run_in_threadpool
+
+        path = self._dir(upload_id)
+        manifest = self._read_json(os.path.join(path, "manifest.json"))
+        if not 0 <= part_no < manifest["total_parts"]:
+            raise UploadError(f"part_no must be between 0 and {manifest['total_parts'] - 1}")
+        # 덮어쓰는 중에 끊기면 이전 표시가 남아 깨진 파트를 받은 것으로 보이므로 먼저 지움
+        # (complete 가 완료 상태를 만든 뒤 빠진 파트를 확인하므로, 상태 확인을 그 다음에 해야
+        # 쓰는 중인 파트가 있는 업로드는 complete 되지 않음)
+        try:
+            os.unlink(os.path.join(path, "parts", str(part_no)))
+        except FileNotFoundError:
+            pass
+        if (self._read_json(os.path.join(path, "state.json")) or {}).get("status"):
+            raise UploadError("upload already completed")
+
+        offset = part_no * manifest["part_size"]
+        expected = min(manifest["part_size"], manifest["total_size"] - offset)
+        digest = hashlib.sha256()
+        written = 0
+        f = await run_in_threadpool(open, os.path.join(path, "data"), 'r+b')
+
+        def flush(data: bytes):
+            digest.update(data)
+            f.write(data)
+
+        try:
+            await run_in_threadpool(f.seek, offset)
+            buffer = bytearray()
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                written += len(chunk)
+                if written > expected:
+                    raise UploadError(f"part {part_no} is larger than {expected} bytes")
+                buffer += chunk
+                if len(buffer) >= HASH_BLOCK_SIZE:
+                    data, buffer = bytes(buffer), bytearray()
+                    await run_in_threadpool(flush, data)
+            if buffer:
+                await run_in_threadpool(flush, bytes(buffer))
+        finally:
+            await run_in_threadpool(f.close)
+
+        if written != expected:
+            raise UploadError(f"part {part_no} size mismatch: expected {expected}, got {written}")
+        checksum = digest.hexdigest()
+        if sha256 and sha256.lower() != checksum:
+            raise UploadError(f"part {part_no} checksum mismatch")
+
+        entry = {"size": written, "sha256": checksum}
+        self._write_json(os.path.join(path, "parts", str(part_no)), entry)
+        return {"part_no": part_no, **entry}
+
+    def get_status(self, upload_id: str) -> Dict:
+        """받은/빠진 파트와 인덱싱 상태 (재개 시 next_part 부터 전송)"""
+        path = self._dir(upload_id)
+        manifest = self._read_json(os.path.join(path, "manifest.json"))
+        received = self._received(path)
+        missing = [n for n in range(manifest["total_parts"]) if n not in received]
+        return {
+            **manifest,
+            "received_parts": len(received),
+            "bytes_received": sum(entry["size"] for entry in received.values()),
+            "missing_parts": missing[:1000],
+            "next_part": missing[0] if missing else None,
+            "state": self._read_json(os.path.join(path, "state.json"), {"status": "uploading"}),
+        }
+
+    def _claim(self, path: str, data: Dict) -> bool:
+        """state.json 을 내용이 채워진 채로 배타적으로 생성 (이미 있으면 False)
+
+        임시 파일을 쓴 뒤 hard link 로 만들기 때문에 O_EXCL 처럼 한 호출만 성공하고,
+        다른 워커가 읽어도 빈 파일을 보지 않습니다.
+        """
+        state_path = os.path.join(path, "state.json")
+        tmp_path = f"{state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        try:
+            os.link(tmp_path, state_path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(tmp_path)
+
+    def complete(self, upload_id: str, clear_existing: bool = False) -> Dict:
+        """모든 파트 수신 확인 → 전체 체크섬 검증 → 백그라운드 인덱싱 시작
+
+        여러 워커에 동시에 complete 가 와도 state.json 을 먼저 만든 한 호출만 인덱싱을 시작하고,
+        나머지는 현재 상태를 돌려줍니다. 검증에 실패하면 상태를 지워 다시 업로드할 수 있게 합니다.
+        """
+        path = self._dir(upload_id)
+        if self._read_json(os.path.join(path, "state.json")) is not None:
+            return self.get_status(upload_id)
+        state = {"status": "verifying", "started_at": datetime.now().isoformat(), "progress": None}
+        if not self._claim(path, state):
+            return self.get_status(upload_id)
+
+        try:
+            # 상태를 만든 뒤 확인하므로 이 시점에 쓰는 중인 파트는 빠진 파트로 보임
+            status = self.get_status(upload_id)
+            if status["missing_parts"]:
+                raise UploadError(f"{len(status['missing_parts'])} parts missing (next: {status['next_part']})")
+            if status["sha256"]:
+                digest = hashlib.sha256()
+                with open(os.path.join(path, "data"), 'rb') as f:
+                    for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                        digest.update(block)
+                if digest.hexdigest() != status["sha256"]:
+                    raise UploadError("file checksum mismatch")
+        except Exception:
+            os.unlink(os.path.join(path, "state.json"))
+            raise
+
+        state["status"] = "indexing"
+        self._write_json(os.path.join(path, "state.json"), state)
+        threading.Thread(target=self._index, args=(upload_id, path, status, clear_existing), daemon=True).start()
+        return self.get_status(upload_id)
+
+    def _index(self, upload_id: str, path: str, manifest: Dict, clear_existing: bool):
+        from app.services.embedding import index_multiple_files, index_slack_data
+
+        state_path = os.path.join(path, "state.json")
+        state = self._read_json(state_path)
+
+        def progress(message: str):
+            state["progress"] = message
+            self._write_json(state_path, state)
+
+        data_path = os.path.join(path, "data")
+        extract_dir = None
+        try:
+            if manifest["filename"].endswith(".zip"):
+                extract_dir = tempfile.mkdtemp(dir=path)
+                json_files = self._extract_json(data_path, extract_dir)
+                if not json_files:
+                    raise UploadError("No JSON files found in the uploaded ZIP")
+                result = index_multiple_files(json_files, progress_callback=progress)
+                state["file_count"] = len(json_files)
+            else:
+                result = index_slack_data(data_path, progress_callback=progress, clear_existing=clear_existing)
+            state.update({"status": "indexed", "chunk_count": result["indexed"], "failed": result["failed"],
+                          "failed_items": result["failed_items"], "finished_at": datetime.now().isoformat()})
+            # 인덱싱이 끝난 원본은 바로 정리 (매니페스트/상태는 조회용으로 남김)
+            os.unlink(data_path)
+        except Exception as e:
+            logger.error(f"분할 업로드 인덱싱 실패 ({upload_id}): {e}")
+            state.update({"status": "failed", "error": str(e), "finished_at": datetime.now().isoformat()})
+        finally:
+            if extract_dir:
+                shutil.rmtree(extract_dir, ignore_errors=True)
+            self._write_json(state_path, state)
+
+    def _extract_json(self, zip_path: str, target_dir: str) -> List[str]:
+        """ZIP 안의 JSON 파일만 스트리밍으로 풀기 (경로 조작 방지)
+
+        압축 해제된 크기 합계에도 UPLOAD_MAX_BYTES 를 적용합니다. 헤더의 file_size 는 조작할 수
+        있으므로 미리 확인한 뒤 실제로 풀리는 바이트도 세어서 넘으면 중단합니다 (zip bomb 방지).
+        """
+        limit = settings.upload_max_bytes
+        json_files = []
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [(index, info) for index, info in enumerate(archive.infolist())
+                       if not info.is_dir() and os.path.basename(info.filename).endswith('.json')
+                       and not os.path.basename(info.filename).startswith('.')]
+            if limit and sum(info.file_size for _, info in members) > limit:
+                raise UploadError(f"extracted size exceeds UPLOAD_MAX_BYTES ({limit})")
+            extracted = 0
+            for index, info in members:
+                target = os.path.join(target_dir, f"{index:06d}_{os.path.basename(info.filename)}")
+                with archive.open(info) as source, open(target, 'wb') as dest:
+                    for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+                        extracted += len(block)
+                        if limit and extracted > limit:
+                            raise UploadError(f"extracted size exceeds UPLOAD_MAX_BYTES ({limit})")
+                        dest.write(block)
+                json_files.append(target)
+        return json_files
+
+    def abort(self, upload_id: str):
+        """업로드 취소 및 파일 삭제"""
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+# 전역 업로드 관리자 인스턴스
+upload_manager = UploadManager()
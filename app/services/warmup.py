@@ -0,0 +1,122 @@
+"""서버 시작 후 백그라운드 워밍업과 준비 상태(readiness)
+
+`/health` 는 프로세스가 살아 있으면 바로 응답하고(liveness), `/ready` 는 워밍업 단계가
+모두 끝난 뒤에만 200을 반환합니다(readiness). 로드밸런서/오케스트레이터는 `/ready` 로
+트래픽 투입 시점을 판단합니다.
+
+워밍업 단계: 서비스 모듈 import → 임베딩 모델 로드 → 컬렉션 열기/읽기 → 합성 질문 검색
+(HNSW 인덱스 로드) → LLM 클라이언트 생성. 배포 직후 첫 `/search` 가 이 비용을 내지 않습니다.
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DURATION = registry.gauge(
+    "slack_qa_warmup_duration_seconds", "시작 워밍업 소요 시간 (초, step=단계 이름 또는 total)"
+)
+
+def _import_services():
+    # 검색/인덱싱 경로의 무거운 모듈(chromadb 등)을 첫 요청 전에 로드
+    import app.services.search  # noqa: F401
+    import app.services.embedding  # noqa: F401
+
+def _load_embedding_model():
+    from app.core.collections import get_active_collection
+    from app.services.llm_service import get_embeddings
+
+    get_embeddings([settings.warmup_query], spec=get_active_collection()["spec"])
+
+def _touch_collection():
+    from app.core.database import get_collection
+
+    collection = get_collection()
+    if collection.count():
+        collection.get(limit=1, include=["metadatas"])
+
+def _synthetic_query():
+    # 첫 query 에서 HNSW 인덱스를 메모리로 읽어 들임
+    from app.services.search import retrieve_messages
+
+    retrieve_messages(settings.warmup_query, 1)
+
+def _setup_llm_client():
+    from app.services.llm_service import get_llm_client
+
+    if settings.api_provider == "claude" and settings.claude_api_key:
+        get_llm_client("claude")
+    elif settings.openai_api_key:
+        get_llm_client("openai")
+
+def default_steps() -> List[Tuple[str, Callable[[], None]]]:
+    if not settings.warmup_enabled:
+        return [("import_services", _import_services)]
+    return [
+        ("import_services", _import_services),
+        ("embedding_model", _load_embedding_model),
+        ("collection", _touch_collection),
+        ("synthetic_query", _synthetic_query),
+        ("llm_client", _setup_llm_client),
+    ]
+
+class WarmupState:
+    def __init__(self):
+        self.status = "pending"  # pending / running / ready
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.steps: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status == "ready"
+
+    def start(self, steps: Optional[List[Tuple[str, Callable[[], None]]]] = None):
+        """백그라운드 스레드에서 워밍업 단계 실행 (이미 시작했으면 무시)"""
+        with self._lock:
+            if self.status != "pending":
+                return
+            self.status = "running"
+            self.started_at = datetime.now()
+        threading.Thread(target=self.run, args=(steps or default_steps(),), daemon=True).start()
+
+    def run(self, steps: List[Tuple[str, Callable[[], None]]]):
+        """단계를 순서대로 실행
+
+        실패한 단계는 기록만 하고 다음 단계로 넘어갑니다. 해당 리소스는 첫 요청에서
+        다시 지연 로드되므로, 워밍업 실패로 프로세스가 영원히 트래픽을 못 받는 일은 없습니다.
+        """
+        began = time.perf_counter()
+        for name, step in steps:
+            step_began = time.perf_counter()
+            error = None
+            try:
+                step()
+            except Exception as e:
+                error = str(e)
+                logger.error(f"워밍업 단계 실패 ({name}): {e}")
+            seconds = time.perf_counter() - step_began
+            WARMUP_DURATION.set(seconds, step=name)
+            self.steps.append({"name": name, "seconds": round(seconds, 3), **({"error": error} if error else {})})
+        total = time.perf_counter() - began
+        WARMUP_DURATION.set(total, step="total")
+        self.finished_at = datetime.now()
+        self.status = "ready"
+        logger.info(f"✅ 워밍업 완료 ({total:.2f}초)")
+
+    def get_status(self) -> Dict:
+        return {
+            "status": self.status,
+            "seconds": round((self.finished_at - self.started_at).total_seconds(), 3) if self.finished_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "steps": list(self.steps),
+        }
+
+# 전역 워밍업 상태 인스턴스
+warmup = WarmupState()
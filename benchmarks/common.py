@@ -0,0 +1,76 @@
+"""벤치마크 공통 유틸리티 - 격리된 오프라인 환경, 단계별 지연시간 집계, 통계"""
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+import glob
+import os
+import resource
+import shutil
+import tempfile
+from app.core.config import settings
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILES = sorted(glob.glob(os.path.join(ROOT_DIR, "data", "sample_slack_data*.json")))
+QUESTIONS_FILE = os.path.join(ROOT_DIR, "benchmarks", "questions.json")
+
+@contextmanager
+def offline_environment(backend: str = "hash", vector_store: str = "chroma"):
+    """임시 ChromaDB 디렉토리와 오프라인 설정으로 벤치마크 실행
+
+    LLM 키를 비워 답변 생성이 네트워크 없이 폴백 경로를 타도록 하고,
+    끝나면 원래 설정과 임시 디렉토리를 복구/삭제합니다.
+    """
+    overrides = {
+        "chroma_persist_directory": tempfile.mkdtemp(prefix="bench_chroma_"),
+        "chroma_collection_name": "benchmark_messages",
+        "local_embedding_backend": backend,
+        "vector_store": vector_store,
+        "api_provider": "claude",
+        "openai_api_key": None,
+        "claude_api_key": None,
+    }
+    original = {key: getattr(settings, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+
+    try:
+        yield overrides["chroma_persist_directory"]
+    finally:
+        shutil.rmtree(overrides["chroma_persist_directory"], ignore_errors=True)
+        for key, value in original.items():
+            setattr(settings, key, value)
+
+def group_spans(spans: List[Tuple[str, float]]) -> Dict[str, List[float]]:
+    """collect_spans() 로 모은 (stage, seconds) 목록을 단계별로 묶기"""
+    durations: Dict[str, List[float]] = {}
+    for stage, seconds in spans:
+        durations.setdefault(stage, []).append(seconds)
+    return durations
+
+def percentiles(values: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """nearest-rank 방식 백분위수 (밀리초)"""
+    if not values:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        rank = max(int(round(p / 100 * len(ordered) + 0.5)) - 1, 0)
+        result[f"p{p}"] = ordered[min(rank, len(ordered) - 1)] * 1000
+    return result
+
+def max_rss_mb() -> float:
+    """프로세스 최대 RSS (MB, Linux 기준 ru_maxrss는 KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def summarize_stages(durations: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """단계별 호출 수와 지연시간 백분위수(ms) 요약"""
+    return {
+        stage: {"count": len(values), **percentiles(values)}
+        for stage, values in durations.items()
+    }
+
+def print_stage_table(title: str, summary: Dict[str, Dict[str, float]]):
+    """summarize_stages() 결과를 표로 출력"""
+    print(f"\n{title}")
+    print(f"{'stage':<28}{'count':>7}{'p50(ms)':>11}{'p95(ms)':>11}{'p99(ms)':>11}")
+    for stage, stats in summary.items():
+        print(f"{stage:<28}{stats['count']:>7}{stats['p50']:>11.2f}{stats['p95']:>11.2f}{stats['p99']:>11.2f}")
@@ -0,0 +1,79 @@
+"""벤치마크용 합성 슬랙 코퍼스 생성기
+
+샘플 데이터만으로는 인덱스 규모에 따른 성능 변화를 볼 수 없으므로,
+시드가 같으면 항상 같은 결과가 나오는 방해(distractor) 메시지를 대량으로 만듭니다.
+생성 결과는 `parse_slack_export`가 읽는 채널별 dict 형식입니다.
+
+사용법:
+    python -m benchmarks.corpus --messages 10000 --output /tmp/synthetic.json
+"""
+from typing import Dict, List
+import argparse
+import json
+import random
+
+CHANNELS = ["general", "dev-help", "project", "random", "incidents", "deploy", "design", "qa"]
+
+SUBJECTS = [
+    "배치 작업", "결제 모듈", "알림 서버", "관리자 페이지", "검색 API", "캐시 레이어",
+    "모바일 앱", "정산 리포트", "로그 수집기", "인증 게이트웨이", "이미지 업로더", "예약 시스템",
+]
+
+PREDICATES = [
+    "응답이 느려졌습니다", "배포가 끝났습니다", "리뷰 부탁드립니다", "에러가 간헐적으로 납니다",
+    "스펙이 변경되었습니다", "모니터링 대시보드에 추가했습니다", "롤백했습니다",
+    "티켓을 생성했습니다", "내일 오전에 점검 예정입니다", "부하 테스트를 진행 중입니다",
+]
+
+FOLLOW_UPS = [
+    "확인해보겠습니다.", "관련 로그 공유 부탁드려요.", "재현 방법이 있을까요?",
+    "감사합니다!", "이번 스프린트에 반영하겠습니다.", "담당자 지정해두었습니다.",
+]
+
+BASE_TS = 1704067200  # 2024-01-01 00:00:00 UTC
+
+def generate_corpus(message_count: int, seed: int = 42) -> Dict[str, List[Dict]]:
+    """채널별 합성 메시지 생성 (시드 고정 시 결정적)"""
+    rng = random.Random(seed)
+    corpus = {channel: [] for channel in CHANNELS}
+
+    for i in range(message_count):
+        channel = rng.choice(CHANNELS)
+        ts = f"{BASE_TS + i * 37}.{i % 1000000:06d}"
+        if corpus[channel] and rng.random() < 0.3:
+            text = rng.choice(FOLLOW_UPS)
+            thread_ts = corpus[channel][-1].get("thread_ts") or corpus[channel][-1]["ts"]
+        else:
+            text = f"{rng.choice(SUBJECTS)} #{rng.randint(1, 500)} {rng.choice(PREDICATES)}"
+            thread_ts = None
+
+        message = {
+            "type": "message",
+            "user": f"U{rng.randint(100, 199)}",
+            "text": text,
+            "ts": ts,
+        }
+        if thread_ts:
+            message["thread_ts"] = thread_ts
+        corpus[channel].append(message)
+
+    return corpus
+
+def write_corpus(path: str, message_count: int, seed: int = 42) -> str:
+    """합성 코퍼스를 JSON 파일로 저장"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(generate_corpus(message_count, seed), f, ensure_ascii=False)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 슬랙 코퍼스 생성')
+    parser.add_argument('--messages', type=int, default=10000, help='생성할 메시지 수')
+    parser.add_argument('--seed', type=int, default=42, help='랜덤 시드')
+    parser.add_argument('--output', required=True, help='출력 JSON 파일 경로')
+    args = parser.parse_args()
+
+    write_corpus(args.output, args.messages, args.seed)
+    print(f"✅ {args.messages}개 메시지를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""유사 메시지 접기(MinHash LSH) 벤치마크
+
+합성 코퍼스에 반복 봇 알림(숫자/시각만 다른 알림), 복사한 스택 트레이스, 여러 채널 교차 게시를
+섞어 넣고 `collapse_chunks` 로 접어서
+  - 임베딩 호출/인덱스 크기 절감 비율 (접힌 청크 / 전체 청크)
+  - 주입한 중복 중 접힌 비율(recall)과 원본 메시지를 잘못 접은 수(false merge)
+  - 처리량 (청크/s) 과 배치 크기별 증분 갱신 시간
+을 측정합니다. 임베딩/네트워크 없이 서명 인덱스(SQLite)만 사용합니다.
+
+사용법:
+    python -m benchmarks.dedup
+    python -m benchmarks.dedup --messages 20000 --duplicate-ratio 0.3 --threshold 0.8
+"""
+from typing import Dict, List
+import argparse
+import json
+import random
+import time
+from app.core.config import settings
+from app.services.dedup import collapse_chunks, get_dedup_index
+from app.services.slack_data import chunk_message_columns
+from benchmarks.common import offline_environment
+from benchmarks.corpus import BASE_TS, CHANNELS, generate_corpus
+
+ALERT_TEMPLATES = [
+    "[ALERT] api-server-{n} CPU 사용률 {p}% 초과 (임계치 85%) - 대시보드: https://grafana.example.com/d/api",
+    "[배포 알림] payment-service v1.{n}.{p} 프로덕션 배포 완료 (소요 {p}초, 커밋 a1b2c3d)",
+]
+
+STACK_TRACE = (
+    "Traceback (most recent call last):\n  File \"/app/services/search.py\", line {n}, in retrieve_messages\n"
+    "    results = collection.query(query_embeddings=[query_embedding], n_results=top_k)\n"
+    "  File \"/usr/lib/python3.11/site-packages/chromadb/api/models/Collection.py\", line 223, in query\n"
+    "chromadb.errors.InvalidDimensionException: Embedding dimension 1536 does not match collection dimensionality 384"
+)
+
+ANNOUNCEMENT = ("[공지] 이번 주 금요일 18시부터 정기 점검이 있습니다. 점검 중에는 관리자 페이지와 "
+                "정산 리포트 접속이 제한되니 미리 작업을 마쳐주세요. 문의는 #dev-help 로 부탁드립니다.")
+
+def build_columns(message_count: int, duplicate_ratio: float, seed: int) -> Dict:
+    """합성 코퍼스 + 주입한 중복 메시지 컬럼과 정답(주입 여부)"""
+    rng = random.Random(seed)
+    columns = {"user": [], "text": [], "ts": [], "channel": [], "thread_ts": []}
+    injected: List[bool] = []
+
+    def add(user, text, ts, channel, thread_ts=None, duplicate=False):
+        for name, value in zip(columns, (user, text, ts, channel, thread_ts)):
+            columns[name].append(value)
+        injected.append(duplicate)
+
+    for channel, messages in generate_corpus(message_count, seed).items():
+        for msg in messages:
+            add(msg["user"], msg["text"], msg["ts"], channel, msg.get("thread_ts"))
+
+    # 그룹마다 첫 메시지는 원본, 이후는 중복으로 라벨
+    seen_groups = set()
+    for i in range(int(message_count * duplicate_ratio)):
+        kind = rng.random()
+        if kind < 0.6:
+            group = f"alert-{i % len(ALERT_TEMPLATES)}"
+            text = ALERT_TEMPLATES[i % len(ALERT_TEMPLATES)].format(n=rng.randint(1, 9), p=rng.randint(86, 99))
+            user, channel = "B_ALERT", "incidents"
+        elif kind < 0.85:
+            group = "trace"
+            text = STACK_TRACE.format(n=rng.choice([18, 19]))
+            user, channel = f"U{rng.randint(100, 199)}", rng.choice(["dev-help", "incidents"])
+        else:
+            group = "announcement"
+            text = ANNOUNCEMENT
+            user, channel = "U001", rng.choice(CHANNELS)
+        add(user, text, f"{BASE_TS + message_count * 37 + i * 11}.{i:06d}", channel, duplicate=group in seen_groups)
+        seen_groups.add(group)
+
+    return {"columns": columns, "injected": injected}
+
+def run_benchmark(message_count: int, duplicate_ratio: float, batch_size: int, seed: int) -> Dict:
+    data = build_columns(message_count, duplicate_ratio, seed)
+    chunks = chunk_message_columns(data["columns"])
+    injected = data["injected"]
+
+    with offline_environment():
+        settings.dedup_enabled = True
+        index = get_dedup_index()
+        collapsed_flags = [False] * len(chunks)
+        batch_seconds = []
+        began = time.perf_counter()
+        for offset in range(0, len(chunks), batch_size):
+            batch = chunks[offset:offset + batch_size]
+            ids = [f"bench:{offset + i}" for i in range(len(batch))]
+            start = time.perf_counter()
+            result = collapse_chunks("benchmark_messages", ids, batch, source="benchmark")
+            batch_seconds.append(time.perf_counter() - start)
+            for i in result["duplicate_of"]:
+                collapsed_flags[offset + i] = True
+        seconds = time.perf_counter() - began
+        stats = index.stats("benchmark_messages")
+
+    collapsed = sum(collapsed_flags)
+    injected_total = sum(injected)
+    caught = sum(1 for flag, dup in zip(collapsed_flags, injected) if flag and dup)
+    return {
+        "chunks": len(chunks),
+        "injected_duplicates": injected_total,
+        "collapsed": collapsed,
+        "embedding_calls_saved_ratio": collapsed / len(chunks) if chunks else 0.0,
+        "index_size_ratio": (len(chunks) - collapsed) / len(chunks) if chunks else 1.0,
+        "recall": caught / injected_total if injected_total else 1.0,
+        # 주입하지 않은 합성 메시지가 접힌 수 (템플릿이 같은 짧은 합성 메시지끼리 접힐 수 있음)
+        "other_collapsed": collapsed - caught,
+        "seconds": seconds,
+        "chunks_per_second": len(chunks) / seconds if seconds > 0 else 0.0,
+        "batch_ms_mean": sum(batch_seconds) / len(batch_seconds) * 1000 if batch_seconds else 0.0,
+        "index": stats,
+        "params": {"threshold": settings.dedup_threshold, "num_perm": settings.dedup_num_perm,
+                   "bands": settings.dedup_bands, "min_chars": settings.dedup_min_chars, "batch_size": batch_size},
+    }
+
+def print_report(report: Dict):
+    print("=" * 60)
+    print("📊 유사 메시지 접기 벤치마크 (MinHash LSH)")
+    print("=" * 60)
+    params = report["params"]
+    print(f"threshold={params['threshold']} num_perm={params['num_perm']} bands={params['bands']} "
+          f"min_chars={params['min_chars']} batch={params['batch_size']}")
+    print(f"청크 {report['chunks']}개 (주입한 중복 {report['injected_duplicates']}개) → 접힘 {report['collapsed']}개")
+    print(f"임베딩 호출 절감 {report['embedding_calls_saved_ratio'] * 100:.1f}% / "
+          f"인덱스 크기 {report['index_size_ratio'] * 100:.1f}% 로 축소")
+    print(f"주입 중복 recall {report['recall'] * 100:.1f}%, 그 외 접힌 메시지 {report['other_collapsed']}개")
+    print(f"처리량 {report['chunks_per_second']:.0f} chunks/s (배치당 평균 {report['batch_ms_mean']:.1f}ms)")
+
+def main():
+    parser = argparse.ArgumentParser(description='유사 메시지 접기 벤치마크')
+    parser.add_argument('--messages', type=int, default=10000, help='합성 메시지 수')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.2, help='주입할 중복 메시지 비율 (합성 메시지 수 대비)')
+    parser.add_argument('--batch-size', type=int, default=settings.ingest_commit_batch_size, help='증분 갱신 배치 크기')
+    parser.add_argument('--threshold', type=float, help='DEDUP_THRESHOLD 덮어쓰기')
+    parser.add_argument('--seed', type=int, default=42, help='랜덤 시드')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    if args.threshold is not None:
+        settings.dedup_threshold = args.threshold
+    report = run_benchmark(args.messages, args.duplicate_ratio, args.batch_size, args.seed)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()
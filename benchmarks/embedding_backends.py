@@ -0,0 +1,110 @@
+"""로컬 임베딩 백엔드 비교 벤치마크 (PyTorch vs ONNX fp32 vs ONNX int8)
+
+같은 sentence-transformers 모델을 백엔드별로 실행해서
+  - 첫 호출 시간 (import + 모델 로드)
+  - 질문 1개 임베딩 지연시간 p50/p95/p99 (/search 경로)
+  - 배치 인코딩 처리량 (texts/s, 인덱싱 경로)
+  - PyTorch 출력 대비 코사인 유사도 (수치 일치)
+를 측정합니다. ONNX 파일은 `python scripts/export_onnx.py` 로 먼저 만들어야 합니다.
+
+사용법:
+    python -m benchmarks.embedding_backends
+    python -m benchmarks.embedding_backends --backends onnx,onnx-int8 --texts 5000 --queries 500
+"""
+from typing import Dict, List
+import argparse
+import json
+import time
+import numpy as np
+from app.core.config import settings
+from app.services.llm_service import get_embeddings
+from benchmarks.common import percentiles
+from benchmarks.embedding_scaling import build_texts
+
+BACKENDS = {
+    "torch": {"local_embedding_backend": "sentence-transformers"},
+    "onnx": {"local_embedding_backend": "onnx", "onnx_model_file": "model.onnx"},
+    "onnx-int8": {"local_embedding_backend": "onnx", "onnx_model_file": "model_int8.onnx"},
+}
+
+def measure_backend(name: str, texts: List[str], queries: List[str], spec: Dict) -> Dict:
+    overrides = {**BACKENDS[name], "local_embedding_workers": 1}
+    original = {key: getattr(settings, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+
+    try:
+        start = time.perf_counter()
+        get_embeddings(queries[:1], spec=spec)
+        load_seconds = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            get_embeddings([query], spec=spec)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vectors = get_embeddings(texts, spec=spec)
+        seconds = time.perf_counter() - start
+    finally:
+        for key, value in original.items():
+            setattr(settings, key, value)
+
+    return {
+        "backend": name,
+        "load_seconds": load_seconds,
+        "query_latency_ms": percentiles(latencies),
+        "texts_per_second": len(texts) / seconds,
+        "vectors": vectors,
+    }
+
+def run_benchmark(backends: List[str], text_count: int, query_count: int, model: str, seed: int) -> Dict:
+    texts = build_texts(text_count, seed)
+    queries = build_texts(query_count, seed + 1)
+    spec = {"provider": "sentence-transformers", "model": model, "dim": None}
+
+    results = [measure_backend(name, texts, queries, spec) for name in backends]
+    reference = results[0]["vectors"]
+    for row in results:
+        vectors = row.pop("vectors")
+        cosine = (reference * vectors).sum(axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(vectors, axis=1)
+        )
+        row["cosine_vs_reference"] = {"min": float(cosine.min()), "mean": float(cosine.mean())}
+
+    return {"model": model, "reference": backends[0], "texts": text_count, "queries": query_count, "results": results}
+
+def print_report(report: Dict):
+    print("=" * 78)
+    print(f"📊 임베딩 백엔드 비교 (model={report['model']}, 기준={report['reference']})")
+    print("=" * 78)
+    print(f"{'backend':<12}{'load(s)':>9}{'q p50(ms)':>11}{'q p95(ms)':>11}{'texts/s':>10}"
+          f"{'cos min':>11}{'cos mean':>11}")
+    for row in report["results"]:
+        latency = row["query_latency_ms"]
+        cosine = row["cosine_vs_reference"]
+        print(f"{row['backend']:<12}{row['load_seconds']:>9.2f}{latency['p50']:>11.2f}{latency['p95']:>11.2f}"
+              f"{row['texts_per_second']:>10.1f}{cosine['min']:>11.5f}{cosine['mean']:>11.5f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 임베딩 백엔드 비교 벤치마크')
+    parser.add_argument('--backends', default='torch,onnx,onnx-int8',
+                        help=f"비교할 백엔드 (콤마 구분, 첫 번째가 수치 비교 기준): {', '.join(BACKENDS)}")
+    parser.add_argument('--texts', type=int, default=2000, help='처리량 측정용 텍스트 수')
+    parser.add_argument('--queries', type=int, default=200, help='지연시간 측정용 질문 수')
+    parser.add_argument('--model', default=settings.embedding_model, help='sentence-transformers 모델')
+    parser.add_argument('--seed', type=int, default=42, help='합성 코퍼스 시드')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.backends.split(','), args.texts, args.queries, args.model, args.seed)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""로컬 임베딩 멀티코어 스케일링 벤치마크
+
+합성 코퍼스 텍스트를 워커 수별로 sentence-transformers 인코딩해서 처리량(texts/s),
+1 워커 대비 속도 향상, 코어당 효율을 측정합니다. 워커 풀 시작(모델 로드)은 측정에서
+제외하도록 워커 수마다 한 번 예열한 뒤 잽니다.
+
+사용법:
+    python -m benchmarks.embedding_scaling
+    python -m benchmarks.embedding_scaling --texts 20000 --workers 1,2,4,8,16,32 --batch-size 64
+    python -m benchmarks.embedding_scaling --output scaling.json
+"""
+from typing import Dict, List
+import argparse
+import json
+import random
+import time
+from app.core.config import settings
+from app.services.local_embedding import encode, shutdown_pools
+from benchmarks.corpus import generate_corpus
+
+def build_texts(count: int, seed: int) -> List[str]:
+    """길이가 섞인 청크 텍스트 생성 (메시지 1~8개를 이어 붙여 실제 스레드 길이 분포를 흉내)"""
+    rng = random.Random(seed)
+    messages = [
+        f"{message['user']}: {message['text']}"
+        for channel_messages in generate_corpus(count, seed).values()
+        for message in channel_messages
+    ]
+    return [" ".join(rng.choice(messages) for _ in range(rng.choice([1, 1, 1, 2, 3, 8]))) for _ in range(count)]
+
+def run_benchmark(text_count: int, worker_counts: List[int], batch_size: int, model: str, seed: int) -> Dict:
+    texts = build_texts(text_count, seed)
+    # 벤치마크 입력은 항상 워커 풀을 타도록 단일 프로세스 폴백 기준을 낮춤
+    original_min = settings.local_embedding_parallel_min_texts
+    settings.local_embedding_parallel_min_texts = 1
+
+    results = []
+    try:
+        for workers in worker_counts:
+            encode(texts[:batch_size * max(workers, 1)], model, workers=workers, batch_size=batch_size)
+            start = time.perf_counter()
+            encode(texts, model, workers=workers, batch_size=batch_size)
+            seconds = time.perf_counter() - start
+            results.append({"workers": workers, "seconds": seconds, "texts_per_second": len(texts) / seconds})
+            print(f"  workers={workers:<3} {seconds:8.2f}초  {len(texts) / seconds:10.1f} texts/s")
+            shutdown_pools()
+    finally:
+        settings.local_embedding_parallel_min_texts = original_min
+
+    # 가장 적은 워커 수 결과 대비 속도 향상 / 워커 증가분 대비 효율
+    baseline = results[0]
+    for row in results:
+        row["speedup"] = row["texts_per_second"] / baseline["texts_per_second"]
+        row["efficiency"] = row["speedup"] * baseline["workers"] / row["workers"]
+
+    return {"model": model, "texts": len(texts), "batch_size": batch_size, "seed": seed, "results": results}
+
+def print_report(report: Dict):
+    print("=" * 60)
+    print(f"📊 임베딩 스케일링 (model={report['model']}, texts={report['texts']}, batch={report['batch_size']})")
+    print("=" * 60)
+    print(f"{'workers':>8}{'seconds':>10}{'texts/s':>12}{'speedup':>10}{'efficiency':>12}")
+    for row in report["results"]:
+        print(f"{row['workers']:>8}{row['seconds']:>10.2f}{row['texts_per_second']:>12.1f}"
+              f"{row['speedup']:>10.2f}{row['efficiency']:>12.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 임베딩 멀티코어 스케일링 벤치마크')
+    parser.add_argument('--texts', type=int, default=5000, help='인코딩할 텍스트 수')
+    parser.add_argument('--workers', default='1,2,4,8', help='측정할 워커 수 목록 (콤마 구분, 1 = 단일 프로세스)')
+    parser.add_argument('--batch-size', type=int, default=settings.local_embedding_batch_size, help='배치 크기')
+    parser.add_argument('--model', default=settings.embedding_model, help='sentence-transformers 모델')
+    parser.add_argument('--seed', type=int, default=42, help='합성 코퍼스 시드')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    worker_counts = sorted(int(w) for w in args.workers.split(','))
+    report = run_benchmark(args.texts, worker_counts, args.batch_size, args.model, args.seed)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()
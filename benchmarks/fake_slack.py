@@ -0,0 +1,401 @@
+"""로컬 가짜 Slack Web API 서버 (동기화 성능/페이지네이션/rate limit 테스트용)
+
+실제 워크스페이스 토큰 없이 `SlackRealtime` / `SlackSyncScheduler` 를 실행할 수 있도록
+동기화가 쓰는 Web API 메서드를 메모리 안의 합성 워크스페이스로 흉내 냅니다.
+`SLACK_API_BASE_URL` 을 이 서버로 지정하면 `WebClient` 가 그대로 호출합니다.
+
+지원 메서드: auth.test, conversations.list, conversations.history, conversations.replies,
+conversations.join, conversations.info, users.list, users.info, search.messages
+
+- 메시지는 서버 시작 시각 기준 최근 `hours` 시간 안에 흩어 만들고, 채널별 메시지 수는
+  활발한 채널과 조용한 채널이 섞이도록 치우치게(1/순위 가중치) 나눕니다
+- conversations.history 는 실제 API 처럼 스레드 답글을 빼고 최신순으로, cursor 로 나눠 돌려줍니다
+- 응답마다 `latency_ms` (+ 0~`jitter_ms`) 만큼 지연하고, `rate_limit_ratio` 확률 또는 메서드별 분당
+  `rate_limit_per_minute` 을 넘으면 `Retry-After` 헤더와 함께 429 를 돌려줍니다
+- `FakeWorkspace.add_messages / edit_messages / delete_messages` 로 동기화 사이의 변경을 만듭니다
+
+사용법:
+    python -m benchmarks.fake_slack --port 8765 --channels 20 --messages 20000 --latency-ms 50 --rate-limit-ratio 0.02
+    SLACK_API_BASE_URL=http://127.0.0.1:8765/api/ SLACK_BOT_TOKEN=xoxb-fake uvicorn app.main:app
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from benchmarks.corpus import FOLLOW_UPS, PREDICATES, SUBJECTS
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+def _encode_cursor(offset: int) -> str:
+    return base64.b64encode(f"offset:{offset}".encode()).decode()
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(base64.b64decode(cursor).decode().split(":", 1)[1])
+    except Exception:
+        raise SlackError("invalid_cursor")
+
+def _page(items: List, params: Dict, default_limit: int = DEFAULT_PAGE_LIMIT) -> Tuple[List, Dict]:
+    """cursor 페이지네이션 - (이번 페이지, response_metadata)"""
+    offset = _decode_cursor(params.get("cursor"))
+    limit = min(int(params.get("limit") or default_limit), MAX_PAGE_LIMIT)
+    page = items[offset:offset + limit]
+    next_offset = offset + len(page)
+    return page, {"next_cursor": _encode_cursor(next_offset) if next_offset < len(items) else ""}
+
+class SlackError(Exception):
+    """{"ok": false, "error": ...} 응답"""
+
+class FakeWorkspace:
+    """메모리 안의 합성 워크스페이스 (채널/사용자/메시지/스레드)"""
+
+    def __init__(self, channels: int = 10, messages: int = 5000, users: int = 50, hours: float = 24,
+                 thread_ratio: float = 0.2, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.now = time.time()
+        self.users = [{"id": f"U{i:08d}", "name": f"user{i}", "real_name": f"사용자 {i}",
+                       "profile": {"real_name": f"사용자 {i}"}} for i in range(users)]
+        self.users_by_id = {user["id"]: user for user in self.users}
+        self.channels = [{"id": f"C{i:08d}", "name": f"bench-{i:03d}", "is_channel": True, "is_private": False,
+                          "is_archived": False, "num_members": users} for i in range(channels)]
+        self.channels_by_id = {channel["id"]: channel for channel in self.channels}
+        self.roots: Dict[str, List[Dict]] = {channel["id"]: [] for channel in self.channels}
+        self.replies: Dict[Tuple[str, str], List[Dict]] = {}
+        self.joined = set()
+        self._seq = 0
+        # 1/순위 가중치 - 소수의 활발한 채널과 다수의 조용한 채널
+        self.weights = [1 / (rank + 1) for rank in range(channels)]
+
+        start = self.now - hours * 3600
+        for i in range(messages):
+            self._add(start + (self.now - start) * i / max(messages, 1), thread_ratio)
+
+    def _next_ts(self, seconds: float) -> str:
+        self._seq += 1
+        return f"{int(seconds)}.{self._seq % 1000000:06d}"
+
+    def _add(self, seconds: float, thread_ratio: float = 0.0) -> Dict:
+        channel_id = self.rng.choices(self.channels, weights=self.weights)[0]["id"]
+        user = self.rng.choice(self.users)["id"]
+        roots = self.roots[channel_id]
+        if roots and self.rng.random() < thread_ratio:
+            root = self.rng.choice(roots[-20:])
+            root.setdefault("thread_ts", root["ts"])
+            reply = {"type": "message", "user": user, "text": self.rng.choice(FOLLOW_UPS),
+                     "ts": self._next_ts(seconds), "thread_ts": root["ts"]}
+            self.replies.setdefault((channel_id, root["ts"]), []).append(reply)
+            root["reply_count"] = len(self.replies[(channel_id, root["ts"])])
+            root["latest_reply"] = reply["ts"]
+            return reply
+        message = {"type": "message", "user": user, "ts": self._next_ts(seconds),
+                   "text": f"{self.rng.choice(SUBJECTS)} #{self.rng.randint(1, 500)} {self.rng.choice(PREDICATES)}"}
+        roots.append(message)
+        return message
+
+    def add_messages(self, count: int) -> int:
+        """지금 시각의 새 채널 메시지(스레드 답글 아님) 추가"""
+        with self.lock:
+            for _ in range(count):
+                self._add(time.time())
+        return count
+
+    def _pick_roots(self, count: int) -> List[Tuple[str, Dict]]:
+        candidates = [(channel_id, message) for channel_id, roots in self.roots.items() for message in roots]
+        return self.rng.sample(candidates, min(count, len(candidates)))
+
+    def edit_messages(self, count: int) -> int:
+        """채널 메시지 본문 수정 (edited.ts 기록)"""
+        with self.lock:
+            picked = self._pick_roots(count)
+            for _, message in picked:
+                message["text"] = f"{message['text']} (수정됨 {self.rng.randint(1, 9999)})"
+                message["edited"] = {"user": message["user"], "ts": self._next_ts(time.time())}
+        return len(picked)
+
+    def delete_messages(self, count: int) -> int:
+        """채널 메시지 삭제 (스레드 루트면 답글도 함께)"""
+        with self.lock:
+            picked = self._pick_roots(count)
+            for channel_id, message in picked:
+                self.roots[channel_id].remove(message)
+                self.replies.pop((channel_id, message["ts"]), None)
+        return len(picked)
+
+    def message_count(self) -> int:
+        with self.lock:
+            return sum(len(roots) for roots in self.roots.values()) + sum(len(r) for r in self.replies.values())
+
+    # --- Web API 메서드 ---
+
+    def _channel(self, params: Dict) -> Dict:
+        channel = self.channels_by_id.get(params.get("channel", ""))
+        if channel is None:
+            raise SlackError("channel_not_found")
+        return channel
+
+    def auth_test(self, params: Dict) -> Dict:
+        return {"url": "https://fake-workspace.slack.com/", "team": "Fake Workspace", "user": "bench-bot",
+                "team_id": "T00000000", "user_id": "U00000BOT", "bot_id": "B00000BOT"}
+
+    def conversations_list(self, params: Dict) -> Dict:
+        types = set((params.get("types") or "public_channel").split(","))
+        channels = [{**channel, "is_member": channel["id"] in self.joined} for channel in self.channels
+                    if ("private_channel" if channel["is_private"] else "public_channel") in types]
+        page, metadata = _page(channels, params)
+        return {"channels": page, "response_metadata": metadata}
+
+    def conversations_info(self, params: Dict) -> Dict:
+        channel = self._channel(params)
+        return {"channel": {**channel, "is_member": channel["id"] in self.joined}}
+
+    def conversations_join(self, params: Dict) -> Dict:
+        channel = self._channel(params)
+        response = {"channel": {**channel, "is_member": True}}
+        if channel["id"] in self.joined:
+            response["warning"] = "already_in_channel"
+            response["response_metadata"] = {"warnings": ["already_in_channel"]}
+        self.joined.add(channel["id"])
+        return response
+
+    def conversations_history(self, params: Dict) -> Dict:
+        channel = self._channel(params)
+        if channel["id"] not in self.joined:
+            raise SlackError("not_in_channel")
+        oldest = float(params.get("oldest") or 0)
+        latest = float(params.get("latest") or "inf")
+        inclusive = str(params.get("inclusive", "")).lower() in ("1", "true")
+        def in_range(ts: float) -> bool:
+            return oldest <= ts <= latest if inclusive else oldest < ts < latest
+
+        # 최신순, 답글 제외 (루트에 reply_count / latest_reply 포함)
+        messages = [dict(message) for message in reversed(self.roots[channel["id"]]) if in_range(float(message["ts"]))]
+        page, metadata = _page(messages, params)
+        return {"messages": page, "has_more": bool(metadata["next_cursor"]), "pin_count": 0,
+                "response_metadata": metadata}
+
+    def conversations_replies(self, params: Dict) -> Dict:
+        channel = self._channel(params)
+        ts = params.get("ts")
+        root = next((message for message in self.roots[channel["id"]] if message["ts"] == ts), None)
+        if root is None:
+            raise SlackError("thread_not_found")
+        messages = [dict(root)] + [dict(reply) for reply in self.replies.get((channel["id"], ts), [])]
+        page, metadata = _page(messages, params, default_limit=10)
+        return {"messages": page, "has_more": bool(metadata["next_cursor"]), "response_metadata": metadata}
+
+    def users_list(self, params: Dict) -> Dict:
+        page, metadata = _page(self.users, params)
+        return {"members": page, "response_metadata": metadata}
+
+    def users_info(self, params: Dict) -> Dict:
+        user = self.users_by_id.get(params.get("user", ""))
+        if user is None:
+            raise SlackError("user_not_found")
+        return {"user": user}
+
+    def search_messages(self, params: Dict) -> Dict:
+        query = (params.get("query") or "").lower()
+        count = min(int(params.get("count") or 20), 100)
+        page_no = max(int(params.get("page") or 1), 1)
+        matches = []
+        for channel in self.channels:
+            for message in self.roots[channel["id"]]:
+                if query in message["text"].lower():
+                    matches.append({**message, "channel": {"id": channel["id"], "name": channel["name"]},
+                                    "permalink": f"https://fake-workspace.slack.com/archives/{channel['id']}"
+                                                 f"/p{message['ts'].replace('.', '')}"})
+        matches.sort(key=lambda match: float(match["ts"]), reverse=params.get("sort_dir", "desc") == "desc")
+        pages = max(1, -(-len(matches) // count))
+        return {"query": params.get("query"), "messages": {
+            "matches": matches[(page_no - 1) * count:page_no * count],
+            "total": len(matches),
+            "paging": {"count": count, "total": len(matches), "page": page_no, "pages": pages},
+        }}
+
+    def call(self, method: str, params: Dict) -> Dict:
+        handler = getattr(self, method.replace(".", "_"), None) if method in API_METHODS else None
+        if handler is None:
+            raise SlackError("unknown_method")
+        with self.lock:
+            return handler(params)
+
+API_METHODS = {
+    "auth.test", "conversations.list", "conversations.history", "conversations.replies", "conversations.join",
+    "conversations.info", "users.list", "users.info", "search.messages",
+}
+
+class FakeSlackServer:
+    """FakeWorkspace 를 /api/<method> 로 제공하는 HTTP 서버 (백그라운드 스레드)"""
+
+    def __init__(self, workspace: FakeWorkspace, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, rate_limit_ratio: float = 0.0,
+                 rate_limit_per_minute: int = 0, retry_after: int = 1, seed: int = 42):
+        self.workspace = workspace
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_ratio = rate_limit_ratio
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows: Dict[str, List[float]] = {}  # 메서드별 최근 1분 호출 시각
+        self.calls: Dict[str, int] = {}
+        self.rate_limited: Dict[str, int] = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def start(self) -> "FakeSlackServer":
+        """백그라운드 스레드에서 서비스 시작"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """현재 스레드에서 서비스 (Ctrl+C 까지)"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"calls": dict(self.calls), "rate_limited": dict(self.rate_limited),
+                    "total_calls": sum(self.calls.values()), "total_rate_limited": sum(self.rate_limited.values())}
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+            self.rate_limited.clear()
+
+    def _should_rate_limit(self, method: str) -> bool:
+        """호출을 기록하고 429 로 응답할지 결정 (무작위 주입 또는 메서드별 분당 한도 초과)"""
+        now = time.monotonic()
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            limited = self.rate_limit_ratio > 0 and self.rng.random() < self.rate_limit_ratio
+            if not limited and self.rate_limit_per_minute > 0:
+                window = [t for t in self._windows.get(method, []) if now - t < 60]
+                limited = len(window) >= self.rate_limit_per_minute
+                if not limited:
+                    window.append(now)
+                self._windows[method] = window
+            if limited:
+                self.rate_limited[method] = self.rate_limited.get(method, 0) + 1
+            return limited
+
+    def _delay(self) -> float:
+        with self._lock:
+            jitter = self.rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _params(self) -> Dict:
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8") if length else ""
+                if body:
+                    if (self.headers.get("Content-Type") or "").startswith("application/json"):
+                        params.update(json.loads(body))
+                    else:
+                        params.update({key: values[-1] for key, values in parse_qs(body).items()})
+                return params
+
+            def _send(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self):
+                params = self._params()
+                method = urlparse(self.path).path.rsplit("/", 1)[-1]
+                delay = server._delay()
+                if delay > 0:
+                    time.sleep(delay)
+                if not (self.headers.get("Authorization") or "").startswith("Bearer ") and "token" not in params:
+                    self._send(200, {"ok": False, "error": "not_authed"})
+                    return
+                if server._should_rate_limit(method):
+                    self._send(429, {"ok": False, "error": "ratelimited"},
+                               headers={"Retry-After": str(server.retry_after)})
+                    return
+                try:
+                    self._send(200, {"ok": True, **server.workspace.call(method, params)})
+                except SlackError as e:
+                    self._send(404 if str(e) == "unknown_method" else 200, {"ok": False, "error": str(e)})
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                self._handle()
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 가짜 Slack Web API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--channels', type=int, default=10, help='채널 수')
+    parser.add_argument('--messages', type=int, default=5000, help='메시지 수 (스레드 답글 포함)')
+    parser.add_argument('--users', type=int, default=50, help='사용자 수')
+    parser.add_argument('--hours', type=float, default=24, help='메시지를 흩을 최근 기간 (시간)')
+    parser.add_argument('--thread-ratio', type=float, default=0.2, help='스레드 답글 비율')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='응답마다 더할 지연 (ms)')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='지연에 더할 0~N ms 무작위 지터')
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0, help='429 를 돌려줄 확률')
+    parser.add_argument('--rate-limit-per-minute', type=int, default=0, help='메서드별 분당 허용 호출 수 (0이면 제한 없음)')
+    parser.add_argument('--retry-after', type=int, default=1, help='429 응답의 Retry-After (초)')
+    parser.add_argument('--seed', type=int, default=42, help='랜덤 시드')
+    args = parser.parse_args()
+
+    workspace = FakeWorkspace(args.channels, args.messages, args.users, args.hours, args.thread_ratio, args.seed)
+    server = FakeSlackServer(workspace, args.host, args.port, args.latency_ms, args.jitter_ms,
+                             args.rate_limit_ratio, args.rate_limit_per_minute, args.retry_after, args.seed)
+    print(f"✅ 가짜 Slack Web API: {server.base_url} (채널 {args.channels}개, 메시지 {workspace.message_count()}개)")
+    print(f"   SLACK_API_BASE_URL={server.base_url} SLACK_BOT_TOKEN=xoxb-fake 로 앱을 실행하세요. 종료: Ctrl+C")
+    server.serve_forever()
+    print(f"\n호출 통계: {json.dumps(server.stats(), ensure_ascii=False)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""HNSW 파라미터(M, ef) 스윕 벤치마크 - recall@k 대 검색 지연시간
+
+저장된 컬렉션의 임베딩(`--collection`) 또는 샘플/합성 슬랙 데이터를 임베딩한 벡터로
+M 값마다 그래프를 한 번 만들고, ef 값을 바꿔 가며
+  - numpy 정확 검색 대비 recall@k (동점 거리는 정답으로 인정)
+  - 질문 1개 검색 지연시간 p50/p95 (ms) 와 QPS
+  - 그래프 구축 시간
+을 측정합니다. 목표 recall 을 만족하는 가장 빠른 조합을 HNSW_* 설정값으로 추천하고,
+matplotlib 이 있으면 `--plot` 경로에 M 별 recall-지연시간 곡선을 그립니다.
+
+엔진:
+  - hnswlib: VECTOR_STORE=hnswlib 과 같은 그래프 (ef 를 검색마다 바꿀 수 있어 빠름, hnswlib 필요)
+  - chroma:  ChromaDB 는 search_ef 가 컬렉션 생성 시점에 고정되어 (M, ef) 조합마다 새로 만듭니다
+
+사용법:
+    python -m benchmarks.hnsw_sweep
+    python -m benchmarks.hnsw_sweep --collection slack_messages --m 8,16,32 --ef 10,20,40,80,160 --plot hnsw.png
+    python -m benchmarks.hnsw_sweep --engine chroma --synthetic 20000 --backend sentence-transformers
+"""
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import time
+import uuid
+import numpy as np
+from app.core.config import settings
+from benchmarks.common import SAMPLE_FILES, offline_environment, percentiles
+from benchmarks.corpus import write_corpus
+
+def load_collection_vectors(name: str, page_size: int = 5000) -> np.ndarray:
+    """저장된 컬렉션의 임베딩 전체 (현재 CHROMA_PERSIST_DIRECTORY / VECTOR_STORE 기준)"""
+    from app.core.database import get_collection
+
+    collection = get_collection(name)
+    pages, offset = [], 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=["embeddings"])
+        if not len(page["ids"]):
+            break
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page["ids"])
+    if not pages:
+        raise SystemExit(f"컬렉션 {name} 에 임베딩이 없습니다.")
+    return np.concatenate(pages)
+
+def embed_corpus(files: List[str]) -> np.ndarray:
+    """슬랙 export 파일을 인덱싱과 같은 방식으로 청크로 나눠 임베딩"""
+    from app.core.collections import current_embedding_spec
+    from app.services.llm_service import get_embeddings
+    from app.services.slack_data import chunk_message_columns, load_message_columns
+
+    texts = []
+    for path in files:
+        texts.extend(chunk["text"] for chunk in chunk_message_columns(load_message_columns(path)))
+    return np.asarray(get_embeddings(texts, spec=current_embedding_spec()), dtype=np.float32)
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+def exact_kth_distance(base: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """질문별 정확한 k 번째 cosine 거리 (recall 판정 기준)"""
+    scores = queries @ base.T
+    kth = np.partition(-scores, k - 1, axis=1)[:, k - 1]
+    return 1.0 + kth
+
+def measure(search: Callable[[np.ndarray], np.ndarray], base: np.ndarray, queries: np.ndarray,
+            kth: np.ndarray, k: int) -> Dict:
+    """질문을 하나씩 검색해서 recall@k 와 지연시간 측정"""
+    latencies, hits = [], 0
+    for query, threshold in zip(queries, kth):
+        start = time.perf_counter()
+        labels = search(query)
+        latencies.append(time.perf_counter() - start)
+        # 같은 거리의 중복 메시지가 많아서 id 대신 거리로 판정
+        distances = 1.0 - base[labels] @ query
+        hits += int(np.sum(distances <= threshold + 1e-5))
+    return {
+        "recall": hits / (len(queries) * k),
+        "latency_ms": percentiles(latencies, (50, 95)),
+        "qps": len(queries) / sum(latencies) if latencies else 0.0,
+    }
+
+def sweep_hnswlib(base, queries, kth, k, m_values, ef_values, construction_ef) -> List[Dict]:
+    import hnswlib
+
+    rows = []
+    for M in m_values:
+        index = hnswlib.Index(space="cosine", dim=base.shape[1])
+        start = time.perf_counter()
+        index.init_index(max_elements=len(base), ef_construction=construction_ef, M=M, random_seed=100)
+        index.add_items(base, np.arange(len(base)))
+        build_seconds = time.perf_counter() - start
+        for ef in ef_values:
+            index.set_ef(max(ef, k))
+            result = measure(lambda q: index.knn_query(q[None, :], k=k)[0][0].astype(np.int64), base, queries, kth, k)
+            rows.append({"M": M, "ef": ef, "build_seconds": build_seconds, **result})
+    return rows
+
+def sweep_chroma(base, queries, kth, k, m_values, ef_values, construction_ef) -> List[Dict]:
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
+    client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False))
+    batch = getattr(client, "max_batch_size", 5000)
+    ids = [str(i) for i in range(len(base))]
+    rows = []
+    for M in m_values:
+        for ef in ef_values:
+            name = f"hnsw_sweep_{uuid.uuid4().hex[:8]}"
+            collection = client.create_collection(name=name, metadata={
+                "hnsw:space": "cosine", "hnsw:M": M, "hnsw:construction_ef": construction_ef, "hnsw:search_ef": ef,
+            })
+            start = time.perf_counter()
+            for offset in range(0, len(base), batch):
+                collection.add(ids=ids[offset:offset + batch], embeddings=base[offset:offset + batch].tolist())
+            build_seconds = time.perf_counter() - start
+
+            def search(query):
+                found = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+                return np.asarray([int(i) for i in found["ids"][0]], dtype=np.int64)
+
+            rows.append({"M": M, "ef": ef, "build_seconds": build_seconds, **measure(search, base, queries, kth, k)})
+            client.delete_collection(name)
+    return rows
+
+ENGINES = {"hnswlib": sweep_hnswlib, "chroma": sweep_chroma}
+
+def recommend(rows: List[Dict], target_recall: float) -> Optional[Dict]:
+    """목표 recall 을 넘는 조합 중 p50 지연시간이 가장 짧은 것"""
+    passing = [row for row in rows if row["recall"] >= target_recall]
+    return min(passing, key=lambda row: row["latency_ms"]["p50"]) if passing else None
+
+def run_benchmark(engine: str, vectors: np.ndarray, query_count: int, k: int, m_values: List[int],
+                  ef_values: List[int], construction_ef: int, target_recall: float, seed: int) -> Dict:
+    vectors = normalize(vectors)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(vectors))
+    # 인덱스에 없는 벡터를 질문으로 사용 (자기 자신이 1위로 나오는 것 방지)
+    query_count = min(query_count, len(vectors) // 10)
+    queries, base = vectors[order[:query_count]], vectors[order[query_count:]]
+    k = min(k, len(base))
+    kth = exact_kth_distance(base, queries, k)
+
+    start = time.perf_counter()
+    for query in queries:
+        np.argpartition(-(base @ query), k - 1)[:k]
+    brute_force_ms = (time.perf_counter() - start) / max(len(queries), 1) * 1000
+
+    rows = ENGINES[engine](base, queries, kth, k, m_values, ef_values, construction_ef)
+    return {
+        "engine": engine,
+        "vectors": len(base),
+        "dim": int(base.shape[1]),
+        "queries": len(queries),
+        "k": k,
+        "construction_ef": construction_ef,
+        "brute_force_ms": brute_force_ms,
+        "target_recall": target_recall,
+        "results": rows,
+        "recommended": recommend(rows, target_recall),
+    }
+
+def plot(report: Dict, path: str):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("⚠️ matplotlib 이 없어 그래프를 건너뜁니다: pip install matplotlib")
+        return
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for M in sorted({row["M"] for row in report["results"]}):
+        rows = [row for row in report["results"] if row["M"] == M]
+        xs = [row["latency_ms"]["p50"] for row in rows]
+        ys = [row["recall"] for row in rows]
+        ax.plot(xs, ys, marker="o", label=f"M={M}")
+        for row, x, y in zip(rows, xs, ys):
+            ax.annotate(f"ef={row['ef']}", (x, y), textcoords="offset points", xytext=(4, -10), fontsize=7)
+    ax.axvline(report["brute_force_ms"], color="gray", linestyle="--", label="brute force")
+    ax.axhline(report["target_recall"], color="gray", linestyle=":")
+    ax.set_xlabel("p50 latency (ms)")
+    ax.set_ylabel(f"recall@{report['k']}")
+    ax.set_title(f"{report['engine']} HNSW sweep ({report['vectors']} vectors, dim={report['dim']})")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    print(f"\n📈 그래프를 {path}에 저장했습니다.")
+
+def print_report(report: Dict):
+    print("=" * 72)
+    print(f"📊 HNSW 스윕 (engine={report['engine']}, 벡터 {report['vectors']}개, dim={report['dim']}, "
+          f"질문 {report['queries']}개, k={report['k']}, construction_ef={report['construction_ef']})")
+    print("=" * 72)
+    print(f"{'M':>4}{'ef':>6}{'recall@k':>11}{'p50(ms)':>10}{'p95(ms)':>10}{'QPS':>10}{'build(s)':>10}")
+    for row in report["results"]:
+        print(f"{row['M']:>4}{row['ef']:>6}{row['recall']:>11.4f}{row['latency_ms']['p50']:>10.3f}"
+              f"{row['latency_ms']['p95']:>10.3f}{row['qps']:>10.0f}{row['build_seconds']:>10.2f}")
+    print(f"\nnumpy 정확 검색: 질문당 {report['brute_force_ms']:.3f}ms")
+
+    best = report["recommended"]
+    if best:
+        print(f"✅ recall ≥ {report['target_recall']} 중 가장 빠른 조합: "
+              f"HNSW_M={best['M']} HNSW_CONSTRUCTION_EF={report['construction_ef']} HNSW_SEARCH_EF={best['ef']} "
+              f"(recall {best['recall']:.4f}, p50 {best['latency_ms']['p50']:.3f}ms)")
+    else:
+        print(f"⚠️ recall {report['target_recall']} 을 넘는 조합이 없습니다. ef 나 M 을 더 크게 잡아 보세요.")
+
+def main():
+    parser = argparse.ArgumentParser(description='HNSW 파라미터 스윕 (recall@k 대 지연시간)')
+    parser.add_argument('--engine', choices=list(ENGINES), help='기본: hnswlib 이 설치되어 있으면 hnswlib, 아니면 chroma')
+    parser.add_argument('--collection', help='저장된 컬렉션의 임베딩 사용 (없으면 샘플 + 합성 데이터를 임베딩)')
+    parser.add_argument('--synthetic', type=int, default=10000, help='추가할 합성 메시지 수 (--collection 없을 때)')
+    parser.add_argument('--backend', default='hash', help='로컬 임베딩 백엔드 (--collection 없을 때)')
+    parser.add_argument('--m', default='8,16,32', help='M 값 목록 (쉼표 구분)')
+    parser.add_argument('--ef', default='10,20,40,80,160', help='search ef 값 목록 (쉼표 구분)')
+    parser.add_argument('--construction-ef', type=int, default=settings.hnsw_construction_ef, help='그래프 구축 ef')
+    parser.add_argument('--k', type=int, default=10, help='recall@k 의 k')
+    parser.add_argument('--queries', type=int, default=200, help='질문으로 떼어 낼 벡터 수')
+    parser.add_argument('--target-recall', type=float, default=0.95, help='추천 기준 recall')
+    parser.add_argument('--seed', type=int, default=42, help='랜덤 시드')
+    parser.add_argument('--plot', help='recall-지연시간 그래프를 저장할 PNG 경로 (matplotlib 필요)')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    engine = args.engine
+    if engine is None:
+        try:
+            import hnswlib  # noqa: F401
+            engine = "hnswlib"
+        except ImportError:
+            engine = "chroma"
+
+    if args.collection:
+        vectors = load_collection_vectors(args.collection)
+    else:
+        with offline_environment(args.backend) as workdir:
+            files = list(SAMPLE_FILES)
+            if args.synthetic > 0:
+                files.append(write_corpus(os.path.join(workdir, "synthetic.json"), args.synthetic, args.seed))
+            vectors = embed_corpus(files)
+
+    report = run_benchmark(engine, vectors, args.queries, args.k, [int(v) for v in args.m.split(',')],
+                           [int(v) for v in args.ef.split(',')], args.construction_ef, args.target_recall, args.seed)
+    print_report(report)
+    if args.plot:
+        plot(report, args.plot)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""오프라인 검색 품질/지연시간 벤치마크
+
+샘플 슬랙 데이터 + 합성 코퍼스로 결정적 인덱스를 만들고, 라벨링된 질문 세트로
+recall@k, MRR, 인덱싱 처리량, 단계별 지연시간 백분위수, 최대 메모리를 측정합니다.
+네트워크/API 키 없이 동작하며 기본 임베딩은 결정적 해시 스텁입니다.
+
+사용법:
+    python -m benchmarks.retrieval
+    python -m benchmarks.retrieval --synthetic 20000 --backend sentence-transformers
+    python -m benchmarks.retrieval --output bench_output.json
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from app.core.metrics import collect_spans, track
+from app.models.message import SearchQuery
+from app.services.embedding import index_multiple_files
+from app.services.search import retrieve_messages, search_messages
+from benchmarks.common import (
+    QUESTIONS_FILE, SAMPLE_FILES, group_spans, max_rss_mb, offline_environment,
+    print_stage_table, summarize_stages
+)
+from benchmarks.corpus import write_corpus
+
+def evaluate_retrieval(questions: List[Dict], k_values: List[int]) -> Dict:
+    """라벨된 질문 세트로 recall@k 와 MRR 계산 (timestamp 메타데이터 기준)"""
+    max_k = max(k_values)
+    recall_sums = {k: 0.0 for k in k_values}
+    reciprocal_rank_sum = 0.0
+
+    for item in questions:
+        relevant = set(item["relevant"])
+        results = retrieve_messages(item["question"], max_k)
+        ranked = [meta.get("timestamp") for meta in (results["metadatas"][0] or [])]
+
+        for k in k_values:
+            recall_sums[k] += len(relevant & set(ranked[:k])) / len(relevant)
+
+        for rank, ts in enumerate(ranked, 1):
+            if ts in relevant:
+                reciprocal_rank_sum += 1 / rank
+                break
+
+    count = len(questions)
+    metrics = {f"recall@{k}": recall_sums[k] / count for k in k_values}
+    metrics["mrr"] = reciprocal_rank_sum / count
+    return metrics
+
+def run_benchmark(synthetic_messages: int, seed: int, k_values: List[int],
+                  backend: str, search_runs: int, vector_store: str = "chroma") -> Dict:
+    """인덱스 구축 -> 검색 품질 -> 엔드투엔드 검색 지연시간 순서로 측정"""
+    with open(QUESTIONS_FILE, 'r', encoding='utf-8') as f:
+        questions = json.load(f)
+
+    with offline_environment(backend, vector_store) as workdir, collect_spans() as spans:
+        files = list(SAMPLE_FILES)
+        if synthetic_messages > 0:
+            files.append(write_corpus(os.path.join(workdir, "synthetic.json"), synthetic_messages, seed))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        chunk_count = index_multiple_files(files)["indexed"]
+        build_seconds = time.perf_counter() - start
+        _, build_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        quality = evaluate_retrieval(questions, k_values)
+
+        for _ in range(search_runs):
+            for item in questions:
+                with track("search.total"):
+                    search_messages(SearchQuery(question=item["question"], top_k=max(k_values)))
+        _, search_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "backend": backend,
+        "vector_store": vector_store,
+        "seed": seed,
+        "indexed_chunks": chunk_count,
+        "question_count": len(questions),
+        "quality": quality,
+        "index_build": {
+            "seconds": build_seconds,
+            "chunks_per_second": chunk_count / build_seconds if build_seconds else 0.0,
+        },
+        "latency_ms": summarize_stages(group_spans(spans)),
+        "memory_mb": {
+            "index_build_peak_traced": build_peak / 1024 / 1024,
+            "search_peak_traced": search_peak / 1024 / 1024,
+            "max_rss": max_rss_mb(),
+        },
+    }
+
+def print_report(report: Dict):
+    print("=" * 60)
+    print(f"📊 검색 벤치마크 (backend={report['backend']}, vector_store={report['vector_store']}, seed={report['seed']})")
+    print("=" * 60)
+    print(f"인덱싱 청크 수: {report['indexed_chunks']}개 / 질문 수: {report['question_count']}개")
+    print(f"인덱스 구축: {report['index_build']['seconds']:.2f}초 "
+          f"({report['index_build']['chunks_per_second']:.1f} chunks/s)")
+
+    print("\n검색 품질")
+    for name, value in report["quality"].items():
+        print(f"  {name:<12}{value:.3f}")
+
+    print_stage_table("단계별 지연시간", report["latency_ms"])
+
+    memory = report["memory_mb"]
+    print(f"\n메모리: 인덱싱 peak {memory['index_build_peak_traced']:.1f}MB, "
+          f"검색 peak {memory['search_peak_traced']:.1f}MB, max RSS {memory['max_rss']:.1f}MB")
+
+def main():
+    parser = argparse.ArgumentParser(description='오프라인 검색 품질/지연시간 벤치마크')
+    parser.add_argument('--synthetic', type=int, default=2000, help='추가할 합성 메시지 수')
+    parser.add_argument('--seed', type=int, default=42, help='합성 코퍼스 시드')
+    parser.add_argument('--k', default='1,5,10', help='recall@k 의 k 목록 (콤마 구분)')
+    parser.add_argument('--backend', default='hash', help="로컬 임베딩 백엔드 ('hash' 또는 'sentence-transformers')")
+    parser.add_argument('--vector-store', default='chroma', help="벡터 저장소 ('chroma' 또는 'quantized')")
+    parser.add_argument('--search-runs', type=int, default=3, help='질문 세트 반복 횟수 (지연시간 측정용)')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    k_values = sorted(int(k) for k in args.k.split(','))
+    report = run_benchmark(args.synthetic, args.seed, k_values, args.backend, args.search_runs, args.vector_store)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""시작(import) 시간 프로파일
+
+`python -X importtime` 으로 새 인터프리터에서 대상 모듈을 import 하고, 누적 시간이 큰 모듈과
+최상위 패키지별 자체(self) 시간 합계를 출력합니다. 무거운 의존성(chromadb, torch,
+sentence_transformers, anthropic, openai 등)이 시작 경로에 다시 들어왔는지 확인하는 용도입니다.
+
+사용법:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module app.main --module app.services.search --top 30
+    python -m benchmarks.startup --output startup.json
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from benchmarks.common import ROOT_DIR
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# 시작 경로에 있으면 안 되는(첫 사용 시 로드해야 하는) 패키지
+HEAVY_PACKAGES = ["chromadb", "torch", "sentence_transformers", "onnxruntime", "anthropic", "openai", "pandas"]
+
+def profile_import(module: str) -> Dict:
+    """새 프로세스에서 module 을 import 하며 importtime 로그 수집"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT_DIR},
+    )
+    wall_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{completed.stderr[-2000:]}")
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({"name": name, "self_ms": int(self_us) / 1000,
+                            "cumulative_ms": int(cumulative_us) / 1000, "depth": len(indent) // 2})
+
+    packages: Dict[str, float] = {}
+    for item in modules:
+        top = item["name"].split('.')[0]
+        packages[top] = packages.get(top, 0.0) + item["self_ms"]
+
+    return {
+        "module": module,
+        "wall_seconds": wall_seconds,
+        "import_ms": next((item["cumulative_ms"] for item in modules if item["name"] == module), 0.0),
+        "modules": modules,
+        "packages": dict(sorted(packages.items(), key=lambda pair: pair[1], reverse=True)),
+        "heavy_loaded": [name for name in HEAVY_PACKAGES if name in packages],
+    }
+
+def print_report(report: Dict, top: int):
+    print("=" * 60)
+    print(f"📊 시작 프로파일: import {report['module']}")
+    print("=" * 60)
+    print(f"import 누적 {report['import_ms']:.1f}ms / 인터프리터 포함 {report['wall_seconds']:.2f}초")
+
+    print(f"\n누적 시간 상위 {top}개 모듈")
+    print(f"{'module':<52}{'self(ms)':>10}{'cum(ms)':>10}")
+    for item in sorted(report["modules"], key=lambda m: m["cumulative_ms"], reverse=True)[:top]:
+        print(f"{item['name'][:51]:<52}{item['self_ms']:>10.1f}{item['cumulative_ms']:>10.1f}")
+
+    print(f"\n패키지별 self 시간 상위 {top}개")
+    for name, ms in list(report["packages"].items())[:top]:
+        print(f"  {name:<40}{ms:>10.1f}ms")
+
+    if report["heavy_loaded"]:
+        print(f"\n⚠️ 시작 경로에서 로드된 무거운 패키지: {', '.join(report['heavy_loaded'])}")
+    else:
+        print("\n✅ 시작 경로에 무거운 패키지 없음")
+
+def main():
+    parser = argparse.ArgumentParser(description='시작(import) 시간 프로파일')
+    parser.add_argument('--module', action='append', help='import 할 모듈 (여러 번 지정 가능, 기본: app.main)')
+    parser.add_argument('--top', type=int, default=20, help='출력할 상위 항목 수')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    reports: List[Dict] = []
+    for module in args.module or ["app.main"]:
+        report = profile_import(module)
+        print_report(report, args.top)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 결과를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()
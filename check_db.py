@@ -2,6 +2,7 @@
 import chromadb
 from chromadb.config import Settings
 import os
+import json
 from dotenv import load_dotenv
 
 # .env 파일 로드
@@ -11,6 +12,12 @@ load_dotenv()
 persist_directory = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
 collection_name = os.getenv("CHROMA_COLLECTION_NAME", "slack_messages")
 
+# 버전 컬렉션 레지스트리가 있으면 현재 서비스 중인 컬렉션 확인
+registry_path = os.path.join(persist_directory, "collections.json")
+if os.path.exists(registry_path):
+    with open(registry_path, "r", encoding="utf-8") as f:
+        collection_name = json.load(f).get("active") or collection_name
+
 # ChromaDB 클라이언트 초기화
 client = chromadb.PersistentClient(
     path=persist_directory,
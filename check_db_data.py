@@ -2,11 +2,14 @@
 """ChromaDB에 저장된 데이터 조회 스크립트"""
 
 from app.core.database import get_collection
+from app.core.index_stats import get_index_stats
 import json
 from datetime import datetime
 
+SAMPLE_CHUNKS = 5
+
 def check_db_data():
-    """DB에 저장된 모든 데이터 조회"""
+    """DB 현황 조회 (샘플 청크 + 집계 통계)"""
     
     collection = get_collection()
     
@@ -21,17 +24,12 @@ def check_db_data():
         print("❌ 저장된 데이터가 없습니다.")
         return
     
-    # 2. 모든 데이터 가져오기
-    results = collection.get()
+    # 2. 샘플 데이터 (전체를 읽지 않고 앞부분만)
+    results = collection.get(limit=SAMPLE_CHUNKS)
     
-    # 3. 메타데이터 분석
-    print(f"📝 저장된 데이터 상세:")
+    print(f"📝 저장된 데이터 샘플 ({len(results['ids'])}개):")
     print(f"-" * 60)
     
-    channels_set = set()
-    users_set = set()
-    sync_times = []
-    
     for i, (doc_id, doc, metadata) in enumerate(zip(
         results['ids'], 
         results['documents'], 
@@ -58,35 +56,33 @@ def check_db_data():
         
         # Slack API로 가져온 데이터인 경우
         if 'sync_time' in metadata:
-            sync_time = metadata['sync_time']
-            print(f"    - 동기화 시간: {sync_time}")
-            sync_times.append(sync_time)
+            print(f"    - 동기화 시간: {metadata['sync_time']}")
         
         # 소스 정보
         source = metadata.get('source', 'file_upload')
         print(f"    - 소스: {source}")
-        
-        # 통계 수집
-        if 'users' in metadata:
-            for user in metadata['users'].split(', '):
-                if user:
-                    users_set.add(user)
     
-    # 4. 전체 통계
+    # 3. 전체 통계 (저장/삭제 시 갱신되는 카운터 - 문서 수와 무관하게 빠름)
+    stats = get_index_stats().summary(collection.name, top=10, days=7)
     print(f"\n{'=' * 60}")
     print(f"📈 전체 통계")
     print(f"{'=' * 60}")
-    print(f"총 청크 수: {total_count}개")
-    print(f"고유 사용자 수: {len(users_set)}명")
-    
-    if users_set:
-        print(f"사용자 목록: {', '.join(sorted(users_set)[:10])}")
-        if len(users_set) > 10:
-            print(f"  ... 외 {len(users_set) - 10}명")
-    
-    if sync_times:
-        latest_sync = max(sync_times)
-        print(f"최근 동기화: {latest_sync}")
+    print(f"총 청크 수: {total_count}개 (통계 카운터: {stats['documents']}개)")
+    if stats['documents'] != total_count:
+        print(f"⚠️ 카운터가 실제 문서 수와 다릅니다. python scripts/rebuild_stats.py 로 다시 세세요.")
+    print(f"고유 채널 수: {stats['channels_total']}개")
+    print(f"고유 사용자 수: {stats['users_total']}명")
+    
+    if stats['users']:
+        print(f"사용자 목록 (문서 수 순): {', '.join(row['key'] for row in stats['users'])}")
+        if stats['users_total'] > len(stats['users']):
+            print(f"  ... 외 {stats['users_total'] - len(stats['users'])}명")
+    
+    for row in stats['sources']:
+        print(f"소스 {row['key']}: {row['documents']}개")
+    
+    if stats['last_sync_time']:
+        print(f"최근 동기화: {stats['last_sync_time']}")
     
     # 5. 샘플 검색 테스트
     print(f"\n{'=' * 60}")
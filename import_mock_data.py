@@ -6,36 +6,25 @@ OpenAI API 없이 테스트용 랜덤 임베딩을 생성합니다
 import json
 import uuid
 import random
-import chromadb
-from chromadb.config import Settings
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# ChromaDB 설정
-persist_directory = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
-collection_name = os.getenv("CHROMA_COLLECTION_NAME", "slack_messages")
+from app.core.collections import get_active_collection
+from app.core.database import get_collection
 
 # 데이터 로드
 with open("data/sample_slack_data.json", "r", encoding="utf-8") as f:
     messages = json.load(f)
 
-# ChromaDB 클라이언트 초기화
-client = chromadb.PersistentClient(
-    path=persist_directory,
-    settings=Settings(anonymized_telemetry=False)
-)
+# 현재 서비스 중인 버전 컬렉션 (임베딩 모델/차원 태그 포함)
+active = get_active_collection()
+collection_name = active["name"]
+embedding_dim = active["spec"]["dim"]
+collection = get_collection(collection_name)
 
-# 컬렉션 생성 또는 가져오기
+# 기존 데이터 삭제
 try:
-    collection = client.get_collection(name=collection_name)
-    # 기존 데이터 삭제
     collection.delete(where={})
-    print(f"기존 컬렉션 '{collection_name}' 초기화")
-except:
-    collection = client.create_collection(name=collection_name)
-    print(f"새 컬렉션 '{collection_name}' 생성")
+    print(f"기존 컬렉션 '{collection_name}' 초기화 (모델: {active['spec']['model']}, {embedding_dim}차원)")
+except Exception as e:
+    print(f"기존 데이터 삭제 실패: {e}")
 
 # 메시지를 문서로 변환
 documents = []
@@ -60,9 +49,9 @@ for msg in messages:
         # ID 생성
         ids.append(str(uuid.uuid4()))
         
-        # Mock 임베딩 생성 (1536 차원의 랜덤 벡터)
-        # 실제로는 OpenAI API를 사용하지만 테스트용으로 랜덤 벡터 사용
-        mock_embedding = [random.random() for _ in range(1536)]
+        # Mock 임베딩 생성 (서비스 컬렉션 차원의 랜덤 벡터)
+        # 실제로는 임베딩 모델을 사용하지만 테스트용으로 랜덤 벡터 사용
+        mock_embedding = [random.random() for _ in range(embedding_dim)]
         embeddings.append(mock_embedding)
 
 # 데이터 저장
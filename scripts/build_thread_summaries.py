@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""
+질문-답변 스레드 요약 문서를 컬렉션 전체에 대해 만드는 스크립트 (오프라인 단계)
+
+파일 인덱싱 후에는 인덱싱한 스레드만 백그라운드로 요약하므로, 이 기능 이전에 쌓인 문서나
+Slack 동기화/이벤트로 답글이 추가된 스레드는 이 스크립트(크론 등)로 반영합니다. 스레드
+메시지가 바뀌지 않은 요약은 건너뛰므로 반복 실행해도 새로 바뀐 스레드만 LLM 을 호출합니다.
+
+사용법:
+    python scripts/build_thread_summaries.py
+    python scripts/build_thread_summaries.py --collection slack_messages --force
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.collections import get_active_collection
+from app.core.database import get_collection
+from app.services.thread_summary import build_thread_summaries
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description='질문-답변 스레드 요약 생성')
+    parser.add_argument('--collection', help='대상 컬렉션 (기본: 현재 서비스 컬렉션)')
+    parser.add_argument('--force', action='store_true', help='바뀌지 않은 스레드도 다시 요약')
+    args = parser.parse_args()
+
+    name = args.collection or get_active_collection()["name"]
+    report = build_thread_summaries(get_collection(name), force=args.force, progress_callback=print)
+
+    print(f"✅ {name}: 스레드 {report['threads']}개 중 질문-답변 스레드 {report['qa_threads']}개")
+    print(f"   새 요약 {report['created']}개, 갱신 {report['updated']}개, "
+          f"변경 없음 {report['unchanged']}개, 제거 {report['removed']}개")
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,6 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.embedding import index_slack_data
 import argparse
 
 def main():
@@ -22,12 +21,17 @@ def main():
     
     print(f"파일 인덱싱 시작: {args.file_path}")
     
+    # 인자 확인 전에 chromadb/임베딩 모델을 로드하지 않도록 지연 import
+    from app.services.embedding import index_slack_data
+    
     def progress_callback(message):
         print(f"[진행] {message}")
     
     try:
-        chunk_count = index_slack_data(args.file_path, progress_callback)
-        print(f"\n✅ 인덱싱 완료! 총 {chunk_count}개 청크가 생성되었습니다.")
+        result = index_slack_data(args.file_path, progress_callback)
+        print(f"\n✅ 인덱싱 완료! 총 {result['indexed']}개 청크가 생성되었습니다.")
+        if result["failed"]:
+            print(f"⚠️ 임베딩 실패로 {result['failed']}개 청크를 저장하지 못했습니다 (첫 오류: {result['failed_items'][0]['error']})")
     except Exception as e:
         print(f"\n❌ 인덱싱 실패: {str(e)}")
         sys.exit(1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+sentence-transformers 모델 ONNX 내보내기 / int8 양자화 / 수치 검증 스크립트
+
+LOCAL_EMBEDDING_BACKEND=onnx 가 사용할 디렉토리를 만듭니다. 내보내기에는 torch 와
+sentence-transformers 가 필요하지만, 서버는 onnxruntime 과 tokenizers 만으로 추론합니다.
+
+사용법:
+    python scripts/export_onnx.py
+    python scripts/export_onnx.py --model sentence-transformers/all-MiniLM-L6-v2 --output ./models/all-MiniLM-L6-v2
+    python scripts/export_onnx.py --validate-only
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.onnx_embedding import CONFIG_FILE, OnnxEmbedder, default_model_dir
+import argparse
+import glob
+import json
+import numpy as np
+
+def export(model_name: str, output_dir: str, opset: int = 14):
+    """트랜스포머 본체를 ONNX로 내보내고 토크나이저/풀링 설정 저장"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    pooling = next((module for module in model if isinstance(module, Pooling)), None)
+
+    os.makedirs(output_dir, exist_ok=True)
+    dummy = model.tokenizer(["ONNX export 샘플 문장"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            os.path.join(output_dir, "model.onnx"),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    model.tokenizer.save_pretrained(output_dir)
+    config = {
+        "model": model_name,
+        "pooling": "cls" if pooling is not None and pooling.pooling_mode_cls_token else "mean",
+        "normalize": any(isinstance(module, Normalize) for module in model),
+        "max_seq_length": model.max_seq_length,
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    print(f"✅ ONNX 모델 저장: {output_dir}/model.onnx ({config})")
+
+def quantize(output_dir: str):
+    """가중치 int8 동적 양자화 (model_int8.onnx)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(output_dir, "model.onnx"),
+        os.path.join(output_dir, "model_int8.onnx"),
+        weight_type=QuantType.QInt8,
+    )
+    print(f"✅ int8 양자화 모델 저장: {output_dir}/model_int8.onnx")
+
+def sample_texts(limit: int = 256) -> list:
+    """검증용 문장 (샘플 슬랙 데이터 + 길이가 다른 고정 문장)"""
+    from app.services.slack_data import parse_slack_export
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    texts = []
+    for path in sorted(glob.glob(os.path.join(root, "data", "sample_slack_data*.json"))):
+        texts.extend(message.text for message in parse_slack_export(path))
+    texts.extend(["배포", "로그인 API가 간헐적으로 500 에러를 반환합니다. 어디부터 확인해야 할까요? " * 20])
+    return texts[:limit]
+
+def validate(model_name: str, output_dir: str, model_file: str, min_cosine: float) -> bool:
+    """PyTorch 출력과 ONNX 출력 비교 (행별 코사인 유사도 / 최대 절대 오차)"""
+    from sentence_transformers import SentenceTransformer
+
+    texts = sample_texts()
+    reference = SentenceTransformer(model_name, device="cpu").encode(texts, convert_to_numpy=True)
+    candidate = OnnxEmbedder(output_dir, model_file).encode(texts, settings.local_embedding_batch_size)
+
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    max_abs = float(np.abs(reference - candidate).max())
+    passed = bool(cosine.min() >= min_cosine)
+    print(f"{'✅' if passed else '❌'} {model_file}: {len(texts)}개 문장, 코사인 최소 {cosine.min():.6f} / "
+          f"평균 {cosine.mean():.6f}, 최대 절대 오차 {max_abs:.2e} (기준 {min_cosine})")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description='임베딩 모델 ONNX 내보내기 및 검증')
+    parser.add_argument('--model', default=settings.embedding_model, help='sentence-transformers 모델')
+    parser.add_argument('--output', help='출력 디렉토리 (기본: ONNX_MODEL_DIR 또는 ./models/{모델 이름})')
+    parser.add_argument('--opset', type=int, default=14, help='ONNX opset 버전')
+    parser.add_argument('--no-quantize', action='store_true', help='int8 양자화 생략')
+    parser.add_argument('--validate-only', action='store_true', help='내보내기 없이 기존 파일 검증만')
+    parser.add_argument('--min-cosine', type=float, default=0.9999, help='fp32 모델 최소 코사인 유사도')
+    parser.add_argument('--min-cosine-int8', type=float, default=0.98, help='int8 모델 최소 코사인 유사도')
+    args = parser.parse_args()
+
+    output_dir = args.output or settings.onnx_model_dir or default_model_dir(args.model)
+    if not args.validate_only:
+        export(args.model, output_dir, args.opset)
+        if not args.no_quantize:
+            quantize(output_dir)
+
+    passed = validate(args.model, output_dir, "model.onnx", args.min_cosine)
+    if os.path.exists(os.path.join(output_dir, "model_int8.onnx")):
+        passed = validate(args.model, output_dir, "model_int8.onnx", args.min_cosine_int8) and passed
+    if not passed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+기존 단일 컬렉션을 파티션 컬렉션으로 옮기는 스크립트
+
+`PARTITION_BY` 를 켜면 서비스 컬렉션 이름 아래의 `__p{파티션}` 하위 컬렉션만 읽으므로, 그 전에
+쌓인 문서는 이 스크립트로 한 번 옮겨야 검색됩니다. 저장된 임베딩을 그대로 복사하므로 재임베딩이
+없고, 같은 문서 ID 로 upsert 하므로 중간에 끊겨도 다시 실행하면 됩니다. 기간 필터용 `ts_epoch`
+메타데이터가 없는 문서는 timestamp 로 채워 넣습니다.
+
+사용법:
+    PARTITION_BY=month python scripts/partition_collection.py
+    PARTITION_BY=channel python scripts/partition_collection.py --collection slack_messages --drop-source
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.collections import get_active_collection
+from app.core.config import settings
+from app.core.database import get_collection, get_vector_store, open_collection
+import argparse
+
+def migrate(name: str, batch_size: int) -> int:
+    source = open_collection(name)
+    target = get_collection(name)
+    total, offset = source.count(), 0
+    print(f"📦 {name}: {total}개 문서를 '{settings.partition_by}' 파티션으로 복사합니다.")
+
+    while True:
+        page = source.get(limit=batch_size, offset=offset, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+        metadatas = []
+        for metadata in page["metadatas"]:
+            metadata = dict(metadata or {})
+            if "ts_epoch" not in metadata:
+                try:
+                    metadata["ts_epoch"] = float(metadata.get("timestamp"))
+                except (TypeError, ValueError):
+                    pass
+            metadatas.append(metadata)
+        target.upsert(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"], metadatas=metadatas)
+        offset += len(page["ids"])
+        print(f"  {offset}/{total}")
+
+    print(f"✅ 완료: {', '.join(target.partitions()) or '(파티션 없음)'}")
+    return offset
+
+def main():
+    parser = argparse.ArgumentParser(description='단일 컬렉션을 파티션 컬렉션으로 복사')
+    parser.add_argument('--collection', help='대상 컬렉션 (기본: 현재 서비스 컬렉션)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='한 번에 읽고 쓸 문서 수')
+    parser.add_argument('--drop-source', action='store_true', help='복사 후 원본 단일 컬렉션 삭제')
+    args = parser.parse_args()
+
+    if settings.partition_by == "none":
+        parser.error("PARTITION_BY 를 month 또는 channel 로 설정한 뒤 실행하세요.")
+
+    name = args.collection or get_active_collection()["name"]
+    copied = migrate(name, args.batch_size)
+
+    if args.drop_source and copied:
+        get_vector_store().delete_collection(name)
+        print(f"🗑️ 원본 컬렉션 {name} 삭제")
+
+if __name__ == "__main__":
+    main()
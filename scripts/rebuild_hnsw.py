@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+기존 컬렉션의 HNSW 그래프를 현재 HNSW_* 설정으로 다시 만드는 스크립트
+
+ChromaDB 는 M / construction_ef / search_ef 를 컬렉션 생성 시점에 고정하므로, 설정을 바꾼 뒤
+이 스크립트로 저장된 임베딩을 새 파라미터의 임시 컬렉션에 복사하고 원래 이름으로 바꿔 넣습니다
+(재임베딩 없음). hnswlib 저장소는 원본 벡터 파일로 그래프만 다시 만듭니다. quantized 저장소는
+HNSW 를 쓰지 않으므로 대상이 아닙니다. `PARTITION_BY` 사용 중이면 모든 파티션을 다시 만들며, 실행 중인
+서버는 열어 둔 파티션 핸들을 캐시하므로 완료 후 재시작하세요.
+
+사용법:
+    HNSW_M=32 HNSW_SEARCH_EF=64 python scripts/rebuild_hnsw.py
+    python scripts/rebuild_hnsw.py --collection slack_messages --batch-size 2000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.collections import get_active_collection
+from app.core.config import settings
+from app.core.database import get_chroma_client, get_collection, get_vector_store, list_collection_names, open_collection
+from app.core.partitions import partition_collection_name
+import argparse
+
+def rebuild_chroma(name: str, batch_size: int) -> int:
+    client = get_chroma_client()
+    source = client.get_collection(name)
+    temp_name = f"{name[:55]}__rebuild"
+    if temp_name in list_collection_names():
+        client.delete_collection(temp_name)
+    target = client.create_collection(name=temp_name, metadata={**(source.metadata or {}),
+                                                                **get_vector_store().hnsw_metadata()})
+    total, offset = source.count(), 0
+    print(f"📦 {name}: {total}개 문서를 새 HNSW 파라미터로 복사합니다. {target.metadata}")
+
+    while True:
+        page = source.get(limit=batch_size, offset=offset, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+        target.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"],
+                   metadatas=page["metadatas"])
+        offset += len(page["ids"])
+        print(f"  {offset}/{total}")
+
+    # 원본 삭제 → 임시 컬렉션 이름 변경 사이의 짧은 구간에는 검색이 빈 결과를 반환
+    client.delete_collection(name)
+    target.modify(name=name)
+    return offset
+
+def main():
+    parser = argparse.ArgumentParser(description='HNSW 그래프를 현재 설정으로 다시 만들기')
+    parser.add_argument('--collection', help='대상 컬렉션 (기본: 현재 서비스 컬렉션)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='한 번에 읽고 쓸 문서 수 (chroma)')
+    args = parser.parse_args()
+
+    name = args.collection or get_active_collection()["name"]
+    if settings.partition_by != "none":
+        names = [partition_collection_name(name, suffix) for suffix in get_collection(name).partitions()]
+    else:
+        names = [name]
+
+    for target in names:
+        if settings.vector_store == "chroma":
+            rebuild_chroma(target, args.batch_size)
+        elif settings.vector_store == "hnswlib":
+            collection = open_collection(target)
+            collection.rebuild_index(settings.hnsw_m, settings.hnsw_construction_ef)
+            print(f"📦 {target}: {collection.count()}개 문서로 그래프를 다시 만들었습니다. {collection.metadata}")
+        else:
+            parser.error(f"VECTOR_STORE={settings.vector_store} 는 HNSW 그래프를 쓰지 않습니다.")
+    print(f"✅ 완료: {', '.join(names)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+인덱스 집계 통계(/api/v1/stats 카운터)를 저장소 메타데이터로 다시 세는 스크립트
+
+카운터는 저장/삭제 시점에 갱신되므로, 통계 기능 도입 이전에 쌓인 문서가 있거나
+`/api/v1/stats?verify=true` 의 consistent 가 false 이면 한 번 실행합니다. 메타데이터만
+페이지 단위로 읽으므로 임베딩/벡터는 메모리에 올리지 않습니다.
+
+사용법:
+    python scripts/rebuild_stats.py
+    python scripts/rebuild_stats.py --collection slack_messages --page-size 5000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.collections import get_active_collection
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.index_stats import get_index_stats
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description='인덱스 집계 통계 다시 세기')
+    parser.add_argument('--collection', help='대상 컬렉션 (기본: 현재 서비스 컬렉션)')
+    parser.add_argument('--page-size', type=int, default=1000, help='한 번에 읽을 문서 수')
+    args = parser.parse_args()
+
+    name = args.collection or get_active_collection()["name"]
+    # 래퍼 없이 읽기만 하므로 카운터를 끈 상태로 열어도 됨
+    settings.index_stats_enabled = False
+    stats = get_index_stats()
+    counted = stats.rebuild(name, get_collection(name), args.page_size)
+
+    summary = stats.summary(name, top=5, days=7)
+    print(f"✅ {name}: 문서 {summary['documents']}개 / 메시지 {summary['messages']}개 ({counted}개 읽음)")
+    print(f"   채널 {summary['channels_total']}개, 사용자 {summary['users_total']}명, "
+          f"소스 {summary['sources_total']}개, 일자 {summary['days_total']}일")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Slack 이벤트 재생 스크립트
+Slack Events API 페이로드를 서명해서 /api/v1/slack/events 로 보내고,
+이벤트가 검색 가능해질 때까지의 처리 과정을 로컬에서 확인할 때 사용
+
+예시:
+    # 샘플 export 메시지를 message 이벤트로 바꿔 앱 프로세스 안에서 재생 (서버 불필요)
+    python scripts/replay_slack_events.py --in-process
+
+    # 실행 중인 서버로 재생, 일부는 수정/삭제 이벤트로 변형
+    python scripts/replay_slack_events.py --url http://localhost:8000/api/v1/slack/events \\
+        --from-export data/sample_slack_data2.json --edit-ratio 0.2 --delete-ratio 0.1
+
+    # 저장해 둔 이벤트 페이로드(JSON 배열 또는 한 줄에 하나씩) 재생
+    python scripts/replay_slack_events.py --events captured_events.ndjson --in-process
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import time
+
+DEFAULT_URL = "http://localhost:8000/api/v1/slack/events"
+DEFAULT_EXPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "data", "sample_slack_data.json")
+
+def load_events(path):
+    """JSON 배열 또는 NDJSON 파일에서 이벤트 페이로드 읽기"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    if content.startswith('['):
+        items = json.loads(content)
+    else:
+        items = [json.loads(line) for line in content.splitlines() if line.strip()]
+    # event_callback 래퍼 없이 event 만 저장된 경우 감싸기
+    return [item if "event" in item else wrap_event(item, i) for i, item in enumerate(items)]
+
+def wrap_event(event, index):
+    return {
+        "type": "event_callback",
+        "team_id": "TREPLAY",
+        "event_id": f"EvReplay{index:08d}",
+        "event_time": int(float(event.get("event_ts") or event.get("ts") or time.time())),
+        "event": event,
+    }
+
+def events_from_export(path, edit_ratio, delete_ratio, seed):
+    """Slack export 메시지를 message 이벤트로 변환하고 일부를 수정/삭제 이벤트로 추가"""
+    rng = random.Random(seed)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        channel_messages = {}
+        for msg in data:
+            channel_messages.setdefault(msg.get("channel", "general"), []).append(msg)
+    else:
+        channel_messages = data
+
+    events = []
+    now = time.time()
+    for channel, messages in channel_messages.items():
+        channel_id = f"C{hashlib.md5(channel.encode()).hexdigest()[:8].upper()}"
+        for msg in messages:
+            if not msg.get("text"):
+                continue
+            base = {"type": "message", "channel": channel_id, "user": msg.get("user"),
+                    "text": msg["text"], "ts": msg["ts"], "event_ts": str(now)}
+            if msg.get("thread_ts"):
+                base["thread_ts"] = msg["thread_ts"]
+            events.append(base)
+
+            roll = rng.random()
+            if roll < delete_ratio:
+                events.append({"type": "message", "subtype": "message_deleted", "channel": channel_id,
+                               "deleted_ts": msg["ts"], "event_ts": str(now)})
+            elif roll < delete_ratio + edit_ratio:
+                edited = {**base, "text": msg["text"] + " (수정됨)",
+                          "edited": {"user": msg.get("user"), "ts": str(now)}}
+                edited.pop("event_ts")
+                events.append({"type": "message", "subtype": "message_changed", "channel": channel_id,
+                               "message": edited, "event_ts": str(now)})
+    return [wrap_event(event, i) for i, event in enumerate(events)]
+
+def sign(body, secret, timestamp):
+    """Slack 요청 서명 (v0=HMAC-SHA256)"""
+    basestring = f"v0:{timestamp}:{body.decode('utf-8')}".encode('utf-8')
+    digest = hmac.new(secret.encode('utf-8'), basestring, hashlib.sha256).hexdigest()
+    return f"v0={digest}"
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description='Slack 이벤트 재생')
+    parser.add_argument('--events', help='이벤트 페이로드 파일 (JSON 배열 또는 NDJSON)')
+    parser.add_argument('--from-export', default=DEFAULT_EXPORT, help='message 이벤트로 변환할 Slack export 파일')
+    parser.add_argument('--edit-ratio', type=float, default=0.0, help='message_changed 이벤트를 추가할 비율')
+    parser.add_argument('--delete-ratio', type=float, default=0.0, help='message_deleted 이벤트를 추가할 비율')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--url', default=DEFAULT_URL, help='이벤트 수신 URL')
+    parser.add_argument('--in-process', action='store_true', help='서버 없이 앱을 직접 불러와 재생')
+    parser.add_argument('--signing-secret', default=None, help='서명 키 (기본: SLACK_SIGNING_SECRET)')
+    parser.add_argument('--rate', type=float, default=0, help='초당 전송 이벤트 수 (0이면 제한 없음)')
+    args = parser.parse_args()
+
+    if args.events:
+        payloads = load_events(args.events)
+    else:
+        payloads = events_from_export(args.from_export, args.edit_ratio, args.delete_ratio, args.seed)
+
+    if args.in_process:
+        # 앱 설정을 불러오기 전에 서명 키를 지정해야 /slack/events 가 활성화됨
+        secret = args.signing_secret or os.getenv("SLACK_SIGNING_SECRET") or "replay-signing-secret"
+        os.environ["SLACK_SIGNING_SECRET"] = secret
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.core.config import settings
+        settings.slack_signing_secret = secret
+        client = TestClient(app)
+        post = lambda body, headers: client.post("/api/v1/slack/events", content=body, headers=headers)
+    else:
+        import requests
+        secret = args.signing_secret or os.getenv("SLACK_SIGNING_SECRET")
+        if not secret:
+            print("SLACK_SIGNING_SECRET 또는 --signing-secret 이 필요합니다.")
+            sys.exit(1)
+        post = lambda body, headers: requests.post(args.url, data=body, headers=headers, timeout=10)
+
+    print(f"이벤트 {len(payloads)}개 재생 시작")
+    latencies, actions = [], {}
+    started = time.perf_counter()
+    for payload in payloads:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            "X-Slack-Request-Timestamp": timestamp,
+            "X-Slack-Signature": sign(body, secret, timestamp),
+        }
+        sent = time.perf_counter()
+        response = post(body, headers)
+        latencies.append((time.perf_counter() - sent) * 1000)
+        if response.status_code != 200:
+            print(f"❌ {payload.get('event_id')}: HTTP {response.status_code} {response.text}")
+            continue
+        action = response.json().get("action", "unknown")
+        actions[action] = actions.get(action, 0) + 1
+        if args.rate:
+            time.sleep(1 / args.rate)
+
+    elapsed = time.perf_counter() - started
+    print(f"전송 완료: {len(payloads)}개 / {elapsed:.2f}초 ({len(payloads) / max(elapsed, 1e-9):.1f} events/s)")
+    print(f"응답 지연: p50 {percentile(latencies, 50):.1f}ms, p95 {percentile(latencies, 95):.1f}ms")
+    print(f"처리 방식: {actions}")
+
+    if args.in_process:
+        # 워커를 멈추면 큐에 남은 이벤트를 모두 반영한 뒤 종료됨
+        from app.services.slack_events import event_queue
+        drain_started = time.perf_counter()
+        event_queue.is_running = False
+        if event_queue.worker_thread:
+            event_queue.worker_thread.join()
+        print(f"인덱싱 반영 대기: {time.perf_counter() - drain_started:.2f}초")
+        print(f"인덱서 상태: {json.dumps(event_queue.get_status(), ensure_ascii=False)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+인덱스 스냅샷 내보내기/가져오기 스크립트
+
+문서/메타데이터(NDJSON)와 임베딩(float32 원시 배열)을 페이지 단위로 흘려 쓰고 읽으므로
+컬렉션 크기와 관계없이 메모리 사용량이 일정하고, 가져오기는 임베딩을 다시 계산하지 않습니다.
+환경 복제(운영 → 스테이징)나 장애 복구에 사용합니다. 형식은 app/services/snapshot.py 참고.
+
+사용법:
+    python scripts/snapshot.py export ./snapshots/20250820
+    python scripts/snapshot.py export ./snapshots/20250820 --collection slack_messages --page-size 2000
+    python scripts/snapshot.py import ./snapshots/20250820 --activate
+    python scripts/snapshot.py verify ./snapshots/20250820
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.snapshot import SnapshotError, export_snapshot, import_snapshot, verify_snapshot
+import argparse
+import time
+
+def progress(message: str):
+    print(f"  {message}")
+
+def main():
+    parser = argparse.ArgumentParser(description='인덱스 스냅샷 내보내기/가져오기')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='컬렉션을 스냅샷 디렉토리로 내보내기')
+    export_parser.add_argument('path', help='스냅샷 디렉토리')
+    export_parser.add_argument('--collection', help='대상 컬렉션 (기본: 현재 서비스 컬렉션)')
+    export_parser.add_argument('--page-size', type=int, default=1000, help='한 번에 읽을 문서 수')
+
+    import_parser = subparsers.add_parser('import', help='스냅샷을 컬렉션으로 복원')
+    import_parser.add_argument('path', help='스냅샷 디렉토리')
+    import_parser.add_argument('--collection', help='복원할 컬렉션 (기본: 스냅샷을 만든 컬렉션 이름)')
+    import_parser.add_argument('--batch-size', type=int, default=1000, help='한 번에 upsert 할 문서 수')
+    import_parser.add_argument('--activate', action='store_true', help='복원 후 서비스 컬렉션으로 전환')
+    import_parser.add_argument('--no-verify', action='store_true', help='가져오기 전 체크섬 확인 생략')
+
+    verify_parser = subparsers.add_parser('verify', help='스냅샷 파일 체크섬 확인')
+    verify_parser.add_argument('path', help='스냅샷 디렉토리')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == 'export':
+            manifest = export_snapshot(args.path, args.collection, args.page_size, progress_callback=progress)
+            print(f"✅ {manifest['collection']}: {manifest['count']}개 (dim={manifest['dim']}) → {args.path}")
+        elif args.command == 'import':
+            result = import_snapshot(args.path, args.collection, args.batch_size, activate=args.activate,
+                                     verify=not args.no_verify, progress_callback=progress)
+            activated = " (서비스 컬렉션으로 전환)" if result["activated"] else ""
+            print(f"✅ {args.path} → {result['collection']}: {result['restored']}개 복원{activated}")
+        else:
+            manifest = verify_snapshot(args.path)
+            print(f"✅ {manifest['collection']}: {manifest['count']}개, 체크섬 일치")
+    except SnapshotError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"⏱️ {time.perf_counter() - start:.1f}초")
+
+if __name__ == "__main__":
+    main()
@@ -71,6 +71,8 @@ with st.sidebar:
                 result = upload_slack_data(uploaded_file)
                 if result:
                     st.success(f"✅ 인덱싱 완료! {result['chunk_count']}개 청크 생성됨")
+                    if result.get("failed"):
+                        st.warning(f"⚠️ 임베딩 실패로 {result['failed']}개 청크를 저장하지 못했습니다")
                     st.balloons()
     
     st.divider()
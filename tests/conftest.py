@@ -0,0 +1,28 @@
+"""테스트 공통 픽스처 - 임시 CHROMA_PERSIST_DIRECTORY 와 해시 임베딩으로 오프라인 실행"""
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+@pytest.fixture(autouse=True)
+def offline_settings(tmp_path, monkeypatch):
+    """테스트마다 빈 저장소 디렉토리 (레지스트리/상태 DB/유사 메시지 인덱스 모두 경로 기준으로 분리됨)"""
+    overrides = {
+        "chroma_persist_directory": str(tmp_path / "chroma"),
+        "chroma_collection_name": "test_messages",
+        "local_embedding_backend": "hash",
+        "vector_store": "chroma",
+        "partition_by": "none",
+        "state_db_path": None,
+        "api_provider": "claude",
+        "openai_api_key": None,
+        "claude_api_key": None,
+        # 백그라운드 요약 스레드가 테스트 디렉토리를 정리한 뒤에 쓰지 않도록
+        "thread_summary_enabled": False,
+    }
+    for key, value in overrides.items():
+        monkeypatch.setattr(settings, key, value)
+    return settings
@@ -0,0 +1,86 @@
+import pytest
+from app.core.database import get_collection
+from app.models.message import SlackMessage
+from app.services import llm_service
+from app.services.dedup import get_dedup_index
+from app.services.ingest_pipeline import run_pipeline
+from app.services.slack_realtime import apply_message_changes, slack_message_id
+
+ALERT = "[alert] api-server 배포 실패: health check timeout after 30s on prod-kr-1 (build #1234)"
+NEAR_DUPLICATE = "[alert] api-server 배포 실패: health check timeout after 30s on prod-kr-1 (build #12345)"
+
+@pytest.fixture
+def failing_embeddings(offline_settings, monkeypatch):
+    """failing 에 든 텍스트는 임베딩 실패 (일시적 오류가 아니라 재시도 없이 해당 텍스트만 실패)"""
+    monkeypatch.setattr(offline_settings, "dedup_enabled", True)
+    failing = set()
+    embed_once = llm_service._embed_once
+
+    def embed(texts, spec):
+        if failing.intersection(texts):
+            raise ValueError("embedding rejected")
+        return embed_once(texts, spec)
+
+    monkeypatch.setattr(llm_service, "_embed_once", embed)
+    return failing
+
+def _messages(*texts):
+    return [SlackMessage(user="alice", text=text, ts=f"1700000{i:03d}.000100", channel="alerts")
+            for i, text in enumerate(texts)]
+
+def test_sync_does_not_fold_into_failed_canonical(failing_embeddings):
+    collection = get_collection()
+    canonical, duplicate = _messages(ALERT, NEAR_DUPLICATE)
+    failing_embeddings.add(f"alice: {ALERT}")
+
+    result = apply_message_changes(collection, ["C1", "C1"], [canonical, duplicate], {"source": "slack_api"})
+    assert result["failed"] == 2
+    assert result["duplicates"] == 0
+    assert collection.count() == 0
+    assert get_dedup_index().get_members(collection.name, [slack_message_id("C1", duplicate.ts)]) == {}
+
+    # 대표 메시지가 다음 동기화 전에 Slack 에서 삭제되어도 남은 메시지는 새 메시지로 저장됨
+    failing_embeddings.clear()
+    result = apply_message_changes(collection, ["C1"], [duplicate], {"source": "slack_api"})
+    assert result["added"] == 1
+    assert result["embedded"] == 1
+    assert collection.get(include=[])["ids"] == [slack_message_id("C1", duplicate.ts)]
+
+def test_pipeline_reports_chunks_folded_into_failed_canonical(failing_embeddings):
+    collection = get_collection()
+    chunks = [{"text": text, "metadata": {"channel": "alerts", "timestamp": f"1700000{i:03d}.000100"}}
+              for i, text in enumerate([ALERT, NEAR_DUPLICATE, "다른 주제의 충분히 긴 메시지입니다. 오늘 점심 메뉴 추천 받아요"])]
+    failing_embeddings.add(ALERT)
+
+    report = run_pipeline(chunks, collection, lambda offset, length: [f"file:{offset + i}" for i in range(length)])
+    assert sorted(item["offset"] for item in report["failed_items"]) == [0, 1]
+    assert report["duplicates"] == 0
+    assert collection.get(include=[])["ids"] == ["file:2"]
+    assert get_dedup_index().stats(collection.name) == {"canonical": 1, "duplicates": 0}
+
+    # 다시 인덱싱하면 대표/중복 관계가 정상적으로 만들어짐
+    failing_embeddings.clear()
+    report = run_pipeline(chunks, collection, lambda offset, length: [f"file:{offset + i}" for i in range(length)])
+    assert report["failed"] == 0
+    assert report["duplicates"] == 1
+    assert sorted(collection.get(include=[])["ids"]) == ["file:0", "file:2"]
+
+def test_pipeline_store_failure_releases_canonicals(offline_settings, monkeypatch):
+    monkeypatch.setattr(offline_settings, "dedup_enabled", True)
+    collection = get_collection()
+    chunks = [{"text": text, "metadata": {"channel": "alerts", "timestamp": f"1700000{i:03d}.000100"}}
+              for i, text in enumerate([ALERT, NEAR_DUPLICATE])]
+    make_ids = lambda offset, length: [f"file:{offset + i}" for i in range(length)]
+
+    def fail_upsert(**kwargs):
+        raise OSError("저장소 쓰기 실패")
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        patch.setattr(collection, "upsert", fail_upsert)
+        run_pipeline(chunks, collection, make_ids)
+    # 저장하지 못한 대표 서명이 남아 있으면 다음 실행에서 전부 중복으로 접혀 저장되지 않음
+    assert get_dedup_index().stats(collection.name) == {"canonical": 0, "duplicates": 0}
+
+    report = run_pipeline(chunks, collection, make_ids)
+    assert report["duplicates"] == 1
+    assert collection.get(include=[])["ids"] == ["file:0"]
@@ -0,0 +1,52 @@
+import json
+import pytest
+from app.core.database import get_collection
+from app.services import embedding
+from app.services.dedup import get_dedup_index
+from app.services.embedding import index_slack_data
+
+def test_reindexing_same_file_in_append_mode_upserts(offline_settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(offline_settings, "dedup_enabled", False)
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps({"dev": [
+        {"user": "alice", "text": f"배포 체크리스트 {i}번 항목 확인했습니다", "ts": f"1700000{i:03d}.000100"}
+        for i in range(12)
+    ]}, ensure_ascii=False), encoding="utf-8")
+
+    index_slack_data(str(path), clear_existing=True)
+    ids = set(get_collection().get(include=[])["ids"])
+    assert len(ids) == 12
+
+    index_slack_data(str(path), clear_existing=False)
+    assert set(get_collection().get(include=[])["ids"]) == ids
+
+def _write_export(path, prefix, count):
+    path.write_text(json.dumps({"dev": [
+        {"user": "alice", "text": f"{prefix} 체크리스트 {i}번 항목 확인했습니다. 롤백 절차와 모니터링 대시보드도 점검 완료", "ts": f"1700000{i:03d}.000100"}
+        for i in range(count)
+    ]}, ensure_ascii=False), encoding="utf-8")
+
+def test_replace_mode_clears_collection_and_dedup_state(offline_settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(offline_settings, "dedup_enabled", True)
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    _write_export(first, "배포", 12)
+    _write_export(second, "장애 회고", 5)
+
+    index_slack_data(str(first), clear_existing=True)
+    collection = get_collection()
+    dedup_before = get_dedup_index().stats(collection.name)
+    assert collection.count() == dedup_before["canonical"] > 5
+
+    # 삭제가 실패하면 유사 메시지 인덱스는 그대로 두고 예외를 올림
+    def fail_clear(collection):
+        raise OSError("삭제 실패")
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        patch.setattr(embedding, "_clear_collection", fail_clear)
+        index_slack_data(str(second), clear_existing=True)
+    assert get_dedup_index().stats(collection.name) == dedup_before
+
+    result = index_slack_data(str(second), clear_existing=True)
+    assert result["indexed"] == 5
+    documents = get_collection().get(include=["documents"])["documents"]
+    assert len(documents) == 5 and all("장애 회고" in document for document in documents)
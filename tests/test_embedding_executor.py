@@ -0,0 +1,74 @@
+import json
+import numpy as np
+import pytest
+from app.services import embedding_executor, llm_service
+from app.services.embedding import index_slack_data
+from app.services.embedding_executor import run_batches
+
+class StatusError(Exception):
+    """HTTP 상태 코드를 가진 SDK 예외 흉내"""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        super().__init__(f"status {status_code}")
+
+def _embedder(fail=None):
+    """fail(batch) 가 예외를 돌려주면 그 예외를 올리는 가짜 embed_batch (호출 기록 포함)"""
+    calls = []
+
+    def embed(batch):
+        calls.append(list(batch))
+        error = fail(batch) if fail else None
+        if error is not None:
+            raise error
+        return np.array([[float(text.split("-")[1]), 1.0] for text in batch], dtype=np.float32)
+
+    return embed, calls
+
+TEXTS = [f"text-{i}" for i in range(8)]
+
+def test_auth_error_fails_fast_without_bisecting():
+    embed, calls = _embedder(lambda batch: StatusError(401))
+    with pytest.raises(StatusError):
+        run_batches(TEXTS, embed, batch_size=4)
+    assert len(calls) == 1
+
+def test_input_error_is_isolated_by_bisecting():
+    embed, calls = _embedder(lambda batch: StatusError(400) if "text-5" in batch else None)
+    result = run_batches(TEXTS, embed, batch_size=4)
+    assert [item["index"] for item in result["failed"]] == [5]
+    assert result["indices"] == [0, 1, 2, 3, 4, 6, 7]
+    assert result["embeddings"][:, 0].tolist() == [0, 1, 2, 3, 4, 6, 7]
+    # 실패한 배치만 나눠서 다시 보냄: 2배치 + [4,5]/[6,7] + [4]/[5]
+    assert len(calls) == 6
+
+def test_transient_error_is_retried(offline_settings, monkeypatch):
+    monkeypatch.setattr(offline_settings, "embedding_max_attempts", 3)
+    monkeypatch.setattr(embedding_executor.time, "sleep", lambda seconds: None)
+    failures = iter([StatusError(503), StatusError(429)])
+    embed, calls = _embedder(lambda batch: next(failures, None))
+
+    result = run_batches(TEXTS, embed, batch_size=8)
+    assert result["failed"] == [] and result["indices"] == list(range(8))
+    assert len(calls) == 3
+
+def test_index_reports_failed_chunks(offline_settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(offline_settings, "dedup_enabled", False)
+    embed_once = llm_service._embed_once
+
+    def embed(texts, spec):
+        if any("거절" in text for text in texts):
+            raise ValueError("embedding rejected")
+        return embed_once(texts, spec)
+
+    monkeypatch.setattr(llm_service, "_embed_once", embed)
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps({"dev": [
+        {"user": "alice", "text": f"{'거절될' if i == 3 else '배포'} 체크리스트 {i}번 항목 확인했습니다",
+         "ts": f"1700000{i:03d}.000100"}
+        for i in range(6)
+    ]}, ensure_ascii=False), encoding="utf-8")
+
+    result = index_slack_data(str(path), clear_existing=True)
+    assert result["failed"] == len(result["failed_items"]) > 0
+    assert result["indexed"] == result["total"] - result["failed"]
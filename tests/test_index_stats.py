@@ -0,0 +1,55 @@
+import numpy as np
+from app.core.database import get_collection, open_collection
+from app.core.index_stats import get_index_stats
+
+def _vectors(count: int) -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(count, 8)).astype(np.float32)
+
+def _by_key(summary, dimension):
+    return {row["key"]: (row["documents"], row["messages"]) for row in summary[dimension]}
+
+def test_counters_follow_writes(offline_settings):
+    collection = get_collection("stats")
+    stats = get_index_stats()
+    collection.upsert(ids=["a", "b", "c"], embeddings=_vectors(3), metadatas=[
+        {"channel": "dev", "user": "alice", "timestamp": "1700000000.000100", "message_count": 2},
+        {"channel": "dev", "users": "alice, bob", "timestamp": "1700000100.000100"},
+        {"channel": "ops", "user": "carol", "source": "slack_api", "timestamp": "1700000200.000100"},
+    ])
+    summary = stats.summary("stats")
+    assert (summary["documents"], summary["messages"]) == (3, 4)
+    assert _by_key(summary, "channels") == {"dev": (2, 3), "ops": (1, 1)}
+    assert _by_key(summary, "users") == {"alice": (2, 3), "bob": (1, 1), "carol": (1, 1)}
+    assert _by_key(summary, "sources") == {"file_upload": (2, 3), "slack_api": (1, 1)}
+
+    # 같은 id 를 다시 쓰면 이전 기여분을 빼고 더함 (이중 집계 없음)
+    collection.upsert(ids=["a"], embeddings=_vectors(1), metadatas=[{"channel": "ops", "user": "alice"}])
+    collection.add(ids=["c"], embeddings=_vectors(1), metadatas=[{"channel": "dev"}])
+    collection.update(ids=["missing"], metadatas=[{"channel": "dev"}])
+    summary = stats.summary("stats")
+    assert (summary["documents"], summary["messages"]) == (3, 3)
+    assert _by_key(summary, "channels") == {"dev": (1, 1), "ops": (2, 2)}
+
+    # 삭제하면 0 이 된 키는 사라짐
+    collection.delete(ids=["b"])
+    collection.delete(where={"channel": "ops"})
+    summary = stats.summary("stats")
+    assert summary["documents"] == 0
+    assert summary["channels"] == [] and summary["users"] == []
+
+def test_rebuild_matches_incremental_counters(offline_settings):
+    collection = get_collection("stats")
+    stats = get_index_stats()
+    metadatas = [{"channel": f"ch{i % 3}", "user": f"user{i % 4}", "timestamp": f"17000{i:05d}.000100"}
+                 for i in range(20)]
+    metadatas.append({"channel": "ch0", "doc_type": "thread_summary", "timestamp": "1700000000.000100"})
+    collection.upsert(ids=[f"doc-{i}" for i in range(21)], embeddings=_vectors(21), metadatas=metadatas)
+    collection.delete(ids=["doc-3", "doc-7"])
+    incremental = stats.summary("stats")
+    # 스레드 요약 문서는 문서 수에만 포함
+    assert (incremental["documents"], incremental["messages"]) == (19, 18)
+
+    assert stats.rebuild("stats", open_collection("stats"), page_size=4) == 19
+    rebuilt = stats.summary("stats")
+    for field in ("documents", "messages", "channels", "users", "sources", "days"):
+        assert rebuilt[field] == incremental[field]
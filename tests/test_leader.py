@@ -0,0 +1,94 @@
+import multiprocessing
+import threading
+import pytest
+from app.core.collections import load_registry, register_collection
+from app.core.database import EMBEDDED_CHROMA_LOCK_FILE, get_chroma_client
+from app.core.leader import SCHEDULER_LOCK_FILE, LeaderLease, read_holder_pid
+from app.services import scheduler as scheduler_module
+from app.services.reindex import REINDEX_LOCK_FILE, ReindexMigration
+from app.services.scheduler import SlackSyncScheduler
+
+_fork = multiprocessing.get_context("fork")
+
+def _hold_lease(filename, acquired, release):
+    lease = LeaderLease(filename)
+    if lease.try_acquire():
+        acquired.set()
+        release.wait(10)
+        lease.release()
+
+def _register_many(prefix: str, count: int):
+    for i in range(count):
+        register_collection(f"{prefix}-{i}", {"provider": "hash", "model": "hash-8", "dim": 8})
+
+@pytest.fixture
+def other_process():
+    """다른 워커 프로세스가 잠금 파일을 잡고 있는 상황"""
+    processes = []
+
+    def hold(filename: str):
+        acquired, release = _fork.Event(), _fork.Event()
+        process = _fork.Process(target=_hold_lease, args=(filename, acquired, release))
+        process.start()
+        assert acquired.wait(10)
+        processes.append((process, release))
+        return process, release
+
+    yield hold
+    for process, release in processes:
+        release.set()
+        process.join(10)
+
+def test_follower_takes_over_when_leader_exits(offline_settings, monkeypatch, other_process):
+    monkeypatch.setattr(offline_settings, "scheduler_leader_retry_seconds", 0.05)
+    lease = LeaderLease(SCHEDULER_LOCK_FILE)
+    monkeypatch.setattr(scheduler_module, "scheduler_lease", lease)
+    process, release = other_process(SCHEDULER_LOCK_FILE)
+
+    scheduler = SlackSyncScheduler()
+    scheduler.is_running = True
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(leader=scheduler._wait_for_leadership()))
+    waiter.start()
+    waiter.join(0.3)
+    assert waiter.is_alive() and scheduler.role == "follower"
+    assert read_holder_pid(SCHEDULER_LOCK_FILE) == process.pid
+
+    release.set()
+    waiter.join(10)
+    assert result["leader"] is True and scheduler.role == "leader"
+    lease.release()
+
+def test_embedded_chroma_refuses_second_process(offline_settings, other_process):
+    other_process(EMBEDDED_CHROMA_LOCK_FILE)
+    with pytest.raises(RuntimeError):
+        get_chroma_client()
+
+def test_registry_updates_from_processes_are_not_lost(offline_settings):
+    processes = [_fork.Process(target=_register_many, args=(f"worker{n}", 10)) for n in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    names = set(load_registry()["collections"])
+    assert names == {f"worker{n}-{i}" for n in range(4) for i in range(10)}
+
+def test_reindex_runs_in_one_worker_and_status_is_shared(offline_settings, monkeypatch, other_process):
+    process, release = other_process(REINDEX_LOCK_FILE)
+    running_elsewhere = ReindexMigration()
+    running_elsewhere.state = {"status": "copying", "pid": process.pid, "copied": 5}
+    running_elsewhere._publish()
+
+    migration = ReindexMigration()
+    monkeypatch.setattr(migration, "_run", lambda batch_size: pytest.fail("다른 워커가 실행 중인데 시작함"))
+    status = migration.start()
+    assert status["is_running"] is True
+    assert status["status"] == "copying" and status["pid"] == process.pid
+
+    # 실행하던 워커가 완료 전에 종료됨
+    release.set()
+    process.join(10)
+    status = migration.get_status()
+    assert status["is_running"] is False and status["status"] == "interrupted"
@@ -0,0 +1,16 @@
+from fastapi.testclient import TestClient
+from app.main import REQUEST_COUNT, UNMATCHED_ROUTE, app
+
+def test_unmatched_paths_share_one_label():
+    client = TestClient(app)
+    before = REQUEST_COUNT.value(method="GET", path=UNMATCHED_ROUTE, status=404)
+    for i in range(5):
+        assert client.get(f"/api/v1/nope/{i}").status_code == 404
+
+    assert REQUEST_COUNT.value(method="GET", path=UNMATCHED_ROUTE, status=404) == before + 5
+    assert "/api/v1/nope/0" not in client.get("/api/v1/metrics").text
+
+def test_matched_route_uses_template():
+    client = TestClient(app)
+    client.get("/")
+    assert REQUEST_COUNT.value(method="GET", path="/", status=200) >= 1
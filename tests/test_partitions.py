@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+from app.core.database import get_collection, list_collection_names, open_collection
+from app.core.partitions import PartitionedCollection, partition_key
+
+MONTHS = [datetime(2024, month, 10, tzinfo=timezone.utc).timestamp() for month in (1, 2, 3)]
+FEB_START = datetime(2024, 2, 1, tzinfo=timezone.utc).timestamp()
+MAR_START = datetime(2024, 3, 1, tzinfo=timezone.utc).timestamp()
+
+@pytest.fixture
+def partitioned(offline_settings, monkeypatch):
+    monkeypatch.setattr(offline_settings, "vector_store", "quantized")
+    monkeypatch.setattr(offline_settings, "partition_by", "month")
+    collection = get_collection("parts")
+    vectors = np.random.default_rng(0).normal(size=(12, 16)).astype(np.float32)
+    ids = [f"doc-{i}" for i in range(12)]
+    metadatas = [{"timestamp": str(MONTHS[i % 3] + i), "ts_epoch": MONTHS[i % 3] + i,
+                  "channel": "dev" if i % 2 else "ops"} for i in range(12)]
+    collection.upsert(ids=ids, embeddings=vectors, metadatas=metadatas, documents=[f"문서 {i}" for i in ids])
+    return collection, vectors, ids
+
+def test_month_partitions_route_writes_and_prune_queries(partitioned):
+    collection, vectors, ids = partitioned
+    router = PartitionedCollection("parts", open_collection, list_collection_names)
+    assert router.partitions() == ["m202401", "m202402", "m202403"]
+    assert router.count() == 12
+
+    assert router.select_partitions({"ts_epoch": {"$gte": FEB_START}}) == ["m202402", "m202403"]
+    feb_only = {"$and": [{"ts_epoch": {"$gte": FEB_START}}, {"ts_epoch": {"$lt": MAR_START}}]}
+    assert router.select_partitions(feb_only) == ["m202402"]
+
+    # 필터 없는 검색은 모든 파티션 결과를 거리순으로 합침
+    result = collection.query(vectors[3:4], n_results=3)
+    assert result["ids"][0][0] == "doc-3"
+    assert result["distances"][0] == sorted(result["distances"][0])
+    # 시간 필터가 있으면 겹치는 달만 검색
+    filtered = collection.query(vectors[3:4], n_results=12, where=feb_only)
+    assert sorted(filtered["ids"][0]) == sorted(ids[1::3])
+
+def test_partitioned_get_update_delete(partitioned):
+    collection, vectors, ids = partitioned
+    everything = collection.get(include=[])["ids"]
+    assert sorted(everything) == sorted(ids)
+    # limit/offset 은 파티션을 이어 붙인 전체 기준
+    assert collection.get(limit=5, offset=3, include=[])["ids"] == everything[3:8]
+
+    # 메타데이터 없이 수정/삭제하면 문서가 든 파티션을 찾아서 반영
+    collection.update(ids=["doc-4"], documents=["수정됨"])
+    assert collection.get(ids=["doc-4"])["documents"] == ["수정됨"]
+    collection.delete(ids=["doc-0", "doc-5"])
+    assert collection.count() == 10
+    assert collection.get(ids=["doc-0", "doc-5"], include=[])["ids"] == []
+
+def test_channel_partitions_select_group(offline_settings, monkeypatch):
+    monkeypatch.setattr(offline_settings, "vector_store", "quantized")
+    monkeypatch.setattr(offline_settings, "partition_by", "channel")
+    monkeypatch.setattr(offline_settings, "partition_channel_groups", 4)
+    collection = get_collection("parts")
+    channels = ["dev", "ops", "alerts", "random", "general"]
+    vectors = np.random.default_rng(1).normal(size=(len(channels), 16)).astype(np.float32)
+    collection.upsert(ids=channels, embeddings=vectors, metadatas=[{"channel": channel} for channel in channels])
+
+    router = PartitionedCollection("parts", open_collection, list_collection_names)
+    assert router.select_partitions({"channel": "dev"}) == [partition_key({"channel": "dev"})]
+    result = collection.query(vectors[0:1], n_results=5, where={"channel": {"$in": ["dev", "ops"]}})
+    assert set(result["ids"][0]) == {"dev", "ops"}
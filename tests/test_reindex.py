@@ -0,0 +1,111 @@
+from app.core.collections import get_active_collection, load_registry
+from app.core.database import get_collection
+from app.services import reindex
+from app.services.llm_service import get_embeddings
+from app.services.reindex import ReindexMigration
+
+def _store(collection, spec, ids):
+    documents = [f"메시지 {doc_id}" for doc_id in ids]
+    collection.upsert(ids=ids, embeddings=get_embeddings(documents, spec=spec), documents=documents,
+                      metadatas=[{"channel": "dev", "source": "test"} for _ in ids])
+
+def test_writes_after_switch_are_kept(offline_settings, monkeypatch):
+    source_info = get_active_collection()
+    source = get_collection(source_info["name"])
+    _store(source, source_info["spec"], [f"old-{i}" for i in range(20)])
+
+    # 새 임베딩 모델(차원)로 재인덱싱
+    monkeypatch.setattr(offline_settings, "hash_embedding_dim", 64)
+    activate = reindex.activate_collection
+
+    def activate_then_write(name):
+        registry = activate(name)
+        # 전환 직후 들어온 쓰기는 새 서비스 컬렉션에만 저장됨
+        active = get_active_collection()
+        _store(get_collection(active["name"]), active["spec"], ["after-switch"])
+        # 전환 직전 이전 컬렉션에 기록된 쓰기
+        _store(source, source_info["spec"], ["before-switch"])
+        return registry
+
+    monkeypatch.setattr(reindex, "activate_collection", activate_then_write)
+    migration = ReindexMigration()
+    migration.is_running = True
+    migration._run(batch_size=7)
+
+    assert migration.state["status"] == "completed", migration.state
+    target_name = load_registry()["active"]
+    assert target_name != source_info["name"]
+    target_ids = set(get_collection(target_name).get(include=[])["ids"])
+    assert "after-switch" in target_ids
+    assert "before-switch" in target_ids
+    assert {f"old-{i}" for i in range(20)} <= target_ids
+
+def test_catch_up_before_switch_removes_deleted(offline_settings, monkeypatch):
+    source_info = get_active_collection()
+    source = get_collection(source_info["name"])
+    _store(source, source_info["spec"], ["keep", "gone"])
+
+    monkeypatch.setattr(offline_settings, "hash_embedding_dim", 64)
+    migration = ReindexMigration()
+    target_name = None
+    sync_pass = migration._sync_pass
+
+    def delete_during_copy(src, target, spec, batch_size, *args, **kwargs):
+        nonlocal target_name
+        result = sync_pass(src, target, spec, batch_size, *args, **kwargs)
+        if target_name is None:
+            # 첫 복사가 끝난 뒤 원본에서 삭제됨
+            target_name = target.name
+            source.delete(ids=["gone"])
+        return result
+
+    monkeypatch.setattr(migration, "_sync_pass", delete_during_copy)
+    migration._run(batch_size=10)
+
+    assert migration.state["status"] == "completed", migration.state
+    assert set(get_collection(target_name).get(include=[])["ids"]) == {"keep"}
+
+def test_edits_and_late_deletes_propagate(offline_settings, monkeypatch):
+    source_info = get_active_collection()
+    source = get_collection(source_info["name"])
+    _store(source, source_info["spec"], ["edited", "recounted", "late-delete", "late-edit", "untouched"])
+
+    monkeypatch.setattr(offline_settings, "hash_embedding_dim", 64)
+    migration = ReindexMigration()
+    sync_pass = migration._sync_pass
+    passes = 0
+
+    def edit_after_first_pass(src, target, spec, batch_size, *args):
+        nonlocal passes
+        result = sync_pass(src, target, spec, batch_size, *args)
+        passes += 1
+        if passes == 1:
+            # 복사 후 Slack 수정(문서 변경)과 유사 메시지 접기(메타데이터만 변경)
+            source.update(ids=["edited"], embeddings=get_embeddings(["수정된 메시지"], spec=source_info["spec"]),
+                          documents=["수정된 메시지"], metadatas=[{"channel": "dev", "source": "test"}])
+            source.update(ids=["recounted"], metadatas=[{"channel": "dev", "source": "test", "duplicate_count": 3}])
+        return result
+
+    activate = reindex.activate_collection
+
+    def activate_after_late_writes(name):
+        # 마지막 따라잡기 패스 이후, 전환 직전에 원본에서 삭제
+        source.delete(ids=["late-delete"])
+        registry = activate(name)
+        # 전환 후 새 컬렉션에 직접 들어온 수정은 원본 내용으로 덮어쓰지 않아야 함
+        active = get_active_collection()
+        get_collection(active["name"]).update(ids=["late-edit"], metadatas=[{"channel": "dev", "edited": True}])
+        return registry
+
+    monkeypatch.setattr(migration, "_sync_pass", edit_after_first_pass)
+    monkeypatch.setattr(reindex, "activate_collection", activate_after_late_writes)
+    migration._run(batch_size=2)
+
+    assert migration.state["status"] == "completed", migration.state
+    target = get_collection(load_registry()["active"])
+    records = target.get(include=["documents", "metadatas"])
+    by_id = dict(zip(records["ids"], zip(records["documents"], records["metadatas"])))
+    assert set(by_id) == {"edited", "recounted", "late-edit", "untouched"}
+    assert by_id["edited"][0] == "수정된 메시지"
+    assert by_id["recounted"][1]["duplicate_count"] == 3
+    assert by_id["late-edit"][1]["edited"] is True
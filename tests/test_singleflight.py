@@ -0,0 +1,90 @@
+import threading
+import time
+from app.core.singleflight import SINGLEFLIGHT_CALLS, SingleFlight
+from app.models.message import SearchQuery, SearchResult
+from app.services import search as search_module
+
+def _wait_coalesced(name: str, count: float, timeout: float = 5.0):
+    """count 개의 호출이 진행 중인 호출을 기다리기 시작할 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    while SINGLEFLIGHT_CALLS.value(flight=name, role="coalesced") < count:
+        assert time.monotonic() < deadline, "합쳐진 호출이 기다리지 않음"
+        time.sleep(0.01)
+
+def _run_concurrently(targets):
+    results = [None] * len(targets)
+
+    def run(i, target):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, target)) for i, target in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def _slow(release: threading.Event, calls: list, outcome):
+    def fn():
+        calls.append(1)
+        assert release.wait(5)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return fn
+
+def test_concurrent_calls_share_one_execution():
+    flight, release, calls = SingleFlight("test-share"), threading.Event(), []
+    fn = _slow(release, calls, {"answer": 42})
+    threads, results = _run_concurrently([lambda: flight.do("key", fn)] * 6)
+    _wait_coalesced("test-share", 5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert all(result[0] == {"answer": 42} for result in results)
+    assert sorted(shared for _, shared in results) == [False] + [True] * 5
+    # 완료된 결과는 보관하지 않음 - 끝난 뒤의 호출은 다시 실행
+    assert flight.do("key", fn) == ({"answer": 42}, False) and len(calls) == 2
+
+def test_error_is_shared_and_not_kept():
+    flight, release, calls = SingleFlight("test-error"), threading.Event(), []
+    threads, results = _run_concurrently([lambda: flight.do("key", _slow(release, calls, ValueError("실패")))] * 3)
+    _wait_coalesced("test-error", 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.do("key", lambda: "복구") == ("복구", False)
+
+def test_search_coalesces_equivalent_questions(offline_settings, monkeypatch):
+    monkeypatch.setattr(offline_settings, "search_coalescing_enabled", True)
+    release, calls = threading.Event(), []
+
+    def search(query):
+        calls.append(query.question)
+        assert release.wait(5)
+        return SearchResult(answer="재시작하세요", sources=[], query=query.question)
+
+    monkeypatch.setattr(search_module, "_search_messages", search)
+    before = SINGLEFLIGHT_CALLS.value(flight="search", role="coalesced")
+    questions = ["배포가 실패해요?", "  배포가  실패해요", "배포가 실패해요!!"]
+    threads, results = _run_concurrently(
+        [lambda q=q: search_module.search_messages(SearchQuery(question=q)) for q in questions]
+    )
+    _wait_coalesced("search", before + 2)
+    # 검색 조건이 다르면 합치지 않음
+    other = threading.Thread(target=lambda: search_module.search_messages(SearchQuery(question=questions[0], top_k=3)))
+    other.start()
+    release.set()
+    for thread in threads + [other]:
+        thread.join(5)
+
+    assert len(calls) == 2
+    assert all(result.answer == "재시작하세요" for result in results)
+    # 응답의 query 는 각 요청의 원문
+    assert [result.query for result in results] == questions
@@ -0,0 +1,40 @@
+import glob
+import json
+import os
+import pytest
+from app.services.slack_data import chunk_message_columns, chunk_messages, load_message_columns, parse_slack_export
+
+SAMPLE_FILES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sample_slack_data*.json")))
+
+@pytest.mark.parametrize("path", SAMPLE_FILES)
+def test_column_chunks_match_message_chunks(path):
+    # 파일 인덱싱(컬럼 캐시)과 실시간 동기화(SlackMessage)가 같은 청크/메타데이터를 만들어야 함
+    assert chunk_message_columns(load_message_columns(path)) == chunk_messages(parse_slack_export(path))
+
+def test_parquet_cache_round_trip(offline_settings, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    from app.services import slack_data
+    from app.services.embedding import hash_files
+
+    monkeypatch.setattr(offline_settings, "parsed_cache_enabled", True)
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps({"dev": [
+        {"user": "U1", "text": "배포 <@U2> 확인 부탁드려요 :rocket:", "ts": "1700000000.000100"},
+        {"text": "user 없는 메시지", "ts": "1700000001.000100", "thread_ts": "1700000000.000100"},
+        {"user": "U3", "text": "", "ts": "1700000002.000100"},
+    ], "ops": [{"user": "U1", "text": "점검 완료", "ts": "1700000003.000100"}]}, ensure_ascii=False), encoding="utf-8")
+
+    parsed = load_message_columns(str(path))
+    _, (digest,) = hash_files([str(path)])
+    assert digest == slack_data.file_digest(str(path))
+    assert os.path.exists(slack_data._cache_path(str(path), digest))
+
+    # 두 번째부터는 파싱 없이 캐시에서 같은 값(None 포함)을 읽음
+    def fail_parse(file_path):
+        raise AssertionError("캐시가 있는데 다시 파싱함")
+
+    monkeypatch.setattr(slack_data, "_parse_columns", fail_parse)
+    cached = load_message_columns(str(path), digest)
+    assert cached == parsed
+    assert cached["user"][1] is None and cached["thread_ts"][0] is None
+    assert cached["channel"] == ["dev", "dev", "ops"]
@@ -0,0 +1,131 @@
+import time
+import pytest
+from app.core.state_db import get_state_db
+from app.services.scheduler import SlackSyncScheduler
+from app.services.slack_realtime import SlackRealtime
+from benchmarks.fake_slack import FakeSlackServer, FakeWorkspace
+
+@pytest.fixture
+def fake_slack(offline_settings, monkeypatch):
+    workspace = FakeWorkspace(channels=2, messages=60, users=5, hours=2, thread_ratio=0.0, seed=1)
+    with FakeSlackServer(workspace) as server:
+        monkeypatch.setattr(offline_settings, "slack_api_base_url", server.base_url)
+        monkeypatch.setattr(offline_settings, "slack_bot_token", "xoxb-test")
+        monkeypatch.setattr(offline_settings, "slack_rate_limit_retries", 0)
+        monkeypatch.setattr(offline_settings, "dedup_enabled", False)
+        yield workspace, server
+
+def _scheduler() -> SlackSyncScheduler:
+    scheduler = SlackSyncScheduler()
+    scheduler.sync_hours_back = 3
+    assert scheduler._ensure_client()
+    scheduler._refresh_channels()
+    return scheduler
+
+def test_fetch_error_is_a_failed_run(fake_slack):
+    workspace, server = fake_slack
+    scheduler = _scheduler()
+    channel_id = sorted(scheduler.channels)[0]
+    assert scheduler.sync_channel(channel_id) is not None
+    state = dict(scheduler.channels[channel_id])
+    checkpoint = get_state_db().get_checkpoint(f"channel:{channel_id}")["data"]
+
+    # 재시도 없이 모든 호출이 429
+    workspace.add_messages(5)
+    server.rate_limit_ratio = 1.0
+    assert scheduler.sync_channel(channel_id) is None
+
+    failed = scheduler.channels[channel_id]
+    assert failed["consecutive_errors"] == 1
+    assert failed["last_success"] == state["last_success"]
+    assert failed["rate_per_hour"] == state["rate_per_hour"]
+    assert get_state_db().get_checkpoint(f"channel:{channel_id}")["data"]["last_success"] == checkpoint["last_success"]
+
+    # 복구 후 실패한 구간의 메시지를 다시 가져옴
+    server.rate_limit_ratio = 0.0
+    result = scheduler.sync_channel(channel_id)
+    assert result is not None
+    assert scheduler.channels[channel_id]["consecutive_errors"] == 0
+
+def test_sync_recent_messages_reports_fetch_errors(fake_slack):
+    workspace, server = fake_slack
+    slack = SlackRealtime()
+    channel_ids = [channel["id"] for channel in slack.get_channels()]
+    server.rate_limit_ratio = 1.0
+    result = slack.sync_recent_messages(hours_back=3, channels=channel_ids)
+
+    assert len(result["errors"]) == len(channel_ids)
+    assert result["channels_synced"] == 0
+    for channel_id in channel_ids:
+        assert get_state_db().get_checkpoint(f"channel:{channel_id}") is None
+
+def test_deletions_reconciled_in_pages_within_window(fake_slack, monkeypatch):
+    from app.core.database import get_collection
+    from app.services import slack_realtime
+    from app.services.llm_service import get_embeddings
+
+    workspace, server = fake_slack
+    monkeypatch.setattr(slack_realtime, "CHANGE_BATCH_SIZE", 7)
+    slack = SlackRealtime()
+    channel = slack.get_channels()[0]
+    collection = get_collection()
+    assert slack.sync_channel(channel, hours_back=3, collection=collection)["added"] > 7
+
+    # 조회 기간 밖의 예전 동기화 문서는 대사 대상이 아님
+    old_ts = "1500000000.000100"
+    collection.upsert(ids=[slack_realtime.slack_message_id(channel["id"], old_ts)],
+                      embeddings=get_embeddings(["예전 메시지"]), documents=["예전 메시지"],
+                      metadatas=[{"source": "slack_api", "channel_id": channel["id"], "channel": channel["name"],
+                                  "timestamp": old_ts, "ts_epoch": float(old_ts)}])
+    with workspace.lock:
+        del workspace.roots[channel["id"]][:10]
+    result = slack.sync_channel(channel, hours_back=3, collection=collection)
+
+    assert result["deleted"] == 10
+    assert result["unchanged"] == result["messages"]
+    ids = collection.get(include=[])["ids"]
+    assert len(ids) == result["messages"] + 1
+    assert slack_realtime.slack_message_id(channel["id"], old_ts) in ids
+
+def test_sync_fetches_whole_window_beyond_page_limit(offline_settings, monkeypatch):
+    workspace = FakeWorkspace(channels=1, messages=1100, users=5, hours=2, thread_ratio=0.0, seed=2)
+    with FakeSlackServer(workspace) as server:
+        monkeypatch.setattr(offline_settings, "slack_api_base_url", server.base_url)
+        monkeypatch.setattr(offline_settings, "slack_bot_token", "xoxb-test")
+        monkeypatch.setattr(offline_settings, "dedup_enabled", False)
+        slack = SlackRealtime()
+        channel = slack.get_channels()[0]
+        result = slack.sync_channel(channel, hours_back=3)
+
+    # 예전에는 최신 1000개에서 멈추고 last_success 를 갱신해 오래된 100개가 영영 빠졌음
+    assert result["messages"] == result["added"] == 1100
+
+def test_deleted_folded_message_is_reconciled(fake_slack, offline_settings, monkeypatch):
+    from app.core.database import get_collection
+    from app.services.dedup import get_dedup_index
+    from app.services.slack_realtime import slack_message_id
+
+    monkeypatch.setattr(offline_settings, "dedup_enabled", True)
+    workspace, server = fake_slack
+    slack = SlackRealtime()
+    channel = slack.get_channels()[0]
+    collection = get_collection()
+    alert = "[alert] api-server 배포 실패: health check timeout after 30s on prod-kr-1 (build #1234)"
+    now = int(time.time())
+    canonical = {"type": "message", "user": workspace.users[0]["id"], "text": alert, "ts": f"{now - 60}.900001"}
+    duplicate = {"type": "message", "user": workspace.users[0]["id"], "text": alert + "5", "ts": f"{now - 30}.900002"}
+    with workspace.lock:
+        workspace.roots[channel["id"]].extend([canonical, duplicate])
+    slack.sync_channel(channel, hours_back=3, collection=collection)
+
+    canonical_id = slack_message_id(channel["id"], canonical["ts"])
+    duplicate_id = slack_message_id(channel["id"], duplicate["ts"])
+    assert get_dedup_index().get_members(collection.name, [duplicate_id])[duplicate_id]["canonical_id"] == canonical_id
+    assert collection.get(ids=[canonical_id])["metadatas"][0]["duplicate_count"] == 2
+
+    # 접힌 메시지가 Slack 에서 삭제되면 인덱스에서 지우고 대표 문서의 중복 수를 갱신
+    with workspace.lock:
+        workspace.roots[channel["id"]].remove(duplicate)
+    assert slack.sync_channel(channel, hours_back=3, collection=collection)["deleted"] == 1
+    assert get_dedup_index().get_members(collection.name, [duplicate_id]) == {}
+    assert collection.get(ids=[canonical_id])["metadatas"][0]["duplicate_count"] == 1
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from app.core.collections import get_active_collection, load_registry, register_collection
+from app.core.database import get_collection
+from app.services.llm_service import get_embeddings
+from app.services.snapshot import VECTORS_FILE, SnapshotError, export_snapshot, import_snapshot
+
+@pytest.fixture
+def indexed(offline_settings):
+    collection = get_collection()
+    documents = [f"배포 체크리스트 {i}번 항목" for i in range(10)]
+    ids = [f"doc-{i}" for i in range(10)]
+    metadatas = [{"channel": "dev", "timestamp": f"1700000{i:03d}.000100", "index": i} for i in range(10)]
+    collection.upsert(ids=ids, embeddings=get_embeddings(documents), documents=documents, metadatas=metadatas)
+    return collection
+
+def _contents(collection):
+    page = collection.get(include=["documents", "metadatas", "embeddings"])
+    order = np.argsort(page["ids"])
+    return ([page["ids"][i] for i in order], [page["documents"][i] for i in order],
+            [page["metadatas"][i] for i in order], np.asarray(page["embeddings"], dtype=np.float32)[order])
+
+def test_snapshot_round_trip(indexed, tmp_path):
+    manifest = export_snapshot(str(tmp_path / "snap"), page_size=3)
+    assert manifest["count"] == 10 and manifest["collection"] == get_active_collection()["name"]
+
+    result = import_snapshot(str(tmp_path / "snap"), collection_name="restored", batch_size=4)
+    assert result["restored"] == 10
+    assert load_registry()["collections"]["restored"]["status"] == "restored"
+
+    original, restored = _contents(indexed), _contents(get_collection("restored"))
+    assert original[:3] == restored[:3]
+    np.testing.assert_array_equal(original[3], restored[3])
+
+def test_corrupted_or_mismatched_snapshot_is_rejected(indexed, tmp_path):
+    path = tmp_path / "snap"
+    manifest = export_snapshot(str(path))
+
+    register_collection("other-dim", {"provider": "hash", "model": "hash-8", "dim": manifest["dim"] + 1})
+    with pytest.raises(SnapshotError):
+        import_snapshot(str(path), collection_name="other-dim")
+
+    vectors = path / VECTORS_FILE
+    data = bytearray(vectors.read_bytes())
+    data[0] ^= 0xFF
+    vectors.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError):
+        import_snapshot(str(path), collection_name="restored")
+    assert "restored" not in load_registry()["collections"]
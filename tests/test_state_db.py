@@ -0,0 +1,52 @@
+import sqlite3
+import pytest
+from app.core import state_db
+from app.core.index_stats import IndexStats
+from app.core.state_db import StateDB
+from app.services.dedup import NearDuplicateIndex
+
+@pytest.fixture
+def opened(monkeypatch):
+    """state_db.connect 로 연 연결 목록"""
+    connections = []
+    connect = sqlite3.connect
+
+    def tracking(*args, **kwargs):
+        connections.append(connect(*args, **kwargs))
+        return connections[-1]
+
+    monkeypatch.setattr(state_db.sqlite3, "connect", tracking)
+    return connections
+
+def _closed(conn) -> bool:
+    try:
+        conn.execute("SELECT 1")
+        return False
+    except sqlite3.ProgrammingError:
+        return True
+
+def test_connections_are_closed(tmp_path, opened):
+    state = StateDB(str(tmp_path / "state.sqlite3"))
+    state.save_checkpoint("job", cursor=3, data={"total": 10})
+    assert state.get_checkpoint("job")["cursor"] == "3"
+
+    dedup = NearDuplicateIndex(str(tmp_path / "dedup.sqlite3"))
+    dedup.collapse("c", ["a"], ["충분히 긴 메시지입니다. 유사 메시지 인덱스 연결 테스트"], ["dev 1"])
+    assert dedup.stats("c")["canonical"] == 1
+
+    stats = IndexStats(str(tmp_path / "stats.sqlite3"))
+    stats.record_upsert("c", ["a"], [{"channel": "dev"}])
+    assert stats.summary("c")["documents"] == 1
+    stats.clear("c")
+
+    assert opened and all(_closed(conn) for conn in opened)
+
+def test_failed_transaction_rolls_back(tmp_path, opened):
+    stats = IndexStats(str(tmp_path / "stats.sqlite3"))
+    stats.record_upsert("c", ["a"], [{"channel": "dev"}])
+    with pytest.raises(RuntimeError):
+        with stats._connect() as conn:
+            conn.execute("DELETE FROM counters")
+            raise RuntimeError("중간 실패")
+    assert stats.summary("c")["documents"] == 1
+    assert all(_closed(conn) for conn in opened)
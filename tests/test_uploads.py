@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import zipfile
+import pytest
+from app.services.uploads import MIN_PART_SIZE, UploadError, UploadManager
+
+def _export(count: int = 1500) -> bytes:
+    return json.dumps({"dev": [
+        {"user": "alice", "text": f"배포 체크리스트 {i}번 항목 확인했습니다", "ts": f"1700{i:06d}.000100"}
+        for i in range(count)
+    ]}, ensure_ascii=False).encode("utf-8")
+
+def _send(manager: UploadManager, upload_id: str, part_no: int, data: bytes, fail_after: int = None):
+    async def body():
+        for start in range(0, len(data), 4096):
+            if fail_after is not None and start >= fail_after:
+                raise ConnectionResetError("클라이언트 연결 끊김")
+            yield data[start:start + 4096]
+
+    return asyncio.run(manager.write_part(upload_id, part_no, body(), hashlib.sha256(data).hexdigest()))
+
+def _parts(data: bytes):
+    return [data[start:start + MIN_PART_SIZE] for start in range(0, len(data), MIN_PART_SIZE)]
+
+def test_interrupted_part_is_resent_and_indexed(offline_settings, monkeypatch):
+    monkeypatch.setattr(offline_settings, "dedup_enabled", False)
+    manager = UploadManager()
+    data = _export()
+    upload = manager.init("export.json", len(data), MIN_PART_SIZE, hashlib.sha256(data).hexdigest())
+    parts = _parts(data)
+    assert upload["total_parts"] == len(parts) >= 3
+
+    for part_no, part in enumerate(parts):
+        _send(manager, upload["upload_id"], part_no, part)
+    # 이미 받은 파트를 다시 보내다 끊기면 그 파트는 받지 않은 것으로 돌아감
+    with pytest.raises(ConnectionResetError):
+        _send(manager, upload["upload_id"], 1, parts[1], fail_after=8192)
+    status = manager.get_status(upload["upload_id"])
+    assert status["missing_parts"] == [1] and status["next_part"] == 1
+    with pytest.raises(UploadError):
+        manager.complete(upload["upload_id"])
+    assert manager.get_status(upload["upload_id"])["state"]["status"] == "uploading"
+
+    _send(manager, upload["upload_id"], status["next_part"], parts[1])
+    manager.complete(upload["upload_id"])
+    deadline = time.time() + 30
+    while manager.get_status(upload["upload_id"])["state"]["status"] in ("verifying", "indexing"):
+        assert time.time() < deadline
+        time.sleep(0.05)
+    state = manager.get_status(upload["upload_id"])["state"]
+    assert state["status"] == "indexed" and state["chunk_count"] > 0 and state["failed"] == 0
+
+def test_concurrent_complete_starts_indexing_once(offline_settings, monkeypatch):
+    manager = UploadManager()
+    data = _export(10)
+    upload = manager.init("export.json", len(data), MIN_PART_SIZE)
+    _send(manager, upload["upload_id"], 0, data)
+    started = []
+    monkeypatch.setattr(manager, "_index", lambda *args: started.append(args))
+    # 상태 확인과 인덱싱 시작 사이에 다른 complete 가 끼어들 시간을 줌
+    get_status = manager.get_status
+
+    def slow_status(upload_id):
+        status = get_status(upload_id)
+        time.sleep(0.05)
+        return status
+
+    monkeypatch.setattr(manager, "get_status", slow_status)
+
+    threads = [threading.Thread(target=manager.complete, args=(upload["upload_id"],)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    time.sleep(0.1)
+    assert len(started) == 1
+    with pytest.raises(UploadError):
+        _send(manager, upload["upload_id"], 0, data)
+
+def test_zip_extraction_is_bounded_by_upload_max_bytes(offline_settings, monkeypatch, tmp_path):
+    archive = tmp_path / "bomb.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("dev/2024-01-01.json", b"[" + b" " * (4 * 1024 * 1024) + b"]")
+    assert archive.stat().st_size < 64 * 1024
+
+    monkeypatch.setattr(offline_settings, "upload_max_bytes", 1024 * 1024)
+    target = tmp_path / "out"
+    target.mkdir()
+    with pytest.raises(UploadError):
+        UploadManager()._extract_json(str(archive), str(target))
+
+    monkeypatch.setattr(offline_settings, "upload_max_bytes", 8 * 1024 * 1024)
+    files = UploadManager()._extract_json(str(archive), str(target))
+    assert len(files) == 1
@@ -0,0 +1,125 @@
+import os
+import numpy as np
+import pytest
+from app.core import quantized_store
+from app.core.quantized_store import QuantizedCollection
+
+def _vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+def _ids(start: int, count: int):
+    return [f"doc-{i}" for i in range(start, start + count)]
+
+def test_quantized_upsert_query_delete(tmp_path):
+    collection = QuantizedCollection("test", str(tmp_path / "store"))
+    vectors = _vectors(50)
+    collection.add(ids=_ids(0, 50), embeddings=vectors,
+                   metadatas=[{"channel": "dev" if i % 2 else "ops"} for i in range(50)],
+                   documents=[f"문서 {i}" for i in range(50)])
+
+    result = collection.query(vectors[7:8], n_results=3)
+    assert result["ids"][0][0] == "doc-7"
+    filtered = collection.query(vectors[7:8], n_results=50, where={"channel": "ops"})
+    assert "doc-7" not in filtered["ids"][0] and len(filtered["ids"][0]) == 25
+
+    collection.upsert(ids=["doc-7"], embeddings=vectors[8:9], documents=["교체"])
+    assert collection.get(ids=["doc-7"])["documents"] == ["교체"]
+    collection.delete(ids=["doc-8"])
+    assert collection.count() == 49
+    assert "doc-8" not in collection.query(vectors[8:9], n_results=5)["ids"][0]
+
+    # 다른 인스턴스(= 다른 프로세스)에서 열어도 같은 상태
+    reopened = QuantizedCollection("test", str(tmp_path / "store"))
+    assert reopened.count() == 49
+    assert reopened.query(vectors[8:9], n_results=1)["ids"][0] == ["doc-7"]
+
+def test_quantized_rejects_where_document(tmp_path):
+    collection = QuantizedCollection("test", str(tmp_path / "store"))
+    collection.add(ids=_ids(0, 3), embeddings=_vectors(3))
+    with pytest.raises(ValueError):
+        collection.query(_vectors(1), n_results=1, where_document={"$contains": "배포"})
+
+def test_quantized_repeated_upserts_compact_automatically(tmp_path, monkeypatch):
+    monkeypatch.setattr(quantized_store, "COMPACT_MIN_DEAD_ROWS", 10)
+    directory = str(tmp_path / "store")
+    collection = QuantizedCollection("test", directory)
+    vectors = _vectors(20)
+    for _ in range(10):
+        collection.upsert(ids=_ids(0, 20), embeddings=vectors)
+
+    # 같은 id 를 계속 upsert 해도 파일이 죽은 행으로 무한히 커지지 않음
+    assert collection.count() == 20
+    assert collection._rows < 20 * 3
+    assert os.path.getsize(collection._vectors_path) == collection._rows * 16 * 4
+    assert collection.query(vectors[3:4], n_results=1)["ids"][0] == ["doc-3"]
+
+    # 이전 세대 파일은 남지 않고, 다시 열어도 같은 세대를 읽음
+    data_files = [name for name in os.listdir(directory) if name.startswith(("vectors.", "codes.", "scales."))]
+    assert sorted(data_files) == sorted(os.path.basename(path) for path in collection._paths(collection._generation))
+    reopened = QuantizedCollection("test", directory)
+    assert reopened.query(vectors[3:4], n_results=1)["ids"][0] == ["doc-3"]
+
+def test_quantized_failed_compact_keeps_previous_files(tmp_path, monkeypatch):
+    collection = QuantizedCollection("test", str(tmp_path / "store"))
+    vectors = _vectors(30)
+    collection.add(ids=_ids(0, 30), embeddings=vectors)
+    collection.delete(ids=_ids(0, 10))
+
+    def fail_write(path, array):
+        raise OSError("디스크 가득 참")
+
+    monkeypatch.setattr(quantized_store, "_write_file", fail_write)
+    with pytest.raises(OSError):
+        collection.compact()
+
+    # compact 가 실패해도 기존 파일/레코드로 검색이 그대로 됨
+    assert collection.count() == 20
+    assert collection.query(vectors[15:16], n_results=1)["ids"][0] == ["doc-15"]
+    reopened = QuantizedCollection("test", str(tmp_path / "store"))
+    assert reopened.query(vectors[15:16], n_results=1)["ids"][0] == ["doc-15"]
+
+def test_hnsw_compact_and_incremental_writes(tmp_path, monkeypatch):
+    pytest.importorskip("hnswlib")
+    from app.core.hnsw_store import HnswCollection
+
+    monkeypatch.setattr(quantized_store, "COMPACT_MIN_DEAD_ROWS", 10)
+    directory = str(tmp_path / "store")
+    collection = HnswCollection("test", directory, M=8, construction_ef=50)
+    vectors = _vectors(40)
+    for _ in range(6):
+        collection.upsert(ids=_ids(0, 40), embeddings=vectors)
+    collection.delete(ids=["doc-0"])
+
+    assert collection.count() == 39
+    assert collection._rows < 40 * 3
+    assert collection.query(vectors[5:6], n_results=1)["ids"][0] == ["doc-5"]
+    assert "doc-0" not in collection.query(vectors[0:1], n_results=5)["ids"][0]
+    with pytest.raises(ValueError):
+        collection.query(vectors[0:1], n_results=1, where_document={"$contains": "배포"})
+
+    reopened = HnswCollection("test", directory)
+    assert reopened.count() == 39
+    assert reopened.query(vectors[5:6], n_results=1)["ids"][0] == ["doc-5"]
+
+def test_hnsw_failed_compact_keeps_previous_files(tmp_path, monkeypatch):
+    pytest.importorskip("hnswlib")
+    from app.core import hnsw_store
+    from app.core.hnsw_store import HnswCollection
+
+    directory = str(tmp_path / "store")
+    collection = HnswCollection("test", directory, M=8, construction_ef=50)
+    vectors = _vectors(30)
+    collection.add(ids=_ids(0, 30), embeddings=vectors)
+    collection.delete(ids=_ids(0, 10))
+
+    def fail_write(path, array):
+        raise OSError("디스크 가득 참")
+
+    monkeypatch.setattr(hnsw_store, "_write_file", fail_write)
+    with pytest.raises(OSError):
+        collection.compact()
+
+    assert collection.count() == 20
+    assert collection.query(vectors[15:16], n_results=1)["ids"][0] == ["doc-15"]
+    reopened = HnswCollection("test", directory)
+    assert reopened.query(vectors[15:16], n_results=1)["ids"][0] == ["doc-15"]